@@ -0,0 +1,50 @@
+"""Map tile API endpoints for clustered property markers"""
+
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Path, status
+
+from app.schemas.property import MapTileResponse
+from app.services.map_clusters import MAX_TILE_ZOOM, cluster_engine
+
+router = APIRouter()
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}", response_model=MapTileResponse, status_code=status.HTTP_200_OK
+)
+async def get_map_tile(
+    z: int = Path(..., ge=0, le=MAX_TILE_ZOOM),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+) -> Any:
+    """
+    Get clustered property markers for one z/x/y map tile
+
+    Each feature is `[longitude, latitude, count, id]`. Single listings carry
+    the property id; clusters carry a `z/cx/cy` cell id and should be
+    expanded by zooming in. Answers 503 until the worker has loaded the map
+    after starting.
+    """
+    if x >= 1 << z or y >= 1 << z:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Tile coordinates are outside the zoom level",
+        )
+
+    # Loaded and kept current in the background; requests only read
+    if not cluster_engine.loaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Map is loading, try again shortly",
+            headers={"Retry-After": "5"},
+        )
+
+    try:
+        return cluster_engine.get_tile(z, x, y)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get map tile: {str(e)}",
+        )
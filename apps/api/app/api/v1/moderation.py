@@ -0,0 +1,105 @@
+"""Moderation queue API endpoints for listing reports"""
+
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_current_user
+from app.models.base import get_db
+from app.schemas.moderation import (
+    ModerationClaimResponse,
+    ModerationDecisionRequest,
+    ModerationDecisionResponse,
+)
+from app.schemas.user import UserResponse
+from app.services.moderation import MAX_CLAIM_BATCH, moderation_service
+
+router = APIRouter()
+
+
+def _require_moderator(user: UserResponse) -> None:
+    if user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can moderate reports",
+        )
+
+
+@router.post(
+    "/claim", response_model=ModerationClaimResponse, status_code=status.HTTP_200_OK
+)
+async def claim_cases(
+    limit: int = Query(10, ge=1, le=MAX_CLAIM_BATCH),
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Claim the next reported listings to review, most severe first
+
+    Claimed cases are leased to you for 15 minutes and no other moderator
+    gets them meanwhile. An empty list means the queue is clear.
+    """
+    _require_moderator(current_user)
+    try:
+        items = moderation_service.claim(db, current_user.id, limit)
+        return ModerationClaimResponse(items=items, count=len(items))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to claim cases: {str(e)}",
+        )
+
+
+@router.post(
+    "/cases/{property_id}/decision",
+    response_model=ModerationDecisionResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def decide_case(
+    property_id: uuid.UUID,
+    decision: ModerationDecisionRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Close a claimed case: dismiss the reports or remove the listing
+
+    Dismissing restores a listing the report threshold took down.
+    """
+    _require_moderator(current_user)
+    try:
+        return ModerationDecisionResponse(
+            **moderation_service.decide(
+                db, property_id, current_user.id, decision.action
+            )
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to decide case: {str(e)}",
+        )
+
+
+@router.post("/cases/{property_id}/release", status_code=status.HTTP_204_NO_CONTENT)
+async def release_case(
+    property_id: uuid.UUID,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> None:
+    """Hand a claimed case back to the queue undecided"""
+    _require_moderator(current_user)
+    if not moderation_service.release(db, property_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="You do not hold a claim on this case",
+        )
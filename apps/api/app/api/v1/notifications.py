@@ -0,0 +1,194 @@
+"""Notification inbox API endpoints"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_current_user
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+)
+from app.models.base import get_db
+from app.schemas.notification import (
+    BroadcastCreate,
+    MarkAllReadRequest,
+    MarkReadRequest,
+    MarkReadResponse,
+    NotificationListResponse,
+    NotificationResponse,
+    UnreadCountResponse,
+)
+from app.schemas.user import UserResponse
+from app.services.notifications import notification_service
+
+router = APIRouter()
+
+
+@router.get("", response_model=NotificationListResponse, status_code=status.HTTP_200_OK)
+async def list_notifications(
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    unread_only: bool = Query(False),
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get the current user's notifications, newest first
+
+    Pages are keyset-paginated on (created_at, id); pass the returned
+    `next_cursor` to fetch the next page. Announcements to the user's role
+    are mixed in by date. Expired notifications are left out.
+    """
+    after = (
+        decode_cursor(cursor, (datetime.fromisoformat, uuid.UUID)) if cursor else None
+    )
+    try:
+        items, has_more = notification_service.inbox(
+            db,
+            current_user.id,
+            limit,
+            after=after,
+            unread_only=unread_only,
+            role=current_user.role,
+        )
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+        return NotificationListResponse(
+            items=items,
+            count=len(items),
+            has_more=has_more,
+            next_cursor=next_cursor,
+            unread_count=notification_service.unread_count(
+                db, current_user.id, current_user.role
+            ),
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get notifications: {str(e)}",
+        )
+
+
+@router.get(
+    "/unread-count", response_model=UnreadCountResponse, status_code=status.HTTP_200_OK
+)
+async def get_unread_count(
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """Get the current user's unread notification count (a single-row read)"""
+    return UnreadCountResponse(
+        unread_count=notification_service.unread_count(
+            db, current_user.id, current_user.role
+        )
+    )
+
+
+@router.post("/read", response_model=MarkReadResponse, status_code=status.HTTP_200_OK)
+async def mark_notifications_read(
+    request: MarkReadRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """Mark notifications read; already-read and unknown ids are ignored"""
+    try:
+        updated = notification_service.mark_read(
+            db, current_user.id, request.ids, current_user.role
+        )
+        return MarkReadResponse(
+            updated=updated,
+            unread_count=notification_service.unread_count(
+                db, current_user.id, current_user.role
+            ),
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to mark notifications read: {str(e)}",
+        )
+
+
+@router.post(
+    "/read-all", response_model=MarkReadResponse, status_code=status.HTTP_200_OK
+)
+async def mark_all_notifications_read(
+    request: Optional[MarkAllReadRequest] = None,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Mark every notification read in one statement
+
+    Pass `read_through`, the `created_at` of the newest item the inbox
+    showed, so anything that arrived after it stays unread.
+    """
+    try:
+        updated = notification_service.mark_all_read(
+            db,
+            current_user.id,
+            current_user.role,
+            request.read_through if request else None,
+        )
+        return MarkReadResponse(
+            updated=updated,
+            unread_count=notification_service.unread_count(
+                db, current_user.id, current_user.role
+            ),
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to mark notifications read: {str(e)}",
+        )
+
+
+@router.post(
+    "/broadcasts",
+    response_model=NotificationResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_broadcast(
+    request: BroadcastCreate,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Send a system announcement to every user in an audience (admins only)
+
+    The announcement is stored once and shown in each inbox when it is read,
+    however many users it reaches.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can send announcements",
+        )
+    try:
+        return notification_service.broadcast(
+            db,
+            request.title,
+            request.message,
+            audience=request.audience,
+            data=request.data,
+            action_url=request.action_url,
+            expires_at=request.expires_at,
+            created_by=current_user.id,
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to send announcement: {str(e)}",
+        )
@@ -0,0 +1,690 @@
+"""Property listing API endpoints"""
+
+import uuid
+from typing import Any, List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.auth import get_current_user, get_optional_user_id
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.response_cache import to_response
+from app.models.base import get_db
+from app.models.property import Property
+from app.schemas.property import (
+    MediaAttachRequest,
+    MediaAttachResponse,
+    MediaUploadRequest,
+    MediaUploadResponse,
+    EngagementResponse,
+    EngagementStatesResponse,
+    NearbyPropertiesResponse,
+    PropertyDetailResponse,
+    PropertyFeedResponse,
+    PropertyImportResponse,
+    PropertySearchResponse,
+    PropertyViewResponse,
+    ResumableUploadRequest,
+    ResumableUploadResponse,
+    UploadPartUrl,
+    UploadPartUrlsRequest,
+    UploadPartUrlsResponse,
+)
+from app.schemas.moderation import PropertyReportRequest, PropertyReportResponse
+from app.schemas.user import UserResponse
+from app.services.engagement import MAX_STATE_LOOKUP, engagement_service
+from app.services.facets import facet_service
+from app.services.feed_cache import detail_scope, feed_cache, feed_key, feed_scope
+from app.services.listing_import import detect_format, listing_import_service
+from app.services.media import UPLOAD_URL_TTL_SECONDS, media_service
+from app.services.moderation import moderation_service
+from app.services.resumable_uploads import (
+    DEFAULT_PART_SIZE,
+    resumable_upload_service,
+)
+from app.services.property_feed import (
+    FEED_INCLUDES,
+    FEED_SORTS,
+    property_feed_service,
+)
+from app.services.search import MAX_SEARCH_RESULTS, property_search_service
+from app.services.spatial import MAX_RADIUS_KM, spatial_search_service
+from app.services.view_ingestion import view_ingestion_service
+
+router = APIRouter()
+
+
+@router.get("", response_model=PropertyFeedResponse, status_code=status.HTTP_200_OK)
+async def list_properties(
+    state: Optional[str] = Query(None, description="State, e.g. Lagos"),
+    lga: Optional[str] = Query(None, description="Local government area"),
+    property_type: Optional[str] = Query(None, alias="type"),
+    min_bedrooms: Optional[int] = Query(None, ge=0),
+    max_bedrooms: Optional[int] = Query(None, ge=0),
+    min_price: Optional[int] = Query(None, ge=0, description="Minimum price in kobo"),
+    max_price: Optional[int] = Query(None, ge=0, description="Maximum price in kobo"),
+    sort: str = Query("newest", description="newest, price_asc, price_desc or ranked"),
+    include: List[str] = Query(
+        [], description="Extra fields to load: description, media"
+    ),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    facets: bool = Query(
+        False, description="Also return filter facet counts for the state"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get a page of active property listings
+
+    Uses keyset (cursor) pagination: pass the returned `next_cursor` to get
+    the next page. Description and full media lists are only loaded when
+    requested through `include`. With `facets=true` the response also carries
+    counts per property type, bedroom count, price band and LGA.
+
+    Pages are cached and carry a strong ETag; send it back in
+    `If-None-Match` to get an empty 304 when nothing changed.
+    """
+    if sort not in FEED_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort must be one of: {', '.join(FEED_SORTS)}",
+        )
+    unknown = set(include) - set(FEED_INCLUDES)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"include accepts only: {', '.join(FEED_INCLUDES)}",
+        )
+
+    filters = dict(
+        state=state,
+        lga=lga,
+        property_type=property_type,
+        min_bedrooms=min_bedrooms,
+        max_bedrooms=max_bedrooms,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    params = dict(limit=limit, cursor=cursor, sort=sort, include=sorted(include))
+
+    def build() -> bytes:
+        return property_feed_service.get_page_json(
+            db,
+            facets=facet_service.get_facets(db, **filters) if facets else None,
+            **params,
+            **filters,
+        )
+
+    try:
+        cached = feed_cache.get_or_build(
+            feed_scope(state), feed_key(facets=facets, **params, **filters), build
+        )
+        return to_response(cached, if_none_match)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get properties: {str(e)}",
+        )
+
+
+@router.get(
+    "/nearby", response_model=NearbyPropertiesResponse, status_code=status.HTTP_200_OK
+)
+async def nearby_properties(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the search centre"),
+    lng: float = Query(
+        ..., ge=-180, le=180, description="Longitude of the search centre"
+    ),
+    radius_km: Optional[float] = Query(
+        None,
+        gt=0,
+        le=MAX_RADIUS_KM,
+        description="Search radius; omit to get the nearest listings",
+    ),
+    property_type: Optional[str] = Query(None, alias="type"),
+    min_bedrooms: Optional[int] = Query(None, ge=0),
+    max_bedrooms: Optional[int] = Query(None, ge=0),
+    min_price: Optional[int] = Query(None, ge=0, description="Minimum price in kobo"),
+    max_price: Optional[int] = Query(None, ge=0, description="Maximum price in kobo"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get active listings near a point, nearest first
+
+    With `radius_km`, returns up to `limit` listings inside that radius.
+    Without it, returns the `limit` nearest listings (up to 50km away).
+    `truncated` is set when the area was too dense to consider every listing;
+    the nearest ones are still returned.
+    """
+    filters = dict(
+        property_type=property_type,
+        min_bedrooms=min_bedrooms,
+        max_bedrooms=max_bedrooms,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    try:
+        if radius_km is not None:
+            items, truncated = spatial_search_service.search_radius(
+                db, lat, lng, radius_km, limit, **filters
+            )
+        else:
+            items, truncated = spatial_search_service.nearest(
+                db, lat, lng, limit, **filters
+            )
+        return NearbyPropertiesResponse(
+            items=items, count=len(items), truncated=truncated
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search nearby properties: {str(e)}",
+        )
+
+
+@router.get(
+    "/search", response_model=PropertySearchResponse, status_code=status.HTTP_200_OK
+)
+async def search_properties(
+    q: str = Query(
+        ..., min_length=2, max_length=200, description="Free text, e.g. duplex lekki"
+    ),
+    state: Optional[str] = Query(None, description="State, e.g. Lagos"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_RESULTS),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Search active listings by title, area, address and description
+
+    Results are ranked by text relevance blended with listing recency and
+    7-day views, and tolerate small misspellings. Each item carries a
+    highlighted snippet of the matching text.
+    """
+    try:
+        items = property_search_service.search(
+            db, q, limit=limit, offset=offset, state=state
+        )
+        return PropertySearchResponse(items=items, count=len(items), offset=offset)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search properties: {str(e)}",
+        )
+
+
+@router.get(
+    "/engagement",
+    response_model=EngagementStatesResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_engagement_states(
+    ids: List[uuid.UUID] = Query(
+        ..., description="Listing ids, e.g. every card on a feed page"
+    ),
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Whether the current user flicked and clipped each listing
+
+    One query for a whole feed page. Kept apart from the feed itself, which
+    is cached and shared by every user.
+    """
+    if len(ids) > MAX_STATE_LOOKUP:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_STATE_LOOKUP} ids per request",
+        )
+    try:
+        return EngagementStatesResponse(
+            items=engagement_service.engagement_states(db, current_user.id, ids)
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get engagement: {str(e)}",
+        )
+
+
+@router.post(
+    "/import",
+    response_model=PropertyImportResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def import_properties(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON"),
+    format: Optional[str] = Query(
+        None, description="csv or ndjson; defaults from the file extension"
+    ),
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Bulk import listings for the authenticated agent
+
+    Columns/keys: title, property_type, price_monthly (kobo), state and lga
+    are required; description, bedrooms, bathrooms, address, latitude,
+    longitude, media_urls ("|"-separated in CSV) and expires_at are
+    optional. Valid rows are inserted in batches; rejected rows are listed
+    by row number with the reasons.
+    """
+    if current_user.role != "agent":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only agents can import listings",
+        )
+
+    try:
+        fmt = detect_format(file.filename, format)
+        # Parsing and inserting are blocking; keep them off the event loop
+        result = await run_in_threadpool(
+            listing_import_service.import_listings,
+            db,
+            current_user.id,
+            file.file,
+            fmt,
+        )
+        return PropertyImportResponse(**result)
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import properties: {str(e)}",
+        )
+
+
+@router.get(
+    "/{property_id}",
+    response_model=PropertyDetailResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_property(
+    property_id: uuid.UUID,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get a single property listing with all of its fields
+
+    Supports `If-None-Match` with the returned ETag.
+    """
+
+    def build() -> bytes:
+        detail = property_feed_service.get_detail(property_id, db)
+        if detail is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Property not found"
+            )
+        return PropertyDetailResponse(**detail).model_dump_json().encode("utf-8")
+
+    cached = feed_cache.get_or_build(detail_scope(property_id), "detail", build)
+    return to_response(cached, if_none_match)
+
+
+def _require_owner(db: Session, property_id: uuid.UUID, user: UserResponse) -> None:
+    """404 for unknown listings, 403 unless the user is the listing's agent"""
+    agent_id = db.query(Property.agent_id).filter(Property.id == property_id).scalar()
+    if agent_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Property not found"
+        )
+    if user.role != "agent" or agent_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the listing's agent can manage its media",
+        )
+
+
+@router.post(
+    "/{property_id}/media/uploads",
+    response_model=MediaUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_media_upload(
+    property_id: uuid.UUID,
+    upload: MediaUploadRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get presigned URLs to upload a photo or video straight to storage
+
+    Upload with either the PUT URL (sending `put_headers`) or a multipart
+    form POST to `post_url` with `post_fields` followed by the file, then
+    attach the returned key with `POST /{property_id}/media`.
+    """
+    _require_owner(db, property_id, current_user)
+    try:
+        return MediaUploadResponse(
+            **media_service.create_upload(property_id, upload.content_type, upload.size)
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create upload: {str(e)}",
+        )
+
+
+@router.post(
+    "/{property_id}/media",
+    response_model=MediaAttachResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def attach_media(
+    property_id: uuid.UUID,
+    attach: MediaAttachRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Attach uploaded files to a listing, after checking they are in storage
+
+    Keys already attached are ignored, so the call can be retried.
+    """
+    _require_owner(db, property_id, current_user)
+    try:
+        media = media_service.attach(db, property_id, attach.keys)
+        return MediaAttachResponse(media_urls=media_service.resolve_urls(media))
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to attach media: {str(e)}",
+        )
+
+
+def _set_engagement(
+    db: Session, kind: str, property_id: uuid.UUID, user_id: uuid.UUID, active: bool
+) -> EngagementResponse:
+    try:
+        return EngagementResponse(
+            **engagement_service.set_engagement(db, kind, property_id, user_id, active)
+        )
+
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update {kind}: {str(e)}",
+        )
+
+
+@router.put(
+    "/{property_id}/flick",
+    response_model=EngagementResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def flick_property(
+    property_id: uuid.UUID,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """Flick (like) a listing; flicking it again changes nothing"""
+    return _set_engagement(db, "flick", property_id, current_user.id, True)
+
+
+@router.delete(
+    "/{property_id}/flick",
+    response_model=EngagementResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def unflick_property(
+    property_id: uuid.UUID,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """Undo a flick; undoing a missing flick changes nothing"""
+    return _set_engagement(db, "flick", property_id, current_user.id, False)
+
+
+@router.put(
+    "/{property_id}/clip",
+    response_model=EngagementResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def clip_property(
+    property_id: uuid.UUID,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """Clip (save) a listing; clipping it again changes nothing"""
+    return _set_engagement(db, "clip", property_id, current_user.id, True)
+
+
+@router.delete(
+    "/{property_id}/clip",
+    response_model=EngagementResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def unclip_property(
+    property_id: uuid.UUID,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """Remove a clip; removing a missing clip changes nothing"""
+    return _set_engagement(db, "clip", property_id, current_user.id, False)
+
+
+@router.post(
+    "/{property_id}/reports",
+    response_model=PropertyReportResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def report_property(
+    property_id: uuid.UUID,
+    report: PropertyReportRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Report a listing to the moderators
+
+    One pending report per user and listing counts; repeats are accepted
+    but ignored. Listings with many reports are hidden until reviewed.
+    """
+    try:
+        return PropertyReportResponse(
+            **moderation_service.report(
+                db, property_id, current_user.id, report.reason, report.description
+            )
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to report property: {str(e)}",
+        )
+
+
+def _upload_error(e: Exception, action: str) -> HTTPException:
+    """Map resumable upload service errors to HTTP errors"""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, LookupError):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if isinstance(e, RuntimeError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Failed to {action}: {str(e)}",
+    )
+
+
+@router.post(
+    "/{property_id}/media/resumable",
+    response_model=ResumableUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_resumable_upload(
+    property_id: uuid.UUID,
+    upload: ResumableUploadRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Start a resumable upload for a large file (e.g. a listing video)
+
+    Split the file into `part_size` chunks, get URLs for them from
+    `.../parts`, PUT each chunk (several at once is fine) and call
+    `.../complete`. After a dropped connection, `GET` the session to see
+    which parts storage already has and upload only the rest.
+    """
+    _require_owner(db, property_id, current_user)
+    try:
+        return ResumableUploadResponse(
+            **resumable_upload_service.create(
+                property_id,
+                current_user.id,
+                upload.content_type,
+                upload.size,
+                upload.part_size or DEFAULT_PART_SIZE,
+            )
+        )
+    except Exception as e:
+        raise _upload_error(e, "start upload")
+
+
+@router.get(
+    "/{property_id}/media/resumable/{upload_id}",
+    response_model=ResumableUploadResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_resumable_upload(
+    property_id: uuid.UUID,
+    upload_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+) -> Any:
+    """Get the committed parts and offset of a resumable upload"""
+    try:
+        return ResumableUploadResponse(
+            **resumable_upload_service.status(upload_id, property_id, current_user.id)
+        )
+    except Exception as e:
+        raise _upload_error(e, "get upload")
+
+
+@router.post(
+    "/{property_id}/media/resumable/{upload_id}/parts",
+    response_model=UploadPartUrlsResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_upload_part_urls(
+    property_id: uuid.UUID,
+    upload_id: str,
+    request: UploadPartUrlsRequest,
+    current_user: UserResponse = Depends(get_current_user),
+) -> Any:
+    """Get presigned URLs to PUT the given parts to"""
+    try:
+        urls = resumable_upload_service.part_urls(
+            upload_id, property_id, current_user.id, request.part_numbers
+        )
+        return UploadPartUrlsResponse(
+            parts=[
+                UploadPartUrl(part_number=number, url=url)
+                for number, url in urls.items()
+            ],
+            expires_in=UPLOAD_URL_TTL_SECONDS,
+        )
+    except Exception as e:
+        raise _upload_error(e, "sign upload parts")
+
+
+@router.post(
+    "/{property_id}/media/resumable/{upload_id}/complete",
+    response_model=MediaAttachResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def complete_resumable_upload(
+    property_id: uuid.UUID,
+    upload_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """Assemble an upload's parts and attach the file to the listing"""
+    try:
+        media = resumable_upload_service.complete(
+            db, upload_id, property_id, current_user.id
+        )
+        return MediaAttachResponse(media_urls=media_service.resolve_urls(media))
+    except Exception as e:
+        raise _upload_error(e, "complete upload")
+
+
+@router.delete(
+    "/{property_id}/media/resumable/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def abort_resumable_upload(
+    property_id: uuid.UUID,
+    upload_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+) -> None:
+    """Cancel a resumable upload and discard its parts"""
+    try:
+        resumable_upload_service.abort(upload_id, property_id, current_user.id)
+    except Exception as e:
+        raise _upload_error(e, "abort upload")
+
+
+@router.post(
+    "/{property_id}/views",
+    response_model=PropertyViewResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def record_property_view(
+    property_id: uuid.UUID,
+    request: Request,
+    user_id: Optional[uuid.UUID] = Depends(get_optional_user_id),
+) -> Any:
+    """
+    Record a view of a property listing
+
+    Views are buffered and written in batches, so this never waits on the
+    database. Anonymous views are accepted; a bearer token attributes the
+    view to the user. A viewer counts once per listing per half hour, and
+    views of listings that are not live are discarded.
+    """
+    accepted = view_ingestion_service.record(
+        property_id,
+        user_id,
+        client=request.client.host if request.client else None,
+    )
+    return PropertyViewResponse(accepted=accepted)
@@ -0,0 +1,36 @@
+"""Short share links that redirect to listings"""
+
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Path, status
+from fastapi.responses import RedirectResponse
+
+from app.services.share_links import (
+    MAX_TOKEN_LENGTH,
+    share_link_service,
+    share_redirect_url,
+)
+
+router = APIRouter()
+
+
+@router.get("/{token}", status_code=status.HTTP_302_FOUND)
+async def resolve_share_link(
+    token: str = Path(..., min_length=1, max_length=MAX_TOKEN_LENGTH),
+) -> Any:
+    """
+    Redirect a shared link to its listing and count the click
+
+    Served from cache; clicks are written in batches shortly after.
+    """
+    link = share_link_service.resolve(token)
+    if link is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Share link not found"
+        )
+    return RedirectResponse(
+        share_redirect_url(link, token),
+        status_code=status.HTTP_302_FOUND,
+        # Every click has to reach us to be counted
+        headers={"Cache-Control": "no-store"},
+    )
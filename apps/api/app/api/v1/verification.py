@@ -1,23 +1,38 @@
 """Verification API endpoints for BVN and NIN verification"""
 
-from datetime import datetime, timedelta
-from typing import Any, Dict
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_user, get_password_hash
-from app.models.base import get_db
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+)
+from app.models.base import SessionLocal, get_db
 from app.models.engagement import AgentVerificationAttempt
 from app.models.user import User
 from app.schemas.user import UserResponse
 from app.schemas.verification import (
+    AgentBadgeBatchResponse,
     VerificationInitiate,
     VerificationResponse,
     VerificationStatusResponse,
 )
 from app.services.verification import YouverifyService
+from app.services.verification_status import (
+    MAX_BADGE_BATCH,
+    verification_status_service,
+)
 
 router = APIRouter()
 security = HTTPBearer()
@@ -47,8 +62,8 @@ async def initiate_verification(
             detail="Only agents can initiate verification",
         )
 
-    # Check if verification is locked
-    if youverify_service._check_verification_lock(current_user.id, db):
+    # Check if verification is locked (read from the database, not the cache)
+    if verification_status_service.is_locked(current_user.id, db):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Verification locked for 24 hours due to multiple failed attempts",
@@ -109,10 +124,6 @@ async def initiate_verification(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
 
-        # Update agent verification status
-        # Note: We need to import and use the agent_verifications table
-        # For now, we'll store the hashed values and update the status
-
         # Hash BVN and NIN for storage (bcrypt)
         bvn_hash = get_password_hash(verification_data.bvn)
         nin_hash = get_password_hash(verification_data.nin)
@@ -121,9 +132,15 @@ async def initiate_verification(
         verified_state = nin_result.get("state", "")
         verified_lga = nin_result.get("lga", "")
 
-        # TODO: Update agent_verifications table with the new status
-        # This requires importing the AgentVerification model
-        # For now, we'll return success with the verification data
+        # Persist the agent verification status (invalidates cached status/badge)
+        verification = verification_status_service.record_success(
+            agent_id=current_user.id,
+            db=db,
+            bvn_hash=bvn_hash,
+            nin_hash=nin_hash,
+            verified_state=verified_state,
+            verified_lga=verified_lga,
+        )
 
         return VerificationResponse(
             success=True,
@@ -136,8 +153,8 @@ async def initiate_verification(
                 "verified_lga": verified_lga,
                 "bvn_full_name": bvn_result.get("full_name", ""),
                 "nin_full_name": nin_result.get("full_name", ""),
-                "credibility_score": 50,  # Default score after verification
-                "verification_badge_visible": True,
+                "credibility_score": verification.credibility_score,
+                "verification_badge_visible": verification.verification_badge_visible,
             },
         )
 
@@ -158,6 +175,8 @@ async def get_verification_status(
     """
     Get current verification status for agent
 
+    Served from a per-agent cache that is invalidated on verification events.
+
     Returns:
     - Verification status
     - Credibility score
@@ -172,42 +191,9 @@ async def get_verification_status(
         )
 
     try:
-        # Get recent verification attempts (last 7 days)
-        cutoff_time = datetime.utcnow() - timedelta(days=7)
-
-        recent_attempts = (
-            db.query(AgentVerificationAttempt)
-            .filter(
-                AgentVerificationAttempt.agent_id == current_user.id,
-                AgentVerificationAttempt.created_at >= cutoff_time,
-            )
-            .order_by(AgentVerificationAttempt.created_at.desc())
-            .limit(10)
-            .all()
-        )
-
-        # Format recent attempts for response
-        attempts_data = []
-        for attempt in recent_attempts:
-            attempts_data.append(
-                {
-                    "attempt_type": attempt.attempt_type,
-                    "status": attempt.status,
-                    "error_message": attempt.error_message,
-                    "created_at": attempt.created_at.isoformat()
-                    if attempt.created_at
-                    else None,
-                }
-            )
-
-        # TODO: Get actual verification status from agent_verifications table
-        # For now, return default status
+        # Served from the per-agent status cache; invalidated on verification events
         return VerificationStatusResponse(
-            verification_status="pending",  # Default - should come from database
-            credibility_score=0,  # Default - should come from database
-            verification_badge_visible=False,  # Default - should come from database
-            recent_attempts=attempts_data,
-            is_locked=youverify_service._check_verification_lock(current_user.id, db),
+            **verification_status_service.get_status(current_user.id, db)
         )
 
     except Exception as e:
@@ -217,55 +203,134 @@ async def get_verification_status(
         )
 
 
+ATTEMPT_EXPORT_BATCH_SIZE = 500
+
+
+def _serialize_attempt(attempt) -> Dict[str, Any]:
+    """Format a verification attempt row for responses and exports"""
+    return {
+        "id": str(attempt.id),
+        "attempt_type": attempt.attempt_type,
+        "status": attempt.status,
+        "error_message": attempt.error_message,
+        "attempt_count": attempt.attempt_count,
+        "created_at": attempt.created_at.isoformat() if attempt.created_at else None,
+        "last_attempt_at": (
+            attempt.last_attempt_at.isoformat() if attempt.last_attempt_at else None
+        ),
+    }
+
+
+def _attempts_after(
+    db: Session, agent_id: uuid.UUID, after: Optional[list], limit: int
+):
+    """One keyset page of attempts, newest first, served by the (agent_id, created_at, id) index"""
+    query = db.query(AgentVerificationAttempt).filter(
+        AgentVerificationAttempt.agent_id == agent_id
+    )
+    if after:
+        query = query.filter(
+            keyset_filter(
+                (AgentVerificationAttempt.created_at, AgentVerificationAttempt.id),
+                after,
+            )
+        )
+    return (
+        query.order_by(
+            AgentVerificationAttempt.created_at.desc(),
+            AgentVerificationAttempt.id.desc(),
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+def _export_attempts_ndjson(
+    agent_id: uuid.UUID, after: Optional[list]
+) -> Iterator[bytes]:
+    """
+    Yield every attempt as NDJSON, one bounded keyset batch at a time
+
+    The body is streamed after the handler returns, when the request's get_db
+    session may already be closed, so the export reads through its own.
+    """
+    db = SessionLocal()
+    try:
+        while True:
+            batch = _attempts_after(db, agent_id, after, ATTEMPT_EXPORT_BATCH_SIZE)
+            for attempt in batch:
+                yield (json.dumps(_serialize_attempt(attempt)) + "\n").encode("utf-8")
+            if len(batch) < ATTEMPT_EXPORT_BATCH_SIZE:
+                return
+            last = batch[-1]
+            after = [last.created_at, last.id]
+            # Release the exported rows before fetching the next batch
+            db.expunge_all()
+    finally:
+        db.close()
+
+
 @router.get("/attempts", response_model=Dict, status_code=status.HTTP_200_OK)
 async def get_verification_attempts(
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    agent_id: Optional[uuid.UUID] = Query(
+        None, description="Agent to inspect (admins only)"
+    ),
     current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> Any:
     """
     Get detailed verification attempt history for agent
 
-    Returns comprehensive history of all verification attempts
+    Pages are keyset-paginated on (created_at, id), newest first. Pass the
+    returned `next_cursor` to fetch the next page. `format=ndjson` streams the
+    full history from the cursor onwards in constant memory (admin exports).
     """
-    # Check if user is an agent
-    if current_user.role != "agent":
+    # Agents see their own history; admins may export any agent's history
+    if current_user.role == "admin":
+        target_agent_id = agent_id or current_user.id
+    elif current_user.role == "agent":
+        if agent_id is not None and agent_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Agents can only view their own verification attempts",
+            )
+        target_agent_id = current_user.id
+    else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only agents can view verification attempts",
         )
 
-    try:
-        # Get all verification attempts for this agent
-        attempts = (
-            db.query(AgentVerificationAttempt)
-            .filter(AgentVerificationAttempt.agent_id == current_user.id)
-            .order_by(AgentVerificationAttempt.created_at.desc())
-            .all()
+    after = (
+        decode_cursor(cursor, (datetime.fromisoformat, uuid.UUID)) if cursor else None
+    )
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _export_attempts_ndjson(target_agent_id, after),
+            media_type="application/x-ndjson",
         )
 
-        # Format attempts for response
-        attempts_data = []
-        for attempt in attempts:
-            attempts_data.append(
-                {
-                    "id": str(attempt.id),
-                    "attempt_type": attempt.attempt_type,
-                    "status": attempt.status,
-                    "error_message": attempt.error_message,
-                    "attempt_count": attempt.attempt_count,
-                    "created_at": attempt.created_at.isoformat()
-                    if attempt.created_at
-                    else None,
-                    "last_attempt_at": attempt.last_attempt_at.isoformat()
-                    if attempt.last_attempt_at
-                    else None,
-                }
-            )
+    try:
+        # Fetch one extra row to know whether another page exists
+        attempts = _attempts_after(db, target_agent_id, after, limit + 1)
+        has_more = len(attempts) > limit
+        attempts = attempts[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = attempts[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
 
         return {
-            "agent_id": current_user.id,
-            "total_attempts": len(attempts),
-            "attempts": attempts_data,
+            "agent_id": target_agent_id,
+            "attempts": [_serialize_attempt(attempt) for attempt in attempts],
+            "count": len(attempts),
+            "has_more": has_more,
+            "next_cursor": next_cursor,
         }
 
     except Exception as e:
@@ -273,3 +338,37 @@ async def get_verification_attempts(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get verification attempts: {str(e)}",
         )
+
+
+@router.get(
+    "/badges", response_model=AgentBadgeBatchResponse, status_code=status.HTTP_200_OK
+)
+async def get_verification_badges(
+    agent_ids: List[uuid.UUID] = Query(..., alias="agent_id"),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get verification badges for many agents at once
+
+    Used by feeds and profile pages to render badges for every listed agent.
+    Pass each agent as a repeated `agent_id` query parameter.
+    """
+    if len(agent_ids) > MAX_BADGE_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BADGE_BATCH} agent ids can be requested at once",
+        )
+
+    try:
+        badges = verification_status_service.get_badges(agent_ids, db)
+        return AgentBadgeBatchResponse(
+            badges=[
+                {"agent_id": agent_id, **badge} for agent_id, badge in badges.items()
+            ]
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get verification badges: {str(e)}",
+        )
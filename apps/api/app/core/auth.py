@@ -143,6 +143,22 @@ def get_user_id_from_token(token: str) -> uuid.UUID:
     return uuid.UUID(user_id)
 
 
+def get_optional_user_id(
+    token=Depends(HTTPBearer(auto_error=False)),
+) -> Optional[uuid.UUID]:
+    """User ID from a bearer token if one is sent; anonymous otherwise
+
+    Decodes the token only, without a database lookup, for hot public
+    endpoints that merely attribute an event to a user.
+    """
+    if token is None:
+        return None
+    try:
+        return get_user_id_from_token(token.credentials)
+    except (HTTPException, ValueError):
+        return None
+
+
 def get_user_role_from_token(token: str) -> str:
     """Extract user role from JWT token"""
     payload = verify_token(token)
@@ -0,0 +1,92 @@
+"""In-process caching primitives shared by the service layer"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry expiry and LRU eviction
+
+    Values are kept per worker process, so callers must invalidate explicitly
+    on writes and rely on the TTL to bound staleness across workers.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60.0,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            return self._get_locked(key, default)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Return a dict of the keys that are cached and still fresh"""
+        missing = object()
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._get_locked(key, missing)
+                if value is not missing:
+                    found[key] = value
+        return found
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key for ttl seconds (defaults to the cache TTL)"""
+        with self._lock:
+            self._set_locked(key, value, ttl)
+
+    def set_many(
+        self, mapping: Dict[Hashable, Any], ttl: Optional[float] = None
+    ) -> None:
+        """Store several values with the same TTL"""
+        with self._lock:
+            for key, value in mapping.items():
+                self._set_locked(key, value, ttl)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove key from the cache if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_many(self, keys: Iterable[Hashable]) -> None:
+        """Remove several keys from the cache"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_locked(self, key: Hashable, default: Any) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_locked(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        ttl = self.ttl_seconds if ttl is None else ttl
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
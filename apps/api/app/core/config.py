@@ -29,10 +29,20 @@ class Settings(BaseSettings):
     STORAGE_SECRET_KEY: str
     STORAGE_BUCKET: str
     STORAGE_USE_SSL: bool = False
+    # Host clients reach storage on, if not STORAGE_ENDPOINT (e.g. the API
+    # talks to minio:9000 inside the network); presigned URLs use it
+    STORAGE_PUBLIC_ENDPOINT: Optional[str] = None
+    STORAGE_REGION: str = "us-east-1"
+
+    # Listing photo derivatives (thumbnails); CPU-bound, one process each
+    IMAGE_DERIVATIVE_WORKERS: int = 2
 
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:3000"
 
+    # Web app that share links redirect to (/properties/{id} pages)
+    WEB_APP_URL: str = "http://localhost:3000"
+
     # Email
     SMTP_HOST: str = "localhost"
     SMTP_PORT: int = 1025
@@ -47,6 +57,32 @@ class Settings(BaseSettings):
     # Youverify API
     YOUVERIFY_API_KEY: Optional[str] = None
 
+    # Verification status cache
+    VERIFICATION_STATUS_CACHE_TTL_SECONDS: int = 300
+
+    # Property search backend: "postgres" (tsvector + pg_trgm) or "memory"
+    SEARCH_BACKEND: str = "postgres"
+
+    # Property view ingestion buffer
+    VIEW_BUFFER_MAX_EVENTS: int = 50000
+    VIEW_FLUSH_BATCH_SIZE: int = 1000
+    VIEW_FLUSH_INTERVAL_SECONDS: float = 2.0
+    VIEW_DEDUPE_WINDOW_SECONDS: int = 1800
+    VIEW_DEDUPE_MAX_VIEWERS: int = 200000
+
+    # Feed and property detail response cache (L1 in process, L2 in Redis)
+    FEED_CACHE_TTL_SECONDS: int = 60
+    FEED_CACHE_L1_TTL_SECONDS: int = 5
+    FACET_CACHE_TTL_SECONDS: int = 30
+
+    # Share link clicks, counted in memory and written in batches
+    SHARE_CLICK_FLUSH_INTERVAL_SECONDS: float = 5.0
+    SHARE_CLICK_MAX_PENDING: int = 50000
+
+    # Realtime push (Socket.IO under /ws, Redis pub/sub between workers)
+    REALTIME_SEND_BUFFER_SIZE: int = 256
+    REALTIME_SLOW_CONSUMER_SECONDS: float = 30.0
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,36 @@
+"""In-process publish/subscribe for domain events
+
+Services subscribe handlers at import time; writers publish after their
+transaction commits. Handlers run synchronously in the publishing thread and
+a failing handler never breaks the write that published the event.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, List
+
+logger = logging.getLogger(__name__)
+
+_subscribers: DefaultDict[str, List[Callable[..., Any]]] = defaultdict(list)
+
+
+def subscribe(event: str, handler: Callable[..., Any]) -> Callable[..., Any]:
+    """Register handler for event; returns the handler so it can decorate"""
+    if handler not in _subscribers[event]:
+        _subscribers[event].append(handler)
+    return handler
+
+
+def unsubscribe(event: str, handler: Callable[..., Any]) -> None:
+    """Remove a previously registered handler"""
+    if handler in _subscribers[event]:
+        _subscribers[event].remove(handler)
+
+
+def publish(event: str, **payload: Any) -> None:
+    """Call every handler subscribed to event with the payload"""
+    for handler in list(_subscribers[event]):
+        try:
+            handler(**payload)
+        except Exception:
+            logger.exception("Handler %r failed for event %s", handler, event)
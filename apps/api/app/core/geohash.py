@@ -0,0 +1,133 @@
+"""Geohash encoding and bounding-box coverage for the property spatial index
+
+A geohash is a base32 string where every extra character narrows the cell,
+so points in the same cell share a prefix and a btree index on the column
+answers "everything inside this cell" as a single range scan.
+"""
+
+import math
+from typing import List, Optional, Set, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: index for index, char in enumerate(BASE32)}
+
+# Precision stored on properties (cells of roughly 4.8m x 4.8m)
+STORED_PRECISION = 9
+
+# Upper bound on cells used to cover one search box
+MAX_COVER_CELLS = 16
+
+
+def encode(latitude: float, longitude: float, precision: int = STORED_PRECISION) -> str:
+    """Encode a coordinate as a geohash of the given precision"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def decode_bbox(geohash: str) -> Tuple[float, float, float, float]:
+    """Return (min_lat, min_lng, max_lat, max_lng) of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Return (lat_degrees, lng_degrees) covered by one cell at precision"""
+    total_bits = precision * 5
+    lng_bits = math.ceil(total_bits / 2)
+    lat_bits = total_bits // 2
+    return 180.0 / (2**lat_bits), 360.0 / (2**lng_bits)
+
+
+def cover_bbox(
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    max_cells: int = MAX_COVER_CELLS,
+) -> List[str]:
+    """
+    Return geohash prefixes whose cells together cover the bounding box
+
+    Uses the finest precision that needs at most max_cells cells, so the
+    index scan stays small without reading far outside the box.
+    """
+    for precision in range(STORED_PRECISION, 0, -1):
+        cells = _cells_for_bbox(
+            min_lat, min_lng, max_lat, max_lng, precision, max_cells
+        )
+        if cells is not None:
+            return sorted(cells)
+    # A box this large is effectively the whole map
+    return list(BASE32)
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every geohash that starts with prefix"""
+    return prefix + "~"
+
+
+def _cells_for_bbox(
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    precision: int,
+    max_cells: int,
+) -> Optional[Set[str]]:
+    """Cells at precision touching the box, or None if there are more than max_cells"""
+    lat_step, lng_step = cell_size(precision)
+    rows = math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step) + 1
+    cols = math.floor(max_lng / lng_step) - math.floor(min_lng / lng_step) + 1
+    if rows * cols > max_cells:
+        return None
+    # One sample point per grid row/column lands in each covering cell
+    return {
+        encode(
+            min(max_lat, min_lat + row * lat_step),
+            min(max_lng, min_lng + col * lng_step),
+            precision,
+        )
+        for row in range(rows)
+        for col in range(cols)
+    }
@@ -0,0 +1,69 @@
+"""Image resizing and perceptual hashing for listing photos
+
+Pure functions of bytes in, bytes out, with nothing imported beyond Pillow,
+so they run cheaply in pool worker processes.
+"""
+
+import io
+from typing import Dict, Sequence, Tuple
+
+from PIL import Image, ImageOps
+
+# format -> (Pillow format, save options)
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", {"quality": 75, "method": 4}),
+    "jpg": ("JPEG", {"quality": 80, "optimize": True, "progressive": True}),
+}
+
+
+def render_derivatives(
+    data: bytes,
+    widths: Sequence[int],
+    formats: Sequence[str] = tuple(DERIVATIVE_FORMATS),
+) -> Dict[Tuple[int, str], bytes]:
+    """
+    Resize an image to each width in each format
+
+    The image is rotated per its EXIF orientation and saved without EXIF,
+    ICC or other metadata. Images narrower than a width are not upscaled.
+
+    Returns:
+        (width, format) -> encoded bytes
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        # Lets JPEG decode at a reduced scale when the source is much larger
+        source.draft("RGB", (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(source).convert("RGB")
+
+    rendered = {}
+    for width in widths:
+        target = min(width, image.width)
+        height = max(1, round(image.height * target / image.width))
+        resized = image.resize((target, height), Image.LANCZOS)
+        resized.info = {}
+        for fmt in formats:
+            pil_format, options = DERIVATIVE_FORMATS[fmt]
+            buffer = io.BytesIO()
+            resized.save(buffer, format=pil_format, **options)
+            rendered[(width, fmt)] = buffer.getvalue()
+    return rendered
+
+
+def dhash(data: bytes, size: int = 8) -> int:
+    """
+    64-bit difference hash of an image (for size 8)
+
+    Robust to resizing, recompression and small colour changes; near
+    duplicates differ in a few bits.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source.draft("L", (size * 4, size * 4))
+        image = ImageOps.exif_transpose(source).convert("L")
+    pixels = list(image.resize((size + 1, size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(size):
+        for column in range(size):
+            left = pixels[row * (size + 1) + column]
+            right = pixels[row * (size + 1) + column + 1]
+            value = (value << 1) | (left > right)
+    return value
@@ -0,0 +1,76 @@
+"""Keyset (cursor) pagination helpers
+
+Cursors are opaque URL-safe strings that encode the sort key of the last row
+on a page. The next page is fetched with a row-value comparison such as
+``(created_at, id) < (:created_at, :id)`` so every page is an index range scan
+instead of an OFFSET that re-reads all earlier rows.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode a row's sort key as an opaque cursor string"""
+    payload = json.dumps([_encode_value(value) for value in values])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string from a previous page
+        parsers: One callable per key column (e.g. datetime.fromisoformat, uuid.UUID)
+
+    Raises:
+        HTTPException 400 if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("cursor has the wrong number of values")
+        return [
+            None if value is None else parse(value)
+            for parse, value in zip(parsers, values)
+        ]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+
+
+def keyset_filter(
+    columns: Sequence[Any], values: Sequence[Any], descending: bool = True
+):
+    """Row-value predicate selecting rows strictly after the cursor position"""
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Clamp a requested page size into [1, MAX_PAGE_SIZE]"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
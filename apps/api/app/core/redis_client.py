@@ -0,0 +1,50 @@
+"""Shared Redis connection for caches and coordination
+
+Redis is an optimization here, never a hard dependency: callers treat any
+RedisError as a cache miss. After a failure the client is skipped for
+RETRY_AFTER_SECONDS so an outage does not add a timeout to every request.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SOCKET_TIMEOUT_SECONDS = 0.25
+RETRY_AFTER_SECONDS = 5.0
+
+_client: Optional[redis.Redis] = None
+_client_lock = threading.Lock()
+_unavailable_until = 0.0
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """The shared client, or None while Redis is marked unavailable"""
+    global _client
+    if time.monotonic() < _unavailable_until:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=SOCKET_TIMEOUT_SECONDS,
+                    socket_connect_timeout=SOCKET_TIMEOUT_SECONDS,
+                )
+    return _client
+
+
+def mark_unavailable(error: Exception) -> None:
+    """Skip Redis for a while after a connection or timeout error"""
+    global _unavailable_until
+    if time.monotonic() >= _unavailable_until:
+        logger.warning(
+            "Redis unavailable, bypassing for %ss: %s", RETRY_AFTER_SECONDS, error
+        )
+    _unavailable_until = time.monotonic() + RETRY_AFTER_SECONDS
@@ -0,0 +1,228 @@
+"""Two-tier cache for serialized JSON responses with strong ETags
+
+L1 is a short-lived per-process TTLCache and L2 is Redis, shared by every
+worker. Entries belong to a scope (e.g. one state's feed). Invalidating a
+scope bumps its generation counter in Redis and locally, and an entry built
+under an older generation is treated as stale. Generations are read before a
+response is built, so a write that lands mid-build can never be hidden under
+the newer generation.
+
+Stampede protection:
+- in process, concurrent misses on a key wait on one striped lock and reuse
+  the response the first caller built;
+- across workers, a stale entry is kept for STALE_FACTOR x ttl and one
+  worker (holding a short Redis lock) rebuilds it while the others keep
+  serving the stale copy.
+
+Staleness bounds: a worker's L1 may serve a response for up to l1_ttl after
+another worker invalidates it; a worker that cannot reach Redis falls back
+to L1 only and builds on every L1 miss.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from typing import Callable, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import Response, status
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.redis_client import get_redis, mark_unavailable
+
+# Scope whose generation is part of every entry (invalidate_all)
+ALL_SCOPES = "*"
+STALE_FACTOR = 2
+LOCK_TIMEOUT_MS = 5000
+_LOCK_STRIPES = 64
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers etag"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def to_response(
+    cached: CachedResponse, if_none_match: Optional[str] = None
+) -> Response:
+    """200 with the cached JSON, or an empty 304 if the client has it"""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """L1 (process) + L2 (Redis) cache of response bodies by scope and key"""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float = 60.0,
+        l1_ttl_seconds: float = 5.0,
+        l1_max_entries: int = 5000,
+        redis_getter: Callable = get_redis,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.redis_getter = redis_getter
+        self.clock = clock
+        self.stats: Counter = Counter()
+        self._l1 = TTLCache(ttl_seconds=l1_ttl_seconds, max_entries=l1_max_entries)
+        self._local_generations: Counter = Counter()
+        self._generation_lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def get_or_build(
+        self, scope: str, key: str, build: Callable[[], bytes]
+    ) -> CachedResponse:
+        """
+        Return the cached response for (scope, key), building it on a miss
+
+        Args:
+            scope: Invalidation scope the entry belongs to
+            key: Entry key within the scope
+            build: Produces the response body; exceptions propagate and
+                nothing is cached
+        """
+        entry_key = f"{self.namespace}:{scope}:{key}"
+        token = self._local_token(scope)
+        hit = self._l1.get(entry_key)
+        if hit is not None and hit[0] == token:
+            self.stats["l1_hits"] += 1
+            return hit[1]
+
+        with self._key_locks[hash(entry_key) % _LOCK_STRIPES]:
+            hit = self._l1.get(entry_key)
+            if hit is not None and hit[0] == token:
+                self.stats["l1_hits"] += 1
+                return hit[1]
+            response, fresh = self._from_l2_or_build(scope, entry_key, build)
+            if fresh:
+                self._l1.set(entry_key, (token, response))
+            return response
+
+    def invalidate(self, scopes: Iterable[str]) -> None:
+        """Mark every entry in the given scopes stale, here and in Redis"""
+        scopes = set(scopes)
+        if not scopes:
+            return
+        with self._generation_lock:
+            for scope in scopes:
+                self._local_generations[scope] += 1
+        client = self.redis_getter()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for scope in scopes:
+                generation_key = self._generation_key(scope)
+                pipe.incr(generation_key)
+                # Outlives every entry built under the previous generation
+                pipe.expire(generation_key, self._physical_ttl_ms() // 1000 + 1)
+            pipe.execute()
+        except RedisError as e:
+            mark_unavailable(e)
+
+    def invalidate_all(self) -> None:
+        """Mark every entry of this cache stale"""
+        self.invalidate([ALL_SCOPES])
+
+    def _from_l2_or_build(
+        self, scope: str, entry_key: str, build: Callable[[], bytes]
+    ) -> Tuple[CachedResponse, bool]:
+        client = self.redis_getter()
+        if client is None:
+            return self._build(build), True
+        try:
+            scope_generation, all_generation, raw = client.mget(
+                [
+                    self._generation_key(scope),
+                    self._generation_key(ALL_SCOPES),
+                    entry_key,
+                ]
+            )
+        except RedisError as e:
+            mark_unavailable(e)
+            return self._build(build), True
+
+        generation = f"{int(scope_generation or 0)}.{int(all_generation or 0)}"
+        now = self.clock()
+        entry = self._decode(raw)
+        if entry is not None and entry[0] == generation and now < entry[1]:
+            self.stats["l2_hits"] += 1
+            return entry[2], True
+
+        lock_key = f"{entry_key}:lock"
+        try:
+            acquired = client.set(lock_key, b"1", nx=True, px=LOCK_TIMEOUT_MS)
+        except RedisError as e:
+            mark_unavailable(e)
+            return self._build(build), True
+        if not acquired and entry is not None:
+            # Another worker is rebuilding; serve the old copy meanwhile
+            self.stats["stale_hits"] += 1
+            return entry[2], False
+
+        response = self._build(build)
+        try:
+            client.set(
+                entry_key,
+                self._encode(generation, now + self.ttl_seconds, response),
+                px=self._physical_ttl_ms(),
+            )
+            if acquired:
+                client.delete(lock_key)
+        except RedisError as e:
+            mark_unavailable(e)
+        return response, True
+
+    def _build(self, build: Callable[[], bytes]) -> CachedResponse:
+        self.stats["builds"] += 1
+        body = build()
+        return CachedResponse(make_etag(body), body)
+
+    def _local_token(self, scope: str) -> Tuple[int, int]:
+        with self._generation_lock:
+            return (
+                self._local_generations[scope],
+                self._local_generations[ALL_SCOPES],
+            )
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{self.namespace}:gen:{scope}"
+
+    def _physical_ttl_ms(self) -> int:
+        return int(self.ttl_seconds * STALE_FACTOR * 1000)
+
+    @staticmethod
+    def _encode(generation: str, fresh_until: float, response: CachedResponse):
+        header = json.dumps({"g": generation, "f": fresh_until, "e": response.etag})
+        return header.encode("utf-8") + b"\n" + response.body
+
+    @staticmethod
+    def _decode(raw: Optional[bytes]):
+        if not raw:
+            return None
+        try:
+            header, body = raw.split(b"\n", 1)
+            meta = json.loads(header)
+            return meta["g"], meta["f"], CachedResponse(meta["e"], body)
+        except (ValueError, KeyError):
+            return None
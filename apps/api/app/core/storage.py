@@ -0,0 +1,63 @@
+"""S3-compatible object storage (MinIO in development)
+
+Clients are created lazily and shared. Presigning is local computation, but
+the URLs must name a host the uploading phone can reach, so signing uses
+STORAGE_PUBLIC_ENDPOINT when it is set and server-side calls (HEAD, GET)
+go to STORAGE_ENDPOINT.
+"""
+
+import threading
+from typing import Optional
+
+import boto3
+from botocore.config import Config
+
+from app.core.config import settings
+
+CONNECT_TIMEOUT_SECONDS = 2
+READ_TIMEOUT_SECONDS = 10
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def endpoint_url(endpoint: Optional[str] = None) -> str:
+    """Full URL for a configured endpoint, which may omit the scheme"""
+    endpoint = endpoint or settings.STORAGE_ENDPOINT
+    if "://" in endpoint:
+        return endpoint
+    scheme = "https" if settings.STORAGE_USE_SSL else "http"
+    return f"{scheme}://{endpoint}"
+
+
+def _client(endpoint: str):
+    with _clients_lock:
+        client = _clients.get(endpoint)
+        if client is None:
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url(endpoint),
+                aws_access_key_id=settings.STORAGE_ACCESS_KEY,
+                aws_secret_access_key=settings.STORAGE_SECRET_KEY,
+                region_name=settings.STORAGE_REGION,
+                config=Config(
+                    signature_version="s3v4",
+                    # MinIO serves buckets by path, not by subdomain
+                    s3={"addressing_style": "path"},
+                    connect_timeout=CONNECT_TIMEOUT_SECONDS,
+                    read_timeout=READ_TIMEOUT_SECONDS,
+                    retries={"max_attempts": 3, "mode": "standard"},
+                ),
+            )
+            _clients[endpoint] = client
+        return client
+
+
+def get_storage_client():
+    """Client for server-side calls to the bucket"""
+    return _client(settings.STORAGE_ENDPOINT)
+
+
+def get_signing_client():
+    """Client whose presigned URLs point at the public endpoint"""
+    return _client(settings.STORAGE_PUBLIC_ENDPOINT or settings.STORAGE_ENDPOINT)
@@ -6,8 +6,12 @@ from app.models.base import Base, get_db
 from app.models.engagement import (
     AgentPerformance,
     AgentReview,
+    AgentVerification,
     AgentVerificationAttempt,
+    Broadcast,
+    ModerationCase,
     Notification,
+    NotificationCounter,
     PlatformMetric,
     PropertyClip,
     PropertyFlick,
@@ -15,7 +19,15 @@ from app.models.engagement import (
     PropertyShare,
 )
 from app.models.inspection import Inspection, InspectionProof
-from app.models.property import Property, PropertyView
+from app.models.property import (
+    Property,
+    PropertyCard,
+    PropertyDuplicate,
+    PropertyFingerprint,
+    PropertyLshBucket,
+    PropertyView,
+    PropertyViewDaily,
+)
 from app.models.user import RefreshToken, User
 
 # Export all models for easy import
@@ -25,13 +37,22 @@ __all__ = [
     "User",
     "RefreshToken",
     "Property",
+    "PropertyCard",
+    "PropertyFingerprint",
+    "PropertyLshBucket",
+    "PropertyDuplicate",
     "PropertyView",
+    "PropertyViewDaily",
     "PropertyFlick",
     "PropertyClip",
     "PropertyReport",
+    "ModerationCase",
     "AgentReview",
+    "Broadcast",
     "Notification",
+    "NotificationCounter",
     "PlatformMetric",
+    "AgentVerification",
     "AgentVerificationAttempt",
     "PropertyShare",
     "AgentPerformance",
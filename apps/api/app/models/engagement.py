@@ -11,11 +11,13 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import relationship
@@ -119,12 +121,55 @@ class PropertyReport(Base):
             "status IN ('pending', 'reviewed', 'resolved', 'dismissed')",
             name="check_property_report_status",
         ),
+        # One pending report per user and listing
+        Index(
+            "uq_property_reports_pending",
+            "property_id",
+            "reported_by",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+        ),
     )
 
     def __repr__(self):
         return f"<PropertyReport(property_id={self.property_id}, reason={self.reason}, status={self.status})>"
 
 
+class ModerationCase(Base):
+    """Pending reports against one listing, as one unit of moderator work
+
+    Kept by ModerationService while the listing has pending reports. score
+    weighs each report by its reason; moderators claim the highest scores
+    first, and a claim is a lease that lapses at lease_expires_at.
+    """
+
+    __tablename__ = "moderation_cases"
+
+    property_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("properties.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    report_count = Column(Integer, nullable=False, default=0)
+    score = Column(Integer, nullable=False, default=0)
+    first_reported_at = Column(DateTime(timezone=True), nullable=False)
+    last_reported_at = Column(DateTime(timezone=True), nullable=False)
+    claimed_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    lease_expires_at = Column(DateTime(timezone=True))
+    # Set when the report threshold took the listing out of the feed
+    hidden_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_moderation_cases_queue", score.desc(), "first_reported_at"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<ModerationCase(property_id={self.property_id}, "
+            f"report_count={self.report_count}, score={self.score})>"
+        )
+
+
 class AgentReview(Base):
     """Agent review and rating system"""
 
@@ -187,7 +232,7 @@ class Notification(Base):
     title = Column(String(255), nullable=False)
     message = Column(Text, nullable=False)
     data = Column(JSON, default={})
-    is_read = Column(Boolean, default=False)
+    is_read = Column(Boolean, nullable=False, default=False)
     action_url = Column(String(500))
     expires_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -205,12 +250,69 @@ class Notification(Base):
             ")",
             name="check_notification_type",
         ),
+        # Inbox pages: (created_at, id) keyset per user
+        Index("ix_notifications_inbox", "user_id", "created_at", "id"),
+        Index(
+            "ix_notifications_unread",
+            "user_id",
+            postgresql_where=text("NOT is_read"),
+        ),
+        Index("ix_notifications_expires_at", "expires_at"),
     )
 
     def __repr__(self):
         return f"<Notification(user_id={self.user_id}, type={self.type}, is_read={self.is_read})>"
 
 
+class NotificationCounter(Base):
+    """A user's unread notification count, kept by NotificationService"""
+
+    __tablename__ = "notification_counters"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    unread_count = Column(Integer, nullable=False, default=0)
+    # Broadcasts created up to this time have been read
+    broadcasts_read_through = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return (
+            f"<NotificationCounter(user_id={self.user_id}, "
+            f"unread_count={self.unread_count})>"
+        )
+
+
+class Broadcast(Base):
+    """System announcement shown in the inbox of every user in its audience"""
+
+    __tablename__ = "broadcasts"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    type = Column(String(50), nullable=False, default="system_announcement")
+    audience = Column(String(20), nullable=False, default="all")
+    title = Column(String(255), nullable=False)
+    message = Column(Text, nullable=False)
+    data = Column(JSON, default={})
+    action_url = Column(String(500))
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint(
+            "audience IN ('all', 'tenant', 'agent', 'admin')",
+            name="check_broadcast_audience",
+        ),
+        Index("ix_broadcasts_expires_at", "expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<Broadcast(id={self.id}, audience={self.audience})>"
+
+
 class PlatformMetric(Base):
     """Platform analytics and metrics tracking"""
 
@@ -228,7 +330,8 @@ class PlatformMetric(Base):
             "metric_type IN ("
             "'daily_active_users', 'monthly_active_users', 'new_registrations', "
             "'property_listings', 'completed_inspections', 'total_revenue', "
-            "'agent_verifications', 'user_engagement', 'property_views'"
+            "'agent_verifications', 'user_engagement', 'property_views', "
+            "'listings_expired', 'listings_auto_extended'"
             ")",
             name="check_platform_metric_type",
         ),
@@ -265,12 +368,63 @@ class AgentVerificationAttempt(Base):
             "status IN ('success', 'failed', 'pending')",
             name="check_verification_attempt_status",
         ),
+        # Keyset pagination of an agent's history on (created_at, id)
+        Index(
+            "ix_agent_verification_attempts_agent_created_id",
+            "agent_id",
+            "created_at",
+            "id",
+        ),
     )
 
     def __repr__(self):
         return f"<AgentVerificationAttempt(agent_id={self.agent_id}, type={self.attempt_type}, status={self.status})>"
 
 
+class AgentVerification(Base):
+    """Current BVN/NIN verification state for an agent (one row per agent)"""
+
+    __tablename__ = "agent_verifications"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    agent_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    bvn_hash = Column(String(255))
+    nin_hash = Column(String(255))
+    verified_state = Column(String(100))
+    verified_lga = Column(String(100))
+    verification_status = Column(String(20), nullable=False, default="pending")
+    credibility_score = Column(Integer, nullable=False, default=0)
+    verification_badge_visible = Column(Boolean, nullable=False, default=False)
+    locked_until = Column(DateTime(timezone=True))
+    verified_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    # Relationships - use string references to avoid circular imports
+    agent = relationship("User", back_populates="verification")
+
+    __table_args__ = (
+        CheckConstraint(
+            "verification_status IN ('pending', 'verified', 'failed', 'locked')",
+            name="check_agent_verification_status",
+        ),
+        CheckConstraint(
+            "credibility_score >= 0 AND credibility_score <= 100",
+            name="check_agent_verification_credibility_score",
+        ),
+    )
+
+    def __repr__(self):
+        return f"<AgentVerification(agent_id={self.agent_id}, status={self.verification_status})>"
+
+
 class PropertyShare(Base):
     """Property sharing and referral tracking"""
 
@@ -289,7 +443,10 @@ class PropertyShare(Base):
     shared_with_phone = Column(String(20))
     share_method = Column(String(20))
     share_token = Column(String(100), unique=True)
+    # First click; counts are written in batches by ShareLinkService
     clicked_at = Column(DateTime(timezone=True))
+    last_clicked_at = Column(DateTime(timezone=True))
+    click_count = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships - use string references to avoid circular imports
@@ -3,11 +3,29 @@
 import uuid
 from datetime import datetime, timedelta
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, Numeric, String, Text
-from sqlalchemy.dialects.postgresql import ARRAY, UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    Numeric,
+    SmallInteger,
+    String,
+    Text,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
+from app.core.geohash import encode as encode_geohash
 from app.models.base import Base
 
 
@@ -31,11 +49,23 @@ class Property(Base):
     address = Column(Text)
     latitude = Column(Numeric(10, 8))
     longitude = Column(Numeric(10, 8))
-    media_urls = Column(ARRAY(Text))  # Array of media URLs
+    # Maintained from latitude/longitude on write; "C" collation keeps prefix
+    # range scans on the btree index byte-ordered
+    geohash = Column(String(12, collation="C"))
+    # Storage object keys (see MediaService); older rows hold absolute URLs
+    media_urls = Column(ARRAY(Text))
     is_active = Column(Boolean, default=True, index=True)
     expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Weighted title/lga/address/description document, maintained by the
+    # properties_search_vector_update trigger (migration 009); deferred so
+    # full-object loads never pull it
+    search_vector = deferred(Column(TSVECTOR))
     view_count_7d = Column(Integer, default=0)
     view_count_total = Column(Integer, default=0)
+    # Time-decayed views from property_view_daily; see ViewCounterService
+    trending_score = Column(Float, default=0)
+    # Materialized feed score; see RankingService
+    rank_score = Column(Float, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -58,6 +88,81 @@ class Property(Base):
         "Inspection", back_populates="property", cascade="all, delete-orphan"
     )
 
+    # Partial indexes for keyset-paginated feeds over live listings. Each
+    # ends in the sort key so a filtered page is a single index range scan.
+    __table_args__ = (
+        Index(
+            "ix_properties_feed_newest",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_properties_feed_state_newest",
+            "state",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_properties_feed_state_lga_newest",
+            "state",
+            "lga",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_properties_feed_state_type_newest",
+            "state",
+            "property_type",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_properties_feed_state_price",
+            "state",
+            "price_monthly",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_properties_feed_ranked",
+            "rank_score",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_properties_feed_state_ranked",
+            "state",
+            "rank_score",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        # Expiry sweeper: live listings in expiry order
+        Index(
+            "ix_properties_active_expires_at",
+            "expires_at",
+            postgresql_where=text("is_active"),
+        ),
+        # Change feeds (map cluster sync, read-model drift checks)
+        Index("ix_properties_updated_at", "updated_at"),
+        # Full-text search; the pg_trgm index on lower(title || ' ' || lga)
+        # for misspellings is expression-based and lives in migration 009
+        Index(
+            "ix_properties_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        # Spatial prefilter: geohash prefix ranges over live listings
+        Index(
+            "ix_properties_geohash_active",
+            "geohash",
+            postgresql_where=text("is_active"),
+        ),
+    )
+
     def __init__(self, *args, **kwargs):
         """Initialize property with default 14-day expiry"""
         super().__init__(*args, **kwargs)
@@ -78,6 +183,16 @@ class Property(Base):
         return self.view_count_7d > 20 and not self.is_expired
 
 
+@event.listens_for(Property, "before_insert")
+@event.listens_for(Property, "before_update")
+def _maintain_geohash(mapper, connection, target):
+    """Keep the geohash column in step with latitude/longitude"""
+    if target.latitude is None or target.longitude is None:
+        target.geohash = None
+    else:
+        target.geohash = encode_geohash(float(target.latitude), float(target.longitude))
+
+
 class PropertyView(Base):
     """Property views tracking for feed performance"""
 
@@ -90,3 +205,211 @@ class PropertyView(Base):
 
     def __repr__(self):
         return f"<PropertyView(property_id={self.property_id}, user_id={self.user_id})>"
+
+
+class PropertyViewDaily(Base):
+    """Per-property daily view counts (UTC days) behind view_count_7d"""
+
+    __tablename__ = "property_view_daily"
+
+    property_id = Column(UUID(as_uuid=True), primary_key=True)
+    day = Column(Date, primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Window refreshes and retention purges scan by day
+        Index("ix_property_view_daily_day", "day"),
+    )
+
+    def __repr__(self):
+        return f"<PropertyViewDaily(property_id={self.property_id}, day={self.day}, views={self.views})>"
+
+
+class PropertyCard(Base):
+    """Denormalized listing card: one row per property for single-table feeds
+
+    Carries the listing columns a card shows plus the agent's business name,
+    verification badge, review summary and flick/clip/share counts. Kept
+    current by triggers on properties, property_flicks, property_clips,
+    property_shares, agent_reviews, users and agent_verifications (migration
+    013); the application never writes it. refreshed_at changes on every
+    trigger write. scripts/rebuild_property_cards.py repairs drift.
+    """
+
+    __tablename__ = "property_cards"
+
+    id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("properties.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    agent_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    title = Column(String(255), nullable=False)
+    property_type = Column(String(50), nullable=False)
+    bedrooms = Column(Integer)
+    bathrooms = Column(Integer)
+    price_monthly = Column(Integer, nullable=False)
+    state = Column(String(100), nullable=False)
+    lga = Column(String(100), nullable=False)
+    latitude = Column(Numeric(10, 8))
+    longitude = Column(Numeric(10, 8))
+    cover_url = Column(Text)
+    is_active = Column(Boolean, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    view_count_7d = Column(Integer, nullable=False, default=0)
+    view_count_total = Column(Integer, nullable=False, default=0)
+    rank_score = Column(Float, nullable=False, default=0)
+    agent_business_name = Column(String(255))
+    verification_status = Column(String(20), nullable=False, default="pending")
+    credibility_score = Column(Integer, nullable=False, default=0)
+    verification_badge_visible = Column(Boolean, nullable=False, default=False)
+    agent_locked_until = Column(DateTime(timezone=True))
+    review_count = Column(Integer, nullable=False, default=0)
+    review_avg = Column(Numeric(3, 2))
+    flick_count = Column(Integer, nullable=False, default=0)
+    clip_count = Column(Integer, nullable=False, default=0)
+    share_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    # The feed indexes of properties, moved to the table the feed reads
+    __table_args__ = (
+        Index(
+            "ix_property_cards_feed_newest",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_property_cards_feed_state_newest",
+            "state",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_property_cards_feed_state_lga_newest",
+            "state",
+            "lga",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_property_cards_feed_state_type_newest",
+            "state",
+            "property_type",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_property_cards_feed_state_price",
+            "state",
+            "price_monthly",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_property_cards_feed_ranked",
+            "rank_score",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_property_cards_feed_state_ranked",
+            "state",
+            "rank_score",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<PropertyCard(id={self.id}, title={self.title}, state={self.state})>"
+
+
+class PropertyFingerprint(Base):
+    """Near-duplicate fingerprint of a listing; see DuplicateDetectionService
+
+    minhash is the MinHash signature of the normalized title, description and
+    address (little-endian uint32s); image_hashes the 64-bit dHashes of the
+    first photos (little-endian uint64s). source_hash identifies the inputs,
+    so an unchanged listing is not fingerprinted again.
+    """
+
+    __tablename__ = "property_fingerprints"
+
+    property_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("properties.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    source_hash = Column(String(40), nullable=False)
+    minhash = Column(LargeBinary, nullable=False)
+    image_hashes = Column(LargeBinary, nullable=False, default=b"")
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self):
+        return f"<PropertyFingerprint(property_id={self.property_id})>"
+
+
+class PropertyLshBucket(Base):
+    """One LSH band bucket a listing falls into
+
+    Text bands hash a slice of the MinHash signature; image bands hold one
+    16-bit chunk of a photo's dHash. Listings sharing any (band, bucket) are
+    duplicate candidates.
+    """
+
+    __tablename__ = "property_lsh_buckets"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    property_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("properties.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+
+    def __repr__(self):
+        return (
+            f"<PropertyLshBucket(band={self.band}, bucket={self.bucket}, "
+            f"property_id={self.property_id})>"
+        )
+
+
+class PropertyDuplicate(Base):
+    """A listing found to be a near duplicate of an older one"""
+
+    __tablename__ = "property_duplicates"
+
+    property_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("properties.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    duplicate_of = Column(
+        UUID(as_uuid=True),
+        ForeignKey("properties.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    # Estimated Jaccard similarity of the text shingles
+    text_similarity = Column(Float, nullable=False)
+    # Smallest Hamming distance between the two listings' photo hashes
+    image_distance = Column(SmallInteger)
+    status = Column(String(20), nullable=False, default="pending")
+    detected_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return (
+            f"<PropertyDuplicate(property_id={self.property_id}, "
+            f"duplicate_of={self.duplicate_of})>"
+        )
@@ -61,6 +61,12 @@ class User(Base):
     verification_attempts = relationship(
         "AgentVerificationAttempt", back_populates="agent", cascade="all, delete-orphan"
     )
+    verification = relationship(
+        "AgentVerification",
+        back_populates="agent",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
     property_shares = relationship(
         "PropertyShare", back_populates="sharer", cascade="all, delete-orphan"
     )
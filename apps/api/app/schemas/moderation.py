@@ -0,0 +1,74 @@
+"""Pydantic schemas for listing reports and the moderation queue"""
+
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class PropertyReportRequest(BaseModel):
+    """Schema for reporting a listing"""
+
+    reason: str = Field(
+        ...,
+        description="fake, inappropriate, spam, duplicate, wrong_info or other",
+    )
+    description: Optional[str] = Field(None, max_length=2000)
+
+
+class PropertyReportResponse(BaseModel):
+    """Schema for a filed report"""
+
+    accepted: bool = Field(
+        ..., description="False when you already have a pending report on it"
+    )
+    report_count: int = Field(..., description="Pending reports on the listing")
+
+
+class ModerationReport(BaseModel):
+    """Schema for one pending report in a case"""
+
+    id: uuid.UUID
+    reason: str
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class ModerationCaseResponse(BaseModel):
+    """Schema for a claimed moderation case"""
+
+    property_id: uuid.UUID
+    title: Optional[str] = None
+    report_count: int
+    score: int = Field(..., description="Reports weighted by reason severity")
+    hidden: bool = Field(
+        ..., description="Whether the report threshold took the listing down"
+    )
+    first_reported_at: datetime
+    lease_expires_at: datetime = Field(
+        ..., description="Decide or release the case before this"
+    )
+    reports: List[ModerationReport] = Field(default_factory=list)
+
+
+class ModerationClaimResponse(BaseModel):
+    """Schema for a batch of claimed cases, highest score first"""
+
+    items: List[ModerationCaseResponse] = Field(default_factory=list)
+    count: int
+
+
+class ModerationDecisionRequest(BaseModel):
+    """Schema for closing a case"""
+
+    action: str = Field(..., description="dismiss or remove")
+
+
+class ModerationDecisionResponse(BaseModel):
+    """Schema for a closed case"""
+
+    property_id: uuid.UUID
+    action: str
+    reports_closed: int
+    listing_active: bool
@@ -0,0 +1,98 @@
+"""Pydantic schemas for notifications"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Read datetimes sent without an offset as UTC, so they compare with
+    the timestamptz values they are checked against"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class NotificationResponse(BaseModel):
+    """Schema for one notification in the inbox"""
+
+    id: uuid.UUID
+    type: str
+    title: str
+    message: str
+    data: Dict[str, Any] = Field(default_factory=dict)
+    is_read: bool
+    action_url: Optional[str] = None
+    created_at: datetime
+    expires_at: Optional[datetime] = None
+    broadcast: bool = Field(
+        False, description="Whether this is an announcement to many users"
+    )
+
+    class Config:
+        from_attributes = True
+
+
+class NotificationListResponse(BaseModel):
+    """Schema for a keyset-paginated inbox page, newest first"""
+
+    items: List[NotificationResponse] = Field(default_factory=list)
+    count: int = Field(..., description="Number of items on this page")
+    has_more: bool = Field(..., description="Whether another page exists")
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor to pass for the next page"
+    )
+    unread_count: int
+
+
+class UnreadCountResponse(BaseModel):
+    """Schema for the unread badge count"""
+
+    unread_count: int
+
+
+class MarkReadRequest(BaseModel):
+    """Schema for marking notifications read"""
+
+    ids: List[uuid.UUID] = Field(..., min_length=1, max_length=100)
+
+
+class MarkAllReadRequest(BaseModel):
+    """Schema for marking everything the user has seen read"""
+
+    read_through: Optional[datetime] = Field(
+        None,
+        description="created_at of the newest item shown; newer ones stay unread",
+    )
+
+    @field_validator("read_through")
+    @classmethod
+    def assume_utc(cls, v):
+        return _as_utc(v)
+
+
+class MarkReadResponse(BaseModel):
+    """Schema for the result of marking notifications read"""
+
+    updated: int = Field(..., description="Notifications that were unread")
+    unread_count: int
+
+
+class BroadcastCreate(BaseModel):
+    """Schema for sending a system announcement"""
+
+    title: str = Field(..., min_length=1, max_length=255)
+    message: str = Field(..., min_length=1)
+    audience: str = Field("all", description="all, tenant, agent or admin")
+    data: Dict[str, Any] = Field(default_factory=dict)
+    action_url: Optional[str] = Field(None, max_length=500)
+    expires_at: Optional[datetime] = Field(
+        None, description="When it leaves inboxes; 90 days from now by default"
+    )
+
+    @field_validator("expires_at")
+    @classmethod
+    def assume_utc(cls, v):
+        return _as_utc(v)
@@ -0,0 +1,354 @@
+"""Pydantic schemas for property listings and feeds"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+
+class AgentBadgeSummary(BaseModel):
+    """Compact agent verification badge embedded in listing cards"""
+
+    verification_status: str = Field(..., description="Agent verification status")
+    credibility_score: int = Field(..., description="Agent credibility score (0-100)")
+    verification_badge_visible: bool = Field(
+        ..., description="Whether verification badge is visible"
+    )
+
+
+class PropertyFeedItem(BaseModel):
+    """Schema for a property card in feeds (no heavy columns by default)"""
+
+    id: uuid.UUID
+    agent_id: uuid.UUID
+    title: str
+    property_type: str
+    bedrooms: Optional[int] = None
+    bathrooms: Optional[int] = None
+    price_monthly: int = Field(..., description="Monthly price in kobo")
+    state: str
+    lga: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    cover_url: Optional[str] = Field(None, description="First media URL")
+    cover_thumbnails: Optional[Dict[str, str]] = Field(
+        None, description="WebP thumbnail URLs of the cover photo by width"
+    )
+    view_count_7d: int = 0
+    view_count_total: int = 0
+    expires_at: datetime
+    created_at: Optional[datetime] = None
+    description: Optional[str] = Field(
+        None, description="Only present when include=description"
+    )
+    media_urls: Optional[List[str]] = Field(
+        None, description="Only present when include=media"
+    )
+    agent_badge: Optional[AgentBadgeSummary] = None
+    # From the property_cards read model; absent on search and nearby results
+    agent_business_name: Optional[str] = None
+    review_count: Optional[int] = Field(None, description="Visible agent reviews")
+    review_avg: Optional[float] = Field(None, description="Average agent rating")
+    flick_count: Optional[int] = None
+    clip_count: Optional[int] = None
+    share_count: Optional[int] = None
+
+
+class FacetCount(BaseModel):
+    """Number of matching listings for one facet value"""
+
+    value: str
+    count: int
+
+
+class PriceBandCount(FacetCount):
+    """Facet count for a price band, with the filter bounds that select it"""
+
+    min_price: int = Field(..., description="Inclusive lower bound in kobo")
+    max_price: Optional[int] = Field(
+        None, description="Inclusive upper bound in kobo (None = no limit)"
+    )
+
+
+class FeedFacets(BaseModel):
+    """Facet counts for a filter set; each facet ignores its own filter"""
+
+    total: int = Field(..., description="Listings matching every filter")
+    property_type: List[FacetCount] = Field(default_factory=list)
+    bedrooms: List[FacetCount] = Field(default_factory=list)
+    price_band: List[PriceBandCount] = Field(default_factory=list)
+    lga: List[FacetCount] = Field(default_factory=list)
+
+
+class PropertyFeedResponse(BaseModel):
+    """Schema for a keyset-paginated page of property cards"""
+
+    items: List[PropertyFeedItem] = Field(default_factory=list)
+    count: int = Field(..., description="Number of items on this page")
+    has_more: bool = Field(..., description="Whether another page exists")
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor to pass for the next page"
+    )
+    facets: Optional[FeedFacets] = Field(
+        None, description="Only present when facets=true"
+    )
+
+
+class PropertyDetailResponse(PropertyFeedItem):
+    """Schema for a single property with all listing columns"""
+
+    address: Optional[str] = None
+    is_active: bool = True
+    updated_at: Optional[datetime] = None
+
+
+class NearbyPropertyItem(PropertyFeedItem):
+    """Schema for a property card with its distance from the search point"""
+
+    distance_km: float = Field(..., description="Great-circle distance in km")
+
+
+class NearbyPropertiesResponse(BaseModel):
+    """Schema for proximity search results, nearest first"""
+
+    items: List[NearbyPropertyItem] = Field(default_factory=list)
+    count: int = Field(..., description="Number of items returned")
+    truncated: bool = Field(
+        False,
+        description="True if only the nearest listings in a dense area were searched",
+    )
+
+
+class PropertySearchItem(PropertyFeedItem):
+    """Schema for a property card matched by a text search"""
+
+    score: float = Field(..., description="Blended relevance score")
+    snippet: Optional[str] = Field(
+        None,
+        description="HTML-escaped matching text with terms wrapped in <b></b>",
+    )
+
+
+class PropertySearchResponse(BaseModel):
+    """Schema for text search results, best match first"""
+
+    items: List[PropertySearchItem] = Field(default_factory=list)
+    count: int = Field(..., description="Number of items on this page")
+    offset: int = Field(..., description="Offset of the first item")
+
+
+class PropertyViewResponse(BaseModel):
+    """Schema for an accepted (buffered) property view"""
+
+    accepted: bool = Field(
+        ...,
+        description="False when the view was dropped: a repeat by the same "
+        "viewer within the dedupe window, or the view buffer is full",
+    )
+
+
+class EngagementResponse(BaseModel):
+    """Schema for the result of a flick/clip or its undo"""
+
+    property_id: uuid.UUID
+    kind: str = Field(..., description="flick or clip")
+    active: bool = Field(..., description="Whether the user now has it set")
+    changed: bool = Field(
+        ..., description="False when the request repeated the current state"
+    )
+    count: int = Field(..., description="The listing's flick or clip count")
+
+
+class EngagementState(BaseModel):
+    """Schema for whether the current user flicked/clipped a listing"""
+
+    property_id: uuid.UUID
+    flicked: bool
+    clipped: bool
+
+
+class EngagementStatesResponse(BaseModel):
+    """Schema for a batch engagement lookup, in request order"""
+
+    items: List[EngagementState] = Field(default_factory=list)
+
+
+class MapTileResponse(BaseModel):
+    """Schema for a clustered map tile"""
+
+    z: int
+    x: int
+    y: int
+    features: List[List[Union[float, int, str]]] = Field(
+        default_factory=list,
+        description="[longitude, latitude, count, id] per marker or cluster",
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "z": 11,
+                "x": 1043,
+                "y": 987,
+                "features": [
+                    [3.379192, 6.524379, 42, "11/4174/3950"],
+                    [3.421, 6.4281, 1, "123e4567-e89b-12d3-a456-426614174000"],
+                ],
+            }
+        }
+
+
+PROPERTY_TYPES = ("apartment", "house", "studio", "commercial", "land")
+
+
+class PropertyImportRow(BaseModel):
+    """One listing in a bulk import file (CSV row or NDJSON line)"""
+
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    property_type: str
+    bedrooms: Optional[int] = Field(None, ge=0, le=50)
+    bathrooms: Optional[int] = Field(None, ge=0, le=50)
+    price_monthly: int = Field(..., gt=0, description="Monthly price in kobo")
+    state: str = Field(..., min_length=1, max_length=100)
+    lga: str = Field(..., min_length=1, max_length=100)
+    address: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    media_urls: List[str] = Field(
+        default_factory=list, description='List, or "|"-separated in CSV'
+    )
+    expires_at: Optional[datetime] = Field(
+        None, description="Defaults to 14 days after the import"
+    )
+
+    @field_validator("property_type")
+    @classmethod
+    def validate_property_type(cls, v):
+        v = v.strip().lower()
+        if v not in PROPERTY_TYPES:
+            raise ValueError(
+                f"property_type must be one of {', '.join(PROPERTY_TYPES)}"
+            )
+        return v
+
+    @field_validator("media_urls", mode="before")
+    @classmethod
+    def split_media_urls(cls, v: Any):
+        if v is None:
+            return []
+        if isinstance(v, str):
+            return [url.strip() for url in v.split("|") if url.strip()]
+        return v
+
+    @model_validator(mode="after")
+    def validate_coordinates(self):
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        return self
+
+
+class ImportRowError(BaseModel):
+    """Why one row of an import was rejected"""
+
+    row: int = Field(..., description="1-based data row (header excluded)")
+    errors: List[str] = Field(default_factory=list)
+
+
+class PropertyImportResponse(BaseModel):
+    """Schema for a finished bulk listing import"""
+
+    rows_read: int
+    inserted: int
+    failed: int
+    batches: int
+    duration_seconds: float
+    rows_per_second: float
+    errors: List[ImportRowError] = Field(
+        default_factory=list, description="Rejected rows, capped in number"
+    )
+    errors_truncated: bool = Field(
+        False, description="Whether more rows failed than are listed"
+    )
+
+
+class MediaUploadRequest(BaseModel):
+    """Schema for requesting a presigned media upload"""
+
+    content_type: str = Field(..., description="e.g. image/jpeg or video/mp4")
+    size: int = Field(..., gt=0, description="File size in bytes")
+
+
+class MediaUploadResponse(BaseModel):
+    """Schema for a presigned direct-to-storage upload"""
+
+    key: str = Field(..., description="Object key to attach once uploaded")
+    put_url: str = Field(..., description="URL to PUT the file body to")
+    put_headers: Dict[str, str] = Field(
+        default_factory=dict, description="Headers the PUT must send"
+    )
+    post_url: str = Field(..., description="URL for a multipart form upload")
+    post_fields: Dict[str, str] = Field(
+        default_factory=dict, description="Form fields to send before the file"
+    )
+    expires_in: int = Field(..., description="Seconds the upload URLs stay valid")
+
+
+class MediaAttachRequest(BaseModel):
+    """Schema for attaching uploaded media to a listing"""
+
+    keys: List[str] = Field(..., min_length=1, max_length=20)
+
+
+class MediaAttachResponse(BaseModel):
+    """Schema for a listing's media after an attach"""
+
+    media_urls: List[str] = Field(
+        default_factory=list, description="Signed URLs, in display order"
+    )
+
+
+class ResumableUploadRequest(MediaUploadRequest):
+    """Schema for starting a resumable (multipart) upload"""
+
+    part_size: Optional[int] = Field(
+        None, description="Chunk size in bytes; at least 5 MiB"
+    )
+
+
+class ResumableUploadResponse(BaseModel):
+    """Schema for the state of a resumable upload session"""
+
+    upload_id: str
+    key: str = Field(..., description="Object key the parts assemble into")
+    size: int
+    part_size: int = Field(..., description="Every part but the last is this size")
+    part_count: int
+    committed_parts: List[int] = Field(
+        default_factory=list, description="Part numbers storage already has"
+    )
+    committed_offset: int = Field(
+        ..., description="Bytes committed contiguously from the start"
+    )
+    expires_at: datetime
+
+
+class UploadPartUrlsRequest(BaseModel):
+    """Schema for requesting presigned URLs for upload parts"""
+
+    part_numbers: List[int] = Field(..., min_length=1, max_length=100)
+
+
+class UploadPartUrl(BaseModel):
+    """Presigned URL to PUT one part to"""
+
+    part_number: int
+    url: str
+
+
+class UploadPartUrlsResponse(BaseModel):
+    """Schema for presigned part URLs"""
+
+    parts: List[UploadPartUrl] = Field(default_factory=list)
+    expires_in: int = Field(..., description="Seconds the URLs stay valid")
@@ -1,5 +1,6 @@
 """Pydantic schemas for verification API"""
 
+import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -133,3 +134,38 @@ class VerificationLockStatus(BaseModel):
                 "max_attempts": 3,
             }
         }
+
+
+class AgentBadge(BaseModel):
+    """Schema for an agent verification badge shown on listings"""
+
+    agent_id: uuid.UUID = Field(..., description="Agent user ID")
+    verification_status: str = Field(..., description="Current verification status")
+    credibility_score: int = Field(..., description="Agent credibility score (0-100)")
+    verification_badge_visible: bool = Field(
+        ..., description="Whether verification badge is visible"
+    )
+    is_locked: bool = Field(..., description="Whether verification is currently locked")
+
+
+class AgentBadgeBatchResponse(BaseModel):
+    """Schema for batched agent badge lookups"""
+
+    badges: List[AgentBadge] = Field(
+        default_factory=list, description="Badges in the order requested"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "badges": [
+                    {
+                        "agent_id": "123e4567-e89b-12d3-a456-426614174000",
+                        "verification_status": "verified",
+                        "credibility_score": 50,
+                        "verification_badge_visible": True,
+                        "is_locked": False,
+                    }
+                ]
+            }
+        }
@@ -0,0 +1,113 @@
+"""
+Pre-encoded property card fragments
+
+Every surface that lists properties renders the same card JSON. Each card is
+encoded once and kept as bytes together with the version it was built from,
+so a page is assembled by joining fragments instead of serializing every
+card again. Cards come from the property_cards read model, whose triggers
+set refreshed_at on every write, so (id, refreshed_at) is all a page query
+needs to know which fragments are still current.
+"""
+
+import json
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.cache import TTLCache
+from app.models.property import PropertyCard
+from app.schemas.property import PropertyFeedItem
+
+# Narrow projection that identifies a card's version
+CARD_VERSION_COLUMNS = (PropertyCard.id, PropertyCard.refreshed_at)
+
+CARD_CACHE_MAX_ENTRIES = 20000
+# Versions make entries self-invalidating; the TTL only bounds memory held
+# by listings nobody requests any more
+CARD_CACHE_TTL_SECONDS = 3600
+
+
+def card_version(row):
+    """Version of a card row; changes on every read-model write"""
+    return row.refreshed_at
+
+
+def encode_card(card: Dict) -> bytes:
+    """Encode a card dict exactly as it appears inside a feed response"""
+    return PropertyFeedItem(**card).model_dump_json().encode("utf-8")
+
+
+def splice_page(
+    fragments: Sequence[bytes],
+    has_more: bool,
+    next_cursor: Optional[str],
+    facets: Optional[Dict] = None,
+) -> bytes:
+    """Assemble a PropertyFeedResponse body from encoded cards"""
+    tail = json.dumps(
+        {
+            "count": len(fragments),
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            "facets": facets,
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return b'{"items":[' + b",".join(fragments) + b"]," + tail[1:].encode("utf-8")
+
+
+class CardFragmentCache:
+    """Per-process cache of encoded cards keyed by property id and version"""
+
+    def __init__(
+        self,
+        max_entries: int = CARD_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = CARD_CACHE_TTL_SECONDS,
+    ):
+        self._fragments = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    def render(
+        self,
+        rows: Sequence,
+        load_cards: Callable[[List[uuid.UUID]], Iterable[Tuple[object, Dict]]],
+    ) -> List[bytes]:
+        """
+        Encoded cards for rows, in order
+
+        Args:
+            rows: Page rows with at least the CARD_VERSION_COLUMNS
+            load_cards: Given the ids whose fragments are missing or
+                outdated, returns (row, card dict) pairs for them; each row
+                must carry the CARD_VERSION_COLUMNS
+
+        Returns:
+            One fragment per row; rows whose card could not be loaded (e.g.
+            deleted in between) are skipped
+        """
+        cached = self._fragments.get_many(row.id for row in rows)
+        fragments: Dict[uuid.UUID, bytes] = {}
+        missing = []
+        for row in rows:
+            entry = cached.get(row.id)
+            if entry is not None and entry[0] == card_version(row):
+                fragments[row.id] = entry[1]
+            else:
+                missing.append(row.id)
+
+        if missing:
+            loaded = {}
+            for row, card in load_cards(missing):
+                fragment = encode_card(card)
+                # Keyed by the version of what was loaded, which may be newer
+                # than the version row if the listing changed in between
+                loaded[row.id] = (card_version(row), fragment)
+                fragments[row.id] = fragment
+            self._fragments.set_many(loaded)
+
+        return [fragments[row.id] for row in rows if row.id in fragments]
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+
+card_fragment_cache = CardFragmentCache()
@@ -0,0 +1,511 @@
+"""
+Near-duplicate listing detection
+
+Reposted listings are found without comparing every pair:
+
+- Text: the normalized title, description and address are cut into
+  character shingles and summarized by a NUM_PERMUTATIONS-value MinHash
+  signature. The signature is split into LSH_BANDS bands of LSH_ROWS values
+  and each band hashes to a bucket, so two listings with shingle Jaccard
+  similarity s share a bucket with probability 1 - (1 - s^r)^b: about
+  0.9998 at s = 0.8 and 0.12 at s = 0.3.
+- Photos: the dHash of each of the first MAX_IMAGES photos is split into
+  IMAGE_CHUNKS 16-bit chunks, each its own band, so hashes within 3 bits
+  always share a chunk.
+
+Buckets live in property_lsh_buckets, so finding a listing's candidates is
+one indexed lookup however large the catalog is. Only candidates are
+compared in full; pairs at or above TEXT_SIMILARITY_THRESHOLD or within
+IMAGE_MAX_DISTANCE are recorded in property_duplicates, the newer listing
+pointing at the older one.
+
+New and changed listings arrive through PROPERTY_CHANGED and are checked by
+a background task; unchanged inputs (same source_hash) are skipped. scan()
+walks the whole catalog.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from botocore.exceptions import ClientError
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask
+from app.core.config import settings
+from app.core.events import subscribe
+from app.core.images import dhash
+from app.core.storage import get_storage_client
+from app.models.base import SessionLocal
+from app.models.property import (
+    Property,
+    PropertyDuplicate,
+    PropertyFingerprint,
+    PropertyLshBucket,
+)
+from app.services.image_derivatives import derivative_key, is_image_key
+from app.services.media import is_storage_key
+from app.services.property_events import PROPERTY_CHANGED
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is in requirements.txt
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the fingerprint inputs or parameters change to re-fingerprint
+FINGERPRINT_VERSION = 1
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 5
+
+MAX_IMAGES = 3
+IMAGE_CHUNKS = 4
+# Image bands are numbered after the text bands
+IMAGE_BAND_OFFSET = 100
+# Near-uniform photos (placeholders, blank walls) hash to almost all zeros
+# or ones and would collide with each other
+MIN_IMAGE_BITS = 4
+# Photos are hashed from this thumbnail, far cheaper to fetch than the original
+HASH_THUMBNAIL_WIDTH = 320
+
+TEXT_SIMILARITY_THRESHOLD = 0.8
+# Up to 3 differing bits is always found; 4-5 when the bits cluster
+IMAGE_MAX_DISTANCE = 5
+MAX_CANDIDATES = 100
+
+CHECK_INTERVAL_SECONDS = 30
+SCAN_BATCH_SIZE = 500
+
+_PRIME = (1 << 31) - 1
+_random = random.Random(20240601)
+_PERMUTATIONS = [
+    (_random.randrange(1, _PRIME), _random.randrange(0, _PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Spellings agents use interchangeably
+_SYNONYMS = {
+    "bedroom": "bed",
+    "bedrooms": "bed",
+    "bdrm": "bed",
+    "bathroom": "bath",
+    "bathrooms": "bath",
+    "flat": "apartment",
+    "apt": "apartment",
+    "and": "",
+    "the": "",
+    "a": "",
+}
+
+
+def normalize_text(*parts: Optional[str]) -> str:
+    """Lowercase words with punctuation, filler and common synonyms folded"""
+    words = _WORD_RE.findall(" ".join(part for part in parts if part).lower())
+    return " ".join(
+        word for word in (_SYNONYMS.get(word, word) for word in words) if word
+    )
+
+
+def shingles(text: str) -> Set[int]:
+    """32-bit hashes of the text's SHINGLE_SIZE-character shingles"""
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode("utf-8"))} if text else set()
+    return {
+        zlib.crc32(text[start : start + SHINGLE_SIZE].encode("utf-8"))
+        for start in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(hashes: Set[int]) -> List[int]:
+    """MinHash signature of a shingle set; empty for no shingles"""
+    if not hashes:
+        return []
+    if np is not None:
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        a = np.array([a for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+        b = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+        return ((a * values + b) % _PRIME).min(axis=1).tolist()
+    return [min((a * x + b) % _PRIME for x in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    if not first or not second:
+        return 0.0
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+def hamming(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+
+def text_bands(signature: Sequence[int]) -> List[Tuple[int, int]]:
+    """(band, bucket) of each LSH band of a signature"""
+    bands = []
+    for band in range(LSH_BANDS if signature else 0):
+        rows = signature[band * LSH_ROWS : (band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(
+            struct.pack(f"<{LSH_ROWS}I", *rows), digest_size=8
+        ).digest()
+        bands.append((band, int.from_bytes(digest, "little", signed=True)))
+    return bands
+
+
+def image_bands(image_hashes: Iterable[int]) -> Set[Tuple[int, int]]:
+    """(band, bucket) of each 16-bit chunk of each photo hash"""
+    return {
+        (IMAGE_BAND_OFFSET + chunk, (value >> (16 * chunk)) & 0xFFFF)
+        for value in image_hashes
+        for chunk in range(IMAGE_CHUNKS)
+    }
+
+
+def pack_signature(signature: Sequence[int]) -> bytes:
+    return struct.pack(f"<{len(signature)}I", *signature)
+
+
+def unpack_signature(data: bytes) -> List[int]:
+    return list(struct.unpack(f"<{len(data) // 4}I", data))
+
+
+def pack_image_hashes(image_hashes: Sequence[int]) -> bytes:
+    return struct.pack(f"<{len(image_hashes)}Q", *image_hashes)
+
+
+def unpack_image_hashes(data: bytes) -> List[int]:
+    return list(struct.unpack(f"<{len(data) // 8}Q", data or b""))
+
+
+class DuplicateDetectionService:
+    """Maintains the LSH index and records near-duplicate listings"""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        client_factory=get_storage_client,
+        bucket: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.bucket = bucket or settings.STORAGE_BUCKET
+        self._client_factory = client_factory
+        self._dirty: Set[uuid.UUID] = set()
+        self._lock = threading.Lock()
+        self._checker = PeriodicTask(
+            "duplicate-detection", CHECK_INTERVAL_SECONDS, self._check_dirty_now
+        )
+
+    def mark_dirty(self, property_ids: Iterable[uuid.UUID]) -> None:
+        """Queue listings for a duplicate check"""
+        with self._lock:
+            self._dirty.update(property_ids)
+
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    def start(self) -> None:
+        """Start the background checker (idempotent)"""
+        self._checker.start()
+
+    def stop(self) -> None:
+        """Stop the checker; anything still queued is left to the next scan"""
+        self._checker.stop()
+
+    def check(self, db: Session, property_ids: Iterable[uuid.UUID]) -> Dict:
+        """
+        Fingerprint listings, index them and record their duplicates
+
+        Each listing is committed on its own. Listings whose inputs have
+        not changed since they were last fingerprinted are skipped.
+
+        Returns:
+            Dict with checked, unchanged and duplicates counts
+        """
+        property_ids = list(property_ids)
+        counts = {"checked": 0, "unchanged": 0, "duplicates": 0}
+        if not property_ids:
+            return counts
+        rows = (
+            db.query(
+                Property.id,
+                Property.title,
+                Property.description,
+                Property.address,
+                Property.media_urls,
+                Property.created_at,
+            )
+            .filter(Property.id.in_(property_ids))
+            .all()
+        )
+        known = dict(
+            db.query(PropertyFingerprint.property_id, PropertyFingerprint.source_hash)
+            .filter(PropertyFingerprint.property_id.in_(property_ids))
+            .all()
+        )
+        for row in rows:
+            text = normalize_text(row.title, row.description, row.address)
+            image_keys = self._image_keys(row.media_urls)
+            source_hash = self._source_hash(text, image_keys)
+            if known.get(row.id) == source_hash:
+                counts["unchanged"] += 1
+                continue
+
+            signature = minhash(shingles(text))
+            image_hashes, complete = self.image_hashes(image_keys)
+            matches = self._matches(db, row, signature, image_hashes)
+            # An unreadable photo leaves no source hash, so it is retried
+            self._store(
+                db,
+                row.id,
+                source_hash if complete else "",
+                signature,
+                image_hashes,
+            )
+            if matches:
+                self._record(db, matches)
+            db.commit()
+            counts["checked"] += 1
+            counts["duplicates"] += len(matches)
+        return counts
+
+    def scan(self, db: Session, batch_size: int = SCAN_BATCH_SIZE) -> Dict:
+        """
+        Check every listing in keyset batches
+
+        Returns:
+            Dict with checked, unchanged, duplicates and duration_seconds
+        """
+        started = time.monotonic()
+        totals = {"checked": 0, "unchanged": 0, "duplicates": 0}
+        last_id = None
+        while True:
+            query = db.query(Property.id)
+            if last_id is not None:
+                query = query.filter(Property.id > last_id)
+            ids = [row.id for row in query.order_by(Property.id).limit(batch_size)]
+            if not ids:
+                break
+            for name, count in self.check(db, ids).items():
+                totals[name] += count
+            last_id = ids[-1]
+
+        result = {**totals, "duration_seconds": round(time.monotonic() - started, 3)}
+        logger.info("Duplicate scan finished: %s", result)
+        return result
+
+    def image_hashes(self, image_keys: Sequence[str]) -> Tuple[List[int], bool]:
+        """
+        dHashes of photos, preferring their small JPEG thumbnails
+
+        Returns:
+            (informative hashes, whether every photo could be read)
+        """
+        hashes, complete = [], True
+        client = self._client_factory()
+        for key in image_keys:
+            try:
+                value = dhash(self._read_photo(client, key))
+            except Exception as e:
+                logger.warning("Could not hash photo %s: %s", key, e)
+                complete = False
+                continue
+            if MIN_IMAGE_BITS <= bin(value).count("1") <= 64 - MIN_IMAGE_BITS:
+                hashes.append(value)
+        return hashes, complete
+
+    def _read_photo(self, client, key: str) -> bytes:
+        try:
+            thumbnail = derivative_key(key, HASH_THUMBNAIL_WIDTH, "jpg")
+            return client.get_object(Bucket=self.bucket, Key=thumbnail)["Body"].read()
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey"):
+                raise
+        return client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    @staticmethod
+    def _image_keys(media_urls: Optional[Sequence[str]]) -> List[str]:
+        keys = [
+            key for key in media_urls or [] if is_storage_key(key) and is_image_key(key)
+        ]
+        return keys[:MAX_IMAGES]
+
+    @staticmethod
+    def _source_hash(text: str, image_keys: Sequence[str]) -> str:
+        source = "\n".join([str(FINGERPRINT_VERSION), text, *image_keys])
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+    def _matches(
+        self, db: Session, row, signature: List[int], image_hashes: List[int]
+    ) -> List[Dict]:
+        """Duplicate pairs between a listing and its LSH candidates"""
+        bands = text_bands(signature) + sorted(image_bands(image_hashes))
+        if not bands:
+            return []
+        buckets = PropertyLshBucket.__table__
+        hits = func.count().label("hits")
+        candidate_ids = [
+            candidate.property_id
+            for candidate in db.execute(
+                select(buckets.c.property_id, hits)
+                .where(
+                    tuple_(buckets.c.band, buckets.c.bucket).in_(bands),
+                    buckets.c.property_id != row.id,
+                )
+                .group_by(buckets.c.property_id)
+                .order_by(hits.desc())
+                .limit(MAX_CANDIDATES)
+            )
+        ]
+        if not candidate_ids:
+            return []
+
+        fingerprints = PropertyFingerprint.__table__
+        properties = Property.__table__
+        candidates = db.execute(
+            select(
+                fingerprints.c.property_id,
+                fingerprints.c.minhash,
+                fingerprints.c.image_hashes,
+                properties.c.created_at,
+            )
+            .join(properties, properties.c.id == fingerprints.c.property_id)
+            .where(fingerprints.c.property_id.in_(candidate_ids))
+        ).all()
+
+        matches = []
+        for candidate in candidates:
+            text_similarity = similarity(signature, unpack_signature(candidate.minhash))
+            distances = [
+                hamming(mine, theirs)
+                for mine in image_hashes
+                for theirs in unpack_image_hashes(candidate.image_hashes)
+            ]
+            image_distance = min(distances) if distances else None
+            if text_similarity < TEXT_SIMILARITY_THRESHOLD and (
+                image_distance is None or image_distance > IMAGE_MAX_DISTANCE
+            ):
+                continue
+            newer, older = self._order(row, candidate)
+            matches.append(
+                {
+                    "property_id": newer,
+                    "duplicate_of": older,
+                    "text_similarity": text_similarity,
+                    "image_distance": image_distance,
+                    "status": "pending",
+                }
+            )
+        return matches
+
+    @staticmethod
+    def _order(row, candidate) -> Tuple[uuid.UUID, uuid.UUID]:
+        """(newer, older) listing ids of a pair"""
+        mine = (row.created_at is not None, row.created_at, str(row.id))
+        theirs = (
+            candidate.created_at is not None,
+            candidate.created_at,
+            str(candidate.property_id),
+        )
+        if mine[0] and theirs[0]:
+            newer_is_mine = (mine[1], mine[2]) >= (theirs[1], theirs[2])
+        else:
+            # Unknown creation time: order by id for a stable direction
+            newer_is_mine = mine[2] >= theirs[2]
+        if newer_is_mine:
+            return row.id, candidate.property_id
+        return candidate.property_id, row.id
+
+    @staticmethod
+    def _store(
+        db: Session,
+        property_id: uuid.UUID,
+        source_hash: str,
+        signature: List[int],
+        image_hashes: List[int],
+    ) -> None:
+        """Replace a listing's fingerprint and buckets"""
+        buckets = PropertyLshBucket.__table__
+        db.execute(delete(buckets).where(buckets.c.property_id == property_id))
+        bands = text_bands(signature) + sorted(image_bands(image_hashes))
+        if bands:
+            db.execute(
+                insert(buckets),
+                [
+                    {"band": band, "bucket": bucket, "property_id": property_id}
+                    for band, bucket in bands
+                ],
+            )
+        fingerprints = PropertyFingerprint.__table__
+        stmt = pg_insert(fingerprints).values(
+            property_id=property_id,
+            source_hash=source_hash,
+            minhash=pack_signature(signature),
+            image_hashes=pack_image_hashes(image_hashes),
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[fingerprints.c.property_id],
+                set_={
+                    "source_hash": stmt.excluded.source_hash,
+                    "minhash": stmt.excluded.minhash,
+                    "image_hashes": stmt.excluded.image_hashes,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+    @staticmethod
+    def _record(db: Session, matches: List[Dict]) -> None:
+        """Upsert detected pairs, keeping any moderation status"""
+        duplicates = PropertyDuplicate.__table__
+        stmt = pg_insert(duplicates)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[duplicates.c.property_id, duplicates.c.duplicate_of],
+                set_={
+                    "text_similarity": stmt.excluded.text_similarity,
+                    "image_distance": stmt.excluded.image_distance,
+                },
+            ),
+            matches,
+        )
+
+    def _check_dirty_now(self) -> None:
+        with self._lock:
+            property_ids, self._dirty = self._dirty, set()
+        if not property_ids:
+            return
+        db = self.session_factory()
+        try:
+            self.check(db, property_ids)
+        except Exception:
+            db.rollback()
+            self.mark_dirty(property_ids)
+            raise
+        finally:
+            db.close()
+
+
+duplicate_detection_service = DuplicateDetectionService()
+
+
+def _on_property_changed(changes: Iterable[Dict]) -> None:
+    duplicate_detection_service.mark_dirty(
+        change["id"] for change in changes if change.get("change") != "deleted"
+    )
+
+
+subscribe(PROPERTY_CHANGED, _on_property_changed)
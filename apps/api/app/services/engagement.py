@@ -0,0 +1,148 @@
+"""
+Flicks (likes) and clips (saves) of listings
+
+Both are set membership: a user has flicked a listing or not. Writes are
+single idempotent statements, so retries and double taps are harmless and
+there is no check-then-insert race:
+
+- adding is INSERT ... ON CONFLICT (property_id, user_id) DO NOTHING
+  RETURNING, which returns a row only when the flick is new;
+- removing is DELETE ... RETURNING, which returns a row only when one
+  existed.
+
+The per-listing counters are not touched here: the migration 013 triggers
+adjust property_cards.flick_count / clip_count in the same transaction as
+the insert or delete, so they only move on a real change. A change is
+published as PROPERTY_ENGAGEMENT_CHANGED once committed, which re-ranks the
+listing and invalidates its cached pages.
+
+Whether the current user flicked or clipped each card on a page is read in
+one query for the whole page (engagement_states) rather than per card,
+and is kept out of the shared feed cache.
+"""
+
+import uuid
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.engagement import PropertyClip, PropertyFlick
+from app.models.property import Property, PropertyCard
+from app.services.property_events import publish_engagement_change
+
+# kind -> (membership model, property_cards counter)
+ENGAGEMENT_KINDS = {
+    "flick": (PropertyFlick, PropertyCard.flick_count),
+    "clip": (PropertyClip, PropertyCard.clip_count),
+}
+MAX_STATE_LOOKUP = 100
+
+
+class EngagementService:
+    """Idempotent flick/clip writes and per-user lookups"""
+
+    def set_engagement(
+        self,
+        db: Session,
+        kind: str,
+        property_id: uuid.UUID,
+        user_id: uuid.UUID,
+        active: bool,
+    ) -> Dict:
+        """
+        Flick/clip (active=True) or undo it (active=False)
+
+        Args:
+            db: Database session
+            kind: "flick" or "clip"
+            property_id: Listing
+            user_id: Acting user
+            active: Desired state; already being in it is not an error
+
+        Returns:
+            Dict matching EngagementResponse
+
+        Raises:
+            LookupError: If the listing does not exist
+        """
+        model, counter = ENGAGEMENT_KINDS[kind]
+        table = model.__table__
+        if active:
+            stmt = (
+                pg_insert(table)
+                .values(id=uuid.uuid4(), property_id=property_id, user_id=user_id)
+                .on_conflict_do_nothing(
+                    index_elements=[table.c.property_id, table.c.user_id]
+                )
+                .returning(table.c.id)
+            )
+        else:
+            stmt = (
+                delete(table)
+                .where(table.c.property_id == property_id, table.c.user_id == user_id)
+                .returning(table.c.id)
+            )
+        try:
+            changed = db.execute(stmt).first() is not None
+            db.commit()
+        except IntegrityError:
+            # Foreign key: the listing (or user) does not exist
+            db.rollback()
+            raise LookupError("Property not found")
+
+        card = db.execute(
+            select(counter.label("count"), PropertyCard.state).where(
+                PropertyCard.id == property_id
+            )
+        ).first()
+        if card is None and not self._exists(db, property_id):
+            raise LookupError("Property not found")
+        if changed:
+            publish_engagement_change(property_id, card.state if card else None)
+        return {
+            "property_id": property_id,
+            "kind": kind,
+            "active": active,
+            "changed": changed,
+            "count": card.count if card else 0,
+        }
+
+    def engagement_states(
+        self, db: Session, user_id: uuid.UUID, property_ids: Iterable[uuid.UUID]
+    ) -> List[Dict]:
+        """
+        Whether a user flicked and clipped each listing, in one query
+
+        Returns:
+            Dicts matching EngagementState, in the order of property_ids
+        """
+        property_ids = list(dict.fromkeys(property_ids))
+        if not property_ids:
+            return []
+        lookups = [
+            select(model.property_id, literal(kind).label("kind")).where(
+                model.user_id == user_id, model.property_id.in_(property_ids)
+            )
+            for kind, (model, _) in ENGAGEMENT_KINDS.items()
+        ]
+        found = {(row.property_id, row.kind) for row in db.execute(union_all(*lookups))}
+        return [
+            {
+                "property_id": property_id,
+                "flicked": (property_id, "flick") in found,
+                "clipped": (property_id, "clip") in found,
+            }
+            for property_id in property_ids
+        ]
+
+    @staticmethod
+    def _exists(db: Session, property_id: uuid.UUID) -> bool:
+        return (
+            db.query(Property.id).filter(Property.id == property_id).first() is not None
+        )
+
+
+engagement_service = EngagementService()
@@ -0,0 +1,197 @@
+"""
+Facet counts for the listing filter UI
+
+All facets for a filter set come from one grouped query over property_cards:
+an inner select tags each live listing of the state with its bedroom bucket,
+price band and whether it passes each filter group, and the outer query
+counts with GROUPING SETS ((property_type), (bedrooms), (price_band), (lga),
+()). Facets are disjunctive: each facet's counts apply every filter except
+its own (so picking "apartment" still shows how many houses there are),
+done with count(*) FILTER (WHERE ...) per facet in the same pass.
+
+Results are cached per (state, filter signature) for FACET_CACHE_TTL_SECONDS.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.property import PropertyCard
+from app.services.property_feed import property_feed_service
+
+# Bedroom counts at or above this are reported together as "5+"
+MAX_BEDROOM_BUCKET = 5
+
+# (value, lower, upper) in kobo; upper is exclusive, None is open-ended
+PRICE_BANDS: Tuple[Tuple[str, int, Optional[int]], ...] = (
+    ("under_100k", 0, 10_000_000),
+    ("100k_250k", 10_000_000, 25_000_000),
+    ("250k_500k", 25_000_000, 50_000_000),
+    ("500k_1m", 50_000_000, 100_000_000),
+    ("1m_plus", 100_000_000, None),
+)
+
+FACETS = ("property_type", "bedrooms", "price_band", "lga")
+# Filter group each facet ignores
+_OWN_FILTER = {
+    "property_type": "property_type",
+    "bedrooms": "bedrooms",
+    "price_band": "price",
+    "lga": "lga",
+}
+# GROUPING() bitmask (leftmost argument is the high bit) -> facet
+_GROUPING_FACETS = {
+    0b0111: "property_type",
+    0b1011: "bedrooms",
+    0b1101: "price_band",
+    0b1110: "lga",
+    0b1111: "total",
+}
+
+
+def bedroom_bucket(bedrooms):
+    """Bedroom count capped at MAX_BEDROOM_BUCKET"""
+    return case(
+        (bedrooms >= MAX_BEDROOM_BUCKET, MAX_BEDROOM_BUCKET),
+        else_=bedrooms,
+    )
+
+
+def price_band(price):
+    """PRICE_BANDS value a price falls into"""
+    return case(
+        *[
+            (price < upper, value)
+            for value, _, upper in PRICE_BANDS
+            if upper is not None
+        ],
+        else_=PRICE_BANDS[-1][0],
+    )
+
+
+def filter_signature(**filters) -> str:
+    """Stable key for a filter set"""
+    canonical = json.dumps(
+        {name: value for name, value in filters.items() if value is not None},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class FacetService:
+    """Computes and caches disjunctive facet counts for the feed filters"""
+
+    def __init__(self, ttl_seconds: float = settings.FACET_CACHE_TTL_SECONDS):
+        self.cache = TTLCache(ttl_seconds=ttl_seconds, max_entries=5000)
+
+    def facet_statement(self, **filters):
+        """The single GROUPING SETS query for a filter set"""
+        conditions = property_feed_service.filter_conditions(PropertyCard, **filters)
+        # Only live listings of the state are ever counted; every other
+        # filter becomes a per-row flag so each facet can skip its own
+        passes = {
+            group: and_(*group_conditions).label(f"{group}_ok")
+            for group, group_conditions in conditions.items()
+            if group not in ("live", "state") and group_conditions
+        }
+        tagged = (
+            select(
+                PropertyCard.property_type,
+                bedroom_bucket(PropertyCard.bedrooms).label("bedrooms"),
+                price_band(PropertyCard.price_monthly).label("price_band"),
+                PropertyCard.lga,
+                *passes.values(),
+            )
+            .where(*conditions["live"], *conditions["state"])
+            .subquery()
+        )
+
+        def counted(skip: Optional[str]):
+            flags = [tagged.c[f"{group}_ok"] for group in passes if group != skip]
+            return func.count().filter(and_(*flags)) if flags else func.count()
+
+        keys = [tagged.c[facet] for facet in FACETS]
+        return select(
+            *keys,
+            func.grouping(*keys).label("grouping"),
+            *(counted(_OWN_FILTER[facet]).label(f"{facet}_count") for facet in FACETS),
+            counted(None).label("total_count"),
+        ).group_by(func.grouping_sets(*(tuple_(key) for key in keys), tuple_()))
+
+    def get_facets(self, db: Session, **filters) -> Dict[str, Any]:
+        """
+        Facet counts for the feed filters, from cache when fresh
+
+        Args:
+            db: Database session
+            **filters: Keyword filters accepted by
+                PropertyFeedService.apply_filters
+
+        Returns:
+            Dict matching FeedFacets
+        """
+        key = (filters.get("state"), filter_signature(**filters))
+        facets = self.cache.get(key)
+        if facets is None:
+            facets = self.fold(db.execute(self.facet_statement(**filters)).all())
+            self.cache.set(key, facets)
+        return facets
+
+    @staticmethod
+    def fold(rows) -> Dict[str, Any]:
+        """Turn GROUPING SETS rows into the FeedFacets shape"""
+        counts: Dict[str, Dict[Any, int]] = {facet: {} for facet in FACETS}
+        total = 0
+        for row in rows:
+            facet = _GROUPING_FACETS.get(row.grouping)
+            if facet == "total":
+                total = row.total_count
+            elif facet is not None:
+                value = getattr(row, facet)
+                count = getattr(row, f"{facet}_count")
+                if value is not None and count:
+                    counts[facet][value] = count
+
+        def by_count(items) -> List[Dict]:
+            return [
+                {"value": str(value), "count": count}
+                for value, count in sorted(items, key=lambda item: (-item[1], item[0]))
+            ]
+
+        bands = counts["price_band"]
+        return {
+            "total": total,
+            "property_type": by_count(counts["property_type"].items()),
+            "bedrooms": [
+                {
+                    "value": (
+                        f"{bedrooms}+"
+                        if bedrooms >= MAX_BEDROOM_BUCKET
+                        else str(bedrooms)
+                    ),
+                    "count": count,
+                }
+                for bedrooms, count in sorted(counts["bedrooms"].items())
+            ],
+            "price_band": [
+                {
+                    "value": value,
+                    "count": bands[value],
+                    # Inclusive, like the feed's min_price/max_price filters
+                    "min_price": lower,
+                    "max_price": upper - 1 if upper is not None else None,
+                }
+                for value, lower, upper in PRICE_BANDS
+                if value in bands
+            ],
+            "lga": by_count(counts["lga"].items()),
+        }
+
+
+facet_service = FacetService()
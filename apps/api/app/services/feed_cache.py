@@ -0,0 +1,76 @@
+"""
+Response caching for the property feed and property detail endpoints
+
+Feed pages are cached per state scope ("feed:Lagos", or "feed:*" for pages
+without a state filter) and detail responses per property. Property writes,
+expiry and engagement changes invalidate the affected scopes; a change to an
+agent's credibility invalidates everything since badges appear on every card.
+Changes only carry a listing's current state, so pages of a state the listing
+just moved out of catch up within FEED_CACHE_TTL_SECONDS.
+"""
+
+import hashlib
+import json
+import uuid
+from typing import Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+from app.core.events import subscribe
+from app.core.response_cache import ResponseCache
+from app.services.property_events import (
+    PROPERTY_CHANGED,
+    PROPERTY_ENGAGEMENT_CHANGED,
+)
+from app.services.verification_status import AGENT_CREDIBILITY_CHANGED
+
+UNFILTERED_FEED_SCOPE = "feed:*"
+
+feed_cache = ResponseCache(
+    "reent:feed",
+    ttl_seconds=settings.FEED_CACHE_TTL_SECONDS,
+    l1_ttl_seconds=settings.FEED_CACHE_L1_TTL_SECONDS,
+)
+
+
+def feed_scope(state: Optional[str]) -> str:
+    """Invalidation scope of a feed page"""
+    return f"feed:{state}" if state else UNFILTERED_FEED_SCOPE
+
+
+def detail_scope(property_id: uuid.UUID) -> str:
+    """Invalidation scope of a property detail response"""
+    return f"property:{property_id}"
+
+
+def feed_key(**params) -> str:
+    """Stable key for a feed request's parameters"""
+    canonical = json.dumps(
+        {name: value for name, value in params.items() if value not in (None, [])},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def scopes_for_changes(changes: Iterable[Dict]) -> Set[str]:
+    """Every scope a batch of property changes can affect"""
+    scopes = set()
+    for change in changes:
+        scopes.add(detail_scope(change["id"]))
+        scopes.add(UNFILTERED_FEED_SCOPE)
+        if change.get("state"):
+            scopes.add(feed_scope(change["state"]))
+    return scopes
+
+
+def _on_property_changed(changes: Iterable[Dict]) -> None:
+    feed_cache.invalidate(scopes_for_changes(changes))
+
+
+def _on_credibility_changed(agent_id: uuid.UUID) -> None:
+    feed_cache.invalidate_all()
+
+
+subscribe(PROPERTY_CHANGED, _on_property_changed)
+subscribe(PROPERTY_ENGAGEMENT_CHANGED, _on_property_changed)
+subscribe(AGENT_CREDIBILITY_CHANGED, _on_credibility_changed)
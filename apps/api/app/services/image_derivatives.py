@@ -0,0 +1,265 @@
+"""
+Thumbnails and other derivatives of listing photos
+
+Each attached photo is resized to DERIVATIVE_WIDTHS in WebP and JPEG and
+stored under keys derived from the source key (derivative_key), so a card
+can name its thumbnails without a lookup. Resizing is CPU-bound and runs on
+a process pool; downloads and uploads run on a small thread pool in front
+of it.
+
+Work is skipped by content hash: a manifest next to the derivatives records
+the SHA-256 of the source they were made from, and a by-hash index points
+at the first source with that content, so the same photo attached to
+another listing is copied server-side instead of rendered again. The
+manifest also records the source's ETag and size, so an unchanged source is
+recognised from a HEAD request without downloading it.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.images import DERIVATIVE_FORMATS, render_derivatives
+from app.core.storage import get_storage_client
+
+logger = logging.getLogger(__name__)
+
+# Card thumbnails on 3G need the small ones; 1080 covers full-screen views
+DERIVATIVE_WIDTHS = (320, 640, 1080)
+# The format cards link to; JPEG copies exist for link previews
+CARD_THUMBNAIL_FORMAT = "webp"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+DERIVATIVE_PREFIX = "derivatives"
+
+_CONTENT_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+# Derivative keys are never rewritten with different content
+_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def is_image_key(key: str) -> bool:
+    """Whether an object key names a photo derivatives are made for"""
+    return key.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def derivative_key(source_key: str, width: int, fmt: str) -> str:
+    """Deterministic key of one derivative of a source object"""
+    return f"{DERIVATIVE_PREFIX}/{source_key}/{width}.{fmt}"
+
+
+def manifest_key(source_key: str) -> str:
+    return f"{DERIVATIVE_PREFIX}/{source_key}/manifest.json"
+
+
+def hash_index_key(content_hash: str) -> str:
+    return f"{DERIVATIVE_PREFIX}/by-hash/{content_hash}.json"
+
+
+class ImageDerivativeService:
+    """Renders, stores and deduplicates listing photo derivatives"""
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        client_factory: Callable = get_storage_client,
+        workers: int = settings.IMAGE_DERIVATIVE_WORKERS,
+        process_pool_factory: Optional[Callable[[], Executor]] = None,
+    ):
+        self.bucket = bucket or settings.STORAGE_BUCKET
+        self.workers = workers
+        self._client_factory = client_factory
+        self._process_pool_factory = process_pool_factory or (
+            # spawn: forking a threaded server process is unsafe
+            lambda: ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        )
+        self._processes: Optional[Executor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Source keys already handled by this process
+        self._done = TTLCache(ttl_seconds=3600, max_entries=50000)
+
+    def process(self, source_key: str) -> str:
+        """
+        Make sure a source object has its derivatives
+
+        Returns:
+            "rendered", "copied" (from an identical source), "skipped"
+            (already done) or "unsupported" (not a photo)
+        """
+        if not is_image_key(source_key):
+            return "unsupported"
+        if self._done.get(source_key):
+            return "skipped"
+
+        manifest = self._get_json(manifest_key(source_key))
+        if manifest is not None and manifest.get("source") == self._head(source_key):
+            self._done.set(source_key, True)
+            return "skipped"
+
+        data, source = self._download(source_key)
+        content_hash = hashlib.sha256(data).hexdigest()
+        if manifest is not None and manifest.get("sha256") == content_hash:
+            # Same content under a new ETag (or a manifest from before ETags
+            # were recorded): note it so the next check is a HEAD again
+            self._put_json(manifest_key(source_key), {**manifest, "source": source})
+            self._done.set(source_key, True)
+            return "skipped"
+
+        status = "rendered"
+        index = self._get_json(hash_index_key(content_hash))
+        original = index.get("source_key") if index else None
+        if (
+            original
+            and original != source_key
+            and self._copy_from(original, source_key)
+        ):
+            status = "copied"
+        else:
+            rendered = (
+                self._process_pool()
+                .submit(render_derivatives, data, DERIVATIVE_WIDTHS)
+                .result()
+            )
+            for (width, fmt), body in rendered.items():
+                self._put(derivative_key(source_key, width, fmt), body, fmt)
+            self._put_json(hash_index_key(content_hash), {"source_key": source_key})
+
+        # Written last, so a crash part way through is redone next time
+        self._put_json(
+            manifest_key(source_key),
+            {
+                "sha256": content_hash,
+                "source": source,
+                "widths": list(DERIVATIVE_WIDTHS),
+                "formats": list(DERIVATIVE_FORMATS),
+            },
+        )
+        self._done.set(source_key, True)
+        return status
+
+    def process_many(self, source_keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Process keys concurrently and wait for all of them
+
+        Returns:
+            Count per process() status, plus "failed"
+        """
+        counts: Dict[str, int] = {}
+        futures = [
+            self._thread_pool().submit(self.process, key)
+            for key in dict.fromkeys(source_keys)
+        ]
+        for future in futures:
+            try:
+                status = future.result()
+            except Exception:
+                logger.exception("Image derivatives failed")
+                status = "failed"
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def submit(self, source_keys: Iterable[str]) -> None:
+        """Process photo keys in the background (e.g. right after attach)"""
+        for key in dict.fromkeys(source_keys):
+            if is_image_key(key):
+                self._thread_pool().submit(self._process_logged, key)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Finish queued work and stop the pools"""
+        with self._lock:
+            threads, processes = self._threads, self._processes
+            self._threads = self._processes = None
+        if threads is not None:
+            threads.shutdown(wait=wait)
+        if processes is not None:
+            processes.shutdown(wait=wait)
+
+    def _process_logged(self, source_key: str) -> None:
+        try:
+            self.process(source_key)
+        except Exception:
+            logger.exception("Image derivatives failed for %s", source_key)
+
+    def _process_pool(self) -> Executor:
+        with self._lock:
+            if self._processes is None:
+                self._processes = self._process_pool_factory()
+            return self._processes
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                # Enough I/O in flight to keep every render process busy
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self.workers * 2, thread_name_prefix="derivatives"
+                )
+            return self._threads
+
+    def _copy_from(self, original: str, source_key: str) -> bool:
+        """Copy an identical source's derivatives; False if they are gone"""
+        if self._get_json(manifest_key(original)) is None:
+            return False
+        client = self._client_factory()
+        for width in DERIVATIVE_WIDTHS:
+            for fmt in DERIVATIVE_FORMATS:
+                client.copy_object(
+                    Bucket=self.bucket,
+                    Key=derivative_key(source_key, width, fmt),
+                    CopySource={
+                        "Bucket": self.bucket,
+                        "Key": derivative_key(original, width, fmt),
+                    },
+                )
+        return True
+
+    def _get(self, key: str) -> bytes:
+        response = self._client_factory().get_object(Bucket=self.bucket, Key=key)
+        return response["Body"].read()
+
+    def _head(self, key: str) -> Dict:
+        """ETag and size of a source object, as recorded in its manifest"""
+        response = self._client_factory().head_object(Bucket=self.bucket, Key=key)
+        return {"etag": response["ETag"], "size": response["ContentLength"]}
+
+    def _download(self, key: str) -> Tuple[bytes, Dict]:
+        """Body of a source object with the ETag and size of that body"""
+        response = self._client_factory().get_object(Bucket=self.bucket, Key=key)
+        source = {"etag": response["ETag"], "size": response["ContentLength"]}
+        return response["Body"].read(), source
+
+    def _get_json(self, key: str) -> Optional[Dict]:
+        try:
+            return json.loads(self._get(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    def _put(self, key: str, body: bytes, fmt: str) -> None:
+        self._client_factory().put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=body,
+            ContentType=_CONTENT_TYPES[fmt],
+            CacheControl=_CACHE_CONTROL,
+        )
+
+    def _put_json(self, key: str, value: Dict) -> None:
+        self._client_factory().put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=json.dumps(value).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+
+image_derivative_service = ImageDerivativeService()
@@ -0,0 +1,206 @@
+"""
+Set-based listing expiry and auto-extension
+
+Applies the rules behind Property.is_expired and should_auto_extend to the
+whole table with chunked UPDATE ... RETURNING statements instead of loading
+ORM objects:
+
+1. Live listings with more than AUTO_EXTEND_MIN_VIEWS_7D weekly views that
+   expire within EXTEND_LOOKAHEAD are renewed for LISTING_EXTENSION.
+2. Live listings past expires_at are deactivated, and their agents get a
+   property_expired notification inserted in the same transaction.
+
+Each chunk claims its rows with FOR UPDATE SKIP LOCKED, so concurrent
+sweepers split the work instead of blocking on or double-processing rows,
+and a row that has been handled no longer matches, so re-runs are no-ops.
+"""
+
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.engagement import PlatformMetric
+from app.models.property import Property
+from app.services.notifications import notification_service
+from app.services.property_events import publish_property_changes, snapshot
+
+logger = logging.getLogger(__name__)
+
+# Same threshold and renewal period as Property.should_auto_extend/__init__
+AUTO_EXTEND_MIN_VIEWS_7D = 20
+LISTING_EXTENSION = timedelta(days=14)
+# Renew hot listings a little before they lapse so they never blink out
+EXTEND_LOOKAHEAD = timedelta(hours=6)
+
+SWEEP_BATCH_SIZE = 1000
+
+_RETURNING = (
+    Property.__table__.c.id,
+    Property.__table__.c.agent_id,
+    Property.__table__.c.title,
+    Property.__table__.c.state,
+    Property.__table__.c.lga,
+    Property.__table__.c.property_type,
+    Property.__table__.c.latitude,
+    Property.__table__.c.longitude,
+    Property.__table__.c.is_active,
+    Property.__table__.c.expires_at,
+)
+
+
+def _expired_notification(row, now: datetime) -> Dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": row.agent_id,
+        "type": "property_expired",
+        "title": "Your listing has expired",
+        "message": (
+            f'"{row.title}" is no longer visible to renters. '
+            "Renew it to put it back in the feed."
+        ),
+        "data": {"property_id": str(row.id)},
+        "is_read": False,
+        "action_url": f"/properties/{row.id}",
+        "created_at": now,
+    }
+
+
+class ListingSweeper:
+    """Expires and auto-extends listings in index-driven chunks"""
+
+    def __init__(self, clock: Optional[Callable[[], datetime]] = None):
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+
+    def sweep(self, db: Session, batch_size: int = SWEEP_BATCH_SIZE) -> Dict:
+        """
+        Run one extend pass and one expiry pass
+
+        Args:
+            db: Database session
+            batch_size: Rows claimed per UPDATE
+
+        Returns:
+            Counts of extended/expired listings and notifications, plus
+            duration and throughput
+        """
+        started = time.monotonic()
+        now = self.clock()
+        extended = self._run_chunks(db, self._extend_statement, now, batch_size)
+        expired = self._run_chunks(
+            db, self._expire_statement, now, batch_size, notify=True
+        )
+        self._record_metrics(db, now, extended, expired)
+
+        duration = time.monotonic() - started
+        result = {
+            "extended": extended,
+            "expired": expired,
+            "notifications": expired,
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(
+                (extended + expired) / duration if duration > 0 else 0.0, 1
+            ),
+        }
+        logger.info("Listing sweep finished: %s", result)
+        return result
+
+    def _extend_statement(self, now: datetime, batch_size: int):
+        properties = Property.__table__
+        due = (
+            properties.c.is_active,
+            properties.c.expires_at > now,
+            properties.c.expires_at <= now + EXTEND_LOOKAHEAD,
+            properties.c.view_count_7d > AUTO_EXTEND_MIN_VIEWS_7D,
+        )
+        return self._claiming_update(due, batch_size).values(
+            expires_at=now + LISTING_EXTENSION
+        )
+
+    def _expire_statement(self, now: datetime, batch_size: int):
+        properties = Property.__table__
+        due = (properties.c.is_active, properties.c.expires_at <= now)
+        return self._claiming_update(due, batch_size).values(is_active=False)
+
+    def _claiming_update(self, conditions, batch_size: int):
+        """UPDATE of the next batch_size matching rows, skipping locked ones
+
+        The conditions are repeated on the UPDATE so a row changed between
+        the claim and the write is left alone.
+        """
+        properties = Property.__table__
+        claim = (
+            select(properties.c.id)
+            .where(*conditions)
+            .order_by(properties.c.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return (
+            update(properties)
+            .where(properties.c.id.in_(claim.scalar_subquery()), *conditions)
+            .returning(*_RETURNING)
+        )
+
+    def _run_chunks(
+        self,
+        db: Session,
+        build_statement,
+        now: datetime,
+        batch_size: int,
+        notify: bool = False,
+    ) -> int:
+        statement = build_statement(now, batch_size)
+        handled = 0
+        while True:
+            rows = db.execute(statement).all()
+            if rows and notify:
+                notification_service.add(
+                    db, [_expired_notification(row, now) for row in rows]
+                )
+            db.commit()
+            if rows:
+                publish_property_changes(snapshot(row, "updated") for row in rows)
+                handled += len(rows)
+            if len(rows) < batch_size:
+                return handled
+
+    def _record_metrics(
+        self, db: Session, now: datetime, extended: int, expired: int
+    ) -> None:
+        """Add this run's counts to today's platform metrics"""
+        metric_date = datetime(now.year, now.month, now.day)
+        metrics = PlatformMetric.__table__
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "metric_date": metric_date,
+                "metric_type": metric_type,
+                "metric_value": value,
+            }
+            for metric_type, value in (
+                ("listings_auto_extended", extended),
+                ("listings_expired", expired),
+            )
+            if value
+        ]
+        if not rows:
+            return
+        stmt = pg_insert(metrics).values(rows)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["metric_date", "metric_type"],
+                set_={
+                    "metric_value": metrics.c.metric_value + stmt.excluded.metric_value
+                },
+            )
+        )
+        db.commit()
+
+
+listing_sweeper = ListingSweeper()
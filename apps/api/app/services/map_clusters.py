@@ -0,0 +1,349 @@
+"""
+Server-side marker clustering for the property map
+
+Points are projected to Web Mercator and bucketed into a hierarchical grid:
+each 256px tile is split into CELLS_PER_TILE x CELLS_PER_TILE cells, and a
+cell at zoom z is exactly the union of four cells at zoom z + 1. Every cell
+keeps only aggregates (count, coordinate sums and an XOR of member ids), so
+adding or removing a listing touches one cell per zoom level and the
+affected cached tiles are dropped.
+
+Tile requests only read the grid. A background task started with the app
+loads it, delta-syncs every SYNC_INTERVAL_SECONDS and rebuilds it every
+REBUILD_INTERVAL_SECONDS, so a full table scan never runs on a request.
+"""
+
+import math
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask
+from app.core.cache import TTLCache
+from app.core.events import subscribe
+from app.models.base import SessionLocal
+from app.models.property import Property
+from app.services.property_events import PROPERTY_CHANGED
+
+TILE_SIZE = 256
+CELL_PX = 64
+CELLS_PER_TILE = TILE_SIZE // CELL_PX
+
+# Clusters are precomputed up to MAX_CLUSTER_ZOOM; deeper tiles list points
+MAX_CLUSTER_ZOOM = 16
+MAX_TILE_ZOOM = 20
+
+TILE_CACHE_TTL_SECONDS = 300
+SYNC_INTERVAL_SECONDS = 30
+REBUILD_INTERVAL_SECONDS = 3600
+# Re-read a few seconds before the last sync to absorb clock skew
+SYNC_OVERLAP = timedelta(seconds=5)
+COORDINATE_DECIMALS = 6
+
+# Web Mercator stops at about +/-85.05 degrees latitude
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def project(latitude: float, longitude: float) -> Tuple[float, float]:
+    """Project a coordinate to Web Mercator world units in [0, 1)"""
+    latitude = max(min(latitude, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
+    sin_lat = math.sin(math.radians(latitude))
+    x = (longitude + 180.0) / 360.0
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12)
+
+
+def unproject(x: float, y: float) -> Tuple[float, float]:
+    """Inverse of project; returns (latitude, longitude)"""
+    longitude = x * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return latitude, longitude
+
+
+class _Cell:
+    """Aggregate for one grid cell at one zoom level"""
+
+    __slots__ = ("count", "sum_x", "sum_y", "id_xor")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.id_xor = 0
+
+
+class ClusterEngine:
+    """Incrementally maintained hierarchical grid clusters with a tile cache"""
+
+    def __init__(
+        self,
+        max_cluster_zoom: int = MAX_CLUSTER_ZOOM,
+        tile_cache_ttl: float = TILE_CACHE_TTL_SECONDS,
+        session_factory=SessionLocal,
+    ):
+        self.max_cluster_zoom = max_cluster_zoom
+        self.session_factory = session_factory
+        self.tile_cache = TTLCache(ttl_seconds=tile_cache_ttl, max_entries=20000)
+        # zoom -> tile (tx, ty) -> cell (cx, cy) -> aggregate
+        self._grid: List[Dict[Tuple[int, int], Dict[Tuple[int, int], _Cell]]] = [
+            {} for _ in range(max_cluster_zoom + 1)
+        ]
+        # Members of the deepest cells, for tiles beyond max_cluster_zoom
+        self._leaf_members: Dict[Tuple[int, int], Set[uuid.UUID]] = {}
+        self._points: Dict[uuid.UUID, Tuple[float, float]] = {}
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.synced_at: Optional[datetime] = None
+        self._rebuilt_at = 0.0
+        self._refresher = PeriodicTask(
+            "map-clusters", SYNC_INTERVAL_SECONDS, self._refresh_now
+        )
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def upsert(self, property_id: uuid.UUID, latitude: float, longitude: float) -> None:
+        """Add a listing, or move it if it is already on the map"""
+        point = project(latitude, longitude)
+        with self._lock:
+            previous = self._points.get(property_id)
+            if previous == point:
+                return
+            if previous is not None:
+                self._apply(property_id, previous, -1)
+            self._points[property_id] = point
+            self._apply(property_id, point, 1)
+        if previous is not None:
+            self._invalidate_tiles(previous)
+        self._invalidate_tiles(point)
+
+    def remove(self, property_id: uuid.UUID) -> None:
+        """Take a listing off the map (expired, deactivated or deleted)"""
+        with self._lock:
+            point = self._points.pop(property_id, None)
+            if point is None:
+                return
+            self._apply(property_id, point, -1)
+        self._invalidate_tiles(point)
+
+    def get_tile(self, z: int, x: int, y: int) -> Dict:
+        """
+        Return the compact tile payload for z/x/y
+
+        Each feature is [longitude, latitude, count, id] where id is the
+        property id for single listings and "z/cx/cy" for clusters.
+        """
+        key = (z, x, y)
+        tile = self.tile_cache.get(key)
+        if tile is None:
+            tile = {"z": z, "x": x, "y": y, "features": self._build_tile(z, x, y)}
+            self.tile_cache.set(key, tile)
+        return tile
+
+    def apply_change(self, change: Dict) -> None:
+        """Apply one property change snapshot to the map"""
+        expires_at = change.get("expires_at")
+        if expires_at is not None and expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        visible = (
+            change.get("change") != "deleted"
+            and change.get("is_active") is not False
+            and change.get("latitude") is not None
+            and change.get("longitude") is not None
+            and (expires_at is None or expires_at > datetime.now(timezone.utc))
+        )
+        if visible:
+            self.upsert(change["id"], change["latitude"], change["longitude"])
+        else:
+            self.remove(change["id"])
+
+    def rebuild(self, db: Session, batch_size: int = 5000) -> int:
+        """Load every live listing with coordinates, replacing current state
+
+        The new grid is built off to the side and swapped in, so tile reads
+        keep being served from the old grid while the table is streamed.
+        """
+        started_at = datetime.now(timezone.utc)
+        fresh = ClusterEngine(max_cluster_zoom=self.max_cluster_zoom)
+        rows = (
+            db.query(Property.id, Property.latitude, Property.longitude)
+            .filter(
+                Property.is_active,
+                Property.expires_at > started_at,
+                Property.latitude.isnot(None),
+                Property.longitude.isnot(None),
+            )
+            .yield_per(batch_size)
+        )
+        for row in rows:
+            point = project(float(row.latitude), float(row.longitude))
+            fresh._points[row.id] = point
+            fresh._apply(row.id, point, 1)
+        with self._lock:
+            self._grid = fresh._grid
+            self._leaf_members = fresh._leaf_members
+            self._points = fresh._points
+            self.loaded = True
+            self.synced_at = started_at
+            self._rebuilt_at = time.monotonic()
+        self.tile_cache.clear()
+        return len(self._points)
+
+    def sync(self, db: Session) -> int:
+        """Apply listings changed since the last sync (covers other workers)"""
+        if self.synced_at is None:
+            return self.rebuild(db)
+        started_at = datetime.now(timezone.utc)
+        rows = (
+            db.query(
+                Property.id,
+                Property.latitude,
+                Property.longitude,
+                Property.is_active,
+                Property.expires_at,
+            )
+            .filter(Property.updated_at >= self.synced_at - SYNC_OVERLAP)
+            .all()
+        )
+        for row in rows:
+            self.apply_change(
+                {
+                    "id": row.id,
+                    "latitude": (
+                        float(row.latitude) if row.latitude is not None else None
+                    ),
+                    "longitude": (
+                        float(row.longitude) if row.longitude is not None else None
+                    ),
+                    "is_active": row.is_active,
+                    "expires_at": row.expires_at,
+                    "change": "updated",
+                }
+            )
+        self.synced_at = started_at
+        return len(rows)
+
+    def refresh(self, db: Session) -> int:
+        """Load if empty, else delta-sync; rebuild every
+        REBUILD_INTERVAL_SECONDS to drop anything sync missed"""
+        if (
+            not self.loaded
+            or time.monotonic() - self._rebuilt_at >= REBUILD_INTERVAL_SECONDS
+        ):
+            return self.rebuild(db)
+        return self.sync(db)
+
+    def start(self) -> None:
+        """Start the background refresher and load the grid now (idempotent)"""
+        self._refresher.start()
+        self._refresher.wake()
+
+    def stop(self) -> None:
+        """Stop the background refresher"""
+        self._refresher.stop()
+
+    def _refresh_now(self) -> None:
+        db = self.session_factory()
+        try:
+            self.refresh(db)
+        finally:
+            db.close()
+
+    def _apply(self, property_id: uuid.UUID, point: Tuple[float, float], sign: int):
+        x, y = point
+        id_int = property_id.int
+        for z in range(self.max_cluster_zoom + 1):
+            cells_per_axis = (1 << z) * CELLS_PER_TILE
+            cell_key = (int(x * cells_per_axis), int(y * cells_per_axis))
+            tile_key = (cell_key[0] // CELLS_PER_TILE, cell_key[1] // CELLS_PER_TILE)
+            tile = self._grid[z].setdefault(tile_key, {})
+            cell = tile.get(cell_key)
+            if cell is None:
+                cell = tile[cell_key] = _Cell()
+            cell.count += sign
+            cell.sum_x += sign * x
+            cell.sum_y += sign * y
+            cell.id_xor ^= id_int
+            if cell.count <= 0:
+                del tile[cell_key]
+                if not tile:
+                    del self._grid[z][tile_key]
+            if z == self.max_cluster_zoom:
+                members = self._leaf_members.setdefault(cell_key, set())
+                if sign > 0:
+                    members.add(property_id)
+                else:
+                    members.discard(property_id)
+                    if not members:
+                        del self._leaf_members[cell_key]
+
+    def _build_tile(self, z: int, x: int, y: int) -> List[List]:
+        with self._lock:
+            if z <= self.max_cluster_zoom:
+                cells = self._grid[z].get((x, y), {})
+                return [
+                    self._feature(z, cell_key, cell)
+                    for cell_key, cell in sorted(cells.items())
+                ]
+            return self._leaf_points(z, x, y)
+
+    def _feature(self, z: int, cell_key: Tuple[int, int], cell: _Cell) -> List:
+        latitude, longitude = unproject(
+            cell.sum_x / cell.count, cell.sum_y / cell.count
+        )
+        if cell.count == 1:
+            # With one member the XOR of member ids is that member's id
+            feature_id = str(uuid.UUID(int=cell.id_xor))
+        else:
+            feature_id = f"{z}/{cell_key[0]}/{cell_key[1]}"
+        return [
+            round(longitude, COORDINATE_DECIMALS),
+            round(latitude, COORDINATE_DECIMALS),
+            cell.count,
+            feature_id,
+        ]
+
+    def _leaf_points(self, z: int, x: int, y: int) -> List[List]:
+        """Individual listings for tiles deeper than the cluster pyramid"""
+        scale = 1 << (z - self.max_cluster_zoom)
+        parent_tile = (x // scale, y // scale)
+        tiles_per_axis = 1 << z
+        features = []
+        for cell_key in self._grid[self.max_cluster_zoom].get(parent_tile, {}):
+            for property_id in self._leaf_members.get(cell_key, ()):
+                px, py = self._points[property_id]
+                if int(px * tiles_per_axis) == x and int(py * tiles_per_axis) == y:
+                    latitude, longitude = unproject(px, py)
+                    features.append(
+                        [
+                            round(longitude, COORDINATE_DECIMALS),
+                            round(latitude, COORDINATE_DECIMALS),
+                            1,
+                            str(property_id),
+                        ]
+                    )
+        features.sort(key=lambda feature: feature[3])
+        return features
+
+    def _invalidate_tiles(self, point: Tuple[float, float]) -> None:
+        x, y = point
+        self.tile_cache.delete_many(
+            (z, int(x * (1 << z)), int(y * (1 << z))) for z in range(MAX_TILE_ZOOM + 1)
+        )
+
+
+cluster_engine = ClusterEngine()
+
+
+def _on_property_changed(changes: Iterable[Dict]) -> None:
+    if not cluster_engine.loaded:
+        return  # the background refresher's first load takes a full snapshot
+    for change in changes:
+        cluster_engine.apply_change(change)
+
+
+subscribe(PROPERTY_CHANGED, _on_property_changed)
@@ -0,0 +1,255 @@
+"""
+Listing media in object storage
+
+Photos and videos never pass through the API: the client asks for a
+presigned upload, sends the file straight to the bucket, then asks the API
+to attach the object key to the listing, which is accepted only after a
+HEAD request confirms the object exists with an allowed type and size.
+
+Property.media_urls holds object keys (older rows may hold absolute URLs,
+which are passed through). Keys are turned into signed GET URLs when cards
+are serialized. Signing is cheap, but a fresh signature on every render would
+also change every cached card fragment and feed ETag. Signed URLs are
+therefore cached and reused until SIGNED_GET_MIN_REMAINING_SECONDS before
+they expire, which leaves room for the card fragment and response caches
+that embed them.
+"""
+
+import logging
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.storage import get_signing_client, get_storage_client
+from app.models.property import Property
+from app.services.image_derivatives import (
+    CARD_THUMBNAIL_FORMAT,
+    DERIVATIVE_WIDTHS,
+    derivative_key,
+    image_derivative_service,
+    is_image_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# content type -> key extension
+MEDIA_CONTENT_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "video/mp4": ".mp4",
+    "video/quicktime": ".mov",
+}
+MAX_IMAGE_BYTES = 15 * 1024 * 1024
+MAX_VIDEO_BYTES = 200 * 1024 * 1024
+MAX_MEDIA_PER_PROPERTY = 20
+
+UPLOAD_URL_TTL_SECONDS = 15 * 60
+SIGNED_GET_TTL_SECONDS = 6 * 3600
+# Card fragments live up to an hour (CARD_CACHE_TTL_SECONDS) and clients
+# hold pages for a while after that, so never hand out a URL with less left
+SIGNED_GET_MIN_REMAINING_SECONDS = 2 * 3600
+
+MEDIA_KEY_PREFIX = "properties"
+
+
+def max_bytes(content_type: str) -> int:
+    """Upload size limit for a content type"""
+    return MAX_VIDEO_BYTES if content_type.startswith("video/") else MAX_IMAGE_BYTES
+
+
+def is_storage_key(value: str) -> bool:
+    """Whether a media_urls entry is an object key rather than a full URL"""
+    return not value.startswith(("http://", "https://"))
+
+
+class MediaService:
+    """Presigned uploads, upload verification and signed GET URLs"""
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        client_factory: Callable = get_storage_client,
+        signer_factory: Callable = get_signing_client,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bucket = bucket or settings.STORAGE_BUCKET
+        self._client_factory = client_factory
+        self._signer_factory = signer_factory
+        self._signed = TTLCache(
+            ttl_seconds=SIGNED_GET_TTL_SECONDS - SIGNED_GET_MIN_REMAINING_SECONDS,
+            max_entries=50000,
+            clock=clock,
+        )
+
+    def key_prefix(self, property_id: uuid.UUID) -> str:
+        """Prefix every object of a listing is stored under"""
+        return f"{MEDIA_KEY_PREFIX}/{property_id}/"
+
+    def create_upload(
+        self, property_id: uuid.UUID, content_type: str, size: int
+    ) -> Dict:
+        """
+        Presign a direct upload of one file
+
+        Args:
+            property_id: Listing the file is for
+            content_type: MIME type of the file (one of MEDIA_CONTENT_TYPES)
+            size: File size in bytes
+
+        Returns:
+            Dict matching MediaUploadResponse: the object key, a PUT URL with
+            the headers to send, and an equivalent form POST whose policy
+            also enforces the size limit
+
+        Raises:
+            ValueError: If the type is not allowed or the file is too large
+        """
+        extension = MEDIA_CONTENT_TYPES.get(content_type)
+        if extension is None:
+            raise ValueError(
+                f"content_type must be one of: {', '.join(MEDIA_CONTENT_TYPES)}"
+            )
+        limit = max_bytes(content_type)
+        if size <= 0 or size > limit:
+            raise ValueError(f"size must be between 1 and {limit} bytes")
+
+        key = f"{self.key_prefix(property_id)}{uuid.uuid4().hex}{extension}"
+        signer = self._signer_factory()
+        put_url = signer.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type},
+            ExpiresIn=UPLOAD_URL_TTL_SECONDS,
+        )
+        post = signer.generate_presigned_post(
+            self.bucket,
+            key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, limit],
+            ],
+            ExpiresIn=UPLOAD_URL_TTL_SECONDS,
+        )
+        return {
+            "key": key,
+            "put_url": put_url,
+            "put_headers": {"Content-Type": content_type},
+            "post_url": post["url"],
+            "post_fields": post["fields"],
+            "expires_in": UPLOAD_URL_TTL_SECONDS,
+        }
+
+    def verify_uploads(self, property_id: uuid.UUID, keys: Iterable[str]) -> None:
+        """
+        Confirm uploaded objects exist and are acceptable
+
+        PUT uploads cannot enforce a size limit, so an object over the limit
+        for its type is deleted here rather than attached.
+
+        Raises:
+            ValueError: Naming the first key that is foreign, missing, of a
+                disallowed type or too large
+        """
+        client = self._client_factory()
+        prefix = self.key_prefix(property_id)
+        for key in keys:
+            if not key.startswith(prefix) or ".." in key:
+                raise ValueError(f"{key} does not belong to this property")
+            try:
+                head = client.head_object(Bucket=self.bucket, Key=key)
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code in ("404", "NoSuchKey", "NotFound"):
+                    raise ValueError(f"{key} has not been uploaded")
+                raise
+            content_type = head.get("ContentType", "")
+            if content_type not in MEDIA_CONTENT_TYPES:
+                raise ValueError(f"{key} has unsupported type {content_type!r}")
+            if head.get("ContentLength", 0) > max_bytes(content_type):
+                client.delete_object(Bucket=self.bucket, Key=key)
+                raise ValueError(f"{key} is larger than allowed and was removed")
+
+    def attach(self, db: Session, property_id: uuid.UUID, keys: List[str]) -> List[str]:
+        """
+        Verify uploads and append their keys to a listing's media
+
+        The row is locked while its media list is rewritten so concurrent
+        attaches do not drop each other's keys. Keys already attached are
+        ignored, so retries are safe.
+
+        Returns:
+            The listing's media_urls after the change
+
+        Raises:
+            ValueError: If verification fails, the listing is missing or it
+                would exceed MAX_MEDIA_PER_PROPERTY
+        """
+        self.verify_uploads(property_id, keys)
+        prop = (
+            db.query(Property)
+            .filter(Property.id == property_id)
+            .with_for_update()
+            .first()
+        )
+        if prop is None:
+            raise ValueError("Property not found")
+        media = list(prop.media_urls or [])
+        media += [key for key in dict.fromkeys(keys) if key not in media]
+        if len(media) > MAX_MEDIA_PER_PROPERTY:
+            db.rollback()
+            raise ValueError(
+                f"A listing can have at most {MAX_MEDIA_PER_PROPERTY} media files"
+            )
+        # Assign a new list so the ARRAY change is flushed
+        prop.media_urls = media
+        db.commit()
+        image_derivative_service.submit(keys)
+        return media
+
+    def signed_url(self, key: str) -> str:
+        """Signed GET URL for an object key, reused while it has time left"""
+        url = self._signed.get(key)
+        if url is None:
+            url = self._signer_factory().generate_presigned_url(
+                "get_object",
+                Params={"Bucket": self.bucket, "Key": key},
+                ExpiresIn=SIGNED_GET_TTL_SECONDS,
+            )
+            self._signed.set(key, url)
+        return url
+
+    def resolve_url(self, value: Optional[str]) -> Optional[str]:
+        """URL a client can fetch for a media_urls entry"""
+        if not value or not is_storage_key(value):
+            return value
+        return self.signed_url(value)
+
+    def resolve_urls(self, values: Optional[Iterable[str]]) -> List[str]:
+        """resolve_url over a media_urls array"""
+        return [self.resolve_url(value) for value in values or []]
+
+    def thumbnail_urls(self, value: Optional[str]) -> Optional[Dict[str, str]]:
+        """
+        Signed card thumbnail URLs (width -> URL) for a stored photo
+
+        Derivatives are rendered in the background after attach, so for a
+        few seconds these may not exist yet; clients fall back to the full
+        URL. Absolute legacy URLs and videos have none.
+        """
+        if not value or not is_storage_key(value) or not is_image_key(value):
+            return None
+        return {
+            str(width): self.signed_url(
+                derivative_key(value, width, CARD_THUMBNAIL_FORMAT)
+            )
+            for width in DERIVATIVE_WIDTHS
+        }
+
+
+media_service = MediaService()
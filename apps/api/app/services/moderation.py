@@ -0,0 +1,336 @@
+"""
+Listing report moderation queue
+
+Reports are grouped per listing into a moderation_cases row, the unit of
+moderator work, kept up to date by an upsert when each report is filed. A
+case's score adds up REPORT_SEVERITY over its pending reports, so many or
+serious reports rise to the top. FOR UPDATE cannot be combined with a
+GROUP BY over property_reports, which is why the grouping is stored.
+
+Moderators claim batches of the highest-scoring cases in one
+UPDATE ... WHERE property_id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+RETURNING statement, so concurrent moderators split the queue instead of
+blocking on or double-claiming the same rows. A claim is a lease rather
+than a held lock: it lapses after CLAIM_LEASE, and a lapsed case is back in
+the queue, so a moderator who walks away does not strand work.
+
+A listing reaching AUTO_HIDE_REPORT_COUNT pending reports (one per user) is
+deactivated right away. Dismissing its case restores it if it has not
+expired in the meantime; removing it keeps it down.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.engagement import ModerationCase, PropertyReport
+from app.models.property import Property
+from app.services.property_events import publish_property_changes, snapshot
+
+# Reason -> weight in a case's score
+REPORT_SEVERITY = {
+    "fake": 5,
+    "inappropriate": 4,
+    "spam": 3,
+    "duplicate": 2,
+    "wrong_info": 2,
+    "other": 1,
+}
+AUTO_HIDE_REPORT_COUNT = 5
+CLAIM_LEASE = timedelta(minutes=15)
+MAX_CLAIM_BATCH = 50
+# action -> status given to the case's pending reports
+MODERATION_ACTIONS = {"dismiss": "dismissed", "remove": "resolved"}
+
+_RETURNING = (
+    Property.__table__.c.id,
+    Property.__table__.c.agent_id,
+    Property.__table__.c.state,
+    Property.__table__.c.lga,
+    Property.__table__.c.property_type,
+    Property.__table__.c.latitude,
+    Property.__table__.c.longitude,
+    Property.__table__.c.is_active,
+    Property.__table__.c.expires_at,
+)
+
+
+class ModerationService:
+    """Files reports and hands out moderation cases on leases"""
+
+    def __init__(self, clock: Optional[Callable[[], datetime]] = None):
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+
+    def report(
+        self,
+        db: Session,
+        property_id: uuid.UUID,
+        user_id: uuid.UUID,
+        reason: str,
+        description: Optional[str] = None,
+    ) -> Dict:
+        """
+        File a report and add it to the listing's case
+
+        Args:
+            db: Database session
+            property_id: Reported listing
+            user_id: Reporting user
+            reason: One of REPORT_SEVERITY
+            description: Free-text details
+
+        Returns:
+            Dict matching PropertyReportResponse; accepted is False when the
+            user already has a pending report on the listing
+
+        Raises:
+            ValueError: If the reason is unknown
+            LookupError: If the listing does not exist
+        """
+        severity = REPORT_SEVERITY.get(reason)
+        if severity is None:
+            raise ValueError(f"reason must be one of: {', '.join(REPORT_SEVERITY)}")
+        now = self.clock()
+        reports = PropertyReport.__table__
+        cases = ModerationCase.__table__
+        try:
+            filed = db.execute(
+                pg_insert(reports)
+                .values(
+                    id=uuid.uuid4(),
+                    property_id=property_id,
+                    reported_by=user_id,
+                    reason=reason,
+                    description=description,
+                    status="pending",
+                    created_at=now,
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[reports.c.property_id, reports.c.reported_by],
+                    index_where=reports.c.status == "pending",
+                )
+                .returning(reports.c.id)
+            ).first()
+        except IntegrityError:
+            db.rollback()
+            raise LookupError("Property not found")
+        if filed is None:
+            db.rollback()
+            report_count = db.execute(
+                select(cases.c.report_count).where(cases.c.property_id == property_id)
+            ).scalar()
+            return {"accepted": False, "report_count": report_count or 0}
+
+        stmt = pg_insert(cases).values(
+            property_id=property_id,
+            report_count=1,
+            score=severity,
+            first_reported_at=now,
+            last_reported_at=now,
+        )
+        case = db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[cases.c.property_id],
+                set_={
+                    "report_count": cases.c.report_count + 1,
+                    "score": cases.c.score + stmt.excluded.score,
+                    "last_reported_at": stmt.excluded.last_reported_at,
+                },
+            ).returning(cases.c.report_count, cases.c.hidden_at)
+        ).one()
+
+        hidden = []
+        if case.report_count >= AUTO_HIDE_REPORT_COUNT and case.hidden_at is None:
+            hidden = self._set_active(db, property_id, False, now)
+            db.execute(
+                update(cases)
+                .where(cases.c.property_id == property_id)
+                .values(hidden_at=now)
+            )
+        db.commit()
+        if hidden:
+            publish_property_changes(snapshot(row, "updated") for row in hidden)
+        return {"accepted": True, "report_count": case.report_count}
+
+    def claim(
+        self, db: Session, moderator_id: uuid.UUID, limit: int = 10
+    ) -> List[Dict]:
+        """
+        Lease the next highest-scoring unclaimed cases
+
+        Returns:
+            Dicts matching ModerationCaseResponse, highest score first
+        """
+        now = self.clock()
+        cases = ModerationCase.__table__
+        available = or_(
+            cases.c.lease_expires_at.is_(None), cases.c.lease_expires_at <= now
+        )
+        pick = (
+            select(cases.c.property_id)
+            .where(available)
+            .order_by(cases.c.score.desc(), cases.c.first_reported_at)
+            .limit(min(limit, MAX_CLAIM_BATCH))
+            .with_for_update(skip_locked=True)
+        )
+        claimed = db.execute(
+            update(cases)
+            .where(cases.c.property_id.in_(pick.scalar_subquery()), available)
+            .values(claimed_by=moderator_id, lease_expires_at=now + CLAIM_LEASE)
+            .returning(*cases.c)
+        ).all()
+        db.commit()
+        if not claimed:
+            return []
+
+        property_ids = [case.property_id for case in claimed]
+        titles = dict(
+            db.query(Property.id, Property.title)
+            .filter(Property.id.in_(property_ids))
+            .all()
+        )
+        reports: Dict[uuid.UUID, List[Dict]] = {pid: [] for pid in property_ids}
+        for report in (
+            db.query(PropertyReport)
+            .filter(
+                PropertyReport.property_id.in_(property_ids),
+                PropertyReport.status == "pending",
+            )
+            .order_by(PropertyReport.created_at)
+        ):
+            reports[report.property_id].append(
+                {
+                    "id": report.id,
+                    "reason": report.reason,
+                    "description": report.description,
+                    "created_at": report.created_at,
+                }
+            )
+        ordered = sorted(
+            claimed, key=lambda case: (-case.score, case.first_reported_at)
+        )
+        return [
+            {
+                "property_id": case.property_id,
+                "title": titles.get(case.property_id),
+                "report_count": case.report_count,
+                "score": case.score,
+                "hidden": case.hidden_at is not None,
+                "first_reported_at": case.first_reported_at,
+                "lease_expires_at": case.lease_expires_at,
+                "reports": reports[case.property_id],
+            }
+            for case in ordered
+        ]
+
+    def decide(
+        self,
+        db: Session,
+        property_id: uuid.UUID,
+        moderator_id: uuid.UUID,
+        action: str,
+    ) -> Dict:
+        """
+        Close a claimed case by dismissing or removing the listing
+
+        Returns:
+            Dict matching ModerationDecisionResponse
+
+        Raises:
+            ValueError: If the action is unknown
+            LookupError: If the listing has no open case
+            PermissionError: If the moderator does not hold a live lease on it
+        """
+        report_status = MODERATION_ACTIONS.get(action)
+        if report_status is None:
+            raise ValueError(f"action must be one of: {', '.join(MODERATION_ACTIONS)}")
+        now = self.clock()
+        cases = ModerationCase.__table__
+        reports = PropertyReport.__table__
+        # Holds back concurrent reports on this listing until the case closes
+        case = db.execute(
+            select(cases).where(cases.c.property_id == property_id).with_for_update()
+        ).first()
+        if case is None:
+            db.rollback()
+            raise LookupError("No open moderation case for this listing")
+        if (
+            case.claimed_by != moderator_id
+            or case.lease_expires_at is None
+            or case.lease_expires_at <= now
+        ):
+            db.rollback()
+            raise PermissionError("Claim the case before deciding it")
+
+        closed = db.execute(
+            update(reports)
+            .where(reports.c.property_id == property_id, reports.c.status == "pending")
+            .values(status=report_status, reviewed_by=moderator_id, reviewed_at=now)
+        ).rowcount
+        if action == "remove":
+            changed = self._set_active(db, property_id, False, now)
+        elif case.hidden_at is not None:
+            changed = self._set_active(db, property_id, True, now)
+        else:
+            changed = []
+        db.execute(delete(cases).where(cases.c.property_id == property_id))
+        db.commit()
+        if changed:
+            publish_property_changes(snapshot(row, "updated") for row in changed)
+        return {
+            "property_id": property_id,
+            "action": action,
+            "reports_closed": closed,
+            "listing_active": (
+                changed[0].is_active if changed else self._is_active(db, property_id)
+            ),
+        }
+
+    def release(
+        self, db: Session, property_id: uuid.UUID, moderator_id: uuid.UUID
+    ) -> bool:
+        """
+        Hand a claimed case back to the queue
+
+        Returns:
+            False if the moderator did not hold it
+        """
+        cases = ModerationCase.__table__
+        released = db.execute(
+            update(cases)
+            .where(
+                cases.c.property_id == property_id,
+                cases.c.claimed_by == moderator_id,
+            )
+            .values(claimed_by=None, lease_expires_at=None)
+        ).rowcount
+        db.commit()
+        return released > 0
+
+    @staticmethod
+    def _set_active(db: Session, property_id: uuid.UUID, active: bool, now: datetime):
+        """Flip is_active; reactivation skips listings that have expired"""
+        properties = Property.__table__
+        conditions = [properties.c.id == property_id, properties.c.is_active != active]
+        if active:
+            conditions.append(properties.c.expires_at > now)
+        return db.execute(
+            update(properties)
+            .where(*conditions)
+            .values(is_active=active)
+            .returning(*_RETURNING)
+        ).all()
+
+    @staticmethod
+    def _is_active(db: Session, property_id: uuid.UUID) -> bool:
+        return bool(
+            db.query(Property.is_active).filter(Property.id == property_id).scalar()
+        )
+
+
+moderation_service = ModerationService()
@@ -0,0 +1,617 @@
+"""
+User notifications
+
+Notifications are written in bulk: add() takes any number of rows (e.g. one
+per expired listing from a sweep) and inserts them with one executemany
+INSERT per NOTIFY_BATCH_SIZE rows, inside the caller's transaction.
+
+Each user's unread count is kept in notification_counters and maintained
+incrementally in the same transaction as the change that moves it: one
+upsert per batch adds the new rows per user, and marking read or purging
+subtracts exactly the rows that statement changed (UPDATE/DELETE ...
+RETURNING). Reading the badge count is a primary-key lookup instead of a
+count over the inbox, and increments and decrements commute, so
+concurrent writers never overwrite each other's changes.
+
+The inbox is keyset-paginated on (created_at, id), newest first. Expired
+notifications are hidden from the inbox at once and deleted in batches by
+purge_expired() (scripts/purge_notifications.py); until then an expired
+unread notification still counts as unread.
+
+System announcements to everyone go out as broadcasts (fan-out on read):
+broadcast() writes one broadcasts row however many users will see it, and
+the live broadcasts are merged into each inbox page, in (created_at, id)
+order, when the inbox is read. Per user, only a read watermark is stored
+(notification_counters.broadcasts_read_through): broadcasts created up to
+it are read, so marking one read also marks older ones read. New users
+start with no watermark and see the live broadcasts as unread. The live
+broadcasts are few and shared by every reader, so each worker caches them
+for BROADCAST_CACHE_TTL_SECONDS; a new broadcast reaches other workers
+within that time.
+
+Once committed, new notifications are published as NOTIFICATIONS_CREATED
+and broadcasts as BROADCAST_CREATED, which the realtime gateway pushes to
+connected clients.
+"""
+
+import logging
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlalchemy import bindparam, case, delete, event, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.events import publish
+from app.core.pagination import keyset_filter
+from app.models.engagement import Broadcast, Notification, NotificationCounter
+
+logger = logging.getLogger(__name__)
+
+# Must match check_notification_type
+NOTIFICATION_TYPES = (
+    "property_expired",
+    "inspection_requested",
+    "inspection_confirmed",
+    "payment_released",
+    "new_message",
+    "verification_approved",
+    "verification_rejected",
+    "subscription_expiring",
+    "new_review",
+    "property_featured",
+    "promo_code_used",
+    "system_announcement",
+)
+# Lifetime of a notification that does not set expires_at
+NOTIFICATION_TTL = timedelta(days=90)
+NOTIFY_BATCH_SIZE = 1000
+PURGE_BATCH_SIZE = 5000
+# Must match check_broadcast_audience; "all" or a user role
+BROADCAST_AUDIENCES = ("all", "tenant", "agent", "admin")
+BROADCAST_CACHE_TTL_SECONDS = 30
+# Newest live broadcasts merged into inboxes
+MAX_LIVE_BROADCASTS = 100
+
+# Payload: notifications=[inserted rows as dicts], after commit
+NOTIFICATIONS_CREATED = "notifications_created"
+# Payload: broadcast=InboxItem, audience=str, after commit
+BROADCAST_CREATED = "broadcast_created"
+
+_LIVE_BROADCASTS = "live"
+_PENDING_KEY = "pending_notifications"
+
+
+class InboxItem(NamedTuple):
+    """A personal notification or a broadcast, as shown in the inbox"""
+
+    id: uuid.UUID
+    type: str
+    title: str
+    message: str
+    data: Dict[str, Any]
+    is_read: bool
+    action_url: Optional[str]
+    created_at: datetime
+    expires_at: Optional[datetime]
+    broadcast: bool = False
+
+
+class LiveBroadcast(NamedTuple):
+    audience: str
+    item: InboxItem
+
+
+class NotificationService:
+    """Bulk notification writes, broadcasts, the inbox and unread counters"""
+
+    def __init__(self, clock: Optional[Callable[[], datetime]] = None):
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self._broadcasts = TTLCache(
+            ttl_seconds=BROADCAST_CACHE_TTL_SECONDS, max_entries=1
+        )
+
+    def add(
+        self,
+        db: Session,
+        notifications: Iterable[Dict],
+        batch_size: int = NOTIFY_BATCH_SIZE,
+    ) -> int:
+        """
+        Insert notifications and bump unread counters, without committing
+
+        Args:
+            db: Database session; the caller commits, so notifications land
+                atomically with whatever caused them
+            notifications: Dicts with user_id, type, title and message, and
+                optionally data, action_url, expires_at and created_at
+            batch_size: Rows per INSERT
+
+        Returns:
+            Number of notifications inserted
+
+        Raises:
+            ValueError: If a notification has an unknown type
+        """
+        now = self.clock()
+        table = Notification.__table__
+        unread: Counter = Counter()
+        batch: List[Dict] = []
+        pending: List[Dict] = db.info.setdefault(_PENDING_KEY, [])
+        total = 0
+        for notification in notifications:
+            if notification["type"] not in NOTIFICATION_TYPES:
+                raise ValueError(f"Unknown notification type {notification['type']!r}")
+            created_at = notification.get("created_at") or now
+            batch.append(
+                {
+                    "id": notification.get("id") or uuid.uuid4(),
+                    "user_id": notification["user_id"],
+                    "type": notification["type"],
+                    "title": notification["title"],
+                    "message": notification["message"],
+                    "data": notification.get("data") or {},
+                    "is_read": False,
+                    "action_url": notification.get("action_url"),
+                    "expires_at": notification.get("expires_at")
+                    or created_at + NOTIFICATION_TTL,
+                    "created_at": created_at,
+                }
+            )
+            unread[notification["user_id"]] += 1
+            if len(batch) >= batch_size:
+                db.execute(insert(table), batch)
+                pending.extend(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            db.execute(insert(table), batch)
+            pending.extend(batch)
+            total += len(batch)
+        self._adjust_counters(db, unread)
+        return total
+
+    def notify(self, db: Session, notifications: Iterable[Dict]) -> int:
+        """add() and commit"""
+        try:
+            count = self.add(db, notifications)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return count
+
+    def broadcast(
+        self,
+        db: Session,
+        title: str,
+        message: str,
+        audience: str = "all",
+        data: Optional[Dict] = None,
+        action_url: Optional[str] = None,
+        expires_at: Optional[datetime] = None,
+        created_by: Optional[uuid.UUID] = None,
+    ) -> InboxItem:
+        """
+        Announce to every user in an audience with a single row
+
+        Args:
+            db: Database session
+            title: Announcement title
+            message: Announcement body
+            audience: "all" or the role that sees it
+            data: Extra payload for clients
+            action_url: Link the announcement opens
+            expires_at: When it leaves inboxes; NOTIFICATION_TTL from now
+                by default
+            created_by: Admin who sent it
+
+        Returns:
+            The broadcast as an inbox item
+
+        Raises:
+            ValueError: If the audience is unknown or expires_at has passed
+        """
+        if audience not in BROADCAST_AUDIENCES:
+            raise ValueError(
+                f"audience must be one of: {', '.join(BROADCAST_AUDIENCES)}"
+            )
+        now = self.clock()
+        expires_at = expires_at or now + NOTIFICATION_TTL
+        if expires_at <= now:
+            raise ValueError("expires_at must be in the future")
+        row = {
+            "id": uuid.uuid4(),
+            "type": "system_announcement",
+            "audience": audience,
+            "title": title,
+            "message": message,
+            "data": data or {},
+            "action_url": action_url,
+            "created_by": created_by,
+            "expires_at": expires_at,
+            "created_at": now,
+        }
+        try:
+            db.execute(insert(Broadcast.__table__).values(**row))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self._broadcasts.delete(_LIVE_BROADCASTS)
+        item = _broadcast_item(row)
+        publish(BROADCAST_CREATED, broadcast=item, audience=audience)
+        return item
+
+    def inbox(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        limit: int,
+        after: Optional[Sequence] = None,
+        unread_only: bool = False,
+        role: Optional[str] = None,
+    ) -> Tuple[List[InboxItem], bool]:
+        """
+        A page of a user's live notifications and broadcasts, newest first
+
+        Args:
+            after: (created_at, id) of the last item of the previous page
+            role: The user's role, which picks the broadcasts they see;
+                None sees only broadcasts to "all"
+
+        Returns:
+            (items, whether more follow)
+        """
+        now = self.clock()
+        query = db.query(Notification).filter(
+            Notification.user_id == user_id,
+            or_(Notification.expires_at.is_(None), Notification.expires_at > now),
+        )
+        if unread_only:
+            query = query.filter(~Notification.is_read)
+        if after is not None:
+            query = query.filter(
+                keyset_filter((Notification.created_at, Notification.id), after)
+            )
+        rows = (
+            query.order_by(Notification.created_at.desc(), Notification.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+        items = [_notification_item(row) for row in rows]
+
+        _, read_through = self._counter(db, user_id)
+        for item in self._visible_broadcasts(db, role):
+            if after is not None and (item.created_at, item.id) >= tuple(after):
+                continue
+            read = _is_read(item, read_through)
+            if not (unread_only and read):
+                items.append(item._replace(is_read=read))
+        # Limit + 1 personal rows and every live broadcast: enough for the
+        # page and to tell whether another follows
+        items.sort(key=lambda item: (item.created_at, item.id), reverse=True)
+        return items[:limit], len(items) > limit
+
+    def unread_count(
+        self, db: Session, user_id: uuid.UUID, role: Optional[str] = None
+    ) -> int:
+        """A user's unread notifications and broadcasts, from the counter row"""
+        count, read_through = self._counter(db, user_id)
+        return max(count or 0, 0) + sum(
+            not _is_read(item, read_through)
+            for item in self._visible_broadcasts(db, role)
+        )
+
+    def mark_read(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        notification_ids: Iterable[uuid.UUID],
+        role: Optional[str] = None,
+    ) -> int:
+        """
+        Mark some of a user's notifications and broadcasts read
+
+        A broadcast id moves the user's watermark up to that broadcast, which
+        also marks older broadcasts read.
+
+        Returns:
+            Number that were unread; other users' ids are ignored
+        """
+        table = Notification.__table__
+        notification_ids = list(notification_ids)
+        if not notification_ids:
+            return 0
+        wanted = set(notification_ids)
+        read_through = max(
+            (
+                item.created_at
+                for item in self._visible_broadcasts(db, role)
+                if item.id in wanted
+            ),
+            default=None,
+        )
+        return self._mark(
+            db,
+            user_id,
+            update(table).where(
+                table.c.user_id == user_id,
+                table.c.id.in_(notification_ids),
+                ~table.c.is_read,
+            ),
+            role,
+            read_through,
+        )
+
+    def mark_all_read(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        role: Optional[str] = None,
+        read_through: Optional[datetime] = None,
+    ) -> int:
+        """
+        Mark a user's unread notifications read in one statement, along
+        with the broadcasts they have seen
+
+        Args:
+            read_through: created_at of the newest item the user was shown;
+                anything newer stays unread. Without it every notification
+                is marked, and broadcasts up to the newest one live now.
+
+        Returns:
+            Number that were unread
+        """
+        table = Notification.__table__
+        statement = update(table).where(table.c.user_id == user_id, ~table.c.is_read)
+        if read_through is not None:
+            statement = statement.where(table.c.created_at <= read_through)
+        else:
+            # Not the clock: a broadcast stamped just before now but not yet
+            # loaded here would be marked read unseen
+            read_through = max(
+                (item.created_at for item in self._visible_broadcasts(db, role)),
+                default=None,
+            )
+        return self._mark(db, user_id, statement, role, read_through)
+
+    def purge_expired(self, db: Session, batch_size: int = PURGE_BATCH_SIZE) -> Dict:
+        """
+        Delete expired notifications in batches
+
+        Each batch claims rows with FOR UPDATE SKIP LOCKED, so several
+        purgers can run at once, and takes unread ones off the counters in
+        the same transaction.
+
+        Returns:
+            Dict with deleted, batches and duration_seconds
+        """
+        started = time.monotonic()
+        now = self.clock()
+        table = Notification.__table__
+        claim = (
+            select(table.c.id)
+            .where(table.c.expires_at <= now)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            delete(table)
+            .where(table.c.id.in_(claim.scalar_subquery()))
+            .returning(table.c.user_id, table.c.is_read)
+        )
+        deleted = batches = 0
+        while True:
+            rows = db.execute(statement).all()
+            self._adjust_counters(
+                db, {user_id: -n for user_id, n in _unread_by_user(rows).items()}
+            )
+            db.commit()
+            deleted += len(rows)
+            batches += 1
+            if len(rows) < batch_size:
+                break
+
+        broadcasts = Broadcast.__table__
+        expired_broadcasts = len(
+            db.execute(
+                delete(broadcasts)
+                .where(broadcasts.c.expires_at <= now)
+                .returning(broadcasts.c.id)
+            ).all()
+        )
+        db.commit()
+
+        result = {
+            "deleted": deleted,
+            "batches": batches,
+            "broadcasts_deleted": expired_broadcasts,
+            "duration_seconds": round(time.monotonic() - started, 3),
+        }
+        logger.info("Notification purge finished: %s", result)
+        return result
+
+    def _mark(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        statement,
+        role: Optional[str],
+        read_through: Optional[datetime],
+    ) -> int:
+        table = Notification.__table__
+        try:
+            changed = len(
+                db.execute(statement.values(is_read=True).returning(table.c.id)).all()
+            )
+            self._adjust_counters(db, {user_id: -changed})
+            if read_through is not None:
+                _, previous = self._counter(db, user_id)
+                changed += sum(
+                    not _is_read(item, previous) and item.created_at <= read_through
+                    for item in self._visible_broadcasts(db, role)
+                )
+                self._advance_watermark(db, user_id, read_through)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return changed
+
+    def _visible_broadcasts(self, db: Session, role: Optional[str]) -> List[InboxItem]:
+        """Live broadcasts a role sees, from the per-worker cache"""
+        live = self._broadcasts.get(_LIVE_BROADCASTS)
+        if live is None:
+            live = self._load_broadcasts(db)
+            self._broadcasts.set(_LIVE_BROADCASTS, live)
+        now = self.clock()
+        return [
+            broadcast.item
+            for broadcast in live
+            if broadcast.audience in ("all", role) and broadcast.item.expires_at > now
+        ]
+
+    def _load_broadcasts(self, db: Session) -> List[LiveBroadcast]:
+        table = Broadcast.__table__
+        rows = (
+            db.execute(
+                select(table)
+                .where(table.c.expires_at > self.clock())
+                .order_by(table.c.created_at.desc())
+                .limit(MAX_LIVE_BROADCASTS)
+            )
+            .mappings()
+            .all()
+        )
+        return [LiveBroadcast(row["audience"], _broadcast_item(row)) for row in rows]
+
+    @staticmethod
+    def _counter(
+        db: Session, user_id: uuid.UUID
+    ) -> Tuple[Optional[int], Optional[datetime]]:
+        """(unread_count, broadcasts_read_through) of a user"""
+        row = (
+            db.query(
+                NotificationCounter.unread_count,
+                NotificationCounter.broadcasts_read_through,
+            )
+            .filter(NotificationCounter.user_id == user_id)
+            .first()
+        )
+        return (row.unread_count, row.broadcasts_read_through) if row else (0, None)
+
+    @staticmethod
+    def _advance_watermark(db: Session, user_id: uuid.UUID, read_through) -> None:
+        """Move a user's broadcast watermark forward, never back"""
+        counters = NotificationCounter.__table__
+        current = counters.c.broadcasts_read_through
+        stmt = pg_insert(counters).values(
+            user_id=user_id, unread_count=0, broadcasts_read_through=read_through
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[counters.c.user_id],
+                set_={
+                    "broadcasts_read_through": case(
+                        (
+                            or_(
+                                current.is_(None),
+                                current < stmt.excluded.broadcasts_read_through,
+                            ),
+                            stmt.excluded.broadcasts_read_through,
+                        ),
+                        else_=current,
+                    )
+                },
+            )
+        )
+
+    @staticmethod
+    def _adjust_counters(db: Session, deltas: Dict[uuid.UUID, int]) -> None:
+        """Add deltas to unread counters with one upsert, never below zero"""
+        rows = [
+            {"b_user_id": user_id, "b_initial": max(delta, 0), "b_delta": delta}
+            # Same lock order in every writer, so batches cannot deadlock
+            for user_id, delta in sorted(deltas.items(), key=lambda item: str(item[0]))
+            if delta
+        ]
+        if not rows:
+            return
+        counters = NotificationCounter.__table__
+        adjusted = counters.c.unread_count + bindparam("b_delta")
+        db.execute(
+            pg_insert(counters)
+            .values(user_id=bindparam("b_user_id"), unread_count=bindparam("b_initial"))
+            .on_conflict_do_update(
+                index_elements=[counters.c.user_id],
+                set_={"unread_count": case((adjusted < 0, 0), else_=adjusted)},
+            ),
+            rows,
+        )
+
+
+def _notification_item(row: Notification) -> InboxItem:
+    return InboxItem(
+        id=row.id,
+        type=row.type,
+        title=row.title,
+        message=row.message,
+        data=row.data or {},
+        is_read=row.is_read,
+        action_url=row.action_url,
+        created_at=row.created_at,
+        expires_at=row.expires_at,
+    )
+
+
+def _broadcast_item(row) -> InboxItem:
+    return InboxItem(
+        id=row["id"],
+        type=row["type"],
+        title=row["title"],
+        message=row["message"],
+        data=row["data"] or {},
+        is_read=False,
+        action_url=row["action_url"],
+        created_at=row["created_at"],
+        expires_at=row["expires_at"],
+        broadcast=True,
+    )
+
+
+def _is_read(item: InboxItem, read_through: Optional[datetime]) -> bool:
+    return read_through is not None and item.created_at <= read_through
+
+
+def _unread_by_user(rows) -> Counter:
+    return Counter(row.user_id for row in rows if not row.is_read)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_created_notifications(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        publish(NOTIFICATIONS_CREATED, notifications=pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_created_notifications(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+notification_service = NotificationService()
@@ -0,0 +1,202 @@
+"""
+Rebuilds of the property_cards read model
+
+Day to day property_cards is maintained by the triggers in migration 013.
+This recomputes cards from the source tables in keyset batches of listings,
+one INSERT ... SELECT ... ON CONFLICT DO UPDATE per batch, and only rewrites
+rows that differ, so a rebuild both fills a new table and repairs drift
+(e.g. rows written while the triggers were disabled for a bulk load).
+"""
+
+import logging
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.engagement import (
+    AgentReview,
+    AgentVerification,
+    PropertyClip,
+    PropertyFlick,
+    PropertyShare,
+)
+from app.models.property import Property, PropertyCard
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _count_for_property(model):
+    table = model.__table__
+    return (
+        select(func.count())
+        .where(table.c.property_id == Property.__table__.c.id)
+        .scalar_subquery()
+    )
+
+
+def _visible_reviews(aggregate):
+    reviews = AgentReview.__table__
+    return (
+        select(aggregate)
+        .where(
+            reviews.c.agent_id == Property.__table__.c.agent_id,
+            func.coalesce(reviews.c.is_visible, True),
+        )
+        .scalar_subquery()
+    )
+
+
+def card_source() -> Dict:
+    """property_cards column -> expression over properties and its joins
+
+    Must produce what the migration 013 triggers write.
+    """
+    properties = Property.__table__
+    users = User.__table__
+    verifications = AgentVerification.__table__
+    reviews = AgentReview.__table__
+    return {
+        "id": properties.c.id,
+        "agent_id": properties.c.agent_id,
+        "title": properties.c.title,
+        "property_type": properties.c.property_type,
+        "bedrooms": properties.c.bedrooms,
+        "bathrooms": properties.c.bathrooms,
+        "price_monthly": properties.c.price_monthly,
+        "state": properties.c.state,
+        "lga": properties.c.lga,
+        "latitude": properties.c.latitude,
+        "longitude": properties.c.longitude,
+        "cover_url": properties.c.media_urls[1],
+        "is_active": func.coalesce(properties.c.is_active, True),
+        "expires_at": properties.c.expires_at,
+        "created_at": properties.c.created_at,
+        "updated_at": properties.c.updated_at,
+        "view_count_7d": func.coalesce(properties.c.view_count_7d, 0),
+        "view_count_total": func.coalesce(properties.c.view_count_total, 0),
+        "rank_score": properties.c.rank_score,
+        "agent_business_name": users.c.business_name,
+        "verification_status": func.coalesce(
+            verifications.c.verification_status, "pending"
+        ),
+        "credibility_score": func.coalesce(verifications.c.credibility_score, 0),
+        "verification_badge_visible": func.coalesce(
+            verifications.c.verification_badge_visible, False
+        ),
+        "agent_locked_until": verifications.c.locked_until,
+        "review_count": _visible_reviews(func.count()),
+        "review_avg": _visible_reviews(func.round(func.avg(reviews.c.rating), 2)),
+        "flick_count": _count_for_property(PropertyFlick),
+        "clip_count": _count_for_property(PropertyClip),
+        "share_count": _count_for_property(PropertyShare),
+    }
+
+
+class PropertyCardService:
+    """Recomputes property_cards rows from the source tables"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+
+    def rebuild_statement(self, property_ids: List[uuid.UUID]):
+        """Upsert of the given listings' cards, skipping rows already correct"""
+        source = card_source()
+        properties = Property.__table__
+        users = User.__table__
+        verifications = AgentVerification.__table__
+        cards = PropertyCard.__table__
+
+        names = list(source)
+        rows = (
+            select(
+                *(expression.label(name) for name, expression in source.items()),
+                func.now().label("refreshed_at"),
+            )
+            .select_from(
+                properties.outerjoin(
+                    users, users.c.id == properties.c.agent_id
+                ).outerjoin(
+                    verifications, verifications.c.agent_id == properties.c.agent_id
+                )
+            )
+            .where(properties.c.id.in_(property_ids))
+        )
+        statement = insert(cards).from_select(names + ["refreshed_at"], rows)
+        compared = [name for name in names if name != "id"]
+        return statement.on_conflict_do_update(
+            index_elements=[cards.c.id],
+            set_={
+                name: statement.excluded[name] for name in compared + ["refreshed_at"]
+            },
+            where=or_(
+                *(
+                    cards.c[name].is_distinct_from(statement.excluded[name])
+                    for name in compared
+                )
+            ),
+        ).returning(cards.c.id)
+
+    def rebuild_cards(self, db: Session, property_ids: Iterable[uuid.UUID]) -> int:
+        """
+        Recompute the cards of specific listings and commit
+
+        Returns:
+            Number of cards inserted or corrected
+        """
+        property_ids = list(property_ids)
+        if not property_ids:
+            return 0
+        repaired = len(db.execute(self.rebuild_statement(property_ids)).all())
+        db.commit()
+        return repaired
+
+    def rebuild(
+        self,
+        db: Session,
+        batch_size: int = REBUILD_BATCH_SIZE,
+        max_batches: Optional[int] = None,
+    ) -> Dict:
+        """
+        Recompute every card in keyset batches of listings
+
+        Args:
+            db: Database session
+            batch_size: Listings per statement (and transaction)
+            max_batches: Stop after this many batches (None = all)
+
+        Returns:
+            Dict with scanned, repaired, batches and duration_seconds
+        """
+        started = self.clock()
+        scanned = repaired = batches = 0
+        last_id = None
+        while max_batches is None or batches < max_batches:
+            query = db.query(Property.id)
+            if last_id is not None:
+                query = query.filter(Property.id > last_id)
+            ids = [row.id for row in query.order_by(Property.id).limit(batch_size)]
+            if not ids:
+                break
+            repaired += self.rebuild_cards(db, ids)
+            scanned += len(ids)
+            batches += 1
+            last_id = ids[-1]
+
+        result = {
+            "scanned": scanned,
+            "repaired": repaired,
+            "batches": batches,
+            "duration_seconds": round(self.clock() - started, 3),
+        }
+        logger.info("Property card rebuild finished: %s", result)
+        return result
+
+
+property_card_service = PropertyCardService()
@@ -0,0 +1,91 @@
+"""
+Property change events
+
+ORM writes to Property are captured at flush time and published once the
+transaction commits, so caches and derived structures never see rolled-back
+changes. Set-based writers (bulk UPDATE ... RETURNING) publish the rows they
+touched through publish_property_changes.
+"""
+
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.events import publish
+from app.models.property import Property
+
+PROPERTY_CHANGED = "property_changed"
+# Flicks, clips and other engagement on a listing; payload as PROPERTY_CHANGED
+# but only "id" and "state" are guaranteed
+PROPERTY_ENGAGEMENT_CHANGED = "property_engagement_changed"
+
+# Fields carried by every change so subscribers rarely need to re-query
+SNAPSHOT_FIELDS = (
+    "id",
+    "agent_id",
+    "state",
+    "lga",
+    "property_type",
+    "latitude",
+    "longitude",
+    "is_active",
+    "expires_at",
+)
+
+_PENDING_KEY = "pending_property_changes"
+
+
+def snapshot(prop, change: str) -> Dict:
+    """Capture the fields subscribers rely on from a Property or result row"""
+    data = {field: getattr(prop, field, None) for field in SNAPSHOT_FIELDS}
+    for coordinate in ("latitude", "longitude"):
+        if data[coordinate] is not None:
+            data[coordinate] = float(data[coordinate])
+    data["change"] = change
+    return data
+
+
+def publish_property_changes(changes: Iterable[Dict]) -> None:
+    """Publish already-committed changes (e.g. from set-based UPDATEs)"""
+    changes = list(changes)
+    if changes:
+        publish(PROPERTY_CHANGED, changes=changes)
+
+
+def publish_engagement_change(property_id, state: str) -> None:
+    """Publish that a listing's engagement counts changed (after commit)"""
+    publish(
+        PROPERTY_ENGAGEMENT_CHANGED,
+        changes=[{"id": property_id, "state": state, "change": "engagement"}],
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_property_changes(session, flush_context):
+    pending: List[Dict] = session.info.setdefault(_PENDING_KEY, [])
+    for obj in session.new:
+        if isinstance(obj, Property):
+            pending.append(snapshot(obj, "created"))
+    for obj in session.dirty:
+        if isinstance(obj, Property) and session.is_modified(obj):
+            pending.append(snapshot(obj, "updated"))
+    for obj in session.deleted:
+        if isinstance(obj, Property):
+            pending.append(snapshot(obj, "deleted"))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_property_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        # Later changes to the same row supersede earlier ones in the batch
+        latest = {}
+        for change in pending:
+            latest[change["id"]] = change
+        publish_property_changes(latest.values())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_property_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,391 @@
+"""
+Property feed queries with keyset pagination and narrow projections
+
+Feed pages read the property_cards read model, so a page is one index range
+scan over one table. Search and proximity queries still project cards from
+properties (they need search_vector and geohash) with CARD_COLUMNS.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.models.property import Property, PropertyCard
+from app.schemas.property import PropertyFeedResponse
+from app.services.card_cache import (
+    CARD_VERSION_COLUMNS,
+    card_fragment_cache,
+    splice_page,
+)
+from app.services.media import media_service
+from app.services.verification_status import (
+    effective_status,
+    verification_status_service,
+)
+
+# Columns every feed card needs; description and media_urls are opt-in
+CARD_COLUMNS = (
+    Property.id,
+    Property.agent_id,
+    Property.title,
+    Property.property_type,
+    Property.bedrooms,
+    Property.bathrooms,
+    Property.price_monthly,
+    Property.state,
+    Property.lga,
+    Property.latitude,
+    Property.longitude,
+    Property.view_count_7d,
+    Property.view_count_total,
+    Property.expires_at,
+    Property.created_at,
+)
+
+# Only the first array element leaves the database for the card image
+COVER_URL = Property.media_urls[1].label("cover_url")
+
+# Feed card columns from the read model; badge columns are folded into
+# agent_badge by serialize_feed_card
+FEED_CARD_COLUMNS = (
+    PropertyCard.id,
+    PropertyCard.agent_id,
+    PropertyCard.title,
+    PropertyCard.property_type,
+    PropertyCard.bedrooms,
+    PropertyCard.bathrooms,
+    PropertyCard.price_monthly,
+    PropertyCard.state,
+    PropertyCard.lga,
+    PropertyCard.latitude,
+    PropertyCard.longitude,
+    PropertyCard.cover_url,
+    PropertyCard.view_count_7d,
+    PropertyCard.view_count_total,
+    PropertyCard.expires_at,
+    PropertyCard.created_at,
+    PropertyCard.agent_business_name,
+    PropertyCard.review_count,
+    PropertyCard.review_avg,
+    PropertyCard.flick_count,
+    PropertyCard.clip_count,
+    PropertyCard.share_count,
+    PropertyCard.verification_status,
+    PropertyCard.credibility_score,
+    PropertyCard.verification_badge_visible,
+    PropertyCard.agent_locked_until,
+)
+
+# Counters and agent details only the read model carries
+CARD_EXTRA_FIELDS = (
+    "agent_business_name",
+    "review_count",
+    "review_avg",
+    "flick_count",
+    "clip_count",
+    "share_count",
+)
+
+FEED_INCLUDES = ("description", "media")
+
+# sort name -> (key columns, cursor parsers, descending)
+FEED_SORTS: Dict[str, Tuple[Tuple[Any, ...], Tuple[Any, ...], bool]] = {
+    "newest": (
+        (PropertyCard.created_at, PropertyCard.id),
+        (datetime.fromisoformat, uuid.UUID),
+        True,
+    ),
+    "price_asc": (
+        (PropertyCard.price_monthly, PropertyCard.id),
+        (int, uuid.UUID),
+        False,
+    ),
+    "price_desc": (
+        (PropertyCard.price_monthly, PropertyCard.id),
+        (int, uuid.UUID),
+        True,
+    ),
+    # Precomputed by RankingService
+    "ranked": ((PropertyCard.rank_score, PropertyCard.id), (float, uuid.UUID), True),
+}
+
+
+def serialize_card(row, badges: Optional[Dict] = None) -> Dict:
+    """Turn a projected feed row into a card dict"""
+    card = dict(row._mapping)
+    for coordinate in ("latitude", "longitude"):
+        if card.get(coordinate) is not None:
+            card[coordinate] = float(card[coordinate])
+    card["view_count_7d"] = card.get("view_count_7d") or 0
+    card["view_count_total"] = card.get("view_count_total") or 0
+    # Stored object keys become signed URLs
+    if "cover_url" in card:
+        card["cover_thumbnails"] = media_service.thumbnail_urls(card["cover_url"])
+        card["cover_url"] = media_service.resolve_url(card["cover_url"])
+    if "media_urls" in card:
+        card["media_urls"] = media_service.resolve_urls(card["media_urls"])
+    if badges is not None:
+        badge = badges.get(card["agent_id"])
+        if badge is not None:
+            card["agent_badge"] = {
+                "verification_status": badge["verification_status"],
+                "credibility_score": badge["credibility_score"],
+                "verification_badge_visible": badge["verification_badge_visible"],
+            }
+    return card
+
+
+def serialize_feed_card(row) -> Dict:
+    """Turn a property_cards row into a card dict"""
+    card = serialize_card(row)
+    card["agent_badge"] = {
+        "verification_status": effective_status(
+            card.pop("verification_status"), card.pop("agent_locked_until")
+        ),
+        "credibility_score": card.pop("credibility_score"),
+        "verification_badge_visible": card.pop("verification_badge_visible"),
+    }
+    if card.get("review_avg") is not None:
+        card["review_avg"] = float(card["review_avg"])
+    card.pop("refreshed_at", None)
+    return card
+
+
+class PropertyFeedService:
+    """Serves listing feeds as keyset pages over the partial feed indexes"""
+
+    def filter_conditions(
+        self,
+        source=Property,
+        state: Optional[str] = None,
+        lga: Optional[str] = None,
+        property_type: Optional[str] = None,
+        min_bedrooms: Optional[int] = None,
+        max_bedrooms: Optional[int] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+    ) -> Dict[str, List[Any]]:
+        """
+        Filter conditions grouped by what they restrict
+
+        Keys are "live", "state", "lga", "property_type", "bedrooms" and
+        "price"; facet counts drop one group at a time.
+        """
+        bedrooms, price = [], []
+        if min_bedrooms is not None:
+            bedrooms.append(source.bedrooms >= min_bedrooms)
+        if max_bedrooms is not None:
+            bedrooms.append(source.bedrooms <= max_bedrooms)
+        if min_price is not None:
+            price.append(source.price_monthly >= min_price)
+        if max_price is not None:
+            price.append(source.price_monthly <= max_price)
+        return {
+            # Bare "is_active" so the planner matches the partial feed indexes
+            "live": [
+                source.is_active,
+                source.expires_at > datetime.now(timezone.utc),
+            ],
+            "state": [source.state == state] if state else [],
+            "lga": [source.lga == lga] if lga else [],
+            "property_type": (
+                [source.property_type == property_type] if property_type else []
+            ),
+            "bedrooms": bedrooms,
+            "price": price,
+        }
+
+    def apply_filters(self, query, source=Property, **filters):
+        """
+        Restrict a query to live listings matching the filters
+
+        source is the mapped table the filters apply to: Property, or
+        PropertyCard for feed pages (same column names).
+        """
+        for conditions in self.filter_conditions(source, **filters).values():
+            if conditions:
+                query = query.filter(*conditions)
+        return query
+
+    def get_page(
+        self,
+        db: Session,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: str = "newest",
+        include: Sequence[str] = (),
+        **filters,
+    ) -> Dict:
+        """
+        Fetch one page of property cards
+
+        Args:
+            db: Database session
+            limit: Page size
+            cursor: Cursor returned by the previous page
+            sort: One of FEED_SORTS
+            include: Optional heavy fields ("description", "media")
+            **filters: Keyword filters accepted by apply_filters
+
+        Returns:
+            Dict matching PropertyFeedResponse
+        """
+        columns: List[Any] = list(FEED_CARD_COLUMNS)
+        if "description" in include:
+            columns.append(Property.description)
+        if "media" in include:
+            columns.append(Property.media_urls)
+        query = db.query(*columns)
+        if include:
+            # Heavy columns stay on properties; joined by primary key for
+            # just the rows of the page
+            query = query.join(Property, Property.id == PropertyCard.id)
+
+        rows, has_more, next_cursor = self._page_rows(
+            query, limit, cursor, sort, filters
+        )
+        items = [serialize_feed_card(row) for row in rows]
+
+        return {
+            "items": items,
+            "count": len(items),
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+
+    def get_page_json(
+        self,
+        db: Session,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: str = "newest",
+        include: Sequence[str] = (),
+        facets: Optional[Dict] = None,
+        **filters,
+    ) -> bytes:
+        """
+        Fetch one page as encoded PropertyFeedResponse JSON
+
+        Plain card pages select only ids, versions and sort keys and splice
+        cached card fragments, loading full cards just for new or changed
+        listings. Pages with include fall back to get_page. facets, if
+        given, is embedded as computed by FacetService.
+        """
+        if include:
+            page = self.get_page(db, limit, cursor, sort, include, **filters)
+            page["facets"] = facets
+            return PropertyFeedResponse(**page).model_dump_json().encode("utf-8")
+
+        key_columns = FEED_SORTS[sort][0]
+        columns: List[Any] = list(CARD_VERSION_COLUMNS)
+        columns += [column for column in key_columns if column not in columns]
+
+        rows, has_more, next_cursor = self._page_rows(
+            db.query(*columns), limit, cursor, sort, filters
+        )
+
+        def load_cards(property_ids):
+            loaded = (
+                db.query(*FEED_CARD_COLUMNS, PropertyCard.refreshed_at)
+                .filter(PropertyCard.id.in_(property_ids))
+                .all()
+            )
+            return [(row, serialize_feed_card(row)) for row in loaded]
+
+        fragments = card_fragment_cache.render(rows, load_cards)
+        return splice_page(fragments, has_more, next_cursor, facets)
+
+    def _page_rows(
+        self,
+        query,
+        limit: int,
+        cursor: Optional[str],
+        sort: str,
+        filters: Dict,
+    ):
+        """Rows of one keyset page, whether another exists, and its cursor"""
+        key_columns, parsers, descending = FEED_SORTS[sort]
+        query = self.apply_filters(query, source=PropertyCard, **filters)
+        if cursor:
+            query = query.filter(
+                keyset_filter(
+                    key_columns, decode_cursor(cursor, parsers), descending=descending
+                )
+            )
+        order_by = [
+            column.desc() if descending else column.asc() for column in key_columns
+        ]
+        # Fetch one extra row to know whether another page exists
+        rows = query.order_by(*order_by).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                *(getattr(last, column.key) for column in key_columns)
+            )
+        return rows, has_more, next_cursor
+
+    def get_detail(self, property_id: uuid.UUID, db: Session) -> Optional[Dict]:
+        """Load every listing column for a single property"""
+        prop = db.query(Property).filter(Property.id == property_id).first()
+        if prop is None:
+            return None
+        badges = verification_status_service.get_badges([prop.agent_id], db)
+        badge = badges[prop.agent_id]
+        extras = (
+            db.query(*(getattr(PropertyCard, field) for field in CARD_EXTRA_FIELDS))
+            .filter(PropertyCard.id == property_id)
+            .first()
+        )
+        detail = {
+            "id": prop.id,
+            "agent_id": prop.agent_id,
+            "title": prop.title,
+            "description": prop.description,
+            "property_type": prop.property_type,
+            "bedrooms": prop.bedrooms,
+            "bathrooms": prop.bathrooms,
+            "price_monthly": prop.price_monthly,
+            "state": prop.state,
+            "lga": prop.lga,
+            "address": prop.address,
+            "latitude": float(prop.latitude) if prop.latitude is not None else None,
+            "longitude": float(prop.longitude) if prop.longitude is not None else None,
+            "cover_url": (
+                media_service.resolve_url(prop.media_urls[0])
+                if prop.media_urls
+                else None
+            ),
+            "cover_thumbnails": (
+                media_service.thumbnail_urls(prop.media_urls[0])
+                if prop.media_urls
+                else None
+            ),
+            "media_urls": media_service.resolve_urls(prop.media_urls),
+            "is_active": prop.is_active,
+            "view_count_7d": prop.view_count_7d or 0,
+            "view_count_total": prop.view_count_total or 0,
+            "expires_at": prop.expires_at,
+            "created_at": prop.created_at,
+            "updated_at": prop.updated_at,
+            "agent_badge": {
+                "verification_status": badge["verification_status"],
+                "credibility_score": badge["credibility_score"],
+                "verification_badge_visible": badge["verification_badge_visible"],
+            },
+        }
+        if extras is not None:
+            detail.update(extras._mapping)
+            if detail["review_avg"] is not None:
+                detail["review_avg"] = float(detail["review_avg"])
+        return detail
+
+
+property_feed_service = PropertyFeedService()
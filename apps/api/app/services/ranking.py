@@ -0,0 +1,264 @@
+"""
+Precomputed feed ranking
+
+Each live listing carries a materialized rank_score, and the partial index
+(state, rank_score, id) WHERE is_active makes a ranked feed page a single
+index range scan. The score is time-invariant, in the style of "hot" ranking:
+
+    rank_score = (created_at - RANK_EPOCH) / RECENCY_SCALE
+                 + VIEWS_WEIGHT * ln(1 + view_count_7d)
+                 + ENGAGEMENT_WEIGHT * ln(1 + flicks + CLIP_WEIGHT * clips)
+                 + CREDIBILITY_WEIGHT * credibility_score / 100
+
+Recency is an additive bonus for being newer rather than a penalty that grows
+with age, so relative order never changes just because time passes and a
+score only needs recomputing when one of its inputs changes. Changed
+listings are collected from domain events into a dirty set that a background
+task refreshes every REFRESH_INTERVAL_SECONDS.
+"""
+
+import logging
+import math
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask
+from app.core.events import subscribe
+from app.models.base import SessionLocal
+from app.models.engagement import AgentVerification, PropertyClip, PropertyFlick
+from app.models.property import Property
+from app.services.property_events import (
+    PROPERTY_CHANGED,
+    PROPERTY_ENGAGEMENT_CHANGED,
+)
+from app.services.verification_status import AGENT_CREDIBILITY_CHANGED
+from app.services.view_ingestion import PROPERTY_VIEWS_RECORDED
+
+logger = logging.getLogger(__name__)
+
+RANK_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# A listing this much newer gains as much as e-times the engagement would
+RECENCY_SCALE = timedelta(days=2)
+VIEWS_WEIGHT = 1.0
+ENGAGEMENT_WEIGHT = 1.5
+CLIP_WEIGHT = 2
+CREDIBILITY_WEIGHT = 1.0
+
+REFRESH_BATCH_SIZE = 500
+REFRESH_INTERVAL_SECONDS = 15
+
+
+def rank_score(
+    created_at: Optional[datetime],
+    views_7d: int = 0,
+    flicks: int = 0,
+    clips: int = 0,
+    credibility: int = 0,
+) -> float:
+    """Materialized feed score for one listing"""
+    if created_at is None:
+        created_at = RANK_EPOCH
+    elif created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    recency = (created_at - RANK_EPOCH) / RECENCY_SCALE
+    return (
+        recency
+        + VIEWS_WEIGHT * math.log1p(views_7d or 0)
+        + ENGAGEMENT_WEIGHT * math.log1p((flicks or 0) + CLIP_WEIGHT * (clips or 0))
+        + CREDIBILITY_WEIGHT * (credibility or 0) / 100
+    )
+
+
+def _chunks(ids: List, size: int):
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+class RankingService:
+    """Keeps Property.rank_score current for listings whose signals changed"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._dirty: Set[uuid.UUID] = set()
+        self._dirty_agents: Set[uuid.UUID] = set()
+        self._lock = threading.Lock()
+        self._refresher = PeriodicTask(
+            "ranking-refresh", REFRESH_INTERVAL_SECONDS, self._refresh_dirty_now
+        )
+
+    def mark_dirty(self, property_ids: Iterable[uuid.UUID]) -> None:
+        """Queue listings for a score refresh"""
+        with self._lock:
+            self._dirty.update(property_ids)
+
+    def mark_agent_dirty(self, agent_id: uuid.UUID) -> None:
+        """Queue every live listing of an agent (credibility changed)"""
+        with self._lock:
+            self._dirty_agents.add(agent_id)
+
+    def pending(self) -> int:
+        """Number of queued listings and agents"""
+        return len(self._dirty) + len(self._dirty_agents)
+
+    def refresh(
+        self,
+        db: Session,
+        property_ids: Iterable[uuid.UUID],
+        batch_size: int = REFRESH_BATCH_SIZE,
+    ) -> int:
+        """
+        Recompute rank_score for the given listings
+
+        Returns:
+            Number of listings scored
+        """
+        property_ids = list(property_ids)
+        scored = 0
+        for chunk in _chunks(property_ids, batch_size):
+            scores = self._score(db, chunk)
+            if scores:
+                properties = Property.__table__
+                db.execute(
+                    update(properties)
+                    .where(properties.c.id == bindparam("b_id"))
+                    .values(
+                        rank_score=bindparam("b_score"),
+                        updated_at=properties.c.updated_at,
+                    ),
+                    [
+                        {"b_id": property_id, "b_score": score}
+                        for property_id, score in sorted(
+                            scores.items(), key=lambda item: str(item[0])
+                        )
+                    ],
+                )
+            db.commit()
+            scored += len(scores)
+        return scored
+
+    def refresh_dirty(self, db: Session) -> int:
+        """Refresh everything queued so far; re-queues it on failure"""
+        with self._lock:
+            property_ids, self._dirty = self._dirty, set()
+            agent_ids, self._dirty_agents = self._dirty_agents, set()
+        try:
+            if agent_ids:
+                property_ids |= {
+                    row.id
+                    for row in db.query(Property.id).filter(
+                        Property.agent_id.in_(agent_ids), Property.is_active
+                    )
+                }
+            return self.refresh(db, property_ids) if property_ids else 0
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._dirty |= property_ids
+                self._dirty_agents |= agent_ids
+            raise
+
+    def refresh_all(self, db: Session, batch_size: int = REFRESH_BATCH_SIZE) -> int:
+        """Rescore every live listing (after deploying new weights)"""
+        scored = 0
+        last_id = None
+        while True:
+            query = db.query(Property.id).filter(Property.is_active)
+            if last_id is not None:
+                query = query.filter(Property.id > last_id)
+            ids = [row.id for row in query.order_by(Property.id).limit(batch_size)]
+            if not ids:
+                return scored
+            scored += self.refresh(db, ids, batch_size)
+            last_id = ids[-1]
+
+    def start(self) -> None:
+        """Start the background refresher (idempotent)"""
+        self._refresher.start()
+
+    def stop(self) -> None:
+        """Stop the refresher and apply anything still queued"""
+        self._refresher.stop()
+        self._refresh_dirty_now()
+
+    def _refresh_dirty_now(self) -> None:
+        if not self.pending():
+            return
+        db = self.session_factory()
+        try:
+            self.refresh_dirty(db)
+        finally:
+            db.close()
+
+    def _score(self, db: Session, property_ids: List[uuid.UUID]) -> Dict:
+        rows = (
+            db.query(
+                Property.id,
+                Property.agent_id,
+                Property.created_at,
+                Property.view_count_7d,
+            )
+            .filter(Property.id.in_(property_ids))
+            .all()
+        )
+        if not rows:
+            return {}
+        flicks = self._count_by_property(db, PropertyFlick, property_ids)
+        clips = self._count_by_property(db, PropertyClip, property_ids)
+        credibility = dict(
+            db.query(AgentVerification.agent_id, AgentVerification.credibility_score)
+            .filter(AgentVerification.agent_id.in_({row.agent_id for row in rows}))
+            .all()
+        )
+        return {
+            row.id: rank_score(
+                row.created_at,
+                row.view_count_7d,
+                flicks.get(row.id, 0),
+                clips.get(row.id, 0),
+                credibility.get(row.agent_id, 0),
+            )
+            for row in rows
+        }
+
+    @staticmethod
+    def _count_by_property(db: Session, model, property_ids) -> Dict:
+        return dict(
+            db.query(model.property_id, func.count())
+            .filter(model.property_id.in_(property_ids))
+            .group_by(model.property_id)
+            .all()
+        )
+
+
+ranking_service = RankingService()
+
+
+def _on_property_changed(changes: Iterable[Dict]) -> None:
+    ranking_service.mark_dirty(
+        change["id"]
+        for change in changes
+        if change.get("change") != "deleted" and change.get("is_active")
+    )
+
+
+def _on_engagement_changed(changes: Iterable[Dict]) -> None:
+    ranking_service.mark_dirty(change["id"] for change in changes)
+
+
+def _on_views_recorded(property_ids: Iterable[uuid.UUID]) -> None:
+    ranking_service.mark_dirty(property_ids)
+
+
+def _on_credibility_changed(agent_id: uuid.UUID) -> None:
+    ranking_service.mark_agent_dirty(agent_id)
+
+
+subscribe(PROPERTY_CHANGED, _on_property_changed)
+subscribe(PROPERTY_ENGAGEMENT_CHANGED, _on_engagement_changed)
+subscribe(PROPERTY_VIEWS_RECORDED, _on_views_recorded)
+subscribe(AGENT_CREDIBILITY_CHANGED, _on_credibility_changed)
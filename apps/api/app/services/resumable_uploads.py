@@ -0,0 +1,384 @@
+"""
+Resumable chunked uploads of listing videos
+
+Built on S3 multipart uploads so chunks still go straight to the bucket: a
+session fixes the object key, part size and part count, the client asks for
+presigned URLs for whichever parts it still needs (any number at once, so
+parts can upload in parallel) and PUTs each chunk. After a dropped
+connection it asks for the session status, which lists the parts the bucket
+has committed (ListParts is the source of truth, so a part is never counted
+before storage has it) and the contiguous committed offset, and carries on
+from there. Completing assembles the parts and attaches the object like any
+other upload.
+
+Session metadata lives in Redis for UPLOAD_SESSION_TTL_SECONDS so any API
+worker can serve any request of a session. Incomplete multipart uploads
+should also be expired by a bucket lifecycle rule with the same lifetime.
+"""
+
+import json
+import logging
+import math
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis_client import get_redis, mark_unavailable
+from app.core.storage import get_signing_client, get_storage_client
+from app.services.media import (
+    MEDIA_CONTENT_TYPES,
+    UPLOAD_URL_TTL_SECONDS,
+    max_bytes,
+    media_service,
+)
+
+logger = logging.getLogger(__name__)
+
+# S3 requires every part but the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+MAX_PARTS = 10000
+MAX_PART_URLS_PER_REQUEST = 100
+UPLOAD_SESSION_TTL_SECONDS = 24 * 3600
+
+_SESSION_KEY = "upload_session:{}"
+
+
+def part_sizes(size: int, part_size: int) -> List[int]:
+    """Size of each part, in part number order"""
+    count = max(1, math.ceil(size / part_size))
+    return [part_size] * (count - 1) + [size - part_size * (count - 1)]
+
+
+class ResumableUploadService:
+    """Multipart upload sessions tracked in Redis"""
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        redis_getter: Callable = get_redis,
+        client_factory: Callable = get_storage_client,
+        signer_factory: Callable = get_signing_client,
+        media=media_service,
+        clock: Optional[Callable[[], datetime]] = None,
+    ):
+        self.bucket = bucket or settings.STORAGE_BUCKET
+        self.redis_getter = redis_getter
+        self._client_factory = client_factory
+        self._signer_factory = signer_factory
+        self.media = media
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+
+    def create(
+        self,
+        property_id: uuid.UUID,
+        agent_id: uuid.UUID,
+        content_type: str,
+        size: int,
+        part_size: int = DEFAULT_PART_SIZE,
+    ) -> Dict:
+        """
+        Start a multipart upload session
+
+        Args:
+            property_id: Listing the file is for
+            agent_id: Agent the session belongs to
+            content_type: MIME type (one of MEDIA_CONTENT_TYPES)
+            size: Total file size in bytes
+            part_size: Requested chunk size; raised if the file would need
+                more than MAX_PARTS parts
+
+        Returns:
+            Dict matching ResumableUploadResponse
+
+        Raises:
+            ValueError: If the type, size or part size is not acceptable
+            RuntimeError: If Redis is unavailable
+        """
+        extension = MEDIA_CONTENT_TYPES.get(content_type)
+        if extension is None:
+            raise ValueError(
+                f"content_type must be one of: {', '.join(MEDIA_CONTENT_TYPES)}"
+            )
+        limit = max_bytes(content_type)
+        if size <= 0 or size > limit:
+            raise ValueError(f"size must be between 1 and {limit} bytes")
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        part_size = max(part_size, math.ceil(size / MAX_PARTS))
+
+        key = f"{self.media.key_prefix(property_id)}{uuid.uuid4().hex}{extension}"
+        multipart = self._client_factory().create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type
+        )
+        session = {
+            "id": uuid.uuid4().hex,
+            "property_id": str(property_id),
+            "agent_id": str(agent_id),
+            "key": key,
+            "multipart_id": multipart["UploadId"],
+            "content_type": content_type,
+            "size": size,
+            "part_size": part_size,
+            "part_count": len(part_sizes(size, part_size)),
+            "expires_at": (
+                self.clock() + timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+            ).isoformat(),
+        }
+        try:
+            self._save(session)
+        except RuntimeError:
+            self._abort_multipart(session)
+            raise
+        return self._describe(session, committed={})
+
+    def part_urls(
+        self,
+        session_id: str,
+        property_id: uuid.UUID,
+        agent_id: uuid.UUID,
+        part_numbers: List[int],
+    ) -> Dict[int, str]:
+        """
+        Presigned PUT URLs for parts of a session
+
+        Raises:
+            LookupError: If the session does not exist for this listing
+                and agent
+            ValueError: If a part number is out of range
+        """
+        session = self._load(session_id, property_id, agent_id)
+        if len(part_numbers) > MAX_PART_URLS_PER_REQUEST:
+            raise ValueError(
+                f"At most {MAX_PART_URLS_PER_REQUEST} part URLs per request"
+            )
+        for number in part_numbers:
+            if not 1 <= number <= session["part_count"]:
+                raise ValueError(
+                    f"part numbers must be between 1 and {session['part_count']}"
+                )
+        signer = self._signer_factory()
+        return {
+            number: signer.generate_presigned_url(
+                "upload_part",
+                Params={
+                    "Bucket": self.bucket,
+                    "Key": session["key"],
+                    "UploadId": session["multipart_id"],
+                    "PartNumber": number,
+                },
+                ExpiresIn=UPLOAD_URL_TTL_SECONDS,
+            )
+            for number in dict.fromkeys(part_numbers)
+        }
+
+    def status(
+        self, session_id: str, property_id: uuid.UUID, agent_id: uuid.UUID
+    ) -> Dict:
+        """
+        Committed parts and offset of a session, for resuming
+
+        Raises:
+            LookupError: If the session does not exist for this listing
+                and agent
+        """
+        session = self._load(session_id, property_id, agent_id)
+        if session.get("assembled"):
+            # Storage no longer lists the parts of a finished upload
+            sizes = part_sizes(session["size"], session["part_size"])
+            committed = {
+                number: {"size": size} for number, size in enumerate(sizes, start=1)
+            }
+        else:
+            committed = self._committed_parts(session)
+        return self._describe(session, committed)
+
+    def complete(
+        self,
+        db: Session,
+        session_id: str,
+        property_id: uuid.UUID,
+        agent_id: uuid.UUID,
+    ) -> List[str]:
+        """
+        Assemble the parts and attach the object to the listing
+
+        The session is kept until the attach succeeds, marked as assembled,
+        so a complete that fails on the database can be retried. If the
+        listing rejects the object it is deleted along with the session.
+
+        Returns:
+            The listing's media_urls after the attach
+
+        Raises:
+            LookupError: If the session does not exist for this listing
+                and agent
+            ValueError: If parts are missing or the wrong size, or the
+                listing rejects the assembled object
+        """
+        session = self._load(session_id, property_id, agent_id)
+        if not session.get("assembled"):
+            self._assemble(session)
+
+        try:
+            media_urls = self.media.attach(db, property_id, [session["key"]])
+        except ValueError:
+            self._delete_object(session["key"])
+            self._delete(session_id)
+            raise
+        self._delete(session_id)
+        return media_urls
+
+    def abort(
+        self, session_id: str, property_id: uuid.UUID, agent_id: uuid.UUID
+    ) -> None:
+        """
+        Cancel a session and discard its uploaded parts
+
+        Raises:
+            LookupError: If the session does not exist for this listing
+                and agent
+        """
+        session = self._load(session_id, property_id, agent_id)
+        if session.get("assembled"):
+            self._delete_object(session["key"])
+        else:
+            self._abort_multipart(session)
+        self._delete(session_id)
+
+    def _assemble(self, session: Dict) -> None:
+        committed = self._committed_parts(session)
+        expected = part_sizes(session["size"], session["part_size"])
+        problems = [
+            number
+            for number, size in enumerate(expected, start=1)
+            if number not in committed or committed[number]["size"] != size
+        ]
+        if problems:
+            raise ValueError(
+                "Parts missing or incomplete: "
+                + ", ".join(str(number) for number in problems[:20])
+            )
+
+        self._client_factory().complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=session["key"],
+            UploadId=session["multipart_id"],
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": number, "ETag": committed[number]["etag"]}
+                    for number in range(1, len(expected) + 1)
+                ]
+            },
+        )
+        # The multipart id is spent; a retried complete goes straight to
+        # the attach
+        session["assembled"] = True
+        try:
+            self._save(session)
+        except RuntimeError:
+            logger.warning("Could not mark upload %s assembled", session["key"])
+
+    def _describe(self, session: Dict, committed: Dict[int, Dict]) -> Dict:
+        sizes = part_sizes(session["size"], session["part_size"])
+        offset = 0
+        for number, size in enumerate(sizes, start=1):
+            if committed.get(number, {}).get("size") != size:
+                break
+            offset += size
+        return {
+            "upload_id": session["id"],
+            "key": session["key"],
+            "size": session["size"],
+            "part_size": session["part_size"],
+            "part_count": session["part_count"],
+            "committed_parts": sorted(committed),
+            "committed_offset": offset,
+            "expires_at": session["expires_at"],
+        }
+
+    def _committed_parts(self, session: Dict) -> Dict[int, Dict]:
+        """Parts storage has, by part number"""
+        client = self._client_factory()
+        committed: Dict[int, Dict] = {}
+        marker = 0
+        while True:
+            page = client.list_parts(
+                Bucket=self.bucket,
+                Key=session["key"],
+                UploadId=session["multipart_id"],
+                PartNumberMarker=marker,
+            )
+            for part in page.get("Parts", []):
+                committed[part["PartNumber"]] = {
+                    "etag": part["ETag"],
+                    "size": part["Size"],
+                }
+            if not page.get("IsTruncated"):
+                return committed
+            marker = page["NextPartNumberMarker"]
+
+    def _abort_multipart(self, session: Dict) -> None:
+        try:
+            self._client_factory().abort_multipart_upload(
+                Bucket=self.bucket,
+                Key=session["key"],
+                UploadId=session["multipart_id"],
+            )
+        except Exception:
+            logger.warning("Could not abort multipart upload %s", session["key"])
+
+    def _delete_object(self, key: str) -> None:
+        try:
+            self._client_factory().delete_object(Bucket=self.bucket, Key=key)
+        except Exception:
+            logger.warning("Could not delete rejected upload %s", key)
+
+    def _redis(self):
+        client = self.redis_getter()
+        if client is None:
+            raise RuntimeError("Upload sessions are temporarily unavailable")
+        return client
+
+    def _save(self, session: Dict) -> None:
+        try:
+            self._redis().set(
+                _SESSION_KEY.format(session["id"]),
+                json.dumps(session),
+                ex=UPLOAD_SESSION_TTL_SECONDS,
+            )
+        except RedisError as e:
+            mark_unavailable(e)
+            raise RuntimeError("Upload sessions are temporarily unavailable")
+
+    def _load(
+        self, session_id: str, property_id: uuid.UUID, agent_id: uuid.UUID
+    ) -> Dict:
+        try:
+            raw = self._redis().get(_SESSION_KEY.format(session_id))
+        except RedisError as e:
+            mark_unavailable(e)
+            raise RuntimeError("Upload sessions are temporarily unavailable")
+        session = json.loads(raw) if raw else None
+        # Someone else's session is reported as missing, not forbidden
+        if (
+            session is None
+            or session["agent_id"] != str(agent_id)
+            or session["property_id"] != str(property_id)
+        ):
+            raise LookupError("Upload session not found or expired")
+        return session
+
+    def _delete(self, session_id: str) -> None:
+        try:
+            self._redis().delete(_SESSION_KEY.format(session_id))
+        except RedisError as e:
+            # The session expires on its own; the multipart id is spent
+            mark_unavailable(e)
+
+
+resumable_upload_service = ResumableUploadService()
@@ -0,0 +1,592 @@
+"""
+Full-text property search with blended ranking
+
+Two backends share one ranking formula:
+- PostgresSearchBackend: trigger-maintained tsvector with a GIN index,
+  pg_trgm word similarity for misspellings, ts_headline snippets.
+- InMemorySearchIndex: inverted index with BM25 scoring and trigram
+  spelling correction, for tests and small deployments.
+
+final score = text_rank * (TEXT_FLOOR + RECENCY_WEIGHT * recency
+                                      + POPULARITY_WEIGHT * popularity)
+where text_rank is normalized to [0, 1), recency decays exponentially with
+listing age and popularity is log-scaled 7-day views.
+"""
+
+import html
+import math
+import re
+import threading
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, func, literal, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.events import subscribe
+from app.models.base import SessionLocal
+from app.models.property import Property
+from app.services.property_events import PROPERTY_CHANGED
+from app.services.property_feed import (
+    CARD_COLUMNS,
+    COVER_URL,
+    property_feed_service,
+    serialize_card,
+)
+from app.services.verification_status import verification_status_service
+
+TEXT_SEARCH_CONFIG = "english"
+
+# Ranking blend
+TEXT_FLOOR = 0.6
+RECENCY_WEIGHT = 0.25
+POPULARITY_WEIGHT = 0.15
+RECENCY_DECAY_DAYS = 14.0
+POPULARITY_SATURATION_VIEWS = 1000
+
+# Fuzzy matching
+TRIGRAM_SIMILARITY_THRESHOLD = 0.4
+MAX_SEARCH_RESULTS = 200
+# In-memory hits checked for liveness per database round trip
+MEMORY_SEARCH_BATCH = 50
+
+SNIPPET_WORDS = 20
+HIGHLIGHT_START = "<b>"
+HIGHLIGHT_STOP = "</b>"
+# html.escape(quote=True), applied in order; & must come first
+HTML_ESCAPES = (
+    ("&", "&amp;"),
+    ("<", "&lt;"),
+    (">", "&gt;"),
+    ('"', "&quot;"),
+    ("'", "&#x27;"),
+)
+
+# Field weights for the in-memory index (mirror setweight A/B/C/D)
+FIELD_WEIGHTS = {"title": 3.0, "lga": 2.0, "address": 1.0, "description": 0.5}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase words; hyphenated words also yield their parts"""
+    if not text:
+        return []
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        tokens.append(_normalize(word))
+        if "-" in word:
+            tokens.extend(_normalize(part) for part in word.split("-"))
+    return tokens
+
+
+def _normalize(word: str) -> str:
+    """Very light stemming so plurals match their singular"""
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def trigrams(term: str) -> Set[str]:
+    """pg_trgm-style trigrams of a single term"""
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def blend(text_rank: float, created_at: Optional[datetime], views_7d: int) -> float:
+    """Combine normalized text relevance with recency and popularity"""
+    recency = 0.0
+    if created_at is not None:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        age_days = max(
+            (datetime.now(timezone.utc) - created_at).total_seconds() / 86400, 0.0
+        )
+        recency = math.exp(-age_days / RECENCY_DECAY_DAYS)
+    popularity = min(
+        math.log1p(views_7d or 0) / math.log1p(POPULARITY_SATURATION_VIEWS), 1.0
+    )
+    return text_rank * (
+        TEXT_FLOOR + RECENCY_WEIGHT * recency + POPULARITY_WEIGHT * popularity
+    )
+
+
+def highlight(text: Optional[str], terms: Set[str]) -> Optional[str]:
+    """
+    Window of text around the first matched term, matches wrapped
+
+    The text is HTML-escaped, so the highlight tags are the only markup.
+    """
+    if not text:
+        return None
+    words = text.split()
+    matched = [
+        index
+        for index, word in enumerate(words)
+        if any(token in terms for token in tokenize(word))
+    ]
+    if not matched:
+        return None
+    start = max(matched[0] - SNIPPET_WORDS // 4, 0)
+    window = words[start : start + SNIPPET_WORDS]
+    rendered = [
+        (
+            f"{HIGHLIGHT_START}{html.escape(word)}{HIGHLIGHT_STOP}"
+            if any(token in terms for token in tokenize(word))
+            else html.escape(word)
+        )
+        for word in window
+    ]
+    prefix = "... " if start > 0 else ""
+    suffix = " ..." if start + SNIPPET_WORDS < len(words) else ""
+    return prefix + " ".join(rendered) + suffix
+
+
+class _Document:
+    __slots__ = ("fields", "term_weights", "length", "created_at", "views_7d", "state")
+
+    def __init__(self, fields, term_weights, length, created_at, views_7d, state):
+        self.fields = fields
+        self.term_weights = term_weights
+        self.length = length
+        self.created_at = created_at
+        self.views_7d = views_7d
+        self.state = state
+
+
+class InMemorySearchIndex:
+    """Inverted index over listing text with BM25 scoring
+
+    Postings map term -> {doc_id: weighted term frequency}. Unknown query
+    terms are corrected against the vocabulary through a trigram index.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._docs: Dict[uuid.UUID, _Document] = {}
+        self._postings: Dict[str, Dict[uuid.UUID, float]] = defaultdict(dict)
+        self._trigram_index: Dict[str, Set[str]] = defaultdict(set)
+        self._total_length = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(
+        self,
+        doc_id: uuid.UUID,
+        title: Optional[str],
+        description: Optional[str] = None,
+        address: Optional[str] = None,
+        lga: Optional[str] = None,
+        state: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        views_7d: int = 0,
+    ) -> None:
+        """Index (or re-index) one listing"""
+        fields = {
+            "title": title,
+            "description": description,
+            "address": address,
+            "lga": lga,
+        }
+        term_weights: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields[field]):
+                term_weights[token] += weight
+        length = sum(term_weights.values())
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._docs[doc_id] = _Document(
+                fields, term_weights, length, created_at, views_7d or 0, state
+            )
+            self._total_length += length
+            for term, weight in term_weights.items():
+                if term not in self._postings:
+                    for gram in trigrams(term):
+                        self._trigram_index[gram].add(term)
+                self._postings[term][doc_id] = weight
+
+    def remove(self, doc_id: uuid.UUID) -> None:
+        """Drop a listing from the index"""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        state: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Rank listings for a free-text query
+
+        Returns:
+            Dicts with id, score and snippet, best first
+        """
+        query_terms = tokenize(query)
+        if not query_terms:
+            return []
+        with self._lock:
+            expanded = self._expand_terms(query_terms)
+            if not self._docs:
+                return []
+            average_length = self._total_length / len(self._docs)
+            raw_scores: Dict[uuid.UUID, float] = defaultdict(float)
+            for term, term_boost in expanded.items():
+                postings = self._postings.get(term, {})
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (len(self._docs) - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for doc_id, weight in postings.items():
+                    doc = self._docs[doc_id]
+                    if state and doc.state != state:
+                        continue
+                    norm = self.k1 * (
+                        1 - self.b + self.b * doc.length / max(average_length, 1e-9)
+                    )
+                    raw_scores[doc_id] += (
+                        term_boost * idf * weight * (self.k1 + 1) / (weight + norm)
+                    )
+
+            ranked = []
+            for doc_id, raw in raw_scores.items():
+                doc = self._docs[doc_id]
+                text_rank = raw / (raw + 1)
+                ranked.append((blend(text_rank, doc.created_at, doc.views_7d), doc_id))
+            ranked.sort(key=lambda pair: (-pair[0], str(pair[1])))
+
+            terms = set(expanded)
+            results = []
+            for score, doc_id in ranked[offset : offset + limit]:
+                fields = self._docs[doc_id].fields
+                snippet = highlight(fields["description"], terms) or highlight(
+                    fields["title"], terms
+                )
+                results.append({"id": doc_id, "score": score, "snippet": snippet})
+            return results
+
+    def _expand_terms(self, query_terms: Sequence[str]) -> Dict[str, float]:
+        """Map query terms to indexed terms, correcting misspellings"""
+        expanded: Dict[str, float] = {}
+        for term in query_terms:
+            if term in self._postings:
+                expanded[term] = max(expanded.get(term, 0.0), 1.0)
+                continue
+            correction = self._closest_term(term)
+            if correction is not None:
+                corrected, similarity = correction
+                expanded[corrected] = max(expanded.get(corrected, 0.0), similarity)
+        return expanded
+
+    def _closest_term(self, term: str) -> Optional[Tuple[str, float]]:
+        grams = trigrams(term)
+        overlap: Counter = Counter()
+        for gram in grams:
+            for candidate in self._trigram_index.get(gram, ()):
+                overlap[candidate] += 1
+        best = None
+        for candidate, shared in overlap.items():
+            similarity = shared / len(grams | trigrams(candidate))
+            if similarity >= TRIGRAM_SIMILARITY_THRESHOLD and (
+                best is None or similarity > best[1]
+            ):
+                best = (candidate, similarity)
+        return best
+
+    def _remove_locked(self, doc_id: uuid.UUID) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc.length
+        for term in doc.term_weights:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                for gram in trigrams(term):
+                    self._trigram_index[gram].discard(term)
+
+
+def html_escaped(text):
+    """SQL expression for text with HTML special characters escaped"""
+    for char, entity in HTML_ESCAPES:
+        text = func.replace(text, char, entity)
+    return text
+
+
+# Same expression as ix_properties_search_trgm (migration 009) so the
+# trigram index is used for misspelling matches
+TRIGRAM_DOCUMENT = literal_column("lower(properties.title || ' ' || properties.lga)")
+
+
+class PostgresSearchBackend:
+    """tsvector/GIN search with pg_trgm fallback for misspelt queries"""
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        state: Optional[str] = None,
+    ) -> List:
+        # <% matches at pg_trgm.word_similarity_threshold (default 0.6);
+        # lower it for this transaction to the in-memory backend's threshold
+        # so both backends accept the same misspellings
+        db.execute(
+            select(
+                func.set_config(
+                    "pg_trgm.word_similarity_threshold",
+                    str(TRIGRAM_SIMILARITY_THRESHOLD),
+                    True,
+                )
+            )
+        )
+        return self.build_query(db, query, limit, offset, state).all()
+
+    def build_query(
+        self,
+        db: Session,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        state: Optional[str] = None,
+    ):
+        """Ranked page of matches with card columns, score and snippet"""
+        ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        text_rank = func.ts_rank_cd(Property.search_vector, ts_query, 32)
+        fuzzy_rank = func.word_similarity(query.lower(), TRIGRAM_DOCUMENT)
+
+        age_days = func.extract("epoch", func.now() - Property.created_at) / 86400.0
+        recency = func.exp(-func.greatest(age_days, 0) / RECENCY_DECAY_DAYS)
+        popularity = func.least(
+            func.ln(1 + func.coalesce(Property.view_count_7d, 0))
+            / math.log1p(POPULARITY_SATURATION_VIEWS),
+            1.0,
+        )
+        relevance = func.greatest(
+            func.coalesce(text_rank, 0), func.coalesce(fuzzy_rank, 0) * 0.5
+        )
+        score = (
+            relevance
+            * (TEXT_FLOOR + RECENCY_WEIGHT * recency + POPULARITY_WEIGHT * popularity)
+        ).label("score")
+
+        ranked = (
+            property_feed_service.apply_filters(
+                db.query(*CARD_COLUMNS, COVER_URL, score), state=state
+            )
+            .filter(
+                or_(
+                    Property.search_vector.op("@@")(ts_query),
+                    # <% lets the trigram index prefilter; the explicit
+                    # bound pins the threshold whatever the setting
+                    and_(
+                        literal(query.lower()).op("<%")(TRIGRAM_DOCUMENT),
+                        fuzzy_rank >= TRIGRAM_SIMILARITY_THRESHOLD,
+                    ),
+                )
+            )
+            .order_by(score.desc(), Property.id)
+            .offset(offset)
+            .limit(limit)
+            .subquery()
+        )
+
+        # Headlines are expensive, so only the page's rows get one. The
+        # listing text is agent-written, so it is escaped before the
+        # highlight tags go in and they are the only markup in the snippet.
+        snippet = func.ts_headline(
+            TEXT_SEARCH_CONFIG,
+            html_escaped(func.coalesce(Property.description, Property.title)),
+            ts_query,
+            f"MaxWords={SNIPPET_WORDS}, MinWords=8, "
+            f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}",
+        ).label("snippet")
+        return (
+            db.query(ranked, snippet)
+            .join(Property, Property.id == ranked.c.id)
+            .order_by(ranked.c.score.desc(), ranked.c.id)
+        )
+
+
+class PropertySearchService:
+    """Runs searches on the configured backend and renders result cards"""
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or settings.SEARCH_BACKEND
+        self.memory_index = InMemorySearchIndex()
+        self.postgres = PostgresSearchBackend()
+        self._memory_loaded = False
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        state: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Search live listings
+
+        Args:
+            db: Database session
+            query: Free text, e.g. "self-contain Yaba"
+            limit: Page size
+            offset: Results to skip (capped at MAX_SEARCH_RESULTS)
+            state: Optional state filter
+
+        Returns:
+            Property card dicts with score and snippet, best first
+        """
+        if offset >= MAX_SEARCH_RESULTS:
+            return []
+        limit = min(limit, MAX_SEARCH_RESULTS - offset)
+
+        if self.backend == "memory":
+            rows = self._search_memory(db, query, limit, offset, state)
+        else:
+            rows = self.postgres.search(db, query, limit, offset, state)
+
+        badges = verification_status_service.get_badges(
+            {row.agent_id for row in rows}, db
+        )
+        results = []
+        for row in rows:
+            card = serialize_card(row, badges)
+            card["score"] = round(float(card.pop("score")), 6)
+            results.append(card)
+        return results
+
+    def rebuild_memory_index(self, db: Session, batch_size: int = 2000) -> int:
+        """Load every live listing into the in-memory index"""
+        index = InMemorySearchIndex()
+        rows = (
+            property_feed_service.apply_filters(db.query(*_MEMORY_INDEX_COLUMNS))
+        ).yield_per(batch_size)
+        for row in rows:
+            _index_row(index, row)
+        self.memory_index = index
+        self._memory_loaded = True
+        return len(index)
+
+    def apply_changes(self, changes: Iterable[Dict]) -> None:
+        """Keep the in-memory index in step with property writes"""
+        if self.backend != "memory" or not self._memory_loaded:
+            return
+        changes = list(changes)
+        live_ids = [
+            change["id"]
+            for change in changes
+            if change.get("change") != "deleted" and change.get("is_active")
+        ]
+        for change in changes:
+            if change["id"] not in live_ids:
+                self.memory_index.remove(change["id"])
+        if live_ids:
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(*_MEMORY_INDEX_COLUMNS)
+                    .filter(Property.id.in_(live_ids))
+                    .all()
+                )
+            finally:
+                db.close()
+            for row in rows:
+                _index_row(self.memory_index, row)
+
+    def _search_memory(self, db, query, limit, offset, state):
+        """
+        Page of live matches from the in-memory index
+
+        The index can still hold listings that expired or were deactivated
+        since it was built, so hits are checked against the database before
+        paging, fetching further hits until the page is full.
+        """
+        if not self._memory_loaded:
+            self.rebuild_memory_index(db)
+        wanted = offset + limit
+        batch_size = max(wanted, MEMORY_SEARCH_BATCH)
+        live = []
+        scanned = 0
+        while len(live) < wanted:
+            hits = self.memory_index.search(
+                query, limit=batch_size, offset=scanned, state=state
+            )
+            scanned += len(hits)
+            if hits:
+                by_id = self._live_rows(db, [hit["id"] for hit in hits])
+                live += [
+                    _SearchRow(by_id[hit["id"]], hit["score"], hit["snippet"])
+                    for hit in hits
+                    if hit["id"] in by_id
+                ]
+            if len(hits) < batch_size:
+                break
+        return live[offset:wanted]
+
+    def _live_rows(self, db: Session, property_ids: List[uuid.UUID]) -> Dict:
+        """Card rows of the listings that are still live, by id"""
+        return {
+            row.id: row
+            for row in property_feed_service.apply_filters(
+                db.query(*CARD_COLUMNS, COVER_URL)
+            )
+            .filter(Property.id.in_(property_ids))
+            .all()
+        }
+
+
+_MEMORY_INDEX_COLUMNS = (
+    Property.id,
+    Property.title,
+    Property.description,
+    Property.address,
+    Property.lga,
+    Property.state,
+    Property.created_at,
+    Property.view_count_7d,
+)
+
+
+def _index_row(index: InMemorySearchIndex, row) -> None:
+    index.add(
+        row.id,
+        title=row.title,
+        description=row.description,
+        address=row.address,
+        lga=row.lga,
+        state=row.state,
+        created_at=row.created_at,
+        views_7d=row.view_count_7d or 0,
+    )
+
+
+class _SearchRow:
+    """Card row plus search score/snippet, shaped like a SQL result row"""
+
+    def __init__(self, row, score: float, snippet: Optional[str]):
+        self._mapping = {**row._mapping, "score": score, "snippet": snippet}
+
+    def __getattr__(self, name):
+        try:
+            return self._mapping[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+property_search_service = PropertySearchService()
+subscribe(PROPERTY_CHANGED, property_search_service.apply_changes)
@@ -0,0 +1,294 @@
+"""
+Share link resolution and click tracking
+
+Share links go out over WhatsApp and SMS in bursts, so one token can be
+resolved thousands of times a minute. A token's share never changes, so
+resolution is cached in two layers, in process (TTLCache) and in Redis
+shared by every worker, and the database is only read on a miss in both.
+Unknown tokens are cached briefly too, so a bad link being retried does not
+reach the database.
+
+Clicks are write-behind: resolve() only bumps an in-memory counter per
+share, and a background task writes every share clicked since the last
+flush with one batched UPDATE (click_count += n, first and last click
+times) per SHARE_CLICK_FLUSH_INTERVAL_SECONDS. A burst on one link is one
+row update per flush instead of one per click.
+
+Loss bounds, as for view ingestion: a crash loses at most one interval of
+clicks; a failed flush is merged back for the next one; at most
+SHARE_CLICK_MAX_PENDING shares are held, and clicks on further shares are
+dropped and counted in stats["dropped"]. stop() flushes on shutdown.
+"""
+
+import logging
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, NamedTuple, Optional
+from urllib.parse import quote
+
+from redis.exceptions import RedisError
+from sqlalchemy import bindparam, case, func, update
+
+from app.core.background import PeriodicTask
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis_client import get_redis, mark_unavailable
+from app.models.base import SessionLocal
+from app.models.engagement import PropertyShare
+
+logger = logging.getLogger(__name__)
+
+SHARE_LINK_TTL_SECONDS = 24 * 3600
+SHARE_LINK_L1_TTL_SECONDS = 3600
+# Unknown tokens; short so a share created after a miss resolves soon
+MISSING_SHARE_TTL_SECONDS = 60
+MAX_TOKEN_LENGTH = 100
+
+_CACHE_KEY = "share_link:{}"
+
+
+class ShareLink(NamedTuple):
+    share_id: uuid.UUID
+    property_id: uuid.UUID
+
+
+class PendingClicks(NamedTuple):
+    count: int
+    first_at: datetime
+    last_at: datetime
+
+
+def _encode(link: Optional[ShareLink]) -> str:
+    return f"{link.share_id}:{link.property_id}" if link else ""
+
+
+def _decode(value: str) -> Optional[ShareLink]:
+    if not value:
+        return None
+    share_id, property_id = value.split(":")
+    return ShareLink(uuid.UUID(share_id), uuid.UUID(property_id))
+
+
+def share_redirect_url(link: ShareLink, token: str) -> str:
+    """Web app page a share link sends its visitor to"""
+    base = settings.WEB_APP_URL.rstrip("/")
+    return f"{base}/properties/{link.property_id}?ref={quote(token, safe='')}"
+
+
+def write_click_batch(
+    clicks: Dict[uuid.UUID, PendingClicks], session_factory: Callable = SessionLocal
+) -> None:
+    """Apply coalesced clicks, one UPDATE per share, in one transaction"""
+    shares = PropertyShare.__table__
+    db = session_factory()
+    try:
+        db.execute(
+            update(shares)
+            .where(shares.c.id == bindparam("b_share_id"))
+            .values(
+                click_count=func.coalesce(shares.c.click_count, 0)
+                + bindparam("b_count"),
+                clicked_at=func.coalesce(shares.c.clicked_at, bindparam("b_first")),
+                last_clicked_at=case(
+                    (
+                        shares.c.last_clicked_at > bindparam("b_last"),
+                        shares.c.last_clicked_at,
+                    ),
+                    else_=bindparam("b_last"),
+                ),
+            ),
+            [
+                {
+                    "b_share_id": share_id,
+                    "b_count": pending.count,
+                    "b_first": pending.first_at,
+                    "b_last": pending.last_at,
+                }
+                # Same lock order in every worker, so flushes cannot deadlock
+                for share_id, pending in sorted(
+                    clicks.items(), key=lambda item: str(item[0])
+                )
+            ],
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class ShareLinkService:
+    """Cached token resolution with write-behind click counts"""
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        redis_getter: Callable = get_redis,
+        writer: Callable[[Dict[uuid.UUID, PendingClicks]], None] = write_click_batch,
+        max_pending: int = settings.SHARE_CLICK_MAX_PENDING,
+        flush_interval: float = settings.SHARE_CLICK_FLUSH_INTERVAL_SECONDS,
+        clock: Optional[Callable[[], datetime]] = None,
+    ):
+        self.session_factory = session_factory
+        self.redis_getter = redis_getter
+        self.writer = writer
+        self.max_pending = max_pending
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.stats: Counter = Counter()
+        self._links = TTLCache(ttl_seconds=SHARE_LINK_L1_TTL_SECONDS, max_entries=50000)
+        self._pending: Dict[uuid.UUID, PendingClicks] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = PeriodicTask("share-clicks", flush_interval, self.flush)
+
+    def resolve(self, token: str) -> Optional[ShareLink]:
+        """
+        Look up a share token and count the click
+
+        Returns:
+            The share and its listing, or None for an unknown token
+        """
+        link = self.lookup(token)
+        if link is not None:
+            self.record_click(link.share_id)
+        return link
+
+    def lookup(self, token: str) -> Optional[ShareLink]:
+        """The share a token belongs to, from the caches when possible"""
+        if not token or len(token) > MAX_TOKEN_LENGTH:
+            return None
+        cached = self._links.get(token)
+        if cached is not None:
+            return _decode(cached)
+
+        cached = self._redis_get(token)
+        if cached is None:
+            cached = _encode(self._load(token))
+            self._redis_set(token, cached)
+        self._links.set(token, cached, None if cached else MISSING_SHARE_TTL_SECONDS)
+        return _decode(cached)
+
+    def record_click(
+        self, share_id: uuid.UUID, clicked_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        Count one click for the next flush
+
+        Returns:
+            False if too many shares are pending and the click was dropped
+        """
+        clicked_at = clicked_at or self.clock()
+        with self._lock:
+            pending = self._pending.get(share_id)
+            if pending is None:
+                if len(self._pending) >= self.max_pending:
+                    self.stats["dropped"] += 1
+                    return False
+                pending = PendingClicks(0, clicked_at, clicked_at)
+            self._pending[share_id] = PendingClicks(
+                pending.count + 1,
+                min(pending.first_at, clicked_at),
+                max(pending.last_at, clicked_at),
+            )
+            self.stats["accepted"] += 1
+        return True
+
+    def flush(self) -> int:
+        """
+        Write pending clicks
+
+        Returns:
+            Number of clicks written (0 if the write failed)
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self.writer(batch)
+            except Exception:
+                logger.exception("Failed to write clicks for %d shares", len(batch))
+                self.stats["failed_flushes"] += 1
+                self._merge_back(batch)
+                return 0
+            written = sum(pending.count for pending in batch.values())
+            self.stats["written"] += written
+            return written
+
+    def start(self) -> None:
+        """Start the background flusher (idempotent)"""
+        self._flusher.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher and write whatever is still pending"""
+        self._flusher.stop(timeout)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters for monitoring, plus the shares waiting to be written"""
+        return {
+            "accepted": self.stats["accepted"],
+            "dropped": self.stats["dropped"],
+            "written": self.stats["written"],
+            "failed_flushes": self.stats["failed_flushes"],
+            "pending_shares": len(self._pending),
+        }
+
+    def _merge_back(self, batch: Dict[uuid.UUID, PendingClicks]) -> None:
+        with self._lock:
+            for share_id, failed in batch.items():
+                pending = self._pending.get(share_id)
+                if pending is None:
+                    if len(self._pending) >= self.max_pending:
+                        self.stats["dropped"] += failed.count
+                        continue
+                    self._pending[share_id] = failed
+                else:
+                    self._pending[share_id] = PendingClicks(
+                        pending.count + failed.count,
+                        min(pending.first_at, failed.first_at),
+                        max(pending.last_at, failed.last_at),
+                    )
+
+    def _load(self, token: str) -> Optional[ShareLink]:
+        db = self.session_factory()
+        try:
+            row = (
+                db.query(PropertyShare.id, PropertyShare.property_id)
+                .filter(PropertyShare.share_token == token)
+                .first()
+            )
+        finally:
+            db.close()
+        return ShareLink(row.id, row.property_id) if row else None
+
+    def _redis_get(self, token: str) -> Optional[str]:
+        client = self.redis_getter()
+        if client is None:
+            return None
+        try:
+            value = client.get(_CACHE_KEY.format(token))
+        except RedisError as e:
+            mark_unavailable(e)
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def _redis_set(self, token: str, value: str) -> None:
+        client = self.redis_getter()
+        if client is None:
+            return
+        try:
+            client.set(
+                _CACHE_KEY.format(token),
+                value,
+                ex=SHARE_LINK_TTL_SECONDS if value else MISSING_SHARE_TTL_SECONDS,
+            )
+        except RedisError as e:
+            mark_unavailable(e)
+
+
+share_link_service = ShareLinkService()
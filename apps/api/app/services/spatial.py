@@ -0,0 +1,384 @@
+"""
+Proximity search over property coordinates
+
+Candidates are prefiltered through the geohash index (a handful of prefix
+range scans covering the search box), then ranked by exact haversine
+distance computed over the whole candidate batch at once. A dense box is
+capped at MAX_CANDIDATES, taken nearest first by a flat-earth distance so
+the cap drops the far corners rather than arbitrary rows.
+"""
+
+import math
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core import geohash
+from app.models.property import Property
+from app.services.property_feed import (
+    CARD_COLUMNS,
+    COVER_URL,
+    property_feed_service,
+    serialize_card,
+)
+from app.services.verification_status import verification_status_service
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is in requirements.txt
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Guard rails for a single proximity query
+MAX_RADIUS_KM = 50.0
+MAX_CANDIDATES = 5000
+NEAREST_START_RADIUS_KM = 1.0
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius_km: float
+) -> Tuple[float, float, float, float]:
+    """Return (min_lat, min_lng, max_lat, max_lng) enclosing the search circle"""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lng_delta = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return (
+        max(latitude - lat_delta, -90.0),
+        max(longitude - lng_delta, -180.0),
+        min(latitude + lat_delta, 90.0),
+        min(longitude + lng_delta, 180.0),
+    )
+
+
+def haversine_km(
+    latitude: float,
+    longitude: float,
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+) -> List[float]:
+    """Great-circle distances from one point to many, in kilometres"""
+    if not latitudes:
+        return []
+    if np is not None:
+        lat1 = np.radians(latitude)
+        lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+        dlat = lat2 - lat1
+        dlng = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))).tolist()
+
+    lat1 = math.radians(latitude)
+    cos_lat1 = math.cos(lat1)
+    distances = []
+    for lat, lng in zip(latitudes, longitudes):
+        lat2 = math.radians(lat)
+        a = (
+            math.sin((lat2 - lat1) / 2) ** 2
+            + cos_lat1
+            * math.cos(lat2)
+            * math.sin(math.radians(lng - longitude) / 2) ** 2
+        )
+        distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)))
+    return distances
+
+
+def rank_by_distance(
+    latitude: float,
+    longitude: float,
+    candidates: Sequence[Tuple[Any, float, float]],
+    radius_km: float,
+    limit: int,
+) -> List[Tuple[Any, float]]:
+    """
+    Keep candidates inside the radius, nearest first
+
+    Args:
+        candidates: (item, latitude, longitude) tuples from the prefilter
+        radius_km: Search radius
+        limit: Maximum results
+
+    Returns:
+        (item, distance_km) tuples sorted by distance
+    """
+    distances = haversine_km(
+        latitude,
+        longitude,
+        [candidate[1] for candidate in candidates],
+        [candidate[2] for candidate in candidates],
+    )
+    within = [
+        (candidate[0], distance)
+        for candidate, distance in zip(candidates, distances)
+        if distance <= radius_km
+    ]
+    within.sort(key=lambda pair: pair[1])
+    return within[:limit]
+
+
+class InMemorySpatialIndex:
+    """Pure-Python geohash index for tests and deployments without PostGIS
+
+    Mirrors the database path: points are bucketed by geohash prefix, a
+    query scans only the buckets covering the search box, and survivors are
+    ranked by haversine distance.
+    """
+
+    def __init__(self, bucket_precision: int = 5):
+        self.bucket_precision = bucket_precision
+        self._points: Dict[Any, Tuple[float, float, str]] = {}
+        self._buckets: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: Any, latitude: float, longitude: float) -> None:
+        """Insert or move a point"""
+        code = geohash.encode(latitude, longitude)
+        with self._lock:
+            self._remove_locked(key)
+            self._points[key] = (latitude, longitude, code)
+            self._buckets.setdefault(code[: self.bucket_precision], set()).add(key)
+
+    def remove(self, key: Any) -> None:
+        """Drop a point if present"""
+        with self._lock:
+            self._remove_locked(key)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def search_radius(
+        self, latitude: float, longitude: float, radius_km: float, limit: int
+    ) -> List[Tuple[Any, float]]:
+        """Points within radius_km, nearest first"""
+        box = bounding_box(latitude, longitude, radius_km)
+        prefixes = geohash.cover_bbox(*box)
+        with self._lock:
+            candidates = [
+                (key, point[0], point[1])
+                for key, point in self._scan_locked(prefixes)
+                if box[0] <= point[0] <= box[2] and box[1] <= point[1] <= box[3]
+            ]
+        return rank_by_distance(latitude, longitude, candidates, radius_km, limit)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        max_radius_km: float = MAX_RADIUS_KM,
+    ) -> List[Tuple[Any, float]]:
+        """Up to k nearest points, widening the radius until k are found"""
+        return _expanding_search(
+            lambda radius: self.search_radius(latitude, longitude, radius, k),
+            k,
+            max_radius_km,
+        )
+
+    def _scan_locked(self, prefixes: Iterable[str]):
+        for prefix in prefixes:
+            if len(prefix) >= self.bucket_precision:
+                keys = self._buckets.get(prefix[: self.bucket_precision], ())
+            else:
+                keys = [
+                    key
+                    for bucket, members in self._buckets.items()
+                    if bucket.startswith(prefix)
+                    for key in members
+                ]
+            for key in keys:
+                point = self._points[key]
+                if point[2].startswith(prefix):
+                    yield key, point
+
+    def _remove_locked(self, key: Any) -> None:
+        point = self._points.pop(key, None)
+        if point is not None:
+            bucket = self._buckets.get(point[2][: self.bucket_precision])
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[point[2][: self.bucket_precision]]
+
+
+def _expanding_search(search, k: int, max_radius_km: float, size=len):
+    """Double the radius until search(radius) returns k results or hits the cap"""
+    radius = min(NEAREST_START_RADIUS_KM, max_radius_km)
+    while True:
+        results = search(radius)
+        if size(results) >= k or radius >= max_radius_km:
+            return results
+        radius = min(radius * 2, max_radius_km)
+
+
+class SpatialSearchService:
+    """Radius and nearest-k property search over the geohash index"""
+
+    def geohash_filter(self, prefixes: Sequence[str]):
+        """One btree range per covering prefix, OR-ed together"""
+        return or_(
+            *[
+                and_(
+                    Property.geohash >= prefix,
+                    Property.geohash < geohash.prefix_upper_bound(prefix),
+                )
+                for prefix in prefixes
+            ]
+        )
+
+    def candidate_query(
+        self,
+        db: Session,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        **filters,
+    ):
+        """
+        Live listings in the search box, approximately nearest first
+
+        Ordered by squared equirectangular distance, which ranks like the
+        haversine distance at these radii, so a LIMIT keeps the nearest
+        candidates. Callers apply the limit.
+        """
+        min_lat, min_lng, max_lat, max_lng = bounding_box(
+            latitude, longitude, radius_km
+        )
+        prefixes = geohash.cover_bbox(min_lat, min_lng, max_lat, max_lng)
+        lng_scale = math.cos(math.radians(latitude)) ** 2
+        lat_offset = Property.latitude - latitude
+        lng_offset = Property.longitude - longitude
+        approximate_distance = (
+            lat_offset * lat_offset + lng_offset * lng_offset * lng_scale
+        )
+
+        return (
+            property_feed_service.apply_filters(
+                db.query(*CARD_COLUMNS, COVER_URL), **filters
+            )
+            .filter(
+                self.geohash_filter(prefixes),
+                Property.latitude.between(min_lat, max_lat),
+                Property.longitude.between(min_lng, max_lng),
+            )
+            .order_by(approximate_distance, Property.id)
+        )
+
+    def search_radius(
+        self,
+        db: Session,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int,
+        **filters,
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Find live listings within radius_km, nearest first
+
+        Args:
+            db: Database session
+            latitude: Search centre latitude
+            longitude: Search centre longitude
+            radius_km: Search radius (capped at MAX_RADIUS_KM)
+            limit: Maximum results
+            **filters: Feed filters accepted by PropertyFeedService.apply_filters
+
+        Returns:
+            (property card dicts with a distance_km field, truncated), where
+            truncated is True if the box held more than MAX_CANDIDATES
+            listings and the farthest of them were not considered
+        """
+        radius_km = min(radius_km, MAX_RADIUS_KM)
+        rows = (
+            self.candidate_query(db, latitude, longitude, radius_km, **filters)
+            .limit(MAX_CANDIDATES + 1)
+            .all()
+        )
+        truncated = len(rows) > MAX_CANDIDATES
+        rows = rows[:MAX_CANDIDATES]
+
+        ranked = rank_by_distance(
+            latitude,
+            longitude,
+            [(row, float(row.latitude), float(row.longitude)) for row in rows],
+            radius_km,
+            limit,
+        )
+
+        badges = verification_status_service.get_badges(
+            {row.agent_id for row, _ in ranked}, db
+        )
+        results = []
+        for row, distance in ranked:
+            card = serialize_card(row, badges)
+            card["distance_km"] = round(distance, 3)
+            results.append(card)
+        return results, truncated
+
+    def nearest(
+        self,
+        db: Session,
+        latitude: float,
+        longitude: float,
+        k: int,
+        max_radius_km: float = MAX_RADIUS_KM,
+        **filters,
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Up to k nearest live listings, widening the search radius as needed
+
+        Returns:
+            (property card dicts, truncated) as from search_radius
+        """
+        return _expanding_search(
+            lambda radius: self.search_radius(
+                db, latitude, longitude, radius, k, **filters
+            ),
+            k,
+            min(max_radius_km, MAX_RADIUS_KM),
+            size=lambda found: len(found[0]),
+        )
+
+    def backfill_geohashes(self, db: Session, batch_size: int = 1000) -> int:
+        """
+        Populate geohash for rows written before the column existed
+
+        Walks the table in primary-key order so each batch is an index range.
+
+        Returns:
+            Number of rows updated
+        """
+        updated = 0
+        last_id: Optional[uuid.UUID] = None
+        while True:
+            query = db.query(Property.id, Property.latitude, Property.longitude).filter(
+                Property.geohash.is_(None),
+                Property.latitude.isnot(None),
+                Property.longitude.isnot(None),
+            )
+            if last_id is not None:
+                query = query.filter(Property.id > last_id)
+            batch = query.order_by(Property.id).limit(batch_size).all()
+            if not batch:
+                return updated
+            db.bulk_update_mappings(
+                Property,
+                [
+                    {
+                        "id": row.id,
+                        "geohash": geohash.encode(
+                            float(row.latitude), float(row.longitude)
+                        ),
+                    }
+                    for row in batch
+                ],
+            )
+            db.commit()
+            updated += len(batch)
+            last_id = batch[-1].id
+
+
+spatial_search_service = SpatialSearchService()
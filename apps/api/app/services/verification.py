@@ -14,6 +14,7 @@ from app.core.auth import get_password_hash
 from app.core.config import settings
 from app.models.engagement import AgentVerificationAttempt
 from app.models.user import User
+from app.services.verification_status import verification_status_service
 
 
 class YouverifyService:
@@ -106,6 +107,7 @@ class YouverifyService:
                     f"Phone match: {phone_match}, Name score: {name_match_score}"
                 )
             db.commit()
+            verification_status_service.record_attempt(agent_id, attempt.status, db)
 
             return verification_result
 
@@ -114,6 +116,7 @@ class YouverifyService:
             attempt.status = "failed"
             attempt.error_message = str(e)
             db.commit()
+            verification_status_service.record_attempt(agent_id, attempt.status, db)
 
             return {"verified": False, "error": str(e)}
 
@@ -188,6 +191,7 @@ class YouverifyService:
             if not verification_result["verified"]:
                 attempt.error_message = f"DOB match: {dob_match}"
             db.commit()
+            verification_status_service.record_attempt(agent_id, attempt.status, db)
 
             return verification_result
 
@@ -196,6 +200,7 @@ class YouverifyService:
             attempt.status = "failed"
             attempt.error_message = str(e)
             db.commit()
+            verification_status_service.record_attempt(agent_id, attempt.status, db)
 
             return {"verified": False, "error": str(e)}
 
@@ -273,38 +278,6 @@ class YouverifyService:
 
         return None
 
-    def _check_verification_lock(self, agent_id: str, db: Session) -> bool:
-        """
-        Check if verification is locked for an agent
-
-        Args:
-            agent_id: Agent user ID
-            db: Database session
-
-        Returns:
-            True if locked, False otherwise
-        """
-        # Check for recent failed attempts (last 24 hours)
-        from datetime import datetime, timedelta
-
-        from sqlalchemy import and_
-
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-
-        failed_attempts = (
-            db.query(AgentVerificationAttempt)
-            .filter(
-                and_(
-                    AgentVerificationAttempt.agent_id == agent_id,
-                    AgentVerificationAttempt.status == "failed",
-                    AgentVerificationAttempt.created_at >= cutoff_time,
-                )
-            )
-            .count()
-        )
-
-        return failed_attempts >= 3
-
     async def _mock_bvn_verification(self, bvn: str, phone: str) -> Dict:
         """
         Mock BVN verification for development/testing
@@ -0,0 +1,322 @@
+"""
+Cached read path for agent verification status and badges
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.events import publish
+from app.models.engagement import AgentVerification, AgentVerificationAttempt
+
+# Lock policy: this many failed attempts within LOCK_WINDOW locks an agent
+# out until the oldest of them leaves the window (backfilled by migration 004)
+LOCK_FAILED_ATTEMPTS = 3
+LOCK_WINDOW = timedelta(hours=24)
+RECENT_ATTEMPTS_WINDOW = timedelta(days=7)
+RECENT_ATTEMPTS_LIMIT = 10
+VERIFIED_CREDIBILITY_SCORE = 50
+
+# Largest number of agent ids accepted by a single batched badge lookup
+MAX_BADGE_BATCH = 100
+
+# Published after an agent's credibility score changes
+AGENT_CREDIBILITY_CHANGED = "agent_credibility_changed"
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive datetimes as UTC so they compare with timestamptz values"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _is_locked(locked_until: Optional[datetime], now: datetime) -> bool:
+    locked_until = _as_utc(locked_until)
+    return locked_until is not None and locked_until > now
+
+
+def effective_status(
+    status: str, locked_until: Optional[datetime], now: Optional[datetime] = None
+) -> str:
+    """Stored verification status as shown to clients (expired locks are failures)"""
+    now = now or datetime.now(timezone.utc)
+    if status == "locked" and not _is_locked(locked_until, now):
+        return "failed"
+    return status
+
+
+def _default_badge() -> Dict:
+    return {
+        "verification_status": "pending",
+        "credibility_score": 0,
+        "verification_badge_visible": False,
+        "locked_until": None,
+    }
+
+
+def _badge_from_row(row) -> Dict:
+    return {
+        "verification_status": row.verification_status,
+        "credibility_score": row.credibility_score or 0,
+        "verification_badge_visible": bool(row.verification_badge_visible),
+        "locked_until": _as_utc(row.locked_until),
+    }
+
+
+class VerificationStatusService:
+    """Serves agent verification status from a per-agent cache
+
+    Reads never count attempts: the lock expiry is persisted on the
+    agent_verifications row when a failure is recorded, and every verification
+    event invalidates the cached entries for that agent.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        ttl = (
+            settings.VERIFICATION_STATUS_CACHE_TTL_SECONDS
+            if ttl_seconds is None
+            else ttl_seconds
+        )
+        # Full status (with recent attempts) for the agent's own dashboard
+        self.status_cache = TTLCache(ttl_seconds=ttl)
+        # Badge-only entries for feeds and profile pages
+        self.badge_cache = TTLCache(ttl_seconds=ttl, max_entries=50000)
+
+    def get_status(self, agent_id: uuid.UUID, db: Session) -> Dict:
+        """
+        Get the full verification status for one agent
+
+        Args:
+            agent_id: Agent user ID
+            db: Database session
+
+        Returns:
+            Dict matching VerificationStatusResponse
+        """
+        snapshot = self.status_cache.get(agent_id)
+        if snapshot is None:
+            snapshot = self._load_status(agent_id, db)
+            self.status_cache.set(agent_id, snapshot)
+        return self._present(snapshot, include_attempts=True)
+
+    def get_badges(
+        self, agent_ids: Iterable[uuid.UUID], db: Session
+    ) -> Dict[uuid.UUID, Dict]:
+        """
+        Get verification badges for many agents at once
+
+        Cache misses are resolved with a single IN query; agents without a
+        verification row get (and cache) the default pending badge.
+
+        Args:
+            agent_ids: Agent user IDs
+            db: Database session
+
+        Returns:
+            Dict of agent ID to badge dict
+        """
+        agent_ids = list(dict.fromkeys(agent_ids))
+        badges = self.badge_cache.get_many(agent_ids)
+        missing = [agent_id for agent_id in agent_ids if agent_id not in badges]
+        if missing:
+            loaded = self._load_badges(missing, db)
+            for agent_id in missing:
+                loaded.setdefault(agent_id, _default_badge())
+            self.badge_cache.set_many(loaded)
+            badges.update(loaded)
+        return {
+            agent_id: self._present(badges[agent_id], include_attempts=False)
+            for agent_id in agent_ids
+        }
+
+    def is_locked(self, agent_id: uuid.UUID, db: Session) -> bool:
+        """
+        Check the verification lock against the database
+
+        Gates new attempts, so it bypasses the cache: a lock recorded on
+        another worker only invalidates that worker's entries, and a cached
+        status could let an attempt through for up to the cache TTL.
+        """
+        return _is_locked(
+            self._load_locked_until(agent_id, db), datetime.now(timezone.utc)
+        )
+
+    def invalidate(self, agent_id: uuid.UUID) -> None:
+        """Drop cached entries for an agent after a verification event"""
+        self.status_cache.delete(agent_id)
+        self.badge_cache.delete(agent_id)
+
+    def record_attempt(
+        self, agent_id: uuid.UUID, attempt_status: str, db: Session
+    ) -> None:
+        """
+        Update persisted state after a BVN/NIN attempt finishes
+
+        Failed attempts recompute the lock expiry (the only place attempts
+        are counted); every attempt invalidates the agent's cache entries.
+        """
+        if attempt_status == "failed":
+            locked_until = self._compute_locked_until(agent_id, db)
+            verification = self._get_or_create(agent_id, db)
+            verification.locked_until = locked_until
+            if verification.verification_status != "verified":
+                verification.verification_status = (
+                    "locked" if locked_until is not None else "failed"
+                )
+            db.commit()
+        self.invalidate(agent_id)
+
+    def record_success(
+        self,
+        agent_id: uuid.UUID,
+        db: Session,
+        bvn_hash: str,
+        nin_hash: str,
+        verified_state: str,
+        verified_lga: str,
+    ) -> AgentVerification:
+        """Persist a completed BVN + NIN verification and invalidate the cache"""
+        verification = self._get_or_create(agent_id, db)
+        verification.bvn_hash = bvn_hash
+        verification.nin_hash = nin_hash
+        verification.verified_state = verified_state
+        verification.verified_lga = verified_lga
+        verification.verification_status = "verified"
+        verification.credibility_score = max(
+            verification.credibility_score or 0, VERIFIED_CREDIBILITY_SCORE
+        )
+        verification.verification_badge_visible = True
+        verification.locked_until = None
+        verification.verified_at = datetime.now(timezone.utc)
+        db.commit()
+        self.invalidate(agent_id)
+        publish(AGENT_CREDIBILITY_CHANGED, agent_id=agent_id)
+        return verification
+
+    def _present(self, snapshot: Dict, include_attempts: bool) -> Dict:
+        now = datetime.now(timezone.utc)
+        result = {
+            "verification_status": effective_status(
+                snapshot["verification_status"], snapshot["locked_until"], now
+            ),
+            "credibility_score": snapshot["credibility_score"],
+            "verification_badge_visible": snapshot["verification_badge_visible"],
+            "is_locked": _is_locked(snapshot["locked_until"], now),
+        }
+        if include_attempts:
+            result["recent_attempts"] = snapshot["recent_attempts"]
+        return result
+
+    def _load_status(self, agent_id: uuid.UUID, db: Session) -> Dict:
+        row = (
+            db.query(AgentVerification)
+            .filter(AgentVerification.agent_id == agent_id)
+            .first()
+        )
+        snapshot = _badge_from_row(row) if row else _default_badge()
+        snapshot["recent_attempts"] = self._load_recent_attempts(agent_id, db)
+        return snapshot
+
+    def _load_locked_until(
+        self, agent_id: uuid.UUID, db: Session
+    ) -> Optional[datetime]:
+        return (
+            db.query(AgentVerification.locked_until)
+            .filter(AgentVerification.agent_id == agent_id)
+            .scalar()
+        )
+
+    def _load_badges(
+        self, agent_ids: List[uuid.UUID], db: Session
+    ) -> Dict[uuid.UUID, Dict]:
+        rows = (
+            db.query(
+                AgentVerification.agent_id,
+                AgentVerification.verification_status,
+                AgentVerification.credibility_score,
+                AgentVerification.verification_badge_visible,
+                AgentVerification.locked_until,
+            )
+            .filter(AgentVerification.agent_id.in_(agent_ids))
+            .all()
+        )
+        return {row.agent_id: _badge_from_row(row) for row in rows}
+
+    def _load_recent_attempts(self, agent_id: uuid.UUID, db: Session) -> List[Dict]:
+        cutoff_time = datetime.now(timezone.utc) - RECENT_ATTEMPTS_WINDOW
+        recent_attempts = (
+            db.query(AgentVerificationAttempt)
+            .filter(
+                AgentVerificationAttempt.agent_id == agent_id,
+                AgentVerificationAttempt.created_at >= cutoff_time,
+            )
+            .order_by(AgentVerificationAttempt.created_at.desc())
+            .limit(RECENT_ATTEMPTS_LIMIT)
+            .all()
+        )
+        return [
+            {
+                "attempt_type": attempt.attempt_type,
+                "status": attempt.status,
+                "error_message": attempt.error_message,
+                "created_at": (
+                    attempt.created_at.isoformat() if attempt.created_at else None
+                ),
+            }
+            for attempt in recent_attempts
+        ]
+
+    def _compute_locked_until(
+        self, agent_id: uuid.UUID, db: Session
+    ) -> Optional[datetime]:
+        """Lock lasts until the oldest of the last N failures leaves the window"""
+        cutoff_time = datetime.now(timezone.utc) - LOCK_WINDOW
+        failures = (
+            db.query(AgentVerificationAttempt.created_at)
+            .filter(
+                AgentVerificationAttempt.agent_id == agent_id,
+                AgentVerificationAttempt.status == "failed",
+                AgentVerificationAttempt.created_at >= cutoff_time,
+            )
+            .order_by(AgentVerificationAttempt.created_at.desc())
+            .limit(LOCK_FAILED_ATTEMPTS)
+            .all()
+        )
+        if len(failures) < LOCK_FAILED_ATTEMPTS:
+            return None
+        return _as_utc(failures[-1].created_at) + LOCK_WINDOW
+
+    def _get_or_create(self, agent_id: uuid.UUID, db: Session) -> AgentVerification:
+        """
+        The agent's row, locked for update, created if missing
+
+        FOR UPDATE locks nothing while the row does not exist, so concurrent
+        first attempts insert with ON CONFLICT DO NOTHING instead of racing
+        on the unique agent_id, and then all lock the one row.
+        """
+        db.execute(
+            pg_insert(AgentVerification.__table__)
+            .values(
+                id=uuid.uuid4(),
+                agent_id=agent_id,
+                verification_status="pending",
+                credibility_score=0,
+                verification_badge_visible=False,
+            )
+            .on_conflict_do_nothing(index_elements=["agent_id"])
+        )
+        return (
+            db.query(AgentVerification)
+            .filter(AgentVerification.agent_id == agent_id)
+            .with_for_update()
+            .one()
+        )
+
+
+verification_status_service = VerificationStatusService()
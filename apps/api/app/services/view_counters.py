@@ -0,0 +1,163 @@
+"""
+Sliding-window view counters
+
+Views are counted into per-property daily buckets (property_view_daily) as
+batches are written, and the batch writer also bumps view_count_7d and
+trending_score directly so they stay live between refreshes. Once a day
+roll_forward() recomputes both from the last WINDOW_DAYS buckets, which
+drops the day that slid out of the window, and purges old buckets. Work is
+proportional to the number of viewed listings, never to the number of views.
+
+trending_score = sum(views_on_day * 0.5 ** (age_in_days / half_life))
+"""
+
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, exists, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.property import Property, PropertyViewDaily
+
+WINDOW_DAYS = 7
+TRENDING_HALF_LIFE_DAYS = 2.0
+# One day beyond the window so a late refresh still sees the full week
+BUCKET_RETENTION_DAYS = WINDOW_DAYS + 1
+
+
+def bucket_day(viewed_at: datetime) -> date:
+    """UTC calendar day a view is counted under"""
+    if viewed_at.tzinfo is None:
+        return viewed_at.date()
+    return viewed_at.astimezone(timezone.utc).date()
+
+
+def trending_weight(age_days: float) -> float:
+    """Decay applied to a bucket age_days old"""
+    return 0.5 ** (age_days / TRENDING_HALF_LIFE_DAYS)
+
+
+def bucket_upsert(counts: Dict[Tuple, int]):
+    """
+    INSERT ... ON CONFLICT statement adding views to daily buckets
+
+    Args:
+        counts: (property_id, day) -> views, already coalesced
+
+    Returns:
+        Statement to execute, with rows in key order so concurrent writers
+        lock buckets in the same order
+    """
+    stmt = insert(PropertyViewDaily.__table__).values(
+        [
+            {"property_id": property_id, "day": day, "views": views}
+            for (property_id, day), views in sorted(
+                counts.items(), key=lambda item: (str(item[0][0]), item[0][1])
+            )
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["property_id", "day"],
+        set_={"views": PropertyViewDaily.__table__.c.views + stmt.excluded.views},
+    )
+
+
+def count_buckets(events: Iterable) -> Counter:
+    """Coalesce view events into (property_id, day) -> views"""
+    return Counter((event.property_id, bucket_day(event.viewed_at)) for event in events)
+
+
+class ViewCounterService:
+    """Maintains view_count_7d and trending_score from daily buckets"""
+
+    def refresh(self, db: Session, today: Optional[date] = None) -> int:
+        """
+        Recompute view_count_7d and trending_score from the bucket window
+
+        Idempotent: running it again (or from two workers) gives the same
+        values. updated_at is left alone since these are not listing edits.
+
+        Returns:
+            Number of properties updated
+        """
+        today = today or datetime.now(timezone.utc).date()
+        window_start = today - timedelta(days=WINDOW_DAYS - 1)
+        properties = Property.__table__
+        buckets = PropertyViewDaily.__table__
+
+        # At most WINDOW_DAYS distinct days, so the decay is a lookup
+        decay = case(
+            *[
+                (buckets.c.day == today - timedelta(days=age), trending_weight(age))
+                for age in range(WINDOW_DAYS)
+            ],
+            else_=0.0,
+        )
+        window = (
+            db.query(
+                buckets.c.property_id,
+                func.sum(buckets.c.views).label("views"),
+                func.sum(buckets.c.views * decay).label("score"),
+            )
+            .filter(buckets.c.day >= window_start, buckets.c.day <= today)
+            .group_by(buckets.c.property_id)
+            .subquery()
+        )
+        refreshed = db.execute(
+            update(properties)
+            .where(
+                properties.c.id == window.c.property_id,
+                or_(
+                    properties.c.view_count_7d.is_distinct_from(window.c.views),
+                    properties.c.trending_score.is_distinct_from(window.c.score),
+                ),
+            )
+            .values(
+                view_count_7d=window.c.views,
+                trending_score=window.c.score,
+                updated_at=properties.c.updated_at,
+            )
+        ).rowcount
+
+        # Listings whose last view slid out of the window
+        zeroed = db.execute(
+            update(properties)
+            .where(
+                or_(properties.c.view_count_7d > 0, properties.c.trending_score > 0),
+                ~exists().where(
+                    buckets.c.property_id == properties.c.id,
+                    buckets.c.day >= window_start,
+                ),
+            )
+            .values(
+                view_count_7d=0,
+                trending_score=0,
+                updated_at=properties.c.updated_at,
+            )
+        ).rowcount
+        db.commit()
+        return refreshed + zeroed
+
+    def roll_forward(self, db: Session, today: Optional[date] = None) -> Dict[str, int]:
+        """
+        Daily job: refresh counters for the new window and purge old buckets
+
+        Returns:
+            Counts of refreshed properties and purged buckets
+        """
+        today = today or datetime.now(timezone.utc).date()
+        refreshed = self.refresh(db, today)
+        purged = (
+            db.query(PropertyViewDaily)
+            .filter(
+                PropertyViewDaily.day <= today - timedelta(days=BUCKET_RETENTION_DAYS)
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return {"refreshed": refreshed, "purged_buckets": purged}
+
+
+view_counter_service = ViewCounterService()
@@ -0,0 +1,255 @@
+"""
+Buffered ingestion of property view events
+
+Views are the highest-volume write, so requests only append to an in-process
+buffer and a background thread writes them in batches: one multi-row INSERT
+into property_views, one upsert of the daily view buckets and one coalesced
+counter increment per property, in a single transaction per batch.
+
+Backpressure and loss bounds:
+- record() never blocks on the database. The buffer holds at most
+  VIEW_BUFFER_MAX_EVENTS events; past that new views are dropped (counted in
+  stats["dropped"]) instead of queueing without bound.
+- A failed batch is rolled back as a whole and put back at the front of the
+  buffer for the next flush, as far as capacity allows; events that no
+  longer fit are dropped and counted. Nothing is ever half-written.
+- Events live only in this process until flushed. A crash loses at most the
+  buffered events: normally under VIEW_FLUSH_INTERVAL_SECONDS of traffic or
+  VIEW_FLUSH_BATCH_SIZE events, and never more than VIEW_BUFFER_MAX_EVENTS.
+  stop() flushes on graceful shutdown. A shared Redis buffer would survive
+  crashes but costs a network round trip per view, which view counts do
+  not justify.
+
+Abuse bounds:
+- A viewer (user id, or client address for anonymous views) counts once per
+  listing per VIEW_DEDUPE_WINDOW_SECONDS; repeats are dropped in record().
+  The window is per process, so with N workers a viewer counts at most N
+  times per window.
+- Views of ids that are not live listings are dropped at flush time, so
+  made-up ids write nothing.
+"""
+
+import logging
+import threading
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import bindparam, func, insert, select, update
+
+from app.core.background import PeriodicTask
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.events import publish
+from app.models.base import SessionLocal
+from app.models.property import Property, PropertyView
+from app.services.property_feed import property_feed_service
+from app.services.view_counters import bucket_upsert, count_buckets
+
+logger = logging.getLogger(__name__)
+
+# Published after each batch commits with the ids whose counters changed
+PROPERTY_VIEWS_RECORDED = "property_views_recorded"
+
+
+class ViewEvent(NamedTuple):
+    property_id: uuid.UUID
+    user_id: Optional[uuid.UUID]
+    viewed_at: datetime
+
+
+def write_view_batch(
+    events: Sequence[ViewEvent], session_factory: Callable = SessionLocal
+) -> int:
+    """
+    Insert view rows and apply coalesced counter increments atomically
+
+    Returns:
+        Number of events dropped because their listing is missing or not live
+    """
+    properties = Property.__table__
+    db = session_factory()
+    try:
+        live = set(
+            db.execute(
+                select(Property.id).where(
+                    Property.id.in_({event.property_id for event in events}),
+                    *property_feed_service.filter_conditions()["live"],
+                )
+            ).scalars()
+        )
+        kept = [event for event in events if event.property_id in live]
+        if not kept:
+            return len(events)
+        counts = Counter(event.property_id for event in kept)
+        # executemany: batched into multi-row VALUES by the driver dialect
+        db.execute(
+            insert(PropertyView.__table__),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "property_id": event.property_id,
+                    "user_id": event.user_id,
+                    "viewed_at": event.viewed_at,
+                }
+                for event in kept
+            ],
+        )
+        db.execute(bucket_upsert(count_buckets(kept)))
+        # One UPDATE per property per batch, in id order so concurrent
+        # workers take row locks in the same order and cannot deadlock.
+        # updated_at is pinned so views do not look like listing edits.
+        db.execute(
+            update(properties)
+            .where(properties.c.id == bindparam("b_property_id"))
+            .values(
+                view_count_total=func.coalesce(properties.c.view_count_total, 0)
+                + bindparam("b_views"),
+                # Live between daily refreshes; today's views have weight 1
+                view_count_7d=func.coalesce(properties.c.view_count_7d, 0)
+                + bindparam("b_views"),
+                trending_score=func.coalesce(properties.c.trending_score, 0)
+                + bindparam("b_views"),
+                updated_at=properties.c.updated_at,
+            ),
+            [
+                {"b_property_id": property_id, "b_views": views}
+                for property_id, views in sorted(
+                    counts.items(), key=lambda item: str(item[0])
+                )
+            ],
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    publish(PROPERTY_VIEWS_RECORDED, property_ids=list(counts))
+    return len(events) - len(kept)
+
+
+class ViewIngestionService:
+    """Bounded in-memory view buffer with a background batch flusher"""
+
+    def __init__(
+        self,
+        writer: Callable[[Sequence[ViewEvent]], Optional[int]] = write_view_batch,
+        max_buffered: int = settings.VIEW_BUFFER_MAX_EVENTS,
+        batch_size: int = settings.VIEW_FLUSH_BATCH_SIZE,
+        flush_interval: float = settings.VIEW_FLUSH_INTERVAL_SECONDS,
+        dedupe_window: float = settings.VIEW_DEDUPE_WINDOW_SECONDS,
+    ):
+        self.writer = writer
+        self._recent = TTLCache(
+            ttl_seconds=dedupe_window, max_entries=settings.VIEW_DEDUPE_MAX_VIEWERS
+        )
+        self.max_buffered = max_buffered
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats: Counter = Counter()
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = PeriodicTask("view-ingestion", flush_interval, self.flush)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(
+        self,
+        property_id: uuid.UUID,
+        user_id: Optional[uuid.UUID] = None,
+        viewed_at: Optional[datetime] = None,
+        client: Optional[str] = None,
+    ) -> bool:
+        """
+        Buffer one view
+
+        Args:
+            client: Client address, identifying anonymous viewers for dedupe
+
+        Returns:
+            False if the view was dropped: a repeat within the dedupe window
+            or a full buffer
+        """
+        event = ViewEvent(property_id, user_id, viewed_at or datetime.now(timezone.utc))
+        viewer = user_id or client
+        with self._lock:
+            if viewer is not None:
+                key = (viewer, property_id)
+                if self._recent.get(key) is not None:
+                    self.stats["repeated"] += 1
+                    return False
+                self._recent.set(key, True)
+            if len(self._buffer) >= self.max_buffered:
+                self.stats["dropped"] += 1
+                return False
+            self._buffer.append(event)
+            self.stats["accepted"] += 1
+            batch_ready = len(self._buffer) >= self.batch_size
+        if batch_ready:
+            self._flusher.wake()
+        return True
+
+    def flush(self) -> int:
+        """
+        Write buffered views in batches until the buffer is empty
+
+        Returns:
+            Number of views written; stops at the first failed batch
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return written
+                try:
+                    rejected = self.writer(batch) or 0
+                except Exception:
+                    logger.exception("Failed to write %d property views", len(batch))
+                    self.stats["failed_flushes"] += 1
+                    self._requeue(batch)
+                    return written
+                written += len(batch) - rejected
+                self.stats["written"] += len(batch) - rejected
+                self.stats["rejected"] += rejected
+
+    def start(self) -> None:
+        """Start the background flusher (idempotent)"""
+        self._flusher.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher and write whatever is still buffered"""
+        self._flusher.stop(timeout)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters for monitoring, plus the current buffer depth"""
+        return {
+            "accepted": self.stats["accepted"],
+            "dropped": self.stats["dropped"],
+            "repeated": self.stats["repeated"],
+            "written": self.stats["written"],
+            "rejected": self.stats["rejected"],
+            "failed_flushes": self.stats["failed_flushes"],
+            "buffered": len(self._buffer),
+        }
+
+    def _take_batch(self) -> List[ViewEvent]:
+        with self._lock:
+            size = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(size)]
+
+    def _requeue(self, batch: List[ViewEvent]) -> None:
+        """Put a failed batch back in front, oldest first, within capacity"""
+        with self._lock:
+            room = max(self.max_buffered - len(self._buffer), 0)
+            kept = batch[:room]
+            self._buffer.extendleft(reversed(kept))
+            self.stats["dropped"] += len(batch) - len(kept)
+
+
+view_ingestion_service = ViewIngestionService()
@@ -1,2 +1,6 @@
 # WebSockets Package
 # This package contains WebSocket handlers and real-time communication components for the Reent SaaS platform
+
+from app.websockets.gateway import realtime_gateway
+
+__all__ = ["realtime_gateway"]
@@ -0,0 +1,352 @@
+"""
+Realtime push gateway (Socket.IO over WebSockets)
+
+Clients connect to /ws/socket.io with their access token in the Socket.IO
+auth payload ({"token": "<jwt>"}) or an Authorization: Bearer header. The
+token is only decoded, without a database lookup, so a reconnect storm
+after a deploy does not turn into one query per socket; the connection is
+closed when the token expires. Each connection joins the rooms
+"user:<id>" and "role:<role>".
+
+Any worker, API process or script can push with realtime_gateway.publish():
+the message goes to the Redis channel REALTIME_CHANNEL, every worker running
+the gateway is subscribed to it, and each delivers it to the matching
+sockets it holds. A worker only ever does work for its own sockets. If
+Redis is unavailable, messages published in a worker still reach that
+worker's own sockets.
+
+Delivery goes through a SendBuffer per connection (see send_buffer), drained
+by one task per connection that hands a message to the transport only
+while fewer than TRANSPORT_HIGH_WATER packets are waiting for that socket.
+A slow client loses its oldest messages instead of growing memory, and is
+disconnected after REALTIME_SLOW_CONSUMER_SECONDS of overflow.
+
+Server events: "notification" (a new inbox item, as NotificationResponse)
+and "announcement" (a broadcast, same shape). Clients treat them as hints
+and read counts and the inbox from the REST API.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import redis.asyncio as aioredis
+import socketio
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from app.core.auth import verify_token
+from app.core.config import settings
+from app.core.events import subscribe
+from app.core.redis_client import get_redis, mark_unavailable
+from app.services.notifications import (
+    BROADCAST_CREATED,
+    NOTIFICATIONS_CREATED,
+    InboxItem,
+)
+from app.websockets.send_buffer import SendBuffer
+
+logger = logging.getLogger(__name__)
+
+REALTIME_CHANNEL = "realtime"
+NAMESPACE = "/"
+# Packets queued in a socket's transport before its buffer stops draining
+TRANSPORT_HIGH_WATER = 32
+DRAIN_POLL_SECONDS = 0.05
+# Backoff between backplane reconnects, doubling up to the maximum
+RESUBSCRIBE_DELAY_SECONDS = 1.0
+MAX_RESUBSCRIBE_DELAY_SECONDS = 30.0
+# Incoming packets are only the Socket.IO handshake; keep them small
+MAX_INCOMING_BYTES = 16 * 1024
+
+
+class Connection(NamedTuple):
+    user_id: str
+    role: Optional[str]
+    buffer: SendBuffer
+    sender: asyncio.Task
+    expiry: asyncio.TimerHandle
+
+
+def _user_room(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def _role_room(role: str) -> str:
+    return f"role:{role}"
+
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def realtime_message(
+    event: str, data: Any, user_ids: Iterable = (), audience: Optional[str] = None
+) -> Dict:
+    """A backplane message; see RealtimeGateway.publish for the arguments"""
+    return {
+        "event": event,
+        "data": data,
+        "users": [str(user_id) for user_id in user_ids],
+        "audience": audience,
+    }
+
+
+def _token(environ: Dict, auth: Any) -> Optional[str]:
+    if isinstance(auth, dict) and auth.get("token"):
+        return auth["token"]
+    header = environ.get("HTTP_AUTHORIZATION", "")
+    if header.lower().startswith("bearer "):
+        return header[7:].strip()
+    return None
+
+
+class RealtimeGateway:
+    """Authenticated Socket.IO endpoint fed by a Redis pub/sub backplane"""
+
+    def __init__(
+        self,
+        server: Optional[socketio.AsyncServer] = None,
+        redis_getter=get_redis,
+        redis_url: Optional[str] = None,
+        buffer_size: int = settings.REALTIME_SEND_BUFFER_SIZE,
+        slow_consumer_seconds: float = settings.REALTIME_SLOW_CONSUMER_SECONDS,
+    ):
+        self.sio = server or socketio.AsyncServer(
+            async_mode="asgi",
+            cors_allowed_origins=[
+                origin.strip() for origin in settings.ALLOWED_ORIGINS.split(",")
+            ],
+            max_http_buffer_size=MAX_INCOMING_BYTES,
+        )
+        self.redis_getter = redis_getter
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.buffer_size = buffer_size
+        self.slow_consumer_seconds = slow_consumer_seconds
+        self.stats: Counter = Counter()
+        self._connections: Dict[str, Connection] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+        self.sio.on("connect", self._connect, namespace=NAMESPACE)
+        self.sio.on("disconnect", self._disconnect, namespace=NAMESPACE)
+
+    def asgi_app(self) -> socketio.ASGIApp:
+        """ASGI app to mount at /ws"""
+        return socketio.ASGIApp(self.sio, socketio_path="socket.io")
+
+    def publish(
+        self,
+        event: str,
+        data: Any,
+        user_ids: Iterable = (),
+        audience: Optional[str] = None,
+    ) -> None:
+        """
+        Push an event to users' sockets on every worker; safe from any thread
+
+        Args:
+            event: Socket.IO event name
+            data: JSON-serializable payload (UUIDs and datetimes are encoded)
+            user_ids: Users whose connections receive it
+            audience: "all" or a role, to push to every connection in it
+        """
+        self.publish_many([realtime_message(event, data, user_ids, audience)])
+
+    def publish_many(self, messages: List[Dict]) -> None:
+        """Publish messages built by realtime_message in one Redis round trip"""
+        if not messages:
+            return
+        payloads = [json.dumps(m, default=_json_default) for m in messages]
+        client = self.redis_getter()
+        if client is not None:
+            try:
+                pipeline = client.pipeline(transaction=False)
+                for payload in payloads:
+                    pipeline.publish(REALTIME_CHANNEL, payload)
+                pipeline.execute()
+                self.stats["published"] += len(payloads)
+                return
+            except RedisError as e:
+                mark_unavailable(e)
+        # Without the backplane, at least this worker's sockets get it
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            for payload in payloads:
+                loop.call_soon_threadsafe(self.deliver, json.loads(payload))
+            self.stats["published_locally"] += len(payloads)
+
+    def deliver(self, message: Dict) -> int:
+        """
+        Queue a backplane message for the matching local connections
+
+        Returns:
+            Number of connections it was queued for
+        """
+        audience = message.get("audience")
+        if audience == "all":
+            sids = list(self._connections)
+        else:
+            rooms = [_user_room(user_id) for user_id in message.get("users", ())]
+            if audience:
+                rooms.append(_role_room(audience))
+            sids = (
+                {sid for sid, _ in self.sio.manager.get_participants(NAMESPACE, rooms)}
+                if rooms
+                else set()
+            )
+        delivered = 0
+        for sid in sids:
+            connection = self._connections.get(sid)
+            if connection is None:
+                continue
+            if not connection.buffer.offer(message["event"], message["data"]):
+                self.stats["dropped"] += 1
+            delivered += 1
+        self.stats["delivered"] += delivered
+        return delivered
+
+    async def start(self) -> None:
+        """Subscribe to the backplane (idempotent); call from the event loop"""
+        self._loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done():
+            self._listener = self._loop.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop listening and close every local connection"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for sid in list(self._connections):
+            await self.sio.disconnect(sid, namespace=NAMESPACE)
+        self._loop = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters for monitoring, plus the connections this worker holds"""
+        return {
+            "connections": len(self._connections),
+            "connected": self.stats["connected"],
+            "rejected": self.stats["rejected"],
+            "published": self.stats["published"],
+            "published_locally": self.stats["published_locally"],
+            "delivered": self.stats["delivered"],
+            "sent": self.stats["sent"],
+            "dropped": self.stats["dropped"],
+            "slow_disconnects": self.stats["slow_disconnects"],
+            "buffered": sum(len(c.buffer) for c in self._connections.values()),
+        }
+
+    async def _connect(self, sid: str, environ: Dict, auth: Any = None) -> None:
+        token = _token(environ, auth)
+        try:
+            payload = verify_token(token) if token else None
+        except HTTPException:
+            payload = None
+        if not payload or payload.get("type") != "access" or not payload.get("sub"):
+            self.stats["rejected"] += 1
+            raise socketio.exceptions.ConnectionRefusedError("Invalid token")
+
+        user_id, role = payload["sub"], payload.get("role")
+        await self.sio.enter_room(sid, _user_room(user_id), namespace=NAMESPACE)
+        if role:
+            await self.sio.enter_room(sid, _role_room(role), namespace=NAMESPACE)
+        loop = asyncio.get_running_loop()
+        buffer = SendBuffer(self.buffer_size)
+        expires_in = max(float(payload.get("exp", 0)) - time.time(), 0.0)
+        self._connections[sid] = Connection(
+            user_id=user_id,
+            role=role,
+            buffer=buffer,
+            sender=loop.create_task(self._drain(sid, buffer)),
+            expiry=loop.call_later(expires_in, self._expire, sid),
+        )
+        self.stats["connected"] += 1
+
+    async def _disconnect(self, sid: str) -> None:
+        connection = self._connections.pop(sid, None)
+        if connection is not None:
+            # A slow-client disconnect runs inside the sender itself
+            if connection.sender is not asyncio.current_task():
+                connection.sender.cancel()
+            connection.expiry.cancel()
+
+    def _expire(self, sid: str) -> None:
+        if sid in self._connections:
+            asyncio.ensure_future(self.sio.disconnect(sid, namespace=NAMESPACE))
+
+    async def _drain(self, sid: str, buffer: SendBuffer) -> None:
+        """Send a connection's messages at the pace its transport accepts"""
+        while True:
+            event, data = await buffer.next()
+            while self._transport_backlog(sid) >= TRANSPORT_HIGH_WATER:
+                if buffer.is_stalled(self.slow_consumer_seconds):
+                    self.stats["slow_disconnects"] += 1
+                    logger.info("Disconnecting slow realtime client %s", sid)
+                    await self.sio.disconnect(sid, namespace=NAMESPACE)
+                    return
+                await asyncio.sleep(DRAIN_POLL_SECONDS)
+            await self.sio.emit(event, data, to=sid, namespace=NAMESPACE)
+            self.stats["sent"] += 1
+
+    def _transport_backlog(self, sid: str) -> int:
+        """Packets queued in the engine.io socket and not yet written"""
+        eio_sid = self.sio.manager.eio_sid_from_sid(sid, NAMESPACE)
+        socket = self.sio.eio.sockets.get(eio_sid) if eio_sid else None
+        return socket.queue.qsize() if socket is not None else 0
+
+    async def _listen(self) -> None:
+        """Feed backplane messages to deliver(), resubscribing after errors"""
+        delay = RESUBSCRIBE_DELAY_SECONDS
+        while True:
+            client = aioredis.Redis.from_url(self.redis_url)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(REALTIME_CHANNEL)
+                if delay > RESUBSCRIBE_DELAY_SECONDS:
+                    logger.info("Realtime backplane subscribed again")
+                delay = RESUBSCRIBE_DELAY_SECONDS
+                async for message in pubsub.listen():
+                    try:
+                        self.deliver(json.loads(message["data"]))
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning("Ignoring malformed realtime message")
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as e:
+                if delay == RESUBSCRIBE_DELAY_SECONDS:
+                    logger.warning("Realtime backplane unavailable: %s", e)
+            finally:
+                try:
+                    await pubsub.close()
+                    await client.close()
+                except (RedisError, OSError):
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RESUBSCRIBE_DELAY_SECONDS)
+
+
+def _on_notifications_created(notifications=()) -> None:
+    messages = []
+    for row in notifications:
+        payload = {field: row.get(field) for field in InboxItem._fields}
+        payload["broadcast"] = False
+        messages.append(
+            realtime_message("notification", payload, user_ids=[row["user_id"]])
+        )
+    realtime_gateway.publish_many(messages)
+
+
+def _on_broadcast_created(broadcast: InboxItem, audience: str) -> None:
+    realtime_gateway.publish("announcement", broadcast._asdict(), audience=audience)
+
+
+realtime_gateway = RealtimeGateway()
+
+subscribe(NOTIFICATIONS_CREATED, _on_notifications_created)
+subscribe(BROADCAST_CREATED, _on_broadcast_created)
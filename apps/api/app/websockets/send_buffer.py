@@ -0,0 +1,67 @@
+"""
+Per-connection send buffers
+
+Every realtime connection gets a bounded buffer between the backplane and
+its socket. Delivering a message never waits on the client: offer() returns
+at once, and when the buffer is full the oldest message is dropped to make
+room, so one stalled phone cannot hold memory or delay everyone else. The
+gateway drains each buffer only as fast as the transport takes packets, and
+disconnects a client whose buffer keeps overflowing (is_stalled); clients
+resync from the inbox API when they reconnect.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional, Tuple
+
+
+class SendBuffer:
+    """Bounded FIFO of (event, data) for one connection, oldest dropped first"""
+
+    def __init__(self, max_messages: int, clock: Callable[[], float] = time.monotonic):
+        self.max_messages = max_messages
+        self.clock = clock
+        self.dropped = 0
+        self._messages: Deque[Tuple[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._overflowing_since: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def offer(self, event: str, data: Any) -> bool:
+        """
+        Queue a message without waiting
+
+        Returns:
+            False if the buffer was full and its oldest message was dropped
+        """
+        accepted = True
+        if len(self._messages) >= self.max_messages:
+            self._messages.popleft()
+            self.dropped += 1
+            accepted = False
+            if self._overflowing_since is None:
+                self._overflowing_since = self.clock()
+        self._messages.append((event, data))
+        self._ready.set()
+        return accepted
+
+    async def next(self) -> Tuple[str, Any]:
+        """Wait for and take the oldest message"""
+        while not self._messages:
+            self._ready.clear()
+            await self._ready.wait()
+        message = self._messages.popleft()
+        # Caught up to half full: the client is keeping pace again
+        if len(self._messages) <= self.max_messages // 2:
+            self._overflowing_since = None
+        return message
+
+    def is_stalled(self, timeout: float) -> bool:
+        """Whether the buffer has been overflowing for timeout seconds"""
+        return (
+            self._overflowing_since is not None
+            and self.clock() - self._overflowing_since >= timeout
+        )
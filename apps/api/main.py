@@ -1,8 +1,20 @@
 """FastAPI application entry point"""
 
 from app.api.v1.auth import router as auth_router
+from app.api.v1.map import router as map_router
+from app.api.v1.moderation import router as moderation_router
+from app.api.v1.notifications import router as notifications_router
+from app.api.v1.properties import router as properties_router
+from app.api.v1.shares import router as shares_router
 from app.api.v1.verification import router as verification_router
 from app.core.config import settings
+from app.services.duplicates import duplicate_detection_service
+from app.services.image_derivatives import image_derivative_service
+from app.services.map_clusters import cluster_engine
+from app.services.ranking import ranking_service
+from app.services.share_links import share_link_service
+from app.services.view_ingestion import view_ingestion_service
+from app.websockets import realtime_gateway
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -28,6 +40,41 @@ app.include_router(auth_router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(
     verification_router, prefix="/api/v1/verification", tags=["verification"]
 )
+app.include_router(properties_router, prefix="/api/v1/properties", tags=["properties"])
+app.include_router(map_router, prefix="/api/v1/map", tags=["map"])
+app.include_router(moderation_router, prefix="/api/v1/moderation", tags=["moderation"])
+app.include_router(
+    notifications_router, prefix="/api/v1/notifications", tags=["notifications"]
+)
+# Short links for SMS/WhatsApp, outside /api/v1
+app.include_router(shares_router, prefix="/s", tags=["shares"])
+# Socket.IO push at /ws/socket.io
+app.mount("/ws", realtime_gateway.asgi_app())
+
+
+@app.on_event("startup")
+async def start_background_writers():
+    """Start the view and click writers, ranking refresher, duplicate checker,
+    map cluster refresher and the realtime backplane listener"""
+    view_ingestion_service.start()
+    share_link_service.start()
+    ranking_service.start()
+    duplicate_detection_service.start()
+    cluster_engine.start()
+    await realtime_gateway.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_writers():
+    """Flush buffered property views, share clicks and pending rank refreshes,
+    and close realtime connections"""
+    await realtime_gateway.stop()
+    view_ingestion_service.stop()
+    share_link_service.stop()
+    ranking_service.stop()
+    duplicate_detection_service.stop()
+    cluster_engine.stop()
+    image_derivative_service.shutdown()
 
 
 @app.get("/health")
@@ -0,0 +1,56 @@
+-- 004_create_agent_verifications.sql
+-- Persisted agent verification state (one row per agent).
+-- The verification status endpoint and listing badges read from this table
+-- through an in-process cache instead of recounting failed attempts.
+-- Agents locked out at deploy time (3+ failures in the last 24 hours) get
+-- their lock backfilled, so the lock check keeps refusing them. Safe to
+-- rerun.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS agent_verifications (
+    id UUID PRIMARY KEY,
+    agent_id UUID NOT NULL UNIQUE REFERENCES users(id) ON DELETE CASCADE,
+    bvn_hash VARCHAR(255),
+    nin_hash VARCHAR(255),
+    verified_state VARCHAR(100),
+    verified_lga VARCHAR(100),
+    verification_status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    credibility_score INTEGER NOT NULL DEFAULT 0,
+    verification_badge_visible BOOLEAN NOT NULL DEFAULT FALSE,
+    locked_until TIMESTAMPTZ,
+    verified_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    CONSTRAINT check_agent_verification_status
+        CHECK (verification_status IN ('pending', 'verified', 'failed', 'locked')),
+    CONSTRAINT check_agent_verification_credibility_score
+        CHECK (credibility_score >= 0 AND credibility_score <= 100)
+);
+
+-- Same policy as LOCK_FAILED_ATTEMPTS / LOCK_WINDOW in
+-- app/services/verification_status.py: locked until the third most recent
+-- failure leaves the 24 hour window (gen_random_uuid needs PostgreSQL 13+)
+INSERT INTO agent_verifications (id, agent_id, verification_status, locked_until)
+SELECT gen_random_uuid(), agent_id, 'locked', created_at + interval '24 hours'
+  FROM (
+      SELECT agent_id,
+             created_at,
+             row_number() OVER (
+                 PARTITION BY agent_id ORDER BY created_at DESC
+             ) AS position
+        FROM agent_verification_attempts
+       WHERE status = 'failed' AND created_at >= now() - interval '24 hours'
+  ) failures
+ WHERE position = 3
+ON CONFLICT (agent_id) DO UPDATE
+   SET locked_until = GREATEST(
+           agent_verifications.locked_until, EXCLUDED.locked_until
+       ),
+       verification_status = CASE
+           WHEN agent_verifications.verification_status = 'verified'
+           THEN 'verified'
+           ELSE 'locked'
+       END;
+
+COMMIT;
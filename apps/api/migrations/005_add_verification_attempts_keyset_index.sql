@@ -0,0 +1,10 @@
+-- 005_add_verification_attempts_keyset_index.sql
+-- Supports keyset pagination of /verification/attempts on (created_at, id)
+-- per agent, plus the recent-attempt and lock queries that filter by agent
+-- and created_at. Built concurrently so the table stays writable.
+--
+-- Apply with psql (CREATE INDEX CONCURRENTLY cannot run in a transaction):
+--     psql "$DATABASE_URL" -f migrations/005_add_verification_attempts_keyset_index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_agent_verification_attempts_agent_created_id
+    ON agent_verification_attempts (agent_id, created_at, id);
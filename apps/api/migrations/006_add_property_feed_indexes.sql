@@ -0,0 +1,25 @@
+-- 006_add_property_feed_indexes.sql
+-- Partial indexes over live listings for the keyset-paginated property feed
+-- (/api/v1/properties). Every index ends with the feed sort key so a
+-- filtered page is a single range scan, in either direction.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so apply
+-- this file with psql (which sends each statement separately):
+--     psql "$DATABASE_URL" -f migrations/006_add_property_feed_indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_feed_newest
+    ON properties (created_at, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_feed_state_newest
+    ON properties (state, created_at, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_feed_state_lga_newest
+    ON properties (state, lga, created_at, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_feed_state_type_newest
+    ON properties (state, property_type, created_at, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_feed_state_price
+    ON properties (state, price_monthly, id) WHERE is_active;
+
+ANALYZE properties;
@@ -0,0 +1,19 @@
+-- 007_add_property_geohash.sql
+-- Spatial index for proximity search: a geohash column maintained by the
+-- application on every Property insert/update, indexed over live listings.
+-- Searches scan a few geohash prefix ranges instead of the whole table.
+--
+-- Apply with psql (CREATE INDEX CONCURRENTLY cannot run in a transaction):
+--     psql "$DATABASE_URL" -f migrations/007_add_property_geohash.sql
+-- Then backfill existing rows:
+--     python scripts/backfill_geohash.py
+
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS geohash VARCHAR(12) COLLATE "C";
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_geohash_active
+    ON properties (geohash) WHERE is_active;
+
+-- Where PostGIS is installed the backfill can run in SQL instead:
+-- UPDATE properties
+--    SET geohash = ST_GeoHash(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326), 9)
+--  WHERE geohash IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL;
@@ -0,0 +1,6 @@
+-- 008_add_property_updated_at_index.sql
+-- Lets API workers pull "listings changed since T" cheaply. The map cluster
+-- engine uses it to delta-sync changes made by other workers.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_updated_at
+    ON properties (updated_at);
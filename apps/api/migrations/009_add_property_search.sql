@@ -0,0 +1,54 @@
+-- 009_add_property_search.sql
+-- Full-text search over listings. search_vector is a weighted tsvector
+-- (title A, lga B, address C, description D) kept current by a trigger, so
+-- adding it needs no table rewrite and no application change on write.
+-- pg_trgm backs the misspelling fallback on title and lga.
+--
+-- Apply with psql (CREATE INDEX CONCURRENTLY cannot run in a transaction):
+--     psql "$DATABASE_URL" -f migrations/009_add_property_search.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION properties_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.lga, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.address, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS properties_search_vector_update ON properties;
+CREATE TRIGGER properties_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description, address, lga ON properties
+    FOR EACH ROW EXECUTE FUNCTION properties_search_vector_update();
+
+-- Backfill existing rows through the trigger, 5000 at a time until none
+-- are left. Each batch commits on its own (psql runs the DO block outside a
+-- transaction), so row locks stay short on large tables.
+DO $$
+DECLARE
+    updated integer;
+BEGIN
+    LOOP
+        UPDATE properties SET title = title
+         WHERE id IN (
+             SELECT id FROM properties WHERE search_vector IS NULL LIMIT 5000
+         );
+        GET DIAGNOSTICS updated = ROW_COUNT;
+        EXIT WHEN updated = 0;
+        COMMIT;
+    END LOOP;
+END
+$$;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_search_vector
+    ON properties USING gin (search_vector);
+
+-- Must match TRIGRAM_DOCUMENT in app/services/search.py
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_search_trgm
+    ON properties USING gin (lower(title || ' ' || lga) gin_trgm_ops);
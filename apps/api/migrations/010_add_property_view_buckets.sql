@@ -0,0 +1,26 @@
+-- 010_add_property_view_buckets.sql
+-- Daily per-property view buckets behind view_count_7d and trending_score.
+-- The view batch writer upserts today's bucket; a daily job
+-- (scripts/roll_view_counters.py) recomputes both counters from the last
+-- seven buckets and purges older ones.
+
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS trending_score DOUBLE PRECISION DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS property_view_daily (
+    property_id UUID NOT NULL,
+    day DATE NOT NULL,
+    views INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (property_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS ix_property_view_daily_day ON property_view_daily (day);
+
+-- Seed the window from the raw view log, then run
+--     python scripts/roll_view_counters.py
+-- once to fill view_count_7d and trending_score.
+INSERT INTO property_view_daily (property_id, day, views)
+SELECT property_id, (viewed_at AT TIME ZONE 'UTC')::date, count(*)
+  FROM property_views
+ WHERE viewed_at >= (now() AT TIME ZONE 'UTC')::date - 7
+ GROUP BY 1, 2
+ON CONFLICT (property_id, day) DO UPDATE SET views = EXCLUDED.views;
@@ -0,0 +1,21 @@
+-- 011_add_listing_sweeper_support.sql
+-- Supports the set-based expiry/auto-extend sweeper
+-- (scripts/sweep_listings.py): a partial index so each chunk is an index
+-- range scan over live listings in expiry order, and metric types for the
+-- sweeper's daily counts.
+--
+-- Apply with psql (CREATE INDEX CONCURRENTLY cannot run in a transaction):
+--     psql "$DATABASE_URL" -f migrations/011_add_listing_sweeper_support.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_active_expires_at
+    ON properties (expires_at) WHERE is_active;
+
+ALTER TABLE platform_metrics DROP CONSTRAINT IF EXISTS check_platform_metric_type;
+ALTER TABLE platform_metrics ADD CONSTRAINT check_platform_metric_type CHECK (
+    metric_type IN (
+        'daily_active_users', 'monthly_active_users', 'new_registrations',
+        'property_listings', 'completed_inspections', 'total_revenue',
+        'agent_verifications', 'user_engagement', 'property_views',
+        'listings_expired', 'listings_auto_extended'
+    )
+);
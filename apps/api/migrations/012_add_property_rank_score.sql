@@ -0,0 +1,17 @@
+-- 012_add_property_rank_score.sql
+-- Materialized feed ranking: rank_score is computed by RankingService and
+-- the partial indexes below serve sort=ranked pages (optionally per state)
+-- as a single index range scan.
+--
+-- Apply with psql (CREATE INDEX CONCURRENTLY cannot run in a transaction):
+--     psql "$DATABASE_URL" -f migrations/012_add_property_rank_score.sql
+-- Then score existing listings:
+--     python scripts/rank_listings.py
+
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS rank_score DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_feed_ranked
+    ON properties (rank_score, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_properties_feed_state_ranked
+    ON properties (state, rank_score, id) WHERE is_active;
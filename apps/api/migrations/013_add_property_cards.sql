@@ -0,0 +1,346 @@
+-- 013_add_property_cards.sql
+-- property_cards: a denormalized read model with one row per listing that
+-- holds everything a card shows (listing columns, agent business name,
+-- verification badge, review summary, flick/clip/share counts). Feed pages
+-- become single-table index range scans with no joins.
+--
+-- Triggers keep it current inside the writing transaction:
+--   properties            upsert the listing's own columns
+--   property_flicks/clips/shares
+--                         +1/-1 on the card's counter
+--   agent_reviews         recompute the agent's review summary on their cards
+--   users                 copy business_name to the agent's cards
+--   agent_verifications   copy the badge to the agent's cards
+-- Every trigger write that changes what a card shows sets refreshed_at,
+-- which versions cached card fragments. Listing updates that touch no card
+-- column (trending_score, search_vector, geohash, description, ...) skip
+-- the card entirely, and a rank_score-only change updates the card without
+-- bumping refreshed_at.
+--
+-- Apply with psql (CREATE INDEX CONCURRENTLY cannot run in a transaction):
+--     psql "$DATABASE_URL" -f migrations/013_add_property_cards.sql
+-- Then fill it (and later repair drift) with:
+--     python scripts/rebuild_property_cards.py
+
+CREATE TABLE IF NOT EXISTS property_cards (
+    id UUID PRIMARY KEY REFERENCES properties(id) ON DELETE CASCADE,
+    agent_id UUID NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    property_type VARCHAR(50) NOT NULL,
+    bedrooms INTEGER,
+    bathrooms INTEGER,
+    price_monthly INTEGER NOT NULL,
+    state VARCHAR(100) NOT NULL,
+    lga VARCHAR(100) NOT NULL,
+    latitude NUMERIC(10, 8),
+    longitude NUMERIC(10, 8),
+    cover_url TEXT,
+    is_active BOOLEAN NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ,
+    view_count_7d INTEGER NOT NULL DEFAULT 0,
+    view_count_total INTEGER NOT NULL DEFAULT 0,
+    rank_score DOUBLE PRECISION NOT NULL DEFAULT 0,
+    agent_business_name VARCHAR(255),
+    verification_status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    credibility_score INTEGER NOT NULL DEFAULT 0,
+    verification_badge_visible BOOLEAN NOT NULL DEFAULT FALSE,
+    agent_locked_until TIMESTAMPTZ,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    review_avg NUMERIC(3, 2),
+    flick_count INTEGER NOT NULL DEFAULT 0,
+    clip_count INTEGER NOT NULL DEFAULT 0,
+    share_count INTEGER NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Listing columns. A plain UPDATE of the listing's own columns on the hot
+-- path (view counters, rank scores); agent columns are looked up only when
+-- the card is new or changes agent. Updates reach this function only when a
+-- card source column changed (see the WHEN clause on the trigger).
+CREATE OR REPLACE FUNCTION property_cards_sync_property() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.agent_id = OLD.agent_id THEN
+        UPDATE property_cards SET
+            title = NEW.title,
+            property_type = NEW.property_type,
+            bedrooms = NEW.bedrooms,
+            bathrooms = NEW.bathrooms,
+            price_monthly = NEW.price_monthly,
+            state = NEW.state,
+            lga = NEW.lga,
+            latitude = NEW.latitude,
+            longitude = NEW.longitude,
+            cover_url = NEW.media_urls[1],
+            is_active = coalesce(NEW.is_active, TRUE),
+            expires_at = NEW.expires_at,
+            created_at = NEW.created_at,
+            updated_at = NEW.updated_at,
+            view_count_7d = coalesce(NEW.view_count_7d, 0),
+            view_count_total = coalesce(NEW.view_count_total, 0),
+            rank_score = NEW.rank_score,
+            -- rank_score is not part of the rendered card
+            refreshed_at = CASE
+                WHEN (OLD.title, OLD.property_type, OLD.bedrooms, OLD.bathrooms,
+                      OLD.price_monthly, OLD.state, OLD.lga, OLD.latitude,
+                      OLD.longitude, OLD.media_urls[1], OLD.is_active,
+                      OLD.expires_at, OLD.created_at, OLD.updated_at,
+                      OLD.view_count_7d, OLD.view_count_total)
+                     IS DISTINCT FROM
+                     (NEW.title, NEW.property_type, NEW.bedrooms, NEW.bathrooms,
+                      NEW.price_monthly, NEW.state, NEW.lga, NEW.latitude,
+                      NEW.longitude, NEW.media_urls[1], NEW.is_active,
+                      NEW.expires_at, NEW.created_at, NEW.updated_at,
+                      NEW.view_count_7d, NEW.view_count_total)
+                THEN clock_timestamp()
+                ELSE refreshed_at
+            END
+        WHERE id = NEW.id;
+        IF FOUND THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+
+    INSERT INTO property_cards AS c (
+        id, agent_id, title, property_type, bedrooms, bathrooms,
+        price_monthly, state, lga, latitude, longitude, cover_url, is_active,
+        expires_at, created_at, updated_at, view_count_7d, view_count_total,
+        rank_score, agent_business_name, verification_status,
+        credibility_score, verification_badge_visible, agent_locked_until,
+        review_count, review_avg, flick_count, clip_count, share_count,
+        refreshed_at
+    )
+    SELECT
+        NEW.id, NEW.agent_id, NEW.title, NEW.property_type, NEW.bedrooms,
+        NEW.bathrooms, NEW.price_monthly, NEW.state, NEW.lga, NEW.latitude,
+        NEW.longitude, NEW.media_urls[1], coalesce(NEW.is_active, TRUE),
+        NEW.expires_at, NEW.created_at, NEW.updated_at,
+        coalesce(NEW.view_count_7d, 0), coalesce(NEW.view_count_total, 0),
+        NEW.rank_score,
+        (SELECT u.business_name FROM users u WHERE u.id = NEW.agent_id),
+        coalesce(v.verification_status, 'pending'),
+        coalesce(v.credibility_score, 0),
+        coalesce(v.verification_badge_visible, FALSE),
+        v.locked_until,
+        r.review_count, r.review_avg,
+        (SELECT count(*) FROM property_flicks f WHERE f.property_id = NEW.id),
+        (SELECT count(*) FROM property_clips cl WHERE cl.property_id = NEW.id),
+        (SELECT count(*) FROM property_shares s WHERE s.property_id = NEW.id),
+        clock_timestamp()
+    FROM (SELECT 1) AS one
+    LEFT JOIN agent_verifications v ON v.agent_id = NEW.agent_id
+    CROSS JOIN LATERAL (
+        SELECT count(*) AS review_count, round(avg(rating), 2) AS review_avg
+        FROM agent_reviews
+        WHERE agent_id = NEW.agent_id AND coalesce(is_visible, TRUE)
+    ) r
+    ON CONFLICT (id) DO UPDATE SET
+        agent_id = EXCLUDED.agent_id,
+        title = EXCLUDED.title,
+        property_type = EXCLUDED.property_type,
+        bedrooms = EXCLUDED.bedrooms,
+        bathrooms = EXCLUDED.bathrooms,
+        price_monthly = EXCLUDED.price_monthly,
+        state = EXCLUDED.state,
+        lga = EXCLUDED.lga,
+        latitude = EXCLUDED.latitude,
+        longitude = EXCLUDED.longitude,
+        cover_url = EXCLUDED.cover_url,
+        is_active = EXCLUDED.is_active,
+        expires_at = EXCLUDED.expires_at,
+        created_at = EXCLUDED.created_at,
+        updated_at = EXCLUDED.updated_at,
+        view_count_7d = EXCLUDED.view_count_7d,
+        view_count_total = EXCLUDED.view_count_total,
+        rank_score = EXCLUDED.rank_score,
+        agent_business_name = EXCLUDED.agent_business_name,
+        verification_status = EXCLUDED.verification_status,
+        credibility_score = EXCLUDED.credibility_score,
+        verification_badge_visible = EXCLUDED.verification_badge_visible,
+        agent_locked_until = EXCLUDED.agent_locked_until,
+        review_count = EXCLUDED.review_count,
+        review_avg = EXCLUDED.review_avg,
+        refreshed_at = EXCLUDED.refreshed_at;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS property_cards_sync_property_insert ON properties;
+CREATE TRIGGER property_cards_sync_property_insert
+    AFTER INSERT ON properties
+    FOR EACH ROW EXECUTE FUNCTION property_cards_sync_property();
+
+-- Only when a card source column changed: search_vector, geohash and
+-- trending_score writes do not touch the card
+DROP TRIGGER IF EXISTS property_cards_sync_property ON properties;
+CREATE TRIGGER property_cards_sync_property
+    AFTER UPDATE ON properties
+    FOR EACH ROW
+    WHEN ((OLD.agent_id, OLD.title, OLD.property_type, OLD.bedrooms,
+           OLD.bathrooms, OLD.price_monthly, OLD.state, OLD.lga, OLD.latitude,
+           OLD.longitude, OLD.media_urls[1], OLD.is_active, OLD.expires_at,
+           OLD.created_at, OLD.updated_at, OLD.view_count_7d,
+           OLD.view_count_total, OLD.rank_score)
+          IS DISTINCT FROM
+          (NEW.agent_id, NEW.title, NEW.property_type, NEW.bedrooms,
+           NEW.bathrooms, NEW.price_monthly, NEW.state, NEW.lga, NEW.latitude,
+           NEW.longitude, NEW.media_urls[1], NEW.is_active, NEW.expires_at,
+           NEW.created_at, NEW.updated_at, NEW.view_count_7d,
+           NEW.view_count_total, NEW.rank_score))
+    EXECUTE FUNCTION property_cards_sync_property();
+
+-- Flick/clip/share counters. Incremental, so a hot listing's counter is one
+-- row update per engagement rather than a recount.
+CREATE OR REPLACE FUNCTION property_cards_count_engagement() RETURNS trigger AS $$
+DECLARE
+    target UUID;
+    delta INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        target := NEW.property_id;
+        delta := 1;
+    ELSE
+        target := OLD.property_id;
+        delta := -1;
+    END IF;
+
+    IF TG_TABLE_NAME = 'property_flicks' THEN
+        UPDATE property_cards
+           SET flick_count = greatest(flick_count + delta, 0),
+               refreshed_at = clock_timestamp()
+         WHERE id = target;
+    ELSIF TG_TABLE_NAME = 'property_clips' THEN
+        UPDATE property_cards
+           SET clip_count = greatest(clip_count + delta, 0),
+               refreshed_at = clock_timestamp()
+         WHERE id = target;
+    ELSE
+        UPDATE property_cards
+           SET share_count = greatest(share_count + delta, 0),
+               refreshed_at = clock_timestamp()
+         WHERE id = target;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS property_cards_count_flicks ON property_flicks;
+CREATE TRIGGER property_cards_count_flicks
+    AFTER INSERT OR DELETE ON property_flicks
+    FOR EACH ROW EXECUTE FUNCTION property_cards_count_engagement();
+
+DROP TRIGGER IF EXISTS property_cards_count_clips ON property_clips;
+CREATE TRIGGER property_cards_count_clips
+    AFTER INSERT OR DELETE ON property_clips
+    FOR EACH ROW EXECUTE FUNCTION property_cards_count_engagement();
+
+DROP TRIGGER IF EXISTS property_cards_count_shares ON property_shares;
+CREATE TRIGGER property_cards_count_shares
+    AFTER INSERT OR DELETE ON property_shares
+    FOR EACH ROW EXECUTE FUNCTION property_cards_count_engagement();
+
+-- Review summary, recomputed per agent (reviews are rare, cards per agent few)
+CREATE OR REPLACE FUNCTION property_cards_refresh_reviews(target UUID) RETURNS void AS $$
+    UPDATE property_cards c
+       SET review_count = r.review_count,
+           review_avg = r.review_avg,
+           refreshed_at = clock_timestamp()
+      FROM (
+          SELECT count(*) AS review_count, round(avg(rating), 2) AS review_avg
+          FROM agent_reviews
+          WHERE agent_id = target AND coalesce(is_visible, TRUE)
+      ) r
+     WHERE c.agent_id = target
+       AND (c.review_count, c.review_avg) IS DISTINCT FROM (r.review_count, r.review_avg);
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION property_cards_sync_reviews() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM property_cards_refresh_reviews(NEW.agent_id);
+    END IF;
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.agent_id <> NEW.agent_id) THEN
+        PERFORM property_cards_refresh_reviews(OLD.agent_id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS property_cards_sync_reviews ON agent_reviews;
+CREATE TRIGGER property_cards_sync_reviews
+    AFTER INSERT OR DELETE OR UPDATE OF agent_id, rating, is_visible ON agent_reviews
+    FOR EACH ROW EXECUTE FUNCTION property_cards_sync_reviews();
+
+-- Agent business name
+CREATE OR REPLACE FUNCTION property_cards_sync_agent_name() RETURNS trigger AS $$
+BEGIN
+    UPDATE property_cards
+       SET agent_business_name = NEW.business_name,
+           refreshed_at = clock_timestamp()
+     WHERE agent_id = NEW.id
+       AND agent_business_name IS DISTINCT FROM NEW.business_name;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS property_cards_sync_agent_name ON users;
+CREATE TRIGGER property_cards_sync_agent_name
+    AFTER UPDATE OF business_name ON users
+    FOR EACH ROW EXECUTE FUNCTION property_cards_sync_agent_name();
+
+-- Verification badge; a deleted verification row reverts to the pending badge
+CREATE OR REPLACE FUNCTION property_cards_sync_badge() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE property_cards
+           SET verification_status = 'pending',
+               credibility_score = 0,
+               verification_badge_visible = FALSE,
+               agent_locked_until = NULL,
+               refreshed_at = clock_timestamp()
+         WHERE agent_id = OLD.agent_id;
+    ELSE
+        UPDATE property_cards
+           SET verification_status = NEW.verification_status,
+               credibility_score = coalesce(NEW.credibility_score, 0),
+               verification_badge_visible = coalesce(NEW.verification_badge_visible, FALSE),
+               agent_locked_until = NEW.locked_until,
+               refreshed_at = clock_timestamp()
+         WHERE agent_id = NEW.agent_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS property_cards_sync_badge ON agent_verifications;
+CREATE TRIGGER property_cards_sync_badge
+    AFTER INSERT OR DELETE OR UPDATE OF verification_status, credibility_score,
+        verification_badge_visible, locked_until ON agent_verifications
+    FOR EACH ROW EXECUTE FUNCTION property_cards_sync_badge();
+
+-- Agent-wide updates above
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_property_cards_agent_id
+    ON property_cards (agent_id);
+
+-- Feed indexes, as on properties (006, 012)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_property_cards_feed_newest
+    ON property_cards (created_at, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_property_cards_feed_state_newest
+    ON property_cards (state, created_at, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_property_cards_feed_state_lga_newest
+    ON property_cards (state, lga, created_at, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_property_cards_feed_state_type_newest
+    ON property_cards (state, property_type, created_at, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_property_cards_feed_state_price
+    ON property_cards (state, price_monthly, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_property_cards_feed_ranked
+    ON property_cards (rank_score, id) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_property_cards_feed_state_ranked
+    ON property_cards (state, rank_score, id) WHERE is_active;
@@ -0,0 +1,44 @@
+-- 014_add_duplicate_detection.sql
+-- Near-duplicate listing detection (DuplicateDetectionService):
+--   property_fingerprints  MinHash signature and photo dHashes per listing
+--   property_lsh_buckets   (band, bucket) -> listing; candidates for a listing
+--                          are the listings sharing any of its buckets, one
+--                          primary-key range probe per band
+--   property_duplicates    detected pairs, newer listing -> older listing
+--
+-- Apply with psql:
+--     psql "$DATABASE_URL" -f migrations/014_add_duplicate_detection.sql
+-- Then index the existing catalog with:
+--     python scripts/scan_duplicates.py
+
+CREATE TABLE IF NOT EXISTS property_fingerprints (
+    property_id UUID PRIMARY KEY REFERENCES properties(id) ON DELETE CASCADE,
+    source_hash VARCHAR(40) NOT NULL,
+    minhash BYTEA NOT NULL,
+    image_hashes BYTEA NOT NULL DEFAULT '',
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS property_lsh_buckets (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    property_id UUID NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, property_id)
+);
+
+-- Re-fingerprinting replaces a listing's buckets
+CREATE INDEX IF NOT EXISTS ix_property_lsh_buckets_property_id
+    ON property_lsh_buckets (property_id);
+
+CREATE TABLE IF NOT EXISTS property_duplicates (
+    property_id UUID NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+    duplicate_of UUID NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+    text_similarity REAL NOT NULL,
+    image_distance SMALLINT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    detected_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (property_id, duplicate_of)
+);
+
+CREATE INDEX IF NOT EXISTS ix_property_duplicates_duplicate_of
+    ON property_duplicates (duplicate_of);
@@ -0,0 +1,14 @@
+-- 015_add_share_click_tracking.sql
+-- Click tracking for share links: clicks are counted in memory by
+-- ShareLinkService and written in batches, one UPDATE per share per flush.
+-- clicked_at keeps the first click; last_clicked_at the latest.
+--
+-- Apply with psql:
+--     psql "$DATABASE_URL" -f migrations/015_add_share_click_tracking.sql
+
+ALTER TABLE property_shares ADD COLUMN IF NOT EXISTS click_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE property_shares ADD COLUMN IF NOT EXISTS last_clicked_at TIMESTAMP WITH TIME ZONE;
+
+-- Links clicked before this migration had their first click recorded
+UPDATE property_shares SET click_count = 1, last_clicked_at = clicked_at
+ WHERE clicked_at IS NOT NULL AND click_count = 0;
@@ -0,0 +1,78 @@
+-- 016_add_moderation_queue.sql
+-- Report moderation queue: one moderation_cases row per listing with
+-- pending reports, kept by ModerationService. Moderators claim the
+-- highest-scoring cases with FOR UPDATE SKIP LOCKED and hold them on a
+-- lease, so concurrent moderators never get the same listing.
+--
+-- Apply with psql (CREATE INDEX CONCURRENTLY cannot run in a transaction):
+--     psql "$DATABASE_URL" -f migrations/016_add_moderation_queue.sql
+
+CREATE TABLE IF NOT EXISTS moderation_cases (
+    property_id UUID PRIMARY KEY REFERENCES properties(id) ON DELETE CASCADE,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    score INTEGER NOT NULL DEFAULT 0,
+    first_reported_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_reported_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    claimed_by UUID REFERENCES users(id),
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    hidden_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_moderation_cases_queue
+    ON moderation_cases (score DESC, first_reported_at);
+
+-- One pending report per user and listing, so repeats cannot inflate a
+-- case or trip the auto-hide threshold. Existing repeats are dismissed
+-- first (the earliest pending report is kept), and an INVALID index left by
+-- an earlier failed build is dropped, so IF NOT EXISTS does not skip the
+-- rebuild. If the build still fails (a repeat filed meanwhile), rerun the
+-- migration.
+UPDATE property_reports r
+   SET status = 'dismissed', reviewed_at = now()
+  FROM (
+      SELECT id,
+             row_number() OVER (
+                 PARTITION BY property_id, reported_by
+                 ORDER BY created_at, id
+             ) AS position
+      FROM property_reports
+      WHERE status = 'pending'
+  ) ranked
+ WHERE r.id = ranked.id AND ranked.position > 1;
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = 'uq_property_reports_pending' AND NOT i.indisvalid
+    ) THEN
+        DROP INDEX uq_property_reports_pending;
+    END IF;
+END
+$$;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_property_reports_pending
+    ON property_reports (property_id, reported_by) WHERE status = 'pending';
+
+-- Cases for reports filed before the queue existed
+INSERT INTO moderation_cases (
+    property_id, report_count, score, first_reported_at, last_reported_at
+)
+SELECT property_id,
+       count(*),
+       sum(CASE reason
+               WHEN 'fake' THEN 5
+               WHEN 'inappropriate' THEN 4
+               WHEN 'spam' THEN 3
+               WHEN 'duplicate' THEN 2
+               WHEN 'wrong_info' THEN 2
+               ELSE 1
+           END),
+       min(coalesce(created_at, now())),
+       max(coalesce(created_at, now()))
+FROM property_reports
+WHERE status = 'pending'
+GROUP BY property_id
+ON CONFLICT (property_id) DO NOTHING;
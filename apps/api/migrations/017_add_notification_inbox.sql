@@ -0,0 +1,31 @@
+-- 017_add_notification_inbox.sql
+-- Notification inbox support: keyset inbox and purge indexes, and the
+-- per-user unread counters NotificationService maintains incrementally.
+--
+-- Apply with psql (CREATE INDEX CONCURRENTLY cannot run in a transaction):
+--     psql "$DATABASE_URL" -f migrations/017_add_notification_inbox.sql
+-- Expired notifications are deleted by:
+--     python scripts/purge_notifications.py
+
+UPDATE notifications SET is_read = FALSE WHERE is_read IS NULL;
+ALTER TABLE notifications ALTER COLUMN is_read SET DEFAULT FALSE;
+ALTER TABLE notifications ALTER COLUMN is_read SET NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_inbox
+    ON notifications (user_id, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_unread
+    ON notifications (user_id) WHERE NOT is_read;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_expires_at
+    ON notifications (expires_at);
+
+CREATE TABLE IF NOT EXISTS notification_counters (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    unread_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Counts for notifications created before the counters existed
+INSERT INTO notification_counters (user_id, unread_count)
+SELECT user_id, count(*) FROM notifications WHERE NOT is_read GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET unread_count = EXCLUDED.unread_count;
@@ -0,0 +1,27 @@
+-- 018_add_broadcasts.sql
+-- Fan-out-on-read broadcasts: one row per system announcement, merged into
+-- each user's inbox when it is read, and a per-user read watermark on
+-- notification_counters instead of one notification row per user.
+--
+-- Apply with psql:
+--     psql "$DATABASE_URL" -f migrations/018_add_broadcasts.sql
+
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id UUID PRIMARY KEY,
+    type VARCHAR(50) NOT NULL DEFAULT 'system_announcement',
+    audience VARCHAR(20) NOT NULL DEFAULT 'all',
+    title VARCHAR(255) NOT NULL,
+    message TEXT NOT NULL,
+    data JSON DEFAULT '{}',
+    action_url VARCHAR(500),
+    created_by UUID REFERENCES users(id) ON DELETE SET NULL,
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT check_broadcast_audience
+        CHECK (audience IN ('all', 'tenant', 'agent', 'admin'))
+);
+
+CREATE INDEX IF NOT EXISTS ix_broadcasts_expires_at ON broadcasts (expires_at);
+
+ALTER TABLE notification_counters
+    ADD COLUMN IF NOT EXISTS broadcasts_read_through TIMESTAMPTZ;
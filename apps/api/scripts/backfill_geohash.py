@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backfill Property.geohash for listings created before migration 007.
+
+Usage:
+    python scripts/backfill_geohash.py [--batch-size 1000]
+
+Reads DATABASE_URL (and the other settings) from the environment / .env like
+the API does. Safe to re-run: only rows with a NULL geohash are touched.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import SessionLocal
+from app.services.spatial import spatial_search_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill property geohashes.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        updated = spatial_search_service.backfill_geohashes(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"Backfilled geohash on {updated} properties.")
+
+
+if __name__ == "__main__":
+    main()
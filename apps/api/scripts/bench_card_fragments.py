@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark feed page serialization with and without card fragments.
+
+Usage:
+    python scripts/bench_card_fragments.py [--cards 50] [--rounds 2000]
+
+Compares serializing a page of synthetic cards through PropertyFeedResponse
+with splicing pre-encoded fragments from a warm CardFragmentCache. No
+database is needed; only the serialization step is measured.
+"""
+
+import argparse
+import sys
+import timeit
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas.property import PropertyFeedResponse
+from app.services.card_cache import CardFragmentCache, splice_page
+
+VersionRow = namedtuple("VersionRow", "id refreshed_at")
+BADGE = {
+    "verification_status": "verified",
+    "credibility_score": 80,
+    "verification_badge_visible": True,
+}
+
+
+def synthetic_cards(count: int):
+    now = datetime.now(timezone.utc)
+    rows, cards = [], {}
+    for index in range(count):
+        row = VersionRow(uuid.uuid4(), now)
+        rows.append(row)
+        cards[row.id] = {
+            "id": row.id,
+            "agent_id": uuid.uuid4(),
+            "title": f"{index % 4 + 1} bedroom flat in Lekki Phase 1",
+            "property_type": "apartment",
+            "bedrooms": index % 4 + 1,
+            "bathrooms": index % 3 + 1,
+            "price_monthly": 15000000 + index * 50000,
+            "state": "Lagos",
+            "lga": "Eti-Osa",
+            "latitude": 6.4474 + index / 1000,
+            "longitude": 3.4720 + index / 1000,
+            "cover_url": f"https://media.reent.ng/properties/{row.id}/0.jpg",
+            "view_count_7d": index,
+            "view_count_total": index * 10,
+            "expires_at": now + timedelta(days=30),
+            "created_at": now,
+            "agent_badge": BADGE,
+            "agent_business_name": "Lekki Homes",
+            "review_count": 12,
+            "review_avg": 4.5,
+            "flick_count": index,
+            "clip_count": index // 2,
+            "share_count": index // 5,
+        }
+    return rows, cards
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark card fragments.")
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows, cards = synthetic_cards(args.cards)
+    cache = CardFragmentCache()
+
+    def load_cards(property_ids):
+        return [(row, cards[row.id]) for row in rows if row.id in property_ids]
+
+    def serialize():
+        return (
+            PropertyFeedResponse(
+                items=[cards[row.id] for row in rows],
+                count=len(rows),
+                has_more=True,
+                next_cursor="cursor",
+            )
+            .model_dump_json()
+            .encode("utf-8")
+        )
+
+    def splice():
+        return splice_page(cache.render(rows, load_cards), True, "cursor")
+
+    # Warm the cache and make sure both paths produce identical bytes
+    assert splice() == serialize()
+
+    full = min(timeit.repeat(serialize, number=args.rounds, repeat=3))
+    spliced = min(timeit.repeat(splice, number=args.rounds, repeat=3))
+
+    def per_page(total: float) -> float:
+        return total / args.rounds * 1e6
+
+    print(f"{args.cards}-card page, best of 3 x {args.rounds} rounds:")
+    print(f"  serialize: {per_page(full):8.1f} us/page")
+    print(f"  splice:    {per_page(spliced):8.1f} us/page")
+    print(f"  speedup:   {full / spliced:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generate thumbnails for listing photos that do not have them yet.
+
+Usage:
+    python scripts/generate_derivatives.py [--batch-size 200] [--workers 2]
+
+Walks every listing's media in keyset batches. Photos whose derivatives
+already match their content hash are skipped, so re-runs are cheap.
+"""
+
+import argparse
+import logging
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+from app.models.base import SessionLocal
+from app.models.property import Property
+from app.services.image_derivatives import ImageDerivativeService
+from app.services.media import is_storage_key
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate photo derivatives.")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument(
+        "--workers", type=int, default=settings.IMAGE_DERIVATIVE_WORKERS
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    service = ImageDerivativeService(workers=args.workers)
+    totals: Counter = Counter()
+    db = SessionLocal()
+    try:
+        last_id = None
+        while True:
+            query = db.query(Property.id, Property.media_urls)
+            if last_id is not None:
+                query = query.filter(Property.id > last_id)
+            rows = query.order_by(Property.id).limit(args.batch_size).all()
+            if not rows:
+                break
+            keys = [
+                key
+                for row in rows
+                for key in row.media_urls or []
+                if is_storage_key(key)
+            ]
+            totals.update(service.process_many(keys))
+            last_id = rows[-1].id
+            print(f"  {dict(totals)}", file=sys.stderr)
+    finally:
+        db.close()
+        service.shutdown()
+
+    print(
+        ", ".join(f"{count} {status}" for status, count in sorted(totals.items()))
+        or "No photos found."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk import an agent's listings from a CSV or NDJSON file.
+
+Usage:
+    python scripts/import_listings.py --agent-id <uuid> listings.csv
+        [--format csv|ndjson] [--batch-size 1000] [--max-rows 100000]
+
+Rows are validated and inserted in batches, committed per batch; rejected
+rows are printed with their row numbers and the rest are imported.
+"""
+
+import argparse
+import logging
+import sys
+import uuid
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import SessionLocal
+from app.services.listing_import import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    MAX_IMPORT_ROWS,
+    detect_format,
+    listing_import_service,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import listings.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--agent-id", type=uuid.UUID, required=True)
+    parser.add_argument("--format", choices=IMPORT_FORMATS)
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--max-rows", type=int, default=MAX_IMPORT_ROWS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    def report(totals):
+        print(
+            f"  {totals['rows_read']} read, {totals['inserted']} inserted, "
+            f"{totals['failed']} failed",
+            file=sys.stderr,
+        )
+
+    fmt = detect_format(args.path.name, args.format)
+    db = SessionLocal()
+    try:
+        with args.path.open("rb") as stream:
+            result = listing_import_service.import_listings(
+                db,
+                args.agent_id,
+                stream,
+                fmt,
+                batch_size=args.batch_size,
+                max_rows=args.max_rows,
+                progress=report,
+            )
+    finally:
+        db.close()
+
+    for error in result["errors"]:
+        print(f"row {error['row']}: {'; '.join(error['errors'])}")
+    if result["errors_truncated"]:
+        print(f"... {result['failed'] - len(result['errors'])} more rejected rows")
+    print(
+        f"Imported {result['inserted']} of {result['rows_read']} rows in "
+        f"{result['duration_seconds']}s ({result['rows_per_second']} rows/s)."
+    )
+
+
+if __name__ == "__main__":
+    main()
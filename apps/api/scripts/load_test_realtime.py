@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load test the realtime gateway with many concurrent Socket.IO connections.
+
+Usage:
+    ulimit -n 65536
+    python scripts/load_test_realtime.py [--url ws://localhost:8000]
+        [--connections 10000] [--connect-rate 500] [--messages 20000]
+        [--publish-rate 2000] [--broadcasts 5] [--hold 30]
+
+Opens --connections websocket connections to one API node, each as its own
+synthetic user with a locally minted access token (run with the server's
+JWT_SECRET), answering engine.io pings like a real client. It then publishes
+--messages events to random connected users and --broadcasts events to
+everyone through the Redis backplane, exactly as another worker would, and
+reports connection failures, delivery counts and end-to-end latency
+percentiles. Needs Redis and a running server; no database is used.
+
+The client speaks the engine.io v4 / Socket.IO v5 wire protocol directly
+over the websockets package so one process can hold 10k+ connections.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+import websockets
+from redis.exceptions import RedisError
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.auth import create_access_token
+from app.core.redis_client import get_redis
+from app.websockets.gateway import realtime_gateway, realtime_message
+
+EVENT = "load_test"
+
+
+class Results:
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.latencies: List[float] = []
+
+
+async def client(url: str, user_id: str, results: Results, stop: asyncio.Event):
+    token = create_access_token({"sub": user_id, "role": "tenant"})
+    uri = f"{url.rstrip('/')}/ws/socket.io/?EIO=4&transport=websocket"
+    try:
+        async with websockets.connect(uri, open_timeout=30, max_queue=None) as ws:
+            opened = await ws.recv()
+            if not opened.startswith("0"):
+                raise ConnectionError(f"unexpected open packet {opened[:40]!r}")
+            await ws.send("40" + json.dumps({"token": token}))
+            joined = await ws.recv()
+            if not joined.startswith("40"):
+                results.counts["refused"] += 1
+                return
+            results.counts["connected"] += 1
+            while not stop.is_set():
+                try:
+                    packet = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+                if packet == "2":
+                    await ws.send("3")
+                elif packet.startswith("42"):
+                    event, data = json.loads(packet[2:])[:2]
+                    if event == EVENT:
+                        results.latencies.append(time.time() - data["sent_at"])
+                        results.counts["received"] += 1
+                elif packet.startswith("41"):
+                    results.counts["disconnected"] += 1
+                    return
+    except Exception:
+        results.counts["failed"] += 1
+
+
+async def publish(users: List[str], messages: int, broadcasts: int, rate: int):
+    """Publish from this process through Redis, like another API worker"""
+    loop = asyncio.get_running_loop()
+    batch_size = max(rate // 10, 1)
+    sent = 0
+    while sent < messages:
+        batch = [
+            realtime_message(
+                EVENT, {"sent_at": time.time(), "seq": sent + n}, [random.choice(users)]
+            )
+            for n in range(min(batch_size, messages - sent))
+        ]
+        await loop.run_in_executor(None, realtime_gateway.publish_many, batch)
+        sent += len(batch)
+        await asyncio.sleep(len(batch) / rate)
+    for n in range(broadcasts):
+        message = realtime_message(
+            EVENT, {"sent_at": time.time(), "seq": -n}, audience="all"
+        )
+        await loop.run_in_executor(None, realtime_gateway.publish_many, [message])
+        await asyncio.sleep(1.0)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def run(args) -> Dict:
+    results = Results()
+    stop = asyncio.Event()
+    users = [str(uuid.uuid4()) for _ in range(args.connections)]
+
+    started = time.monotonic()
+    tasks = []
+    for index, user_id in enumerate(users):
+        tasks.append(asyncio.create_task(client(args.url, user_id, results, stop)))
+        if (index + 1) % args.connect_rate == 0:
+            await asyncio.sleep(1.0)
+    # Let the handshakes in flight finish
+    while (
+        sum(results.counts[k] for k in ("connected", "refused", "failed"))
+        < args.connections
+        and time.monotonic() - started < args.connections / args.connect_rate + 30
+    ):
+        await asyncio.sleep(0.5)
+    connect_seconds = time.monotonic() - started
+    print(
+        f"Connected {results.counts['connected']}/{args.connections} "
+        f"in {connect_seconds:.1f}s"
+    )
+
+    await publish(users, args.messages, args.broadcasts, args.publish_rate)
+    await asyncio.sleep(args.hold)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    connected = results.counts["connected"]
+    return {
+        "connected": connected,
+        "refused": results.counts["refused"],
+        "failed": results.counts["failed"],
+        "disconnected_by_server": results.counts["disconnected"],
+        "connect_seconds": round(connect_seconds, 1),
+        # Targets of direct messages may include connections that failed
+        "expected_at_most": args.messages + args.broadcasts * connected,
+        "received": results.counts["received"],
+        "latency_p50_ms": round(percentile(results.latencies, 0.50) * 1000, 1),
+        "latency_p95_ms": round(percentile(results.latencies, 0.95) * 1000, 1),
+        "latency_p99_ms": round(percentile(results.latencies, 0.99) * 1000, 1),
+        "latency_max_ms": round(max(results.latencies, default=0.0) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test realtime push.")
+    parser.add_argument("--url", default="ws://localhost:8000")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument(
+        "--connect-rate", type=int, default=500, help="New connections per second"
+    )
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument(
+        "--publish-rate", type=int, default=2000, help="Direct messages per second"
+    )
+    parser.add_argument("--broadcasts", type=int, default=5)
+    parser.add_argument(
+        "--hold", type=float, default=30.0, help="Seconds to wait for deliveries"
+    )
+    args = parser.parse_args()
+
+    try:
+        get_redis().ping()
+    except (AttributeError, RedisError) as e:
+        # Without the backplane, published messages never leave this process
+        sys.exit(f"Redis is required to publish to the server: {e}")
+    result = asyncio.run(run(args))
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
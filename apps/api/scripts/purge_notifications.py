@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Delete expired notifications.
+
+Usage:
+    python scripts/purge_notifications.py [--batch-size 5000]
+
+Schedule daily (e.g. cron 0 3 * * *). Unread counters are adjusted in the
+same transaction as each batch, and several hosts may run it at once: each
+batch claims rows with FOR UPDATE SKIP LOCKED.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import SessionLocal
+from app.services.notifications import PURGE_BATCH_SIZE, notification_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Purge expired notifications.")
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    try:
+        result = notification_service.purge_expired(db, args.batch_size)
+    finally:
+        db.close()
+    print(
+        f"Deleted {result['deleted']} expired notifications and "
+        f"{result['broadcasts_deleted']} expired broadcasts "
+        f"in {result['duration_seconds']}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rescore every live listing for the ranked feed.
+
+Usage:
+    python scripts/rank_listings.py [--batch-size 500]
+
+Needed once after migration 012 and whenever the ranking weights change;
+day to day, scores are refreshed incrementally by the API workers.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import SessionLocal
+from app.services.ranking import REFRESH_BATCH_SIZE, ranking_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rescore listings.")
+    parser.add_argument("--batch-size", type=int, default=REFRESH_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        scored = ranking_service.refresh_all(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"Rescored {scored} listings.")
+
+
+if __name__ == "__main__":
+    main()
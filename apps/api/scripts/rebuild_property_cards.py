@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rebuild the property_cards read model from the source tables.
+
+Usage:
+    python scripts/rebuild_property_cards.py [--batch-size 1000] [--max-batches N]
+
+Run once after migration 013 to fill the table, and whenever cards may have
+drifted (e.g. after a bulk load with triggers disabled). Only cards that
+differ from their sources are rewritten, so it is safe to schedule nightly.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import SessionLocal
+from app.services.property_cards import REBUILD_BATCH_SIZE, property_card_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild property cards.")
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    try:
+        result = property_card_service.rebuild(
+            db, args.batch_size, max_batches=args.max_batches
+        )
+    finally:
+        db.close()
+    print(
+        f"Checked {result['scanned']} listings and repaired {result['repaired']} "
+        f"cards in {result['duration_seconds']}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
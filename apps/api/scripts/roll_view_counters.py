@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Roll the 7-day view window forward.
+
+Usage:
+    python scripts/roll_view_counters.py [--refresh-only]
+
+Run daily shortly after 00:00 UTC. Recomputes Property.view_count_7d and
+trending_score from the daily buckets and purges buckets that left the
+window, then rescores listings for the ranked feed. --refresh-only skips the
+purge and can run as often as wanted to true up the live counters.
+Idempotent and safe to run from several hosts.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import SessionLocal
+from app.services.ranking import ranking_service
+from app.services.view_counters import view_counter_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Roll property view counters.")
+    parser.add_argument("--refresh-only", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.refresh_only:
+            refreshed = view_counter_service.refresh(db)
+            print(f"Refreshed view counters on {refreshed} properties.")
+        else:
+            result = view_counter_service.roll_forward(db)
+            print(
+                f"Refreshed view counters on {result['refreshed']} properties, "
+                f"purged {result['purged_buckets']} buckets."
+            )
+            rescored = ranking_service.refresh_all(db)
+            print(f"Rescored {rescored} listings.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fingerprint every listing and record near-duplicates.
+
+Usage:
+    python scripts/scan_duplicates.py [--batch-size 500]
+
+Builds the LSH index on first run; afterwards only listings whose text or
+photos changed are fingerprinted again, so re-runs are cheap.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import SessionLocal
+from app.services.duplicates import SCAN_BATCH_SIZE, DuplicateDetectionService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scan listings for duplicates.")
+    parser.add_argument("--batch-size", type=int, default=SCAN_BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    try:
+        result = DuplicateDetectionService().scan(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(
+        f"Checked {result['checked']} listings ({result['unchanged']} unchanged), "
+        f"found {result['duplicates']} duplicate pairs "
+        f"in {result['duration_seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
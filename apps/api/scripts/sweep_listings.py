@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Expire lapsed listings and auto-extend high-traffic ones.
+
+Usage:
+    python scripts/sweep_listings.py [--batch-size 1000]
+
+Schedule every few minutes (e.g. cron */5). Idempotent, and several hosts
+may run it at once: each chunk claims rows with FOR UPDATE SKIP LOCKED.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Make the app package importable when run from apps/api
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import SessionLocal
+from app.services.listing_sweeper import SWEEP_BATCH_SIZE, listing_sweeper
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Expire and extend listings.")
+    parser.add_argument("--batch-size", type=int, default=SWEEP_BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    try:
+        result = listing_sweeper.sweep(db, args.batch_size)
+    finally:
+        db.close()
+    print(
+        f"Expired {result['expired']} and extended {result['extended']} listings "
+        f"in {result['duration_seconds']}s ({result['rows_per_second']} rows/s)."
+    )
+
+
+if __name__ == "__main__":
+    main()
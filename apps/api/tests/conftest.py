@@ -0,0 +1,205 @@
+"""
+Shared fixtures: an in-memory sqlite database built from the real models
+
+The tables come from Base.metadata, so tests run against the columns,
+NOT NULLs, check constraints, foreign keys and unique indexes the services
+rely on. PostgreSQL-only column types are rendered as their nearest sqlite
+type, partial indexes keep their predicates and foreign keys are enforced.
+Arrays, tsvector and trigram operators are covered by compiled-SQL tests
+instead; tests that rely on a migration's triggers install sqlite ones.
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.core.events import subscribe, unsubscribe
+from app.models.base import Base
+from app.models.property import Property, PropertyCard
+from app.models.user import User
+from app.services.property_events import PROPERTY_CHANGED
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid(type_, compiler, **kw):
+    # Same storage as the generic Uuid type: 32 hex characters
+    return "CHAR(32)"
+
+
+@compiles(ARRAY, "sqlite")
+@compiles(TSVECTOR, "sqlite")
+def _compile_text(type_, compiler, **kw):
+    # Left NULL by sqlite tests; array and search SQL is compiled for postgres
+    return "TEXT"
+
+
+# Partial indexes (feed indexes, one pending report per user) keep their
+# predicates, so unique partial indexes reject exactly what they do on
+# PostgreSQL
+for _table in Base.metadata.tables.values():
+    for _index in _table.indexes:
+        _where = _index.dialect_options["postgresql"]["where"]
+        if _where is not None:
+            _index.dialect_options["sqlite"]["where"] = _where
+
+
+def _binary_collation(left, right):
+    return (left > right) - (left < right)
+
+
+@pytest.fixture
+def engine():
+    """In-memory sqlite database with every model table"""
+    engine = create_engine(
+        "sqlite://",
+        # One shared connection, usable from worker threads (streamed bodies)
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys = ON")
+        # geohash is String(collation="C"): byte order
+        dbapi_connection.create_collation("C", _binary_collation)
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """Session over the shared sqlite database"""
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def add_user(engine):
+    """Insert a user row and return its id"""
+
+    def add(role="tenant", **fields):
+        user_id = fields.pop("id", None) or uuid.uuid4()
+        with engine.begin() as conn:
+            conn.execute(
+                User.__table__.insert().values(
+                    id=user_id,
+                    email=f"{user_id.hex}@example.com",
+                    password_hash="x",
+                    role=role,
+                    **fields,
+                )
+            )
+        return user_id
+
+    return add
+
+
+@pytest.fixture
+def add_listing(engine, add_user):
+    """Insert a live properties row and return its id
+
+    Unless given, the listing belongs to a new agent and expires in a
+    week of the real clock; naive datetimes, as sqlite stores them.
+    """
+
+    def add(**fields):
+        values = {
+            "id": uuid.uuid4(),
+            "title": "3 bedroom flat",
+            "property_type": "apartment",
+            "price_monthly": 150000,
+            "state": "Lagos",
+            "lga": "Ikeja",
+            "is_active": True,
+            "expires_at": datetime.now() + timedelta(days=7),
+            "view_count_7d": 0,
+            "view_count_total": 0,
+            "trending_score": 0,
+            "rank_score": 0,
+            **fields,
+        }
+        if "agent_id" not in values:
+            values["agent_id"] = add_user("agent")
+        with engine.begin() as conn:
+            conn.execute(Property.__table__.insert().values(**values))
+        return values["id"]
+
+    return add
+
+
+@pytest.fixture
+def add_card(engine, add_listing):
+    """Insert a listing and its property_cards row; returns the id
+
+    Listing fields go to both rows, as the migration 013 triggers copy
+    them; card-only fields (badge, reviews, counters) to the card alone.
+    """
+    properties, cards = Property.__table__, PropertyCard.__table__
+
+    def add(**fields):
+        property_id = add_listing(
+            **{key: value for key, value in fields.items() if key in properties.c}
+        )
+        with engine.begin() as conn:
+            listing = conn.execute(
+                select(properties).where(properties.c.id == property_id)
+            ).one()
+            conn.execute(
+                cards.insert().values(
+                    **{
+                        column.key: getattr(listing, column.key)
+                        for column in cards.c
+                        if column.key in properties.c
+                    },
+                    **{
+                        key: value
+                        for key, value in fields.items()
+                        if key not in properties.c
+                    },
+                )
+            )
+        return property_id
+
+    return add
+
+
+@pytest.fixture
+def subscribed():
+    """Collect what is published on an event topic while the test runs"""
+    handlers = []
+
+    def collect(topic):
+        received = []
+
+        def handler(changes=()):
+            received.extend(changes)
+
+        subscribe(topic, handler)
+        handlers.append((topic, handler))
+        return received
+
+    yield collect
+    for topic, handler in handlers:
+        unsubscribe(topic, handler)
+
+
+@pytest.fixture
+def published(subscribed):
+    """Listing changes published on PROPERTY_CHANGED"""
+    return subscribed(PROPERTY_CHANGED)
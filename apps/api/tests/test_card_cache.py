@@ -0,0 +1,124 @@
+"""
+Tests for pre-encoded property card fragments
+"""
+
+import sys
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+from app.schemas.property import PropertyFeedResponse
+from app.services.card_cache import CardFragmentCache, splice_page
+
+VersionRow = namedtuple("VersionRow", "id refreshed_at")
+UPDATED = datetime(2024, 6, 1, tzinfo=timezone.utc)
+AGENT = uuid.uuid4()
+BADGE = {
+    "verification_status": "verified",
+    "credibility_score": 80,
+    "verification_badge_visible": True,
+}
+
+
+def make_card(row, title="2 bed flat"):
+    return {
+        "id": row.id,
+        "agent_id": AGENT,
+        "title": title,
+        "property_type": "apartment",
+        "bedrooms": 2,
+        "bathrooms": 1,
+        "price_monthly": 25000000,
+        "state": "Lagos",
+        "lga": "Ikeja",
+        "latitude": 6.6,
+        "longitude": 3.35,
+        "cover_url": "https://cdn.example.com/1.jpg",
+        "view_count_7d": 5,
+        "view_count_total": 50,
+        "expires_at": UPDATED + timedelta(days=30),
+        "created_at": UPDATED,
+        "agent_badge": BADGE,
+        "agent_business_name": "Lekki Homes",
+        "review_count": 3,
+        "review_avg": 4.67,
+        "flick_count": 2,
+        "clip_count": 1,
+        "share_count": 0,
+    }
+
+
+class Loader:
+    """Stands in for the feed service's card query"""
+
+    def __init__(self, rows):
+        self.rows = {row.id: row for row in rows}
+        self.calls = []
+
+    def __call__(self, property_ids):
+        self.calls.append(list(property_ids))
+        return [(self.rows[i], make_card(self.rows[i])) for i in property_ids]
+
+
+def make_rows(n):
+    return [VersionRow(uuid.uuid4(), UPDATED) for _ in range(n)]
+
+
+def test_spliced_page_matches_serialized_response():
+    """Joining fragments yields the same bytes as serializing the page"""
+    rows = make_rows(3)
+    loader = Loader(rows)
+    fragments = CardFragmentCache().render(rows, loader)
+    spliced = splice_page(fragments, True, "abc")
+
+    expected = PropertyFeedResponse(
+        items=[make_card(row) for row in rows],
+        count=3,
+        has_more=True,
+        next_cursor="abc",
+    ).model_dump_json()
+    assert spliced == expected.encode("utf-8")
+    assert splice_page([], False, None) == (
+        PropertyFeedResponse(count=0, has_more=False).model_dump_json().encode()
+    )
+
+
+def test_current_fragments_are_reused():
+    """Only listings without a fragment are loaded on the second page"""
+    rows = make_rows(4)
+    loader = Loader(rows)
+    cache = CardFragmentCache()
+
+    first = cache.render(rows[:2], loader)
+    second = cache.render(rows, loader)
+    assert second[:2] == first
+    assert loader.calls == [[rows[0].id, rows[1].id], [rows[2].id, rows[3].id]]
+
+
+def test_refreshed_at_versions_the_card():
+    """Any read-model write (new refreshed_at) reloads the card"""
+    rows = make_rows(1)
+    cache = CardFragmentCache()
+    cache.render(rows, Loader(rows))
+
+    unchanged = Loader(rows)
+    cache.render(rows, unchanged)
+    changed_row = rows[0]._replace(refreshed_at=UPDATED + timedelta(seconds=1))
+    changed = Loader([changed_row])
+    cache.render([changed_row], changed)
+    assert unchanged.calls == []
+    assert changed.calls == [[changed_row.id]]
+
+
+def test_rows_that_vanish_before_loading_are_skipped():
+    """A listing deleted between the page and card queries is left out"""
+    rows = make_rows(2)
+    fragments = CardFragmentCache().render(
+        rows, lambda ids: [(rows[1], make_card(rows[1]))]
+    )
+    assert len(fragments) == 1
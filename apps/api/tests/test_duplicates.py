@@ -0,0 +1,183 @@
+"""
+Tests for near-duplicate listing detection
+"""
+
+import io
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from botocore.exceptions import ClientError
+from PIL import Image, ImageDraw
+from sqlalchemy import select
+
+from app.core.images import dhash
+from app.models.property import Property, PropertyDuplicate
+from app.services.duplicates import (
+    IMAGE_BAND_OFFSET,
+    DuplicateDetectionService,
+    hamming,
+    image_bands,
+    minhash,
+    normalize_text,
+    shingles,
+    similarity,
+    text_bands,
+)
+
+DESCRIPTION = (
+    "Newly built 3 bedroom flat with a fitted kitchen, prepaid meter, "
+    "borehole water and a large compound with parking for two cars."
+)
+
+
+def _signature(text):
+    return minhash(shingles(normalize_text(text)))
+
+
+def _photo(shift=0, scale=1, quality=90):
+    image = Image.new("RGB", (400, 300), (90, 90, 90))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40 + shift, 60, 180 + shift, 240), fill=(230, 230, 220))
+    draw.ellipse((250, 40, 370, 160), fill=(30, 60, 160))
+    image = image.resize((400 * scale, 300 * scale))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+class FakeBucket:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+
+@pytest.fixture
+def listing(add_listing):
+    """Add a listing with the given text, age_days older than the newest"""
+
+    def add(title, description=DESCRIPTION, age_days=0):
+        return add_listing(
+            title=title,
+            description=description,
+            address="12 Admiralty Way, Lekki",
+            created_at=datetime(2024, 3, 10) - timedelta(days=age_days),
+        )
+
+    return add
+
+
+def test_minhash_estimates_similarity():
+    reworded = DESCRIPTION.replace("3 bedroom flat", "3 Bedroom Apartment!")
+    unrelated = "Shop space to let on a busy road in Wuse 2, suitable for a pharmacy."
+
+    assert similarity(_signature(DESCRIPTION), _signature(reworded)) >= 0.8
+    assert similarity(_signature(DESCRIPTION), _signature(unrelated)) < 0.3
+    assert similarity(_signature(""), _signature("")) == 0.0
+
+
+def test_similar_text_shares_an_lsh_bucket():
+    reworded = DESCRIPTION.replace("two cars", "2 cars")
+    unrelated = "Shop space to let on a busy road in Wuse 2, suitable for a pharmacy."
+
+    original = set(text_bands(_signature(DESCRIPTION)))
+    assert original & set(text_bands(_signature(reworded)))
+    assert not original & set(text_bands(_signature(unrelated)))
+
+
+def test_photo_hash_survives_resizing_and_recompression():
+    original = dhash(_photo())
+    assert hamming(original, dhash(_photo(scale=2, quality=40))) <= 3
+    assert hamming(original, dhash(_photo(shift=120))) > 5
+    # Close hashes always share a chunk band
+    assert image_bands([original]) & image_bands([original ^ 0b101])
+    assert all(band >= IMAGE_BAND_OFFSET for band, _ in image_bands([original]))
+
+
+def test_check_records_newer_listing_as_duplicate(db, listing):
+    original = listing("3 bedroom flat in Lekki", age_days=5)
+    repost = listing("3 Bedroom Flat, Lekki!!")
+    other = listing(
+        "Office space in Wuse 2",
+        description="Open-plan office floor with a generator and lift access.",
+    )
+    service = DuplicateDetectionService(client_factory=lambda: FakeBucket({}))
+
+    assert service.check(db, [original, other])["duplicates"] == 0
+    assert service.check(db, [repost])["duplicates"] == 1
+
+    rows = db.execute(select(PropertyDuplicate.__table__)).all()
+    assert [(row.property_id, row.duplicate_of) for row in rows] == [(repost, original)]
+    assert rows[0].text_similarity >= 0.8
+    assert rows[0].image_distance is None
+    assert rows[0].status == "pending"
+
+
+def test_check_skips_unchanged_listings(db, listing):
+    property_id = listing("3 bedroom flat in Lekki")
+    service = DuplicateDetectionService(client_factory=lambda: FakeBucket({}))
+
+    assert service.check(db, [property_id])["checked"] == 1
+    assert service.check(db, [property_id]) == {
+        "checked": 0,
+        "unchanged": 1,
+        "duplicates": 0,
+    }
+
+    db.execute(
+        Property.__table__.update()
+        .where(Property.id == property_id)
+        .values(title="3 bedroom duplex in Ajah")
+    )
+    db.commit()
+    assert service.check(db, [property_id])["checked"] == 1
+
+
+def test_same_photo_with_new_text_is_a_duplicate(db, listing, monkeypatch):
+    original = listing("3 bedroom flat in Lekki", age_days=2)
+    repost = listing(
+        "Lovely home",
+        description="Call now to inspect this lovely home, no agency fee.",
+    )
+    photos = {original: dhash(_photo()), repost: dhash(_photo(scale=2, quality=40))}
+    service = DuplicateDetectionService(client_factory=lambda: FakeBucket({}))
+    monkeypatch.setattr(
+        service, "_image_keys", staticmethod(lambda media_urls: ["photo.jpg"])
+    )
+    checking = []
+    monkeypatch.setattr(
+        service, "image_hashes", lambda keys: ([photos[checking[-1]]], True)
+    )
+
+    for property_id in (original, repost):
+        checking.append(property_id)
+        service.check(db, [property_id])
+
+    row = db.execute(select(PropertyDuplicate.__table__)).one()
+    assert (row.property_id, row.duplicate_of) == (repost, original)
+    assert row.text_similarity < 0.8
+    assert row.image_distance <= 3
+
+
+def test_image_hashes_prefer_thumbnails_and_report_failures():
+    key = "properties/a1/photo.jpg"
+    bucket = FakeBucket(
+        {f"derivatives/{key}/320.jpg": _photo(), "properties/a1/other.jpg": _photo()}
+    )
+    service = DuplicateDetectionService(client_factory=lambda: bucket)
+
+    hashes, complete = service.image_hashes([key, "properties/a1/other.jpg"])
+    assert hashes == [dhash(_photo()), dhash(_photo())]
+    assert complete
+
+    hashes, complete = service.image_hashes(["properties/a1/missing.jpg"])
+    assert hashes == [] and not complete
@@ -0,0 +1,119 @@
+"""
+Tests for idempotent flicks/clips and the batch engagement lookup
+"""
+
+import sys
+import uuid
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import event, text
+
+from app.services.engagement import EngagementService
+from app.services.property_events import PROPERTY_ENGAGEMENT_CHANGED
+
+USER_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def store(engine, add_user):
+    """The user, with sqlite triggers playing the migration 013 counters"""
+    add_user(id=USER_ID)
+    with engine.begin() as conn:
+        for table, counter in (
+            ("property_flicks", "flick_count"),
+            ("property_clips", "clip_count"),
+        ):
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER {table}_ins AFTER INSERT ON {table} BEGIN "
+                    f"UPDATE property_cards SET {counter} = {counter} + 1 "
+                    f"WHERE id = NEW.property_id; END"
+                )
+            )
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER {table}_del AFTER DELETE ON {table} BEGIN "
+                    f"UPDATE property_cards SET {counter} = {counter} - 1 "
+                    f"WHERE id = OLD.property_id; END"
+                )
+            )
+
+
+@pytest.fixture
+def published(subscribed):
+    return subscribed(PROPERTY_ENGAGEMENT_CHANGED)
+
+
+def test_repeated_flicks_count_once(store, db, add_card, published):
+    property_id = add_card()
+    service = EngagementService()
+
+    first = service.set_engagement(db, "flick", property_id, USER_ID, True)
+    again = service.set_engagement(db, "flick", property_id, USER_ID, True)
+    assert (first["changed"], first["count"]) == (True, 1)
+    assert (again["changed"], again["count"]) == (False, 1)
+
+    undone = service.set_engagement(db, "flick", property_id, USER_ID, False)
+    undone_again = service.set_engagement(db, "flick", property_id, USER_ID, False)
+    assert (undone["changed"], undone["count"]) == (True, 0)
+    assert (undone_again["changed"], undone_again["count"]) == (False, 0)
+
+    # Only real changes are published
+    assert [change["id"] for change in published] == [property_id, property_id]
+    assert published[0]["state"] == "Lagos"
+
+
+def test_flick_and_clip_are_independent(store, db, add_card, add_user):
+    property_id = add_card()
+    service = EngagementService()
+
+    service.set_engagement(db, "clip", property_id, USER_ID, True)
+    result = service.set_engagement(db, "flick", property_id, add_user(), True)
+
+    assert result["count"] == 1
+    assert service.engagement_states(db, USER_ID, [property_id]) == [
+        {"property_id": property_id, "flicked": False, "clipped": True}
+    ]
+
+
+def test_unknown_listing_is_not_found(store, db):
+    service = EngagementService()
+
+    for active in (True, False):
+        with pytest.raises(LookupError):
+            service.set_engagement(db, "flick", uuid.uuid4(), USER_ID, active)
+
+
+def test_engagement_states_for_a_page_in_one_query(
+    store, engine, db, add_card, add_user
+):
+    ids = [add_card() for _ in range(4)]
+    service = EngagementService()
+    service.set_engagement(db, "flick", ids[0], USER_ID, True)
+    service.set_engagement(db, "clip", ids[0], USER_ID, True)
+    service.set_engagement(db, "clip", ids[2], USER_ID, True)
+    service.set_engagement(db, "flick", ids[3], add_user(), True)
+
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    states = service.engagement_states(db, USER_ID, list(reversed(ids)))
+
+    assert len(statements) == 1
+    assert [
+        (state["property_id"], state["flicked"], state["clipped"]) for state in states
+    ] == [
+        (ids[3], False, False),
+        (ids[2], False, True),
+        (ids[1], False, False),
+        (ids[0], True, True),
+    ]
+    assert service.engagement_states(db, USER_ID, []) == []
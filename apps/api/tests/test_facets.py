@@ -0,0 +1,133 @@
+"""
+Tests for single-pass feed facet counts
+"""
+
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+from sqlalchemy.dialects import postgresql
+
+from app.schemas.property import FeedFacets, PropertyFeedResponse
+from app.services.card_cache import splice_page
+from app.services.facets import FacetService, filter_signature
+
+FacetRow = namedtuple(
+    "FacetRow",
+    "property_type bedrooms price_band lga grouping property_type_count "
+    "bedrooms_count price_band_count lga_count total_count",
+)
+
+
+def _row(grouping, facet=None, value=None, count=0):
+    """One GROUPING SETS result row with a value and count for one facet"""
+    fields = dict.fromkeys(FacetRow._fields, 0)
+    fields.update(property_type=None, bedrooms=None, price_band=None, lga=None)
+    fields["grouping"] = grouping
+    if facet == "total":
+        fields["total_count"] = count
+    elif facet is not None:
+        fields[facet] = value
+        fields[f"{facet}_count"] = count
+    return FacetRow(**fields)
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_all_facets_come_from_one_grouping_sets_query():
+    """One statement over property_cards; each facet skips its own filter"""
+    sql = _compile(
+        FacetService().facet_statement(
+            state="Lagos", property_type="apartment", min_bedrooms=2, max_price=100
+        )
+    )
+    assert sql.count("SELECT") == 2
+    assert "FROM property_cards" in sql and "properties." not in sql
+    assert "GROUP BY GROUPING SETS((anon_1.property_type), (anon_1.bedrooms)" in sql
+    assert ", ())" in sql
+
+    counts = {
+        line.split(" AS ")[-1].strip(", "): line
+        for line in sql.split("\n")[0].split("count(*)")[1:]
+    }
+    assert "property_type_ok" not in counts["property_type_count"]
+    assert "bedrooms_ok" in counts["property_type_count"]
+    assert "bedrooms_ok" not in counts["bedrooms_count"]
+    assert "price_ok" not in counts["price_band_count"]
+    assert all(
+        flag in counts["total_count"]
+        for flag in ("property_type_ok", "bedrooms_ok", "price_ok")
+    )
+
+
+def test_unfiltered_facets_use_plain_counts():
+    sql = _compile(FacetService().facet_statement(state="Lagos"))
+    assert "FILTER" not in sql
+    assert "property_cards.state = %(state_1)s" in sql
+
+
+def test_fold_groups_rows_by_grouping_set():
+    """GROUPING() bitmasks route each row to its facet"""
+    facets = FacetService.fold(
+        [
+            _row(0b0111, "property_type", "apartment", 7),
+            _row(0b0111, "property_type", "house", 9),
+            _row(0b1011, "bedrooms", 2, 4),
+            _row(0b1011, "bedrooms", 5, 1),
+            _row(0b1011, "bedrooms", None, 3),
+            _row(0b1101, "price_band", "1m_plus", 2),
+            _row(0b1101, "price_band", "under_100k", 5),
+            _row(0b1110, "lga", "Ikeja", 3),
+            _row(0b1110, "lga", "Surulere", 0),
+            _row(0b1111, "total", count=6),
+        ]
+    )
+    FeedFacets(**facets)
+    assert facets["total"] == 6
+    assert [f["value"] for f in facets["property_type"]] == ["house", "apartment"]
+    assert facets["bedrooms"] == [
+        {"value": "2", "count": 4},
+        {"value": "5+", "count": 1},
+    ]
+    assert facets["price_band"] == [
+        {"value": "under_100k", "count": 5, "min_price": 0, "max_price": 9999999},
+        {"value": "1m_plus", "count": 2, "min_price": 100000000, "max_price": None},
+    ]
+    assert facets["lga"] == [{"value": "Ikeja", "count": 3}]
+
+
+class CountingSession:
+    def __init__(self):
+        self.executed = 0
+
+    def execute(self, statement):
+        self.executed += 1
+        return self
+
+    def all(self):
+        return [_row(0b1111, "total", count=0)]
+
+
+def test_facets_are_cached_per_state_and_filters():
+    service, db = FacetService(ttl_seconds=30), CountingSession()
+    service.get_facets(db, state="Lagos", lga=None)
+    service.get_facets(db, state="Lagos")
+    service.get_facets(db, state="Lagos", min_price=100)
+    assert db.executed == 2
+    assert filter_signature(state="Lagos", lga=None) == filter_signature(state="Lagos")
+
+
+def test_spliced_page_embeds_facets_like_the_schema():
+    facets = FacetService.fold(
+        [_row(0b1110, "lga", "Ọbalende", 2), _row(0b1111, "total", count=2)]
+    )
+    expected = PropertyFeedResponse(
+        count=0, has_more=False, facets=facets
+    ).model_dump_json()
+    assert splice_page([], False, None, facets) == expected.encode("utf-8")
@@ -0,0 +1,212 @@
+"""
+Tests for listing photo derivatives
+"""
+
+import hashlib
+import io
+import json
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from botocore.exceptions import ClientError
+from PIL import Image
+
+from app.core.images import render_derivatives
+from app.services.image_derivatives import (
+    DERIVATIVE_WIDTHS,
+    ImageDerivativeService,
+    derivative_key,
+    manifest_key,
+)
+
+SOURCE = "properties/a1/photo.jpg"
+
+
+def _jpeg(width=1600, height=1200, orientation=None):
+    image = Image.new("RGB", (width, height), (200, 120, 40))
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"  # Make
+    if orientation is not None:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class FakeBucket:
+    """Stand-in for a MinIO bucket keeping objects in a dict"""
+
+    def __init__(self):
+        self.objects = {}
+        self.copies = 0
+        self.downloads = []
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        body = self.objects[Key]
+        return {
+            "ETag": f'"{hashlib.md5(body).hexdigest()}"',
+            "ContentLength": len(body),
+        }
+
+    def get_object(self, Bucket, Key):
+        self.downloads.append(Key)
+        return {**self.head_object(Bucket, Key), "Body": io.BytesIO(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def copy_object(self, Bucket, Key, CopySource):
+        self.copies += 1
+        self.objects[Key] = self.objects[CopySource["Key"]]
+
+
+class InlinePool:
+    """Runs submitted work immediately and counts it"""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, func, *args):
+        self.submitted += 1
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+@pytest.fixture
+def service():
+    bucket, pool = FakeBucket(), InlinePool()
+    derivatives = ImageDerivativeService(
+        bucket="reent", client_factory=lambda: bucket, process_pool_factory=lambda: pool
+    )
+    yield derivatives, bucket, pool
+    derivatives.shutdown()
+
+
+def test_render_resizes_rotates_and_strips_metadata():
+    # Orientation 6: stored landscape, displayed portrait
+    rendered = render_derivatives(_jpeg(1600, 1200, orientation=6), (320, 2000))
+
+    assert set(rendered) == {(320, "webp"), (320, "jpg"), (2000, "webp"), (2000, "jpg")}
+    with Image.open(io.BytesIO(rendered[(320, "jpg")])) as thumb:
+        assert thumb.size == (320, 427)
+        assert len(thumb.getexif()) == 0
+    with Image.open(io.BytesIO(rendered[(2000, "webp")])) as full:
+        # Never upscaled
+        assert full.size == (1200, 1600)
+        assert full.format == "WEBP"
+
+
+def test_process_renders_once_then_skips_by_hash(service):
+    derivatives, bucket, pool = service
+    bucket.objects[SOURCE] = _jpeg()
+
+    assert derivatives.process(SOURCE) == "rendered"
+    for width in DERIVATIVE_WIDTHS:
+        assert derivative_key(SOURCE, width, "webp") in bucket.objects
+        assert derivative_key(SOURCE, width, "jpg") in bucket.objects
+    assert json.loads(bucket.objects[manifest_key(SOURCE)])["widths"] == list(
+        DERIVATIVE_WIDTHS
+    )
+
+    # A fresh process (empty in-memory cache) still skips via the manifest
+    again = ImageDerivativeService(
+        bucket="reent",
+        client_factory=lambda: bucket,
+        process_pool_factory=lambda: pool,
+    )
+    assert again.process(SOURCE) == "skipped"
+    assert pool.submitted == 1
+    # Recognised by ETag and size alone; the original is not downloaded again
+    assert bucket.downloads.count(SOURCE) == 1
+
+
+def test_changed_source_is_downloaded_and_rendered_again(service):
+    derivatives, bucket, pool = service
+    bucket.objects[SOURCE] = _jpeg()
+    derivatives.process(SOURCE)
+
+    # Replaced under the same key: the ETag no longer matches the manifest
+    bucket.objects[SOURCE] = _jpeg(800, 600)
+    again = ImageDerivativeService(
+        bucket="reent",
+        client_factory=lambda: bucket,
+        process_pool_factory=lambda: pool,
+    )
+    assert again.process(SOURCE) == "rendered"
+    assert pool.submitted == 2
+    manifest = json.loads(bucket.objects[manifest_key(SOURCE)])
+    assert manifest["source"] == {
+        "etag": bucket.head_object("reent", SOURCE)["ETag"],
+        "size": len(bucket.objects[SOURCE]),
+    }
+
+
+def test_manifest_without_etag_is_upgraded_on_hash_match(service):
+    derivatives, bucket, pool = service
+    bucket.objects[SOURCE] = _jpeg()
+    derivatives.process(SOURCE)
+    manifest = json.loads(bucket.objects[manifest_key(SOURCE)])
+    del manifest["source"]
+    bucket.objects[manifest_key(SOURCE)] = json.dumps(manifest).encode("utf-8")
+
+    def fresh():
+        return ImageDerivativeService(
+            bucket="reent",
+            client_factory=lambda: bucket,
+            process_pool_factory=lambda: pool,
+        )
+
+    assert fresh().process(SOURCE) == "skipped"
+    assert fresh().process(SOURCE) == "skipped"
+    assert pool.submitted == 1
+    # Hashed once to confirm the old manifest, then skipped by HEAD
+    assert bucket.downloads.count(SOURCE) == 2
+
+
+def test_identical_photo_elsewhere_is_copied(service):
+    derivatives, bucket, pool = service
+    other = "properties/b2/same-photo.jpg"
+    bucket.objects[SOURCE] = bucket.objects[other] = _jpeg()
+
+    derivatives.process(SOURCE)
+    assert derivatives.process(other) == "copied"
+    assert pool.submitted == 1
+    assert bucket.copies == len(DERIVATIVE_WIDTHS) * 2
+    assert (
+        bucket.objects[derivative_key(other, 320, "webp")]
+        == bucket.objects[derivative_key(SOURCE, 320, "webp")]
+    )
+
+
+def test_process_many_counts_and_ignores_videos(service):
+    derivatives, bucket, _ = service
+    bucket.objects[SOURCE] = _jpeg()
+    counts = derivatives.process_many(
+        [SOURCE, SOURCE, "properties/a1/tour.mp4", "properties/a1/missing.jpg"]
+    )
+    assert counts == {"rendered": 1, "unsupported": 1, "failed": 1}
+
+
+def test_render_runs_in_a_real_process_pool():
+    """render_derivatives must be importable and picklable by spawned workers"""
+    bucket = FakeBucket()
+    bucket.objects[SOURCE] = _jpeg(400, 300)
+    derivatives = ImageDerivativeService(
+        bucket="reent", client_factory=lambda: bucket, workers=1
+    )
+    try:
+        assert derivatives.process(SOURCE) == "rendered"
+    finally:
+        derivatives.shutdown()
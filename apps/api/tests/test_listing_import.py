@@ -0,0 +1,182 @@
+"""
+Tests for the streaming bulk listing import
+"""
+
+import io
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.geohash import encode as encode_geohash
+from app.models.property import Property
+from app.services.listing_import import (
+    LISTING_TTL,
+    ListingImportService,
+    detect_format,
+    iter_records,
+)
+
+# sqlite stores naive datetimes, so the import clock is naive here too
+NOW = datetime(2024, 3, 10, 12, 0)
+AGENT_ID = uuid.uuid4()
+HEADER = "title,property_type,price_monthly,state,lga,bedrooms,latitude,longitude"
+
+
+@pytest.fixture
+def store(engine):
+    """The shared database, with a trigger rejecting one title"""
+    with engine.begin() as conn:
+        # Stands in for any constraint the database enforces beyond validation
+        conn.execute(
+            text(
+                "CREATE TRIGGER properties_reject BEFORE INSERT ON properties "
+                "WHEN NEW.title = 'Rejected by the database' "
+                "BEGIN SELECT RAISE(ABORT, 'rejected by a constraint'); END"
+            )
+        )
+    return engine
+
+
+def _csv(*rows):
+    return io.BytesIO("\n".join((HEADER,) + rows).encode("utf-8"))
+
+
+def _import(engine, stream, fmt="csv", **kwargs):
+    service = ListingImportService(clock=lambda: NOW)
+    return service.import_listings(
+        sessionmaker(bind=engine)(), AGENT_ID, stream, fmt, **kwargs
+    )
+
+
+def _rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(Property.__table__).order_by(Property.title)).all()
+
+
+def test_csv_import_inserts_in_batches_and_publishes(store, published):
+    """Valid rows land in chunks with geohash and default expiry set"""
+    engine = store
+    rows = [
+        f"Flat {index:02d},apartment,{15000000 + index},Lagos,Yaba,2,6.5,3.37"
+        for index in range(25)
+    ]
+    progress = []
+    result = _import(engine, _csv(*rows), batch_size=10, progress=progress.append)
+
+    assert result["rows_read"] == 25
+    assert result["inserted"] == 25
+    assert result["failed"] == 0
+    assert result["batches"] == 3
+    assert [totals["inserted"] for totals in progress] == [10, 20, 25]
+    assert len(published) == 25
+    assert {change["change"] for change in published} == {"created"}
+
+    stored = _rows(engine)
+    assert len(stored) == 25
+    first = stored[0]
+    assert first.agent_id == AGENT_ID
+    assert first.is_active
+    assert first.expires_at == NOW + LISTING_TTL
+    assert first.geohash == encode_geohash(6.5, 3.37)
+
+
+def test_invalid_rows_are_reported_and_skipped(store):
+    """Each rejected row is reported by number; the rest are imported"""
+    engine = store
+    result = _import(
+        engine,
+        _csv(
+            "Good flat,apartment,15000000,Lagos,Yaba,2,,",
+            "Castle,castle,15000000,Lagos,Yaba,2,,",
+            "Free flat,apartment,0,Lagos,Yaba,2,,",
+            "Half located,house,20000000,Lagos,Ikeja,3,6.5,",
+            "Rejected by the database,studio,9000000,Lagos,Yaba,1,,",
+            "Another flat,studio,9000000,Lagos,Yaba,1,,",
+        ),
+    )
+
+    assert result["inserted"] == 2
+    assert result["failed"] == 4
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4, 5]
+    assert "property_type" in result["errors"][0]["errors"][0]
+    assert result["errors"][1]["errors"][0].startswith("price_monthly")
+    assert "rejected by a constraint" in result["errors"][3]["errors"][0]
+    assert [row.title for row in _rows(engine)] == [
+        "Another flat",
+        "Good flat",
+    ]
+
+
+def test_ndjson_import(store):
+    """NDJSON lines are numbered by line and may carry media lists"""
+    engine = store
+    lines = [
+        json.dumps(
+            {
+                "title": "Duplex",
+                "property_type": "house",
+                "price_monthly": 50000000,
+                "state": "Abuja",
+                "lga": "Gwarinpa",
+                "expires_at": (NOW + timedelta(days=30)).isoformat(),
+            }
+        ),
+        "",
+        "{not json",
+        "[1, 2]",
+    ]
+    result = _import(engine, io.BytesIO("\n".join(lines).encode()), fmt="ndjson")
+
+    assert result["inserted"] == 1
+    assert [error["row"] for error in result["errors"]] == [3, 4]
+    assert _rows(engine)[0].expires_at == NOW + timedelta(days=30)
+
+
+def test_import_stops_at_max_rows(store):
+    engine = store
+    rows = [f"Flat {index},apartment,15000000,Lagos,Yaba,2,," for index in range(5)]
+    result = _import(engine, _csv(*rows), max_rows=3)
+
+    assert result["inserted"] == 3
+    assert result["errors"] == [
+        {"row": 4, "errors": ["Import limit of 3 rows reached"]}
+    ]
+
+
+def test_csv_without_required_columns_is_rejected(store):
+    engine = store
+    with pytest.raises(ValueError, match="price_monthly"):
+        _import(engine, io.BytesIO(b"title,property_type,state,lga\nA,house,B,C\n"))
+
+
+def test_records_are_streamed_and_media_split():
+    """CSV empties are dropped and media_urls splits on |"""
+    stream = io.BytesIO(
+        "﻿title,property_type,price_monthly,state,lga,media_urls\n"
+        "Flat,apartment,100,Lagos,Yaba,https://a/1.jpg|https://a/2.jpg\n"
+        "Flat,apartment,100,Lagos,,\n".encode("utf-8")
+    )
+    records = list(iter_records(stream, "csv"))
+
+    assert records[0][0] == 1
+    assert records[0][1]["media_urls"] == "https://a/1.jpg|https://a/2.jpg"
+    assert "lga" not in records[1][1]
+    assert not stream.closed
+
+
+def test_detect_format():
+    assert detect_format("listings.CSV") == "csv"
+    assert detect_format("listings.jsonl") == "ndjson"
+    assert detect_format("listings.txt", "ndjson") == "ndjson"
+    with pytest.raises(ValueError):
+        detect_format("listings.xlsx")
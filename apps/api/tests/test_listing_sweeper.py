@@ -0,0 +1,95 @@
+"""
+Tests for the set-based listing expiry and auto-extend sweeper
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.engagement import Notification, NotificationCounter, PlatformMetric
+from app.models.property import Property
+from app.services.listing_sweeper import LISTING_EXTENSION, ListingSweeper
+
+# sqlite stores naive datetimes, so the sweeper clock is naive here too
+NOW = datetime(2024, 3, 10, 12, 0)
+
+
+@pytest.fixture
+def listing(add_listing):
+    """Add a listing expiring relative to NOW; returns its id"""
+
+    def add(expires_in: timedelta, views: int = 0, active: bool = True):
+        return add_listing(
+            title="2 bedroom flat in Yaba",
+            lga="Yaba",
+            is_active=active,
+            expires_at=NOW + expires_in,
+            view_count_7d=views,
+        )
+
+    return add
+
+
+def _listings(db):
+    return {row.id: row for row in db.execute(select(Property.__table__))}
+
+
+def test_sweep_expires_and_extends_in_chunks(db, listing, published):
+    """Expired listings are deactivated, hot ones renewed, cold ones untouched"""
+    expired = [listing(-timedelta(hours=hours)) for hours in range(1, 6)]
+    hot = listing(timedelta(hours=2), views=50)
+    cold = listing(timedelta(hours=2), views=3)
+    hot_but_lapsed = listing(-timedelta(minutes=5), views=50)
+
+    result = ListingSweeper(clock=lambda: NOW).sweep(db, batch_size=2)
+
+    assert result["expired"] == 6
+    assert result["extended"] == 1
+    rows = _listings(db)
+    assert not any(rows[property_id].is_active for property_id in expired)
+    assert not rows[hot_but_lapsed].is_active
+    assert rows[hot].expires_at == NOW + LISTING_EXTENSION
+    assert rows[cold].is_active
+    assert rows[cold].expires_at == NOW + timedelta(hours=2)
+    assert len(published) == 7
+
+
+def test_sweep_notifies_agents_and_is_idempotent(db, listing):
+    """One property_expired notification per listing; a re-run does nothing"""
+    for _ in range(3):
+        listing(-timedelta(days=1))
+    agents = [row.agent_id for row in _listings(db).values()]
+    sweeper = ListingSweeper(clock=lambda: NOW)
+
+    sweeper.sweep(db, batch_size=10)
+    again = sweeper.sweep(db, batch_size=10)
+
+    assert again["expired"] == 0
+    notifications = db.execute(select(Notification.__table__)).all()
+    metrics = db.execute(select(PlatformMetric.__table__)).all()
+    counters = db.execute(select(NotificationCounter.__table__)).all()
+    assert sorted(n.user_id for n in notifications) == sorted(agents)
+    assert sorted((c.user_id, c.unread_count) for c in counters) == sorted(
+        (agent_id, 1) for agent_id in agents
+    )
+    assert {n.type for n in notifications} == {"property_expired"}
+    assert [(m.metric_type, int(m.metric_value)) for m in metrics] == [
+        ("listings_expired", 3)
+    ]
+
+
+def test_claim_uses_skip_locked_on_postgres():
+    """Concurrent sweepers split rows instead of waiting on each other"""
+    sweeper = ListingSweeper(clock=lambda: NOW)
+    sql = str(sweeper._expire_statement(NOW, 100).compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING" in sql
+    assert "WHERE properties.is_active AND" in sql
@@ -0,0 +1,144 @@
+"""
+Tests for the hierarchical grid cluster engine
+"""
+
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+from app.services import map_clusters
+from app.services.map_clusters import ClusterEngine, project
+
+
+def _tile_for(latitude, longitude, z):
+    x, y = project(latitude, longitude)
+    return z, int(x * (1 << z)), int(y * (1 << z))
+
+
+def _lagos_engine(count=500, seed=3):
+    rng = random.Random(seed)
+    engine = ClusterEngine()
+    points = {}
+    for _ in range(count):
+        property_id = uuid.uuid4()
+        points[property_id] = (rng.uniform(6.40, 6.65), rng.uniform(3.20, 3.60))
+        engine.upsert(property_id, *points[property_id])
+    return engine, points
+
+
+def test_counts_are_consistent_across_zoom_levels():
+    """Zoom 0 holds everything and each tile equals the sum of its children"""
+    engine, points = _lagos_engine()
+
+    world = engine.get_tile(0, 0, 0)
+    assert sum(feature[2] for feature in world["features"]) == len(points)
+
+    z, x, y = _tile_for(6.52, 3.38, 10)
+    parent = sum(f[2] for f in engine.get_tile(z, x, y)["features"])
+    children = sum(
+        f[2]
+        for dx in (0, 1)
+        for dy in (0, 1)
+        for f in engine.get_tile(z + 1, 2 * x + dx, 2 * y + dy)["features"]
+    )
+    assert parent == children
+
+
+def test_single_listing_features_carry_property_id():
+    engine = ClusterEngine()
+    property_id = uuid.uuid4()
+    engine.upsert(property_id, 6.5244, 3.3792)
+
+    for z in (0, 8, 16, 19):
+        features = engine.get_tile(*_tile_for(6.5244, 3.3792, z))["features"]
+        assert len(features) == 1
+        longitude, latitude, count, feature_id = features[0]
+        assert count == 1 and feature_id == str(property_id)
+        assert abs(latitude - 6.5244) < 1e-6 and abs(longitude - 3.3792) < 1e-6
+
+
+def test_incremental_updates_invalidate_cached_tiles():
+    """Expired or deactivated listings leave cached tiles immediately"""
+    engine, points = _lagos_engine(count=50)
+    property_id, (latitude, longitude) = next(iter(points.items()))
+    key = _tile_for(latitude, longitude, 12)
+    before = sum(f[2] for f in engine.get_tile(*key)["features"])
+
+    engine.apply_change(
+        {
+            "id": property_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "is_active": True,
+            "expires_at": datetime.now(timezone.utc) - timedelta(minutes=1),
+            "change": "updated",
+        }
+    )
+    assert sum(f[2] for f in engine.get_tile(*key)["features"]) == before - 1
+    assert len(engine) == 49
+
+    engine.apply_change(
+        {
+            "id": property_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "is_active": True,
+            "expires_at": datetime.now(timezone.utc) + timedelta(days=14),
+            "change": "created",
+        }
+    )
+    assert sum(f[2] for f in engine.get_tile(*key)["features"]) == before
+
+
+class _StubSession:
+    def close(self):
+        pass
+
+
+class RecordingEngine(ClusterEngine):
+    """Cluster engine whose database loads are recorded instead of run"""
+
+    def __init__(self):
+        super().__init__(session_factory=_StubSession)
+        self.calls = []
+        self.loaded_event = threading.Event()
+
+    def rebuild(self, db, batch_size=5000):
+        self.calls.append("rebuild")
+        self.loaded = True
+        self._rebuilt_at = map_clusters.time.monotonic()
+        self.loaded_event.set()
+        return 0
+
+    def sync(self, db):
+        self.calls.append("sync")
+        return 0
+
+
+def test_refresh_loads_then_syncs_then_rebuilds(monkeypatch):
+    """Delta syncs between periodic full rebuilds"""
+    engine = RecordingEngine()
+    engine.refresh(None)
+    engine.refresh(None)
+    monkeypatch.setattr(map_clusters, "REBUILD_INTERVAL_SECONDS", 0)
+    engine.refresh(None)
+    assert engine.calls == ["rebuild", "sync", "rebuild"]
+
+
+def test_start_loads_the_grid_in_the_background():
+    """The first load runs on the refresher thread, not on a tile request"""
+    engine = RecordingEngine()
+    assert not engine.loaded
+    engine.start()
+    try:
+        assert engine.loaded_event.wait(5)
+    finally:
+        engine.stop()
+    assert engine.calls[0] == "rebuild"
@@ -0,0 +1,164 @@
+"""
+Tests for presigned media uploads and signed GET URL caching
+"""
+
+import sys
+import uuid
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import boto3
+import pytest
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from app.services.media import (
+    MAX_IMAGE_BYTES,
+    SIGNED_GET_MIN_REMAINING_SECONDS,
+    SIGNED_GET_TTL_SECONDS,
+    MediaService,
+)
+
+PROPERTY_ID = uuid.uuid4()
+
+
+class FakeBucket:
+    """Stand-in for a MinIO bucket: HEAD and DELETE over a dict of objects"""
+
+    def __init__(self):
+        self.objects = {}
+        self.deleted = []
+
+    def put(self, key, content_type, size):
+        self.objects[key] = {"ContentType": content_type, "ContentLength": size}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return dict(self.objects[Key])
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+        self.deleted.append(Key)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _signer():
+    # Presigning is local, so a real client pointed at a local MinIO works
+    # without a server
+    return boto3.client(
+        "s3",
+        endpoint_url="http://localhost:9000",
+        aws_access_key_id="minio",
+        aws_secret_access_key="minio-secret",
+        region_name="us-east-1",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+
+
+@pytest.fixture
+def service():
+    bucket = FakeBucket()
+    signer = _signer()
+    clock = Clock()
+    media = MediaService(
+        bucket="reent",
+        client_factory=lambda: bucket,
+        signer_factory=lambda: signer,
+        clock=clock,
+    )
+    return media, bucket, clock
+
+
+def test_create_upload_presigns_put_and_post(service):
+    media, _, _ = service
+    upload = media.create_upload(PROPERTY_ID, "image/jpeg", 2_000_000)
+
+    assert upload["key"].startswith(f"properties/{PROPERTY_ID}/")
+    assert upload["key"].endswith(".jpg")
+    put = urlparse(upload["put_url"])
+    assert put.netloc == "localhost:9000"
+    assert put.path == f"/reent/{upload['key']}"
+    assert "X-Amz-Signature" in parse_qs(put.query)
+    assert upload["put_headers"] == {"Content-Type": "image/jpeg"}
+    assert upload["post_fields"]["key"] == upload["key"]
+    assert "policy" in upload["post_fields"]
+
+
+@pytest.mark.parametrize(
+    "content_type, size",
+    [("application/pdf", 100), ("image/jpeg", MAX_IMAGE_BYTES + 1), ("image/png", 0)],
+)
+def test_create_upload_rejects_bad_files(service, content_type, size):
+    media, _, _ = service
+    with pytest.raises(ValueError):
+        media.create_upload(PROPERTY_ID, content_type, size)
+
+
+def test_verify_uploads_checks_head(service):
+    """Only present, allowed objects under the listing's prefix pass"""
+    media, bucket, _ = service
+    good = f"properties/{PROPERTY_ID}/a.jpg"
+    bucket.put(good, "image/jpeg", 1000)
+    media.verify_uploads(PROPERTY_ID, [good])
+
+    with pytest.raises(ValueError, match="not been uploaded"):
+        media.verify_uploads(PROPERTY_ID, [f"properties/{PROPERTY_ID}/missing.jpg"])
+    with pytest.raises(ValueError, match="does not belong"):
+        media.verify_uploads(PROPERTY_ID, [f"properties/{uuid.uuid4()}/a.jpg"])
+
+    huge = f"properties/{PROPERTY_ID}/huge.jpg"
+    bucket.put(huge, "image/jpeg", MAX_IMAGE_BYTES + 1)
+    with pytest.raises(ValueError, match="larger than allowed"):
+        media.verify_uploads(PROPERTY_ID, [huge])
+    assert bucket.deleted == [huge]
+
+    odd = f"properties/{PROPERTY_ID}/doc.jpg"
+    bucket.put(odd, "text/html", 10)
+    with pytest.raises(ValueError, match="unsupported type"):
+        media.verify_uploads(PROPERTY_ID, [odd])
+
+
+def test_signed_urls_are_reused_until_close_to_expiry(service, monkeypatch):
+    media, _, clock = service
+    signer = media._signer_factory()
+    signed = []
+    sign = signer.generate_presigned_url
+
+    def counting(*args, **kwargs):
+        signed.append(kwargs["Params"]["Key"])
+        return sign(*args, **kwargs)
+
+    monkeypatch.setattr(signer, "generate_presigned_url", counting)
+    key = f"properties/{PROPERTY_ID}/a.jpg"
+
+    first = media.resolve_url(key)
+    assert parse_qs(urlparse(first).query)["X-Amz-Expires"] == [
+        str(SIGNED_GET_TTL_SECONDS)
+    ]
+    clock.now = 1.0
+    assert media.resolve_url(key) == first
+    assert len(signed) == 1
+
+    clock.now = SIGNED_GET_TTL_SECONDS - SIGNED_GET_MIN_REMAINING_SECONDS + 1
+    media.resolve_url(key)
+    assert len(signed) == 2
+
+
+def test_absolute_urls_pass_through(service):
+    media, _, _ = service
+    legacy = "https://media.reent.ng/properties/1/0.jpg"
+    assert media.resolve_url(legacy) == legacy
+    assert media.resolve_url(None) is None
+    assert media.resolve_urls(None) == []
@@ -0,0 +1,156 @@
+"""
+Tests for the report moderation queue
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import select
+
+from app.models.engagement import PropertyReport
+from app.models.property import Property
+from app.services.moderation import (
+    AUTO_HIDE_REPORT_COUNT,
+    CLAIM_LEASE,
+    ModerationService,
+)
+
+# sqlite stores naive datetimes, so the service clock is naive here too
+NOW = datetime(2024, 3, 10, 12, 0)
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+def _is_active(db, property_id):
+    return db.execute(
+        select(Property.is_active).where(Property.id == property_id)
+    ).scalar()
+
+
+def test_repeat_reports_from_one_user_count_once(db, add_listing, add_user):
+    property_id = add_listing()
+    service = ModerationService(clock=Clock())
+    user = add_user()
+
+    assert service.report(db, property_id, user, "spam") == {
+        "accepted": True,
+        "report_count": 1,
+    }
+    assert service.report(db, property_id, user, "fake") == {
+        "accepted": False,
+        "report_count": 1,
+    }
+    with pytest.raises(ValueError):
+        service.report(db, property_id, add_user(), "rude")
+
+
+def test_report_on_missing_listing_is_not_found(db, add_user):
+    """The foreign key violation surfaces as LookupError, not a 500"""
+    service = ModerationService(clock=Clock())
+    with pytest.raises(LookupError):
+        service.report(db, uuid.uuid4(), add_user(), "spam")
+    assert db.execute(select(PropertyReport.id)).first() is None
+
+
+def test_claims_are_prioritized_and_never_shared(db, add_listing, add_user):
+    minor = add_listing(title="minor")
+    serious = add_listing(title="serious")
+    crowded = add_listing(title="crowded")
+    service = ModerationService(clock=Clock())
+    service.report(db, minor, add_user(), "other")
+    service.report(db, serious, add_user(), "fake")
+    for _ in range(3):
+        service.report(db, crowded, add_user(), "wrong_info")
+
+    first = service.claim(db, add_user("admin"), limit=2)
+    second = service.claim(db, add_user("admin"), limit=2)
+
+    assert [case["title"] for case in first] == ["crowded", "serious"]
+    assert [case["score"] for case in first] == [6, 5]
+    assert len(first[0]["reports"]) == 3
+    assert [case["title"] for case in second] == ["minor"]
+    assert service.claim(db, add_user("admin")) == []
+
+
+def test_expired_lease_returns_case_to_queue(db, add_listing, add_user):
+    property_id = add_listing()
+    clock = Clock()
+    service = ModerationService(clock=clock)
+    service.report(db, property_id, add_user(), "spam")
+    slow, other = add_user("admin"), add_user("admin")
+
+    assert len(service.claim(db, slow)) == 1
+    assert service.claim(db, other) == []
+
+    clock.now += CLAIM_LEASE + timedelta(seconds=1)
+    assert len(service.claim(db, other)) == 1
+    with pytest.raises(PermissionError):
+        service.decide(db, property_id, slow, "remove")
+    assert service.decide(db, property_id, other, "remove")["reports_closed"] == 1
+
+
+def test_threshold_hides_listing_and_dismiss_restores_it(
+    db, add_listing, add_user, published
+):
+    property_id = add_listing()
+    service = ModerationService(clock=Clock())
+    reporters = [add_user() for _ in range(AUTO_HIDE_REPORT_COUNT)]
+
+    for reporter in reporters[:-1]:
+        service.report(db, property_id, reporter, "spam")
+    assert _is_active(db, property_id)
+    service.report(db, property_id, reporters[-1], "spam")
+    assert not _is_active(db, property_id)
+    assert [change["is_active"] for change in published] == [False]
+
+    moderator = add_user("admin")
+    (case,) = service.claim(db, moderator)
+    assert case["hidden"]
+    result = service.decide(db, property_id, moderator, "dismiss")
+
+    assert result == {
+        "property_id": property_id,
+        "action": "dismiss",
+        "reports_closed": AUTO_HIDE_REPORT_COUNT,
+        "listing_active": True,
+    }
+    assert _is_active(db, property_id)
+    statuses = set(db.execute(select(PropertyReport.status)).scalars())
+    assert statuses == {"dismissed"}
+    # The case is closed; a new report opens a fresh one, and the pending-only
+    # unique index lets an earlier reporter report again
+    with pytest.raises(LookupError):
+        service.decide(db, property_id, moderator, "dismiss")
+    assert service.report(db, property_id, reporters[0], "spam") == {
+        "accepted": True,
+        "report_count": 1,
+    }
+
+
+def test_remove_deactivates_and_release_requeues(db, add_listing, add_user):
+    property_id = add_listing()
+    service = ModerationService(clock=Clock())
+    service.report(db, property_id, add_user(), "fake")
+    moderator = add_user("admin")
+
+    service.claim(db, moderator)
+    assert not service.release(db, property_id, add_user("admin"))
+    assert service.release(db, property_id, moderator)
+    assert len(service.claim(db, moderator)) == 1
+
+    result = service.decide(db, property_id, moderator, "remove")
+    assert result["listing_active"] is False
+    assert not _is_active(db, property_id)
@@ -0,0 +1,284 @@
+"""
+Tests for bulk notifications, broadcasts, the keyset inbox and unread
+counters
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects import postgresql
+
+from app.models.engagement import Notification
+from app.schemas.notification import BroadcastCreate, MarkAllReadRequest
+from app.services.notifications import NotificationService
+
+# sqlite stores naive datetimes, so the service clock is naive here too
+NOW = datetime(2024, 3, 10, 12, 0)
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+def _notification(user_id, minutes=0, **fields):
+    return {
+        "user_id": user_id,
+        "type": "system_announcement",
+        "title": "Hello",
+        "message": "Welcome to Reent",
+        "created_at": NOW - timedelta(minutes=minutes),
+        **fields,
+    }
+
+
+def _counted_unread(db, user_id):
+    return db.execute(
+        select(func.count()).where(
+            Notification.user_id == user_id, ~Notification.is_read
+        )
+    ).scalar()
+
+
+def test_bulk_add_batches_inserts_and_counts_per_user(engine, db, add_user):
+    service = NotificationService(clock=Clock())
+    users = [add_user() for _ in range(3)]
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+
+    added = service.notify(
+        db,
+        [_notification(users[n % 3], minutes=n) for n in range(25)],
+    )
+
+    assert added == 25
+    assert [service.unread_count(db, user) for user in users] == [9, 8, 8]
+    assert service.unread_count(db, uuid.uuid4()) == 0
+    inserts = [s for s in statements if s.startswith("INSERT INTO notifications")]
+    # executemany: one statement for the batch
+    assert len(inserts) == 1
+
+    with pytest.raises(ValueError):
+        service.add(db, [_notification(users[0], type="party_invite")])
+
+
+def test_inbox_pages_with_keyset_and_hides_expired(db, add_user):
+    service = NotificationService(clock=Clock())
+    user = add_user()
+    service.notify(db, [_notification(user, minutes=n) for n in range(5)])
+    service.notify(
+        db, [_notification(user, minutes=10, expires_at=NOW - timedelta(seconds=1))]
+    )
+
+    first, more = service.inbox(db, user, limit=3)
+    assert more
+    last = first[-1]
+    second, more = service.inbox(db, user, limit=3, after=(last.created_at, last.id))
+    assert not more
+    created = [n.created_at for n in first + second]
+    assert created == [NOW - timedelta(minutes=n) for n in range(5)]
+
+
+def test_marking_read_keeps_counter_in_step(db, add_user):
+    service = NotificationService(clock=Clock())
+    user, other = add_user(), add_user()
+    service.notify(db, [_notification(user, minutes=n) for n in range(6)])
+    service.notify(db, [_notification(other)])
+    page, _ = service.inbox(db, user, limit=2)
+    foreign, _ = service.inbox(db, other, limit=1)
+
+    ids = [n.id for n in page] + [foreign[0].id]
+    assert service.mark_read(db, user, ids) == 2
+    assert service.mark_read(db, user, ids) == 0
+    assert service.unread_count(db, user) == 4
+    assert service.unread_count(db, other) == 1
+
+    unread, _ = service.inbox(db, user, limit=10, unread_only=True)
+    assert len(unread) == 4
+    assert service.mark_all_read(db, user) == 4
+    assert service.mark_all_read(db, user) == 0
+    assert service.unread_count(db, user) == 0
+    assert _counted_unread(db, user) == 0
+
+
+def test_purge_deletes_expired_and_uncounts_unread(db, add_user):
+    clock = Clock()
+    service = NotificationService(clock=clock)
+    user = add_user()
+    soon = NOW + timedelta(days=1)
+    service.notify(
+        db,
+        [_notification(user, minutes=n, expires_at=soon) for n in range(5)]
+        + [_notification(user, minutes=9)],
+    )
+    page, _ = service.inbox(db, user, limit=1)
+    service.mark_read(db, user, [page[0].id])
+    assert service.unread_count(db, user) == 5
+
+    clock.now = soon
+    result = service.purge_expired(db, batch_size=2)
+
+    assert (result["deleted"], result["batches"]) == (5, 3)
+    assert service.unread_count(db, user) == 1
+    assert _counted_unread(db, user) == 1
+
+
+def test_purge_claims_with_skip_locked_on_postgres():
+    table = Notification.__table__
+    statements = []
+
+    class Recorder:
+        def execute(self, statement):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+
+            class Result:
+                def all(self):
+                    return []
+
+            return Result()
+
+        def commit(self):
+            pass
+
+    NotificationService(clock=Clock()).purge_expired(Recorder())
+    assert "FOR UPDATE SKIP LOCKED" in statements[0]
+    assert f"DELETE FROM {table.name}" in statements[0]
+
+
+def test_broadcast_is_one_row_merged_into_inboxes(db, add_user):
+    clock = Clock()
+    service = NotificationService(clock=clock)
+    tenant, agent = add_user(), add_user("agent")
+    service.notify(db, [_notification(tenant, minutes=n) for n in (1, 3)])
+
+    clock.now = NOW - timedelta(minutes=2)
+    everyone = service.broadcast(db, "Maintenance", "Down at midnight")
+    clock.now = NOW - timedelta(minutes=4)
+    agents = service.broadcast(db, "New tools", "For agents", audience="agent")
+    clock.now = NOW
+    with pytest.raises(ValueError):
+        service.broadcast(db, "Hi", "Everyone", audience="investors")
+
+    # No per-user rows: only the tenant's two personal notifications
+    count = select(func.count()).select_from(Notification)
+    assert db.execute(count).scalar() == 2
+
+    first, more = service.inbox(db, tenant, limit=2, role="tenant")
+    assert more
+    last = first[-1]
+    rest, more = service.inbox(
+        db, tenant, limit=2, after=(last.created_at, last.id), role="tenant"
+    )
+    assert not more
+    assert [item.broadcast for item in first + rest] == [False, True, False]
+    assert first[1].id == everyone.id
+    assert service.unread_count(db, tenant, "tenant") == 3
+
+    inbox, _ = service.inbox(db, agent, limit=10, role="agent")
+    assert [item.id for item in inbox] == [everyone.id, agents.id]
+    assert service.unread_count(db, agent, "agent") == 2
+
+
+def test_reading_broadcasts_moves_the_watermark(db, add_user):
+    clock = Clock()
+    service = NotificationService(clock=clock)
+    user = add_user()
+    service.notify(db, [_notification(user)])
+    for minutes in (3, 2, 1):
+        clock.now = NOW - timedelta(minutes=minutes)
+        service.broadcast(db, f"News {minutes}", "Read me", audience="agent")
+    clock.now = NOW
+
+    inbox, _ = service.inbox(db, user, limit=10, role="agent")
+    middle = inbox[2]
+    assert middle.title == "News 2"
+    # Older broadcasts are read along with it
+    assert service.mark_read(db, user, [middle.id], "agent") == 2
+    assert service.mark_read(db, user, [middle.id], "agent") == 0
+    assert service.unread_count(db, user, "agent") == 2
+    unread, _ = service.inbox(db, user, limit=10, unread_only=True, role="agent")
+    assert [item.title for item in unread] == ["Hello", "News 1"]
+
+    assert service.mark_all_read(db, user, "agent") == 2
+    assert service.unread_count(db, user, "agent") == 0
+
+    clock.now = NOW + timedelta(minutes=1)
+    service.broadcast(db, "Later", "Still unread")
+    assert service.unread_count(db, user, "agent") == 1
+
+
+def test_mark_all_read_stops_at_what_the_user_saw(db, add_user):
+    clock = Clock()
+    service = NotificationService(clock=clock)
+    user = add_user()
+    clock.now = NOW - timedelta(minutes=2)
+    service.notify(db, [_notification(user, minutes=3)])
+    service.broadcast(db, "Seen", "Shown in the inbox")
+    inbox, _ = service.inbox(db, user, limit=10)
+    seen = inbox[0].created_at
+
+    # Both arrive after the page was loaded, a broadcast stamped in the past
+    clock.now = NOW - timedelta(minutes=1)
+    service.notify(db, [_notification(user, minutes=1, title="Later")])
+    service.broadcast(db, "Unseen", "Not shown yet")
+    clock.now = NOW
+
+    assert service.mark_all_read(db, user, read_through=seen) == 2
+    unread, _ = service.inbox(db, user, limit=10, unread_only=True)
+    assert {item.title for item in unread} == {"Later", "Unseen"}
+
+    # Without a watermark, broadcasts are read up to the newest one, not now
+    assert service.mark_all_read(db, user) == 2
+    clock.now = NOW - timedelta(seconds=30)
+    service.broadcast(db, "Stamped before the request", "Still unread")
+    assert service.unread_count(db, user) == 1
+
+
+def test_broadcasts_are_cached_and_expire(engine, db, add_user):
+    clock = Clock()
+    service = NotificationService(clock=clock)
+    user = add_user()
+    service.broadcast(db, "Short", "Gone soon", expires_at=NOW + timedelta(minutes=5))
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+
+    for _ in range(3):
+        service.inbox(db, user, limit=10)
+        service.unread_count(db, user)
+    assert sum("FROM broadcasts" in s for s in statements) == 1
+
+    clock.now = NOW + timedelta(minutes=5)
+    assert service.inbox(db, user, limit=10) == ([], False)
+    assert service.unread_count(db, user) == 0
+    result = service.purge_expired(db)
+    assert result["broadcasts_deleted"] == 1
+
+
+def test_naive_request_datetimes_are_read_as_utc():
+    """Offset-less datetimes compare with timestamptz values instead of failing"""
+    request = MarkAllReadRequest(read_through="2026-10-19T10:00:00")
+    assert request.read_through == datetime(2026, 10, 19, 10, tzinfo=timezone.utc)
+    assert request.read_through < datetime(2026, 10, 19, 11, tzinfo=timezone.utc)
+
+    offset = MarkAllReadRequest(read_through="2026-10-19T10:00:00+01:00")
+    assert offset.read_through == datetime(2026, 10, 19, 9, tzinfo=timezone.utc)
+
+    broadcast = BroadcastCreate(
+        title="Maintenance", message="Tonight", expires_at="2026-10-20T00:00:00"
+    )
+    assert broadcast.expires_at.tzinfo is timezone.utc
@@ -0,0 +1,48 @@
+"""
+Tests for keyset pagination cursors
+"""
+
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+from fastapi import HTTPException
+
+from app.core.pagination import clamp_limit, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    """A (created_at, id) key survives encoding and decoding"""
+    created_at = datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, (datetime.fromisoformat, uuid.UUID)) == [
+        created_at,
+        row_id,
+    ]
+
+
+def test_invalid_cursor_is_rejected():
+    """Tampered or mismatched cursors raise a 400 instead of a server error"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor", (datetime.fromisoformat, uuid.UUID))
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor(1, 2, 3), (int, int))
+
+
+def test_clamp_limit():
+    assert clamp_limit(None) == 20
+    assert clamp_limit(1000) == 100
+    assert clamp_limit(-5) == 1
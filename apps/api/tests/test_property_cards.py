@@ -0,0 +1,183 @@
+"""
+Tests for property_cards read-model rebuilds
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import create_engine, literal, select
+from sqlalchemy.dialects import postgresql
+
+from app.models.engagement import (
+    AgentReview,
+    AgentVerification,
+    PropertyFlick,
+    PropertyShare,
+)
+from app.models.property import PropertyCard
+from app.services import property_cards
+from app.services.property_cards import PropertyCardService
+from app.services.property_feed import serialize_feed_card
+
+CREATED = datetime(2024, 6, 1, 9, 0)
+
+
+@pytest.fixture
+def store(monkeypatch, engine, db, add_user, add_listing):
+    """Two listings with an agent, badge, reviews and engagement to fold in"""
+    # sqlite has no arrays; the cover URL expression is checked on postgres
+    source = property_cards.card_source
+    monkeypatch.setattr(
+        property_cards,
+        "card_source",
+        lambda: {**source(), "cover_url": literal(None)},
+    )
+
+    def listing(agent_id, **overrides):
+        listing = {
+            "agent_id": agent_id,
+            "title": "2 bed flat",
+            "bedrooms": 2,
+            "bathrooms": 1,
+            "price_monthly": 25000000,
+            "expires_at": CREATED + timedelta(days=14),
+            "created_at": CREATED,
+            "updated_at": CREATED,
+            "view_count_7d": 4,
+            "view_count_total": 40,
+            "rank_score": 1.5,
+        }
+        listing.update(overrides)
+        return add_listing(**listing)
+
+    agent = add_user("agent", business_name="Lekki Homes")
+    popular = listing(agent)
+    quiet = listing(add_user("agent"), title="Studio", view_count_7d=None)
+    with engine.begin() as conn:
+        conn.execute(
+            AgentVerification.__table__.insert(),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "agent_id": agent,
+                    "verification_status": "verified",
+                    "credibility_score": 50,
+                    "verification_badge_visible": True,
+                }
+            ],
+        )
+        conn.execute(
+            AgentReview.__table__.insert(),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "agent_id": agent,
+                    "tenant_id": add_user(),
+                    "rating": rating,
+                    "is_visible": visible,
+                }
+                for rating, visible in ((5, True), (4, None), (1, False))
+            ],
+        )
+        conn.execute(
+            PropertyFlick.__table__.insert(),
+            [
+                {"id": uuid.uuid4(), "property_id": popular, "user_id": add_user()}
+                for _ in range(3)
+            ],
+        )
+        conn.execute(
+            PropertyShare.__table__.insert(),
+            [{"id": uuid.uuid4(), "property_id": popular, "shared_by": add_user()}],
+        )
+    return popular, quiet
+
+
+def _cards(db):
+    return {row.id: row for row in db.execute(select(PropertyCard.__table__))}
+
+
+def test_rebuild_fills_cards_from_source_tables(db, store):
+    """Listing columns, agent name, badge, reviews and counters land in one row"""
+    popular, quiet = store
+
+    result = PropertyCardService().rebuild(db, batch_size=1)
+    assert (result["scanned"], result["repaired"], result["batches"]) == (2, 2, 2)
+
+    cards = _cards(db)
+    card = cards[popular]
+    assert card.title == "2 bed flat" and card.view_count_7d == 4
+    assert card.agent_business_name == "Lekki Homes"
+    assert (card.verification_status, card.credibility_score) == ("verified", 50)
+    assert card.review_count == 2 and float(card.review_avg) == 4.5
+    assert (card.flick_count, card.clip_count, card.share_count) == (3, 0, 1)
+
+    bare = cards[quiet]
+    assert bare.agent_business_name is None
+    assert (bare.verification_status, bare.verification_badge_visible) == (
+        "pending",
+        False,
+    )
+    assert bare.review_count == 0 and bare.review_avg is None
+    assert bare.view_count_7d == 0
+
+
+def test_rebuild_rewrites_only_drifted_cards(db, store):
+    """A second rebuild is a no-op; a corrupted card is found and repaired"""
+    popular, _ = store
+    service = PropertyCardService()
+    service.rebuild(db)
+
+    assert service.rebuild(db)["repaired"] == 0
+
+    db.execute(
+        PropertyCard.__table__.update()
+        .where(PropertyCard.id == popular)
+        .values(flick_count=99)
+    )
+    db.commit()
+    result = service.rebuild(db)
+    assert result["repaired"] == 1
+    assert _cards(db)[popular].flick_count == 3
+
+
+def test_rebuild_statement_is_one_upsert_on_postgres():
+    """One INSERT ... SELECT per batch that skips rows already correct"""
+    sql = str(
+        PropertyCardService()
+        .rebuild_statement([uuid.uuid4()])
+        .compile(dialect=postgresql.dialect())
+    )
+    assert sql.startswith("INSERT INTO property_cards")
+    assert "properties.media_urls[" in sql
+    assert "ON CONFLICT (id) DO UPDATE" in sql
+    assert "IS DISTINCT FROM excluded.flick_count" in sql
+    assert "RETURNING property_cards.id" in sql
+
+
+def test_feed_card_folds_badge_columns():
+    """Badge columns become agent_badge; an expired lock reads as failed"""
+    row = select(
+        literal(uuid.uuid4()).label("id"),
+        literal("locked").label("verification_status"),
+        literal(CREATED).label("agent_locked_until"),
+        literal(10).label("credibility_score"),
+        literal(False).label("verification_badge_visible"),
+        literal(None).label("latitude"),
+        literal(4.5).label("review_avg"),
+    )
+    with create_engine("sqlite://").connect() as conn:
+        card = serialize_feed_card(conn.execute(row).one())
+    assert card["agent_badge"] == {
+        "verification_status": "failed",
+        "credibility_score": 10,
+        "verification_badge_visible": False,
+    }
+    assert "agent_locked_until" not in card and card["review_avg"] == 4.5
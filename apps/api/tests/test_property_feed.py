@@ -0,0 +1,141 @@
+"""
+Tests for the property feed query shape and keyset paging
+"""
+
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.services.property_feed import (
+    CARD_COLUMNS,
+    COVER_URL,
+    FEED_SORTS,
+    property_feed_service,
+)
+
+# sqlite stores naive datetimes
+CREATED = datetime(2024, 6, 1, 9, 0)
+
+
+def _compile(query) -> str:
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+
+def test_feed_projection_skips_heavy_columns():
+    """Cards select the first media URL only and never the description"""
+    query = property_feed_service.apply_filters(
+        Session().query(*CARD_COLUMNS, COVER_URL), state="Lagos", min_price=100
+    )
+    sql = _compile(query)
+
+    assert "properties.description" not in sql
+    assert "properties.media_urls[" in sql
+    assert "properties.media_urls," not in sql
+
+
+def test_feed_filter_matches_partial_index_predicate():
+    """Live-listing filter uses bare is_active so partial indexes apply"""
+    query = property_feed_service.apply_filters(Session().query(*CARD_COLUMNS))
+    sql = _compile(query)
+
+    assert "WHERE properties.is_active AND" in sql
+
+
+@pytest.fixture
+def feed(db, add_card):
+    """get_page_json over property_cards rows"""
+    # Seven live cards whose middle three tie on every sort key, so a page
+    # of two ends inside the tie whichever way the feed is sorted
+    rows = [
+        {
+            "title": f"Flat {position}",
+            "price_monthly": 100000 + step * 50000,
+            "created_at": CREATED + timedelta(hours=step),
+            "rank_score": step / 10,
+        }
+        for position, step in enumerate((0, 1, 1, 1, 2, 3, 4))
+    ]
+    for row in rows:
+        row["id"] = add_card(**row)
+    add_card(**{**rows[0], "id": uuid.uuid4(), "is_active": False})
+    add_card(**{**rows[0], "id": uuid.uuid4(), "expires_at": CREATED})
+
+    def page(sort, limit, cursor=None):
+        return json.loads(
+            property_feed_service.get_page_json(
+                db, limit=limit, cursor=cursor, sort=sort
+            )
+        )
+
+    def expected(sort):
+        key_columns, _, descending = FEED_SORTS[sort]
+        ordered = sorted(
+            rows,
+            key=lambda row: tuple(row[column.key] for column in key_columns),
+            reverse=descending,
+        )
+        return [str(row["id"]) for row in ordered]
+
+    return page, expected
+
+
+@pytest.mark.parametrize("sort", ["newest", "price_asc", "price_desc", "ranked"])
+def test_feed_pages_through_every_sort(feed, sort):
+    """Pages follow the sort key then id, with no gaps or repeats at ties"""
+    page, expected = feed
+
+    seen, cursor = [], None
+    while True:
+        result = page(sort, limit=2, cursor=cursor)
+        assert result["count"] == len(result["items"]) <= 2
+        seen += [item["id"] for item in result["items"]]
+        cursor = result["next_cursor"]
+        assert result["has_more"] is (cursor is not None)
+        if cursor is None:
+            break
+    assert seen == expected(sort)
+
+
+@pytest.mark.parametrize("sort", ["newest", "price_asc", "price_desc", "ranked"])
+def test_feed_exact_last_page_has_no_cursor(feed, sort):
+    """A page that ends on the last live card reports nothing more"""
+    page, expected = feed
+    order = expected(sort)
+
+    first = page(sort, limit=len(order) - 1)
+    assert first["has_more"] is True
+    last = page(sort, limit=1, cursor=first["next_cursor"])
+    assert [item["id"] for item in last["items"]] == order[-1:]
+    assert last["has_more"] is False
+    assert last["next_cursor"] is None
+
+    whole = page(sort, limit=len(order))
+    assert whole["count"] == len(order)
+    assert whole["next_cursor"] is None
+
+
+def test_feed_cursor_from_another_sort_returns_400(feed):
+    """A cursor only decodes under the sort whose keys it carries"""
+    page, _ = feed
+    newest_cursor = page("newest", limit=2)["next_cursor"]
+    price_cursor = page("price_asc", limit=2)["next_cursor"]
+
+    for sort, cursor in (
+        ("price_asc", newest_cursor),
+        ("ranked", newest_cursor),
+        ("newest", price_cursor),
+    ):
+        with pytest.raises(HTTPException) as exc:
+            page(sort, limit=2, cursor=cursor)
+        assert exc.value.status_code == 400
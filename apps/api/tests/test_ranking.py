@@ -0,0 +1,118 @@
+"""
+Tests for precomputed feed ranking
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.core.events import publish
+from app.models.base import SessionLocal
+from app.models.engagement import AgentVerification, PropertyFlick
+from app.models.property import Property, PropertyCard
+from app.services import ranking
+from app.services.property_events import PROPERTY_CHANGED
+from app.services.property_feed import (
+    FEED_CARD_COLUMNS,
+    FEED_SORTS,
+    property_feed_service,
+)
+from app.services.ranking import RECENCY_SCALE, RankingService, rank_score
+
+CREATED = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def test_newer_listing_wins_on_equal_engagement():
+    """Recency is a bonus for being newer"""
+    assert rank_score(CREATED + timedelta(hours=1), 10) > rank_score(CREATED, 10)
+
+
+def test_engagement_overcomes_age():
+    """An older listing with far more engagement outranks a fresh one"""
+    older = rank_score(CREATED, views_7d=400, flicks=30, clips=10)
+    newer = rank_score(CREATED + RECENCY_SCALE, views_7d=5)
+    assert older > newer
+
+
+def test_credibility_breaks_ties():
+    """Verified agents' listings rank above unverified ones"""
+    assert rank_score(CREATED, 10, credibility=50) > rank_score(CREATED, 10)
+
+
+def test_property_changes_mark_live_listings_dirty():
+    """Created/updated live listings are queued; deactivated ones are not"""
+    service = RankingService()
+    live, expired = uuid.uuid4(), uuid.uuid4()
+    original = ranking.ranking_service
+    ranking.ranking_service = service
+    try:
+        publish(
+            PROPERTY_CHANGED,
+            changes=[
+                {"id": live, "is_active": True, "change": "updated"},
+                {"id": expired, "is_active": False, "change": "updated"},
+            ],
+        )
+    finally:
+        ranking.ranking_service = original
+    assert service._dirty == {live}
+
+
+def test_refresh_dirty_scores_queued_and_agent_listings(
+    engine, db, add_listing, add_user
+):
+    """Queued listings and all live listings of a re-verified agent are scored"""
+    agent = add_user("agent")
+    popular = add_listing(created_at=CREATED, view_count_7d=100)
+    other = add_listing(agent_id=agent, created_at=CREATED)
+    untouched = add_listing(created_at=CREATED)
+    with engine.begin() as conn:
+        conn.execute(
+            PropertyFlick.__table__.insert(),
+            [
+                {"id": uuid.uuid4(), "property_id": popular, "user_id": add_user()}
+                for _ in range(3)
+            ],
+        )
+        conn.execute(
+            AgentVerification.__table__.insert(),
+            [{"id": uuid.uuid4(), "agent_id": agent, "credibility_score": 50}],
+        )
+
+    service = RankingService(session_factory=sessionmaker(bind=engine))
+    service.mark_dirty([popular])
+    service.mark_agent_dirty(agent)
+    assert service.refresh_dirty(db) == 2
+    assert service.pending() == 0
+
+    scores = dict(db.execute(select(Property.id, Property.rank_score)).all())
+    assert scores[popular] == pytest.approx(rank_score(CREATED, 100, flicks=3))
+    assert scores[other] == pytest.approx(rank_score(CREATED, credibility=50))
+    assert scores[untouched] == 0
+
+
+def test_ranked_feed_orders_by_materialized_score():
+    """sort=ranked reads rank_score through the (state, rank_score, id) index"""
+    db = SessionLocal()
+    try:
+        key_columns, _, descending = FEED_SORTS["ranked"]
+        query = property_feed_service.apply_filters(
+            db.query(*FEED_CARD_COLUMNS), state="Lagos", source=PropertyCard
+        ).order_by(*(column.desc() for column in key_columns))
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    finally:
+        db.close()
+    assert descending
+    assert "WHERE property_cards.is_active AND" in sql
+    assert "ORDER BY property_cards.rank_score DESC, property_cards.id DESC" in sql
+    assert "properties" not in sql.replace("property_cards", "")
@@ -0,0 +1,215 @@
+"""
+Tests for the realtime gateway: token auth, room routing, the backplane
+fallback and per-connection backpressure
+"""
+
+import asyncio
+import sys
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+import socketio
+
+from app.core.auth import create_access_token, create_refresh_token
+from app.websockets.gateway import RealtimeGateway, realtime_message
+from app.websockets.send_buffer import SendBuffer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def publish(self, channel, payload):
+        self.published.append((channel, payload))
+
+    def execute(self):
+        pass
+
+
+def _gateway(redis=None, **options):
+    gateway = RealtimeGateway(
+        server=socketio.AsyncServer(async_mode="asgi"),
+        redis_getter=lambda: redis,
+        **options,
+    )
+    sent = []
+
+    async def emit(event, data, to=None, namespace=None):
+        sent.append((to, event, data))
+
+    gateway.sio.emit = emit
+    return gateway, sent
+
+
+async def _connect(gateway, user_id, role="tenant", **claims):
+    token = create_access_token({"sub": str(user_id), "role": role, **claims})
+    sid = await gateway.sio.manager.connect(uuid.uuid4().hex, "/")
+    await gateway._connect(sid, {}, {"token": token})
+    return sid
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_send_buffer_drops_oldest_and_reports_stalls():
+    clock = Clock()
+    buffer = SendBuffer(4, clock=clock)
+    assert all(buffer.offer("n", n) for n in range(4))
+    assert not buffer.offer("n", 4)
+    assert (len(buffer), buffer.dropped) == (4, 1)
+
+    clock.now = 29.0
+    assert not buffer.is_stalled(30)
+    clock.now = 30.0
+    assert buffer.is_stalled(30)
+
+    async def drain():
+        return [await buffer.next() for _ in range(2)]
+
+    assert asyncio.run(drain()) == [("n", 1), ("n", 2)]
+    assert not buffer.is_stalled(30)
+
+
+def test_connect_requires_an_access_token():
+    gateway, _ = _gateway()
+
+    async def scenario():
+        sid = await gateway.sio.manager.connect("eio", "/")
+        with pytest.raises(socketio.exceptions.ConnectionRefusedError):
+            await gateway._connect(sid, {}, {"token": "not-a-jwt"})
+        with pytest.raises(socketio.exceptions.ConnectionRefusedError):
+            await gateway._connect(sid, {}, None)
+        refresh = create_refresh_token({"sub": str(uuid.uuid4())})
+        with pytest.raises(socketio.exceptions.ConnectionRefusedError):
+            await gateway._connect(sid, {}, {"token": refresh})
+
+        token = create_access_token({"sub": str(uuid.uuid4()), "role": "agent"})
+        await gateway._connect(sid, {"HTTP_AUTHORIZATION": f"Bearer {token}"}, None)
+        assert gateway.get_stats()["connections"] == 1
+        await gateway._disconnect(sid)
+        return gateway.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["connections"], stats["rejected"]) == (0, 3)
+
+
+def test_messages_reach_user_role_and_everyone_rooms():
+    gateway, sent = _gateway()
+    tenant, agent = uuid.uuid4(), uuid.uuid4()
+
+    async def scenario():
+        phone = await _connect(gateway, tenant)
+        laptop = await _connect(gateway, tenant)
+        office = await _connect(gateway, agent, role="agent")
+        assert gateway.deliver(realtime_message("notification", 1, [tenant])) == 2
+        assert (
+            gateway.deliver(realtime_message("announcement", 2, audience="agent")) == 1
+        )
+        assert gateway.deliver(realtime_message("announcement", 3, audience="all")) == 3
+        assert gateway.deliver(realtime_message("notification", 4, [uuid.uuid4()])) == 0
+        await _settle()
+        return phone, laptop, office
+
+    phone, laptop, office = asyncio.run(scenario())
+    assert sorted((to, data) for to, _, data in sent) == sorted(
+        [(phone, 1), (laptop, 1), (office, 2), (phone, 3), (laptop, 3), (office, 3)]
+    )
+
+
+def test_publish_uses_the_backplane_and_falls_back_to_local_sockets():
+    redis = FakeRedis()
+    gateway, _ = _gateway(redis=redis)
+    user = uuid.uuid4()
+    gateway.publish_many(
+        [realtime_message("notification", {"n": n}, [user]) for n in range(3)]
+    )
+    assert [channel for channel, _ in redis.published] == ["realtime"] * 3
+
+    local, sent = _gateway(redis=None)
+
+    async def scenario():
+        sid = await _connect(local, user)
+        await local.start()
+        local._listener.cancel()
+        local.publish("notification", {"id": uuid.uuid4()}, user_ids=[user])
+        await _settle()
+        return sid
+
+    sid = asyncio.run(scenario())
+    assert [(to, event) for to, event, _ in sent] == [(sid, "notification")]
+    assert local.get_stats()["published_locally"] == 1
+
+
+def test_slow_client_is_buffered_then_disconnected():
+    gateway, sent = _gateway(buffer_size=3, slow_consumer_seconds=0.05)
+    user = uuid.uuid4()
+    backlog = {"packets": 100}
+    gateway._transport_backlog = lambda sid: backlog["packets"]
+    disconnected = []
+
+    async def disconnect(sid, namespace=None):
+        disconnected.append(sid)
+        await gateway._disconnect(sid)
+
+    gateway.sio.disconnect = disconnect
+
+    async def scenario():
+        slow = await _connect(gateway, user)
+        for n in range(5):
+            gateway.deliver(realtime_message("notification", n, [user]))
+        await _settle()
+        buffered = gateway.get_stats()["buffered"]
+        # The transport stays full, so the overflowing buffer gets the
+        # client dropped
+        await asyncio.sleep(0.2)
+        return slow, buffered
+
+    slow, buffered = asyncio.run(scenario())
+    assert sent == []
+    # Two oldest dropped, one taken by the sender and held back
+    assert gateway.stats["dropped"] == 2
+    assert buffered == 2
+    assert disconnected == [slow]
+    assert gateway.get_stats()["slow_disconnects"] == 1
+
+
+def test_connection_closes_when_the_token_expires():
+    gateway, _ = _gateway()
+    closed = []
+
+    async def disconnect(sid, namespace=None):
+        closed.append(sid)
+
+    gateway.sio.disconnect = disconnect
+
+    async def scenario():
+        sid = await _connect(gateway, uuid.uuid4())
+        token = create_access_token(
+            {"sub": str(uuid.uuid4())}, expires_delta=timedelta(seconds=1)
+        )
+        short = await gateway.sio.manager.connect("short", "/")
+        await gateway._connect(short, {}, {"token": token})
+        await asyncio.sleep(1.2)
+        return sid, short
+
+    sid, short = asyncio.run(scenario())
+    assert closed == [short]
@@ -0,0 +1,220 @@
+"""
+Tests for the two-tier feed/detail response cache
+"""
+
+import sys
+import uuid
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    etag_matches,
+    make_etag,
+    to_response,
+)
+from app.services.feed_cache import (
+    UNFILTERED_FEED_SCOPE,
+    detail_scope,
+    feed_key,
+    feed_scope,
+    scopes_for_changes,
+)
+
+
+class FakeRedis:
+    """The handful of Redis commands the cache uses, in memory"""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise RedisConnectionError("down")
+
+    def mget(self, keys):
+        self._check()
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, px=None):
+        self._check()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def incr(self, key):
+        self.commands.append(key)
+
+    def expire(self, key, seconds):
+        pass
+
+    def execute(self):
+        self.client._check()
+        for key in self.commands:
+            self.client.data[key] = str(int(self.client.data.get(key, 0)) + 1).encode()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(client, clock=None, l1_ttl=5.0):
+    return ResponseCache(
+        "test",
+        ttl_seconds=60,
+        l1_ttl_seconds=l1_ttl,
+        redis_getter=lambda: client,
+        clock=clock or Clock(),
+    )
+
+
+def counting_builder(body=b'{"items": []}'):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return body
+
+    return build, calls
+
+
+def test_l1_then_l2_hits_avoid_rebuilding():
+    """A second worker reuses what the first one stored in Redis"""
+    client = FakeRedis()
+    first, second = make_cache(client), make_cache(client)
+    build, calls = counting_builder()
+
+    response = first.get_or_build("feed:Lagos", "k", build)
+    assert first.get_or_build("feed:Lagos", "k", build) == response
+    assert second.get_or_build("feed:Lagos", "k", build) == response
+    assert len(calls) == 1
+    assert first.stats["l1_hits"] == 1
+    assert second.stats["l2_hits"] == 1
+
+
+def test_invalidation_reaches_other_workers_through_generations():
+    """Bumping a scope's generation makes every worker rebuild"""
+    client = FakeRedis()
+    writer = make_cache(client)
+    reader = make_cache(client, l1_ttl=0)
+    build, calls = counting_builder()
+
+    reader.get_or_build("feed:Lagos", "k", build)
+    writer.invalidate([feed_scope("Lagos")])
+    reader.get_or_build("feed:Lagos", "k", build)
+    reader.get_or_build("feed:Abuja", "k", build)
+    assert len(calls) == 3
+
+    writer.invalidate_all()
+    reader.get_or_build("feed:Abuja", "k", build)
+    assert len(calls) == 4
+
+
+def test_local_invalidation_drops_l1_immediately():
+    """The invalidating worker never serves its own outdated L1 entry"""
+    cache = make_cache(FakeRedis())
+    build, calls = counting_builder()
+    cache.get_or_build("property:1", "detail", build)
+    cache.invalidate(["property:1"])
+    cache.get_or_build("property:1", "detail", build)
+    assert len(calls) == 2
+
+
+def test_stale_entry_served_while_another_worker_rebuilds():
+    """Only the lock holder rebuilds an expired entry; others get the old copy"""
+    client, clock = FakeRedis(), Clock()
+    cache = make_cache(client, clock, l1_ttl=0)
+    cache.get_or_build("feed:Lagos", "k", lambda: b"old")
+
+    clock.now += 61
+    client.set("test:feed:Lagos:k:lock", b"1", nx=True)
+    stale = cache.get_or_build("feed:Lagos", "k", lambda: b"new")
+    assert stale.body == b"old"
+    assert cache.stats["stale_hits"] == 1
+
+    client.delete("test:feed:Lagos:k:lock")
+    assert cache.get_or_build("feed:Lagos", "k", lambda: b"new").body == b"new"
+
+
+def test_build_errors_are_not_cached():
+    """A 404 raised while building leaves nothing behind"""
+    client = FakeRedis()
+    cache = make_cache(client)
+
+    def missing():
+        raise LookupError("not found")
+
+    with pytest.raises(LookupError):
+        cache.get_or_build("property:1", "detail", missing)
+    assert not [key for key in client.data if not key.endswith(":lock")]
+    assert cache.get_or_build("property:1", "detail", lambda: b"{}").body == b"{}"
+
+
+def test_redis_outage_falls_back_to_building():
+    """Redis errors are cache misses, not request failures"""
+    client = FakeRedis()
+    client.down = True
+    cache = make_cache(client, l1_ttl=0)
+    build, calls = counting_builder()
+    assert cache.get_or_build("feed:*", "k", build).body == b'{"items": []}'
+    cache.invalidate(["feed:*"])
+    assert len(calls) == 1
+
+
+def test_etag_and_conditional_response():
+    """Matching If-None-Match gets an empty 304 with the same ETag"""
+    cached = CachedResponse(make_etag(b"{}"), b"{}")
+    assert cached.etag == make_etag(b"{}") != make_etag(b"[]")
+    assert etag_matches(f'"other", {cached.etag}', cached.etag)
+    assert not etag_matches(None, cached.etag)
+
+    full = to_response(cached)
+    assert full.status_code == 200 and full.body == b"{}"
+    assert full.headers["etag"] == cached.etag
+
+    not_modified = to_response(cached, cached.etag)
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert not_modified.headers["etag"] == cached.etag
+
+
+def test_feed_key_ignores_unset_params_and_order():
+    """Equivalent requests share one cache entry"""
+    assert feed_key(sort="newest", state="Lagos", lga=None, include=[]) == feed_key(
+        state="Lagos", sort="newest"
+    )
+    assert feed_key(state="Lagos") != feed_key(state="Abuja")
+
+
+def test_scopes_for_changes_cover_detail_state_and_unfiltered_feed():
+    property_id = uuid.uuid4()
+    assert scopes_for_changes([{"id": property_id, "state": "Lagos"}]) == {
+        detail_scope(property_id),
+        feed_scope("Lagos"),
+        UNFILTERED_FEED_SCOPE,
+    }
@@ -0,0 +1,244 @@
+"""
+Tests for resumable multipart uploads
+"""
+
+import json
+import sys
+import uuid
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import boto3
+import pytest
+from botocore.config import Config
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services.resumable_uploads import (
+    MIN_PART_SIZE,
+    ResumableUploadService,
+    part_sizes,
+)
+
+PROPERTY_ID = uuid.uuid4()
+AGENT_ID = uuid.uuid4()
+MIB = 1024 * 1024
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise RedisConnectionError("down")
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value.encode()
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+
+class FakeBucket:
+    """Stand-in for MinIO's multipart API; list_parts pages two at a time"""
+
+    def __init__(self):
+        self.uploads = {}
+        self.objects = {}
+        self.aborted = []
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, upload_id, number, size):
+        self.uploads[upload_id][number] = {"ETag": f'"etag-{number}"', "Size": size}
+
+    def list_parts(self, Bucket, Key, UploadId, PartNumberMarker=0):
+        numbers = sorted(n for n in self.uploads[UploadId] if n > PartNumberMarker)
+        page = numbers[:2]
+        return {
+            "Parts": [{"PartNumber": n, **self.uploads[UploadId][n]} for n in page],
+            "IsTruncated": len(numbers) > 2,
+            "NextPartNumberMarker": page[-1] if page else 0,
+        }
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = MultipartUpload["Parts"]
+        self.objects[Key] = [part["ETag"] for part in parts]
+        del self.uploads[UploadId]
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+        self.uploads.pop(UploadId, None)
+
+
+class FakeMedia:
+    def __init__(self):
+        self.attached = []
+        self.failure = None
+
+    def key_prefix(self, property_id):
+        return f"properties/{property_id}/"
+
+    def attach(self, db, property_id, keys):
+        if self.failure is not None:
+            raise self.failure
+        self.attached.extend(keys)
+        return list(self.attached)
+
+
+@pytest.fixture
+def env():
+    redis, bucket, media = FakeRedis(), FakeBucket(), FakeMedia()
+    signer = boto3.client(
+        "s3",
+        endpoint_url="http://localhost:9000",
+        aws_access_key_id="minio",
+        aws_secret_access_key="minio-secret",
+        region_name="us-east-1",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+    service = ResumableUploadService(
+        bucket="reent",
+        redis_getter=lambda: redis,
+        client_factory=lambda: bucket,
+        signer_factory=lambda: signer,
+        media=media,
+    )
+    return service, redis, bucket, media
+
+
+def _multipart_id(redis):
+    (raw,) = redis.data.values()
+    return json.loads(raw)["multipart_id"]
+
+
+def test_part_sizes():
+    assert part_sizes(20 * MIB, 8 * MIB) == [8 * MIB, 8 * MIB, 4 * MIB]
+    assert part_sizes(100, 8 * MIB) == [100]
+
+
+def test_resume_from_committed_parts(env):
+    """Status reflects what storage has; complete assembles in order"""
+    service, redis, bucket, media = env
+    session = service.create(PROPERTY_ID, AGENT_ID, "video/mp4", 45 * MIB)
+    assert session["part_count"] == 6
+    upload_id = session["upload_id"]
+    multipart_id = _multipart_id(redis)
+
+    urls = service.part_urls(upload_id, PROPERTY_ID, AGENT_ID, [1, 2, 4])
+    query = parse_qs(urlparse(urls[4]).query)
+    assert query["partNumber"] == ["4"]
+    assert query["uploadId"] == [multipart_id]
+
+    # Parts 1, 2 and 4 land (in parallel); part 3 was cut off
+    for number in (1, 2, 4):
+        bucket.upload_part(multipart_id, number, 8 * MIB)
+    status = service.status(upload_id, PROPERTY_ID, AGENT_ID)
+    assert status["committed_parts"] == [1, 2, 4]
+    assert status["committed_offset"] == 16 * MIB
+
+    with pytest.raises(ValueError, match="3, 5, 6"):
+        service.complete(None, upload_id, PROPERTY_ID, AGENT_ID)
+
+    for number, size in ((3, 8 * MIB), (5, 8 * MIB), (6, 5 * MIB)):
+        bucket.upload_part(multipart_id, number, size)
+    media_urls = service.complete(None, upload_id, PROPERTY_ID, AGENT_ID)
+
+    assert media_urls == [session["key"]]
+    assert bucket.objects[session["key"]] == [f'"etag-{n}"' for n in range(1, 7)]
+    assert redis.data == {}
+
+
+def _assembled_upload(service, redis, bucket):
+    session = service.create(PROPERTY_ID, AGENT_ID, "video/mp4", 10 * MIB)
+    multipart_id = _multipart_id(redis)
+    bucket.upload_part(multipart_id, 1, 8 * MIB)
+    bucket.upload_part(multipart_id, 2, 2 * MIB)
+    return session
+
+
+def test_complete_keeps_the_session_until_attached(env):
+    """A failed attach can be retried without assembling again"""
+    service, redis, bucket, media = env
+    session = _assembled_upload(service, redis, bucket)
+    upload_id = session["upload_id"]
+
+    media.failure = RuntimeError("database unavailable")
+    with pytest.raises(RuntimeError):
+        service.complete(None, upload_id, PROPERTY_ID, AGENT_ID)
+    assert session["key"] in bucket.objects
+    status = service.status(upload_id, PROPERTY_ID, AGENT_ID)
+    assert status["committed_offset"] == 10 * MIB
+
+    media.failure = None
+    assert service.complete(None, upload_id, PROPERTY_ID, AGENT_ID) == [session["key"]]
+    assert redis.data == {}
+
+
+def test_rejected_upload_is_deleted(env):
+    """An object the listing refuses does not linger in the bucket"""
+    service, redis, bucket, media = env
+    session = _assembled_upload(service, redis, bucket)
+
+    media.failure = ValueError("A listing can have at most 20 media files")
+    with pytest.raises(ValueError, match="at most 20"):
+        service.complete(None, session["upload_id"], PROPERTY_ID, AGENT_ID)
+    assert bucket.objects == {}
+    assert redis.data == {}
+
+
+def test_sessions_are_private_to_agent_and_listing(env):
+    service, _, _, _ = env
+    upload_id = service.create(PROPERTY_ID, AGENT_ID, "video/mp4", 10 * MIB)[
+        "upload_id"
+    ]
+    with pytest.raises(LookupError):
+        service.status(upload_id, PROPERTY_ID, uuid.uuid4())
+    with pytest.raises(LookupError):
+        service.status(upload_id, uuid.uuid4(), AGENT_ID)
+    with pytest.raises(ValueError):
+        service.part_urls(upload_id, PROPERTY_ID, AGENT_ID, [3])
+
+
+def test_abort_discards_parts(env):
+    service, redis, bucket, _ = env
+    upload_id = service.create(PROPERTY_ID, AGENT_ID, "video/mp4", 10 * MIB)[
+        "upload_id"
+    ]
+    multipart_id = _multipart_id(redis)
+    service.abort(upload_id, PROPERTY_ID, AGENT_ID)
+
+    assert bucket.aborted == [multipart_id]
+    with pytest.raises(LookupError):
+        service.status(upload_id, PROPERTY_ID, AGENT_ID)
+
+
+def test_create_validates_and_needs_redis(env):
+    service, redis, bucket, _ = env
+    with pytest.raises(ValueError):
+        service.create(PROPERTY_ID, AGENT_ID, "video/mp4", 10 * MIB, MIN_PART_SIZE - 1)
+    with pytest.raises(ValueError):
+        service.create(PROPERTY_ID, AGENT_ID, "application/zip", 10 * MIB)
+
+    redis.down = True
+    with pytest.raises(RuntimeError):
+        service.create(PROPERTY_ID, AGENT_ID, "video/mp4", 10 * MIB)
+    # The orphaned multipart upload is cleaned up
+    assert len(bucket.aborted) == 1
@@ -0,0 +1,223 @@
+"""
+Tests for property text search ranking and the in-memory index
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+from sqlalchemy import literal_column
+from sqlalchemy.dialects import postgresql
+
+from app.models.base import SessionLocal
+from app.services import search
+from app.services.search import (
+    InMemorySearchIndex,
+    TRIGRAM_SIMILARITY_THRESHOLD,
+    PostgresSearchBackend,
+    PropertySearchService,
+    blend,
+    highlight,
+    html_escaped,
+    tokenize,
+)
+
+
+def _index():
+    now = datetime.now(timezone.utc)
+    index = InMemorySearchIndex()
+    ids = {name: uuid.uuid4() for name in ("duplex", "flat", "abuja", "old")}
+    index.add(
+        ids["duplex"],
+        title="4 bedroom duplex in Lekki",
+        description="Spacious duplex with a boys quarters near the expressway",
+        lga="Eti-Osa",
+        state="Lagos",
+        created_at=now,
+    )
+    index.add(
+        ids["flat"],
+        title="Self-contain in Yaba",
+        description="Clean self-contain close to Unilag",
+        lga="Yaba",
+        state="Lagos",
+        created_at=now,
+    )
+    index.add(
+        ids["abuja"],
+        title="Duplex in Gwarinpa",
+        description="Serviced duplex",
+        lga="Gwarinpa",
+        state="FCT",
+        created_at=now,
+    )
+    index.add(
+        ids["old"],
+        title="Duplex in Lekki",
+        description="Older listing",
+        lga="Eti-Osa",
+        state="Lagos",
+        created_at=now - timedelta(days=90),
+    )
+    return index, ids
+
+
+def test_tokenize_splits_hyphens_and_plurals():
+    """Hyphenated words index as a whole and by part; plurals are folded"""
+    assert tokenize("Self-Contain flats") == ["self-contain", "self", "contain", "flat"]
+
+
+def test_title_match_outranks_older_duplicate():
+    """Equal text relevance falls back to recency"""
+    index, ids = _index()
+    results = index.search("duplex lekki")
+    assert [hit["id"] for hit in results[:2]] == [ids["duplex"], ids["old"]]
+
+
+def test_misspelled_query_is_corrected():
+    """Trigram correction maps unknown terms onto the vocabulary"""
+    index, ids = _index()
+    results = index.search("dupelx lekki")
+    assert results[0]["id"] == ids["duplex"]
+
+
+def test_state_filter_and_pagination():
+    """State filter drops other states; offset pages through results"""
+    index, ids = _index()
+    lagos = index.search("duplex", state="Lagos")
+    assert ids["abuja"] not in {hit["id"] for hit in lagos}
+
+    everything = [hit["id"] for hit in index.search("duplex")]
+    second = [hit["id"] for hit in index.search("duplex", limit=1, offset=1)]
+    assert second == everything[1:2]
+
+
+def test_remove_drops_document_and_vocabulary():
+    """Removed listings stop matching and their unique terms are forgotten"""
+    index, ids = _index()
+    index.remove(ids["flat"])
+    assert index.search("yaba") == []
+    assert len(index) == 3
+
+
+def test_highlight_wraps_matches():
+    """Snippets wrap matched words in <b> tags"""
+    snippet = highlight("Clean self-contain close to Unilag", {"unilag"})
+    assert snippet == "Clean self-contain close to <b>Unilag</b>"
+    assert highlight("Nothing here", {"duplex"}) is None
+
+
+def test_snippets_escape_listing_markup():
+    """Agent-written HTML in a description comes back inert"""
+    snippet = highlight('Duplex <img src=x onerror="alert(1)"> & BQ', {"duplex"})
+    assert snippet == (
+        "<b>Duplex</b> &lt;img src=x onerror=&quot;alert(1)&quot;&gt; &amp; BQ"
+    )
+
+    compiled = html_escaped(literal_column("properties.description")).compile(
+        dialect=postgresql.dialect()
+    )
+    # & is replaced innermost so the entities are not escaped twice
+    assert "replace(properties.description, %(replace_1)s" in str(compiled)
+    assert compiled.params["replace_1"] == "&"
+    assert compiled.params["replace_4"] == "&lt;"
+
+
+def test_blend_prefers_recent_and_popular():
+    """Recency and views lift the score but never beyond text relevance"""
+    now = datetime.now(timezone.utc)
+    fresh = blend(0.5, now, 0)
+    stale = blend(0.5, now - timedelta(days=60), 0)
+    popular = blend(0.5, now - timedelta(days=60), 1000)
+    assert fresh > stale
+    assert popular > stale
+    assert blend(0.5, now, 10**6) <= 0.5
+
+
+def test_postgres_query_uses_indexed_expressions():
+    """The SQL matches on the GIN tsvector and the trigram expression index"""
+    db = SessionLocal()
+    try:
+        query = PostgresSearchBackend().build_query(db, "duplex lekki", limit=20)
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    finally:
+        db.close()
+
+    assert "properties.search_vector @@ websearch_to_tsquery" in sql
+    # pyformat escapes the pg_trgm operator as <%%
+    assert "<%% lower(properties.title || ' ' || properties.lga)" in sql
+    assert "ts_headline" in sql
+    assert "lower(properties.title || ' ' || properties.lga)) >= " in sql
+
+
+def test_postgres_search_uses_the_shared_trigram_threshold():
+    """<% is set to the in-memory backend's threshold before the query runs"""
+
+    class RecordingSession:
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, statement):
+            self.statements.append(statement)
+
+    class NoQuery:
+        def all(self):
+            return []
+
+    backend = PostgresSearchBackend()
+    backend.build_query = lambda *args: NoQuery()
+    db = RecordingSession()
+    assert backend.search(db, "dupelx", limit=20) == []
+
+    (statement,) = db.statements
+    compiled = statement.compile(dialect=postgresql.dialect())
+    assert "set_config" in str(compiled)
+    assert list(compiled.params.values()) == [
+        "pg_trgm.word_similarity_threshold",
+        str(TRIGRAM_SIMILARITY_THRESHOLD),
+        True,
+    ]
+
+
+def test_memory_search_pages_skip_listings_no_longer_live(monkeypatch):
+    """Expired hits are dropped before paging and the page is refilled"""
+    monkeypatch.setattr(search, "MEMORY_SEARCH_BATCH", 2)
+    now = datetime.now(timezone.utc)
+    index = InMemorySearchIndex()
+    ids = [uuid.uuid4() for _ in range(6)]
+    for age, property_id in enumerate(ids):
+        index.add(
+            property_id,
+            title="Duplex in Lekki",
+            state="Lagos",
+            created_at=now - timedelta(days=age),
+        )
+    expired = {ids[0], ids[1], ids[3]}
+
+    class StubbedSearchService(PropertySearchService):
+        def __init__(self):
+            super().__init__(backend="memory")
+            self.memory_index = index
+            self._memory_loaded = True
+            self.lookups = []
+
+        def _live_rows(self, db, property_ids):
+            self.lookups.append(list(property_ids))
+            return {
+                property_id: SimpleNamespace(_mapping={"id": property_id})
+                for property_id in property_ids
+                if property_id not in expired
+            }
+
+    service = StubbedSearchService()
+    first = service._search_memory(None, "duplex", 2, 0, None)
+    assert [row.id for row in first] == [ids[2], ids[4]]
+    second = service._search_memory(None, "duplex", 2, 2, None)
+    assert [row.id for row in second] == [ids[5]]
+    assert len(service.lookups[0]) == 2
@@ -0,0 +1,182 @@
+"""
+Tests for share link resolution and batched click tracking
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.engagement import PropertyShare
+from app.services.share_links import (
+    PendingClicks,
+    ShareLink,
+    ShareLinkService,
+    share_redirect_url,
+    write_click_batch,
+)
+
+NOW = datetime(2024, 3, 10, 12, 0)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise RedisConnectionError("down")
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value.encode()
+
+
+@pytest.fixture
+def store(engine, add_listing, add_user):
+    """Adds shares of new listings; the session factory counts reads"""
+    loads = []
+    factory = sessionmaker(bind=engine)
+
+    def session_factory():
+        loads.append(1)
+        return factory()
+
+    def add_share(token):
+        share_id, property_id = uuid.uuid4(), add_listing()
+        with engine.begin() as conn:
+            conn.execute(
+                PropertyShare.__table__.insert().values(
+                    id=share_id,
+                    property_id=property_id,
+                    shared_by=add_user(),
+                    share_method="link",
+                    share_token=token,
+                )
+            )
+        return share_id, property_id
+
+    return add_share, session_factory, loads
+
+
+def test_resolve_reads_the_database_once_per_token(store):
+    add_share, session_factory, loads = store
+    share_id, property_id = add_share("abc123")
+    redis = FakeRedis()
+    service = ShareLinkService(
+        session_factory=session_factory, redis_getter=lambda: redis, clock=lambda: NOW
+    )
+
+    for _ in range(50):
+        assert service.resolve("abc123") == ShareLink(share_id, property_id)
+    assert len(loads) == 1
+
+    # Another worker finds it in Redis
+    other = ShareLinkService(
+        session_factory=session_factory, redis_getter=lambda: redis
+    )
+    assert other.lookup("abc123") == ShareLink(share_id, property_id)
+    assert len(loads) == 1
+
+
+def test_unknown_tokens_are_cached_as_missing(store):
+    add_share, session_factory, loads = store
+    redis = FakeRedis()
+    service = ShareLinkService(
+        session_factory=session_factory, redis_getter=lambda: redis
+    )
+
+    assert service.resolve("nope") is None
+    assert service.resolve("nope") is None
+    assert service.resolve("x" * 101) is None
+    assert len(loads) == 1
+    assert service.get_stats()["accepted"] == 0
+
+
+def test_resolve_works_without_redis(store):
+    add_share, session_factory, _ = store
+    share_id, property_id = add_share("abc123")
+    redis = FakeRedis()
+    redis.down = True
+    service = ShareLinkService(
+        session_factory=session_factory, redis_getter=lambda: redis
+    )
+
+    assert service.resolve("abc123") == ShareLink(share_id, property_id)
+
+
+def test_clicks_are_coalesced_into_one_update_per_share(store):
+    add_share, session_factory, _ = store
+    first, _ = add_share("first")
+    second, _ = add_share("second")
+    times = iter(NOW + timedelta(seconds=n) for n in range(100))
+    service = ShareLinkService(
+        session_factory=session_factory,
+        redis_getter=lambda: None,
+        writer=lambda clicks: write_click_batch(clicks, session_factory),
+        clock=lambda: next(times),
+    )
+
+    for _ in range(30):
+        service.resolve("first")
+    service.resolve("second")
+    assert service.flush() == 31
+    assert service.flush() == 0
+    service.resolve("first")
+    assert service.flush() == 1
+
+    with session_factory() as db:
+        rows = {row.id: row for row in db.execute(select(PropertyShare.__table__))}
+    assert rows[first].click_count == 31
+    assert rows[first].clicked_at == NOW
+    assert rows[first].last_clicked_at == NOW + timedelta(seconds=31)
+    assert rows[second].click_count == 1
+
+
+def test_failed_flush_is_retried_and_pending_is_bounded():
+    written, failing = [], [True]
+
+    def writer(clicks):
+        if failing[0]:
+            raise RuntimeError("database down")
+        written.append(dict(clicks))
+
+    service = ShareLinkService(
+        redis_getter=lambda: None, writer=writer, max_pending=2, clock=lambda: NOW
+    )
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    service.record_click(first)
+    service.record_click(second)
+    assert not service.record_click(third)
+    assert service.flush() == 0
+
+    service.record_click(first)
+    failing[0] = False
+    assert service.flush() == 3
+    assert written[0][first] == PendingClicks(2, NOW, NOW)
+    stats = service.get_stats()
+    assert (stats["dropped"], stats["failed_flushes"], stats["pending_shares"]) == (
+        1,
+        1,
+        0,
+    )
+
+
+def test_redirect_url_points_at_the_listing():
+    link = ShareLink(uuid.uuid4(), uuid.uuid4())
+    url = share_redirect_url(link, "a b")
+    assert url.endswith(f"/properties/{link.property_id}?ref=a%20b")
@@ -0,0 +1,141 @@
+"""
+Tests for the geohash spatial index and haversine ranking
+"""
+
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+from sqlalchemy.dialects import postgresql
+
+from app.core import geohash
+from app.models.base import SessionLocal
+from app.services import spatial
+from app.services.spatial import (
+    InMemorySpatialIndex,
+    SpatialSearchService,
+    bounding_box,
+    haversine_km,
+)
+
+
+def test_geohash_encode_and_decode():
+    """Known reference value and cell containment"""
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    min_lat, min_lng, max_lat, max_lng = geohash.decode_bbox(
+        geohash.encode(6.5244, 3.3792)
+    )
+    assert min_lat <= 6.5244 <= max_lat
+    assert min_lng <= 3.3792 <= max_lng
+
+
+def test_cover_bbox_contains_every_point_in_box():
+    """Every point inside the box falls under one of the covering prefixes"""
+    box = bounding_box(6.5244, 3.3792, 5)
+    prefixes = geohash.cover_bbox(*box)
+    assert len(prefixes) <= geohash.MAX_COVER_CELLS
+
+    rng = random.Random(7)
+    for _ in range(500):
+        lat = rng.uniform(box[0], box[2])
+        lng = rng.uniform(box[1], box[3])
+        code = geohash.encode(lat, lng)
+        assert any(code.startswith(prefix) for prefix in prefixes)
+
+
+def test_haversine_numpy_and_pure_python_agree(monkeypatch):
+    """The vectorized and fallback paths return the same distances"""
+    lats = [6.4550, 6.6018, 9.0765]
+    lngs = [3.3941, 3.3515, 7.3986]
+    vectorized = haversine_km(6.5244, 3.3792, lats, lngs)
+
+    monkeypatch.setattr(spatial, "np", None)
+    fallback = haversine_km(6.5244, 3.3792, lats, lngs)
+
+    assert [round(d, 6) for d in vectorized] == [round(d, 6) for d in fallback]
+    # Lagos to Abuja is roughly 525km
+    assert 500 < fallback[2] < 550
+
+
+def test_in_memory_index_matches_brute_force():
+    """Radius and nearest-k results equal a full scan"""
+    rng = random.Random(42)
+    index = InMemorySpatialIndex()
+    points = {}
+    for key in range(2000):
+        lat, lng = rng.uniform(6.35, 6.70), rng.uniform(3.10, 3.70)
+        points[key] = (lat, lng)
+        index.add(key, lat, lng)
+
+    centre = (6.5244, 3.3792)
+    distances = dict(
+        zip(
+            points,
+            haversine_km(
+                *centre,
+                [p[0] for p in points.values()],
+                [p[1] for p in points.values()],
+            ),
+        )
+    )
+
+    within = sorted(key for key, d in distances.items() if d <= 3)
+    found = index.search_radius(*centre, 3, limit=len(points))
+    assert sorted(key for key, _ in found) == within
+
+    nearest_keys = [key for key, _ in index.nearest(*centre, k=10)]
+    assert nearest_keys == sorted(distances, key=distances.get)[:10]
+
+    index.remove(nearest_keys[0])
+    assert nearest_keys[0] not in [key for key, _ in index.nearest(*centre, k=10)]
+
+
+def test_candidates_are_taken_nearest_first():
+    """The candidate cap applies after ordering by approximate distance"""
+    db = SessionLocal()
+    try:
+        query = SpatialSearchService().candidate_query(db, 6.5244, 3.3792, 5)
+        sql = str(query.limit(10).statement.compile(dialect=postgresql.dialect()))
+    finally:
+        db.close()
+
+    order_by = sql[sql.index("ORDER BY") :]
+    assert "properties.latitude - " in order_by
+    assert "properties.longitude - " in order_by
+    assert order_by.index("properties.id") < order_by.index("LIMIT")
+
+
+def test_search_radius_flags_truncated_candidates(monkeypatch):
+    """More rows in the box than the cap sets truncated"""
+    monkeypatch.setattr(spatial, "MAX_CANDIDATES", 3)
+    min_lat, min_lng, _, _ = bounding_box(6.5244, 3.3792, 1)
+    # Box corners lie outside the circle, so nothing needs rendering
+    corner = SimpleNamespace(latitude=min_lat, longitude=min_lng, agent_id=None)
+
+    class StubbedSpatialService(SpatialSearchService):
+        def __init__(self, rows):
+            self.rows = rows
+            self.limits = []
+
+        def candidate_query(self, db, latitude, longitude, radius_km, **filters):
+            return self
+
+        def limit(self, limit):
+            self.limits.append(limit)
+            return self
+
+        def all(self):
+            return self.rows[: self.limits[-1]]
+
+    service = StubbedSpatialService([corner] * 4)
+    assert service.search_radius(None, 6.5244, 3.3792, 1, 10) == ([], True)
+    assert service.limits == [4]
+
+    service = StubbedSpatialService([corner] * 3)
+    assert service.search_radius(None, 6.5244, 3.3792, 1, 10) == ([], False)
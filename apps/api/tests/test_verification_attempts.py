@@ -0,0 +1,168 @@
+"""
+Tests for the keyset-paginated /verification/attempts endpoint
+"""
+
+import asyncio
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import verification
+from app.api.v1.verification import (
+    ATTEMPT_EXPORT_BATCH_SIZE,
+    get_verification_attempts,
+)
+from app.core.pagination import encode_cursor
+from app.models.engagement import AgentVerificationAttempt
+
+# sqlite stores naive datetimes
+NOW = datetime(2024, 3, 10, 12, 0)
+AGENT_ID = uuid.uuid4()
+OTHER_AGENT_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def add_attempts(engine, add_user):
+    """Insert attempt rows for AGENT_ID and OTHER_AGENT_ID"""
+    add_user("agent", id=AGENT_ID)
+    add_user("agent", id=OTHER_AGENT_ID)
+
+    def add(rows):
+        with engine.begin() as conn:
+            conn.execute(AgentVerificationAttempt.__table__.insert(), rows)
+
+    return add
+
+
+def _attempt(stamp, agent_id=AGENT_ID):
+    return {
+        "id": uuid.uuid4(),
+        "agent_id": agent_id,
+        "attempt_type": "bvn",
+        "status": "failed",
+        "attempt_count": 1,
+        "last_attempt_at": stamp,
+        "created_at": stamp,
+    }
+
+
+@pytest.fixture
+def attempts_page(db, add_attempts):
+    """The endpoint over the attempts table, as the agent"""
+
+    # Five attempts, two sharing a timestamp so the id breaks the tie
+    stamps = [NOW - timedelta(minutes=m) for m in (0, 1, 1, 2, 3)]
+    rows = [_attempt(stamp) for stamp in stamps]
+    rows.append(_attempt(NOW, agent_id=OTHER_AGENT_ID))
+    add_attempts(rows)
+
+    agent = SimpleNamespace(id=AGENT_ID, role="agent")
+
+    def page(limit=20, cursor=None):
+        return asyncio.run(
+            get_verification_attempts(
+                cursor=cursor,
+                limit=limit,
+                format="json",
+                agent_id=None,
+                current_user=agent,
+                db=db,
+            )
+        )
+
+    expected = sorted(
+        (row for row in rows if row["agent_id"] == AGENT_ID),
+        key=lambda row: (row["created_at"], row["id"]),
+        reverse=True,
+    )
+    return page, [str(row["id"]) for row in expected]
+
+
+def test_attempts_page_through_newest_first(attempts_page):
+    """Pages follow (created_at, id) descending with no gaps or repeats"""
+    page, expected = attempts_page
+
+    first = page(limit=2)
+    assert first["has_more"] is True
+    assert [attempt["id"] for attempt in first["attempts"]] == expected[:2]
+
+    seen = [attempt["id"] for attempt in first["attempts"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        result = page(limit=2, cursor=cursor)
+        seen += [attempt["id"] for attempt in result["attempts"]]
+        cursor = result["next_cursor"]
+        assert result["has_more"] is (cursor is not None)
+    assert seen == expected
+
+
+def test_exact_last_page_has_no_cursor(attempts_page):
+    """A page that ends on the last row reports nothing more"""
+    page, expected = attempts_page
+    result = page(limit=len(expected))
+    assert result["count"] == len(expected)
+    assert result["has_more"] is False
+    assert result["next_cursor"] is None
+
+
+def test_invalid_cursor_returns_400(attempts_page):
+    page, _ = attempts_page
+    with pytest.raises(HTTPException) as exc:
+        page(cursor="garbage")
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        page(cursor=encode_cursor("not-a-date", "not-a-uuid"))
+    assert exc.value.status_code == 400
+
+
+def test_ndjson_export_streams_every_batch_in_order(monkeypatch, engine, add_attempts):
+    """The export reads its own session, past the request's, batch by batch"""
+    # Pairs of equal timestamps so batch boundaries fall inside ties
+    rows = [
+        _attempt(NOW - timedelta(seconds=position // 2))
+        for position in range(2 * ATTEMPT_EXPORT_BATCH_SIZE + 3)
+    ]
+    rows.append(_attempt(NOW, agent_id=OTHER_AGENT_ID))
+    add_attempts(rows)
+    monkeypatch.setattr(verification, "SessionLocal", sessionmaker(bind=engine))
+
+    request_db = sessionmaker(bind=engine)()
+    response = asyncio.run(
+        get_verification_attempts(
+            cursor=None,
+            limit=20,
+            format="ndjson",
+            agent_id=None,
+            current_user=SimpleNamespace(id=AGENT_ID, role="agent"),
+            db=request_db,
+        )
+    )
+    # get_db closes the request session before the body is sent
+    request_db.close()
+
+    async def read_body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    lines = asyncio.run(read_body()).decode("utf-8").splitlines()
+    expected = sorted(
+        (row for row in rows if row["agent_id"] == AGENT_ID),
+        key=lambda row: (row["created_at"], row["id"]),
+        reverse=True,
+    )
+    assert response.media_type == "application/x-ndjson"
+    assert len(lines) == len(expected) > ATTEMPT_EXPORT_BATCH_SIZE
+    assert [json.loads(line)["id"] for line in lines] == [
+        str(row["id"]) for row in expected
+    ]
@@ -0,0 +1,160 @@
+"""
+Tests for the cached verification status read path
+Run with pytest; loaders are stubbed except where row creation is tested
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.cache import TTLCache
+from app.models.engagement import AgentVerification
+from app.services.verification_status import VerificationStatusService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubbedStatusService(VerificationStatusService):
+    """Status service whose database loaders are replaced by fixtures"""
+
+    def __init__(self, rows):
+        super().__init__(ttl_seconds=60)
+        self.rows = rows
+        self.badge_queries = []
+        self.lock_queries = 0
+
+    def _load_badges(self, agent_ids, db):
+        self.badge_queries.append(list(agent_ids))
+        return {
+            agent_id: dict(self.rows[agent_id])
+            for agent_id in agent_ids
+            if agent_id in self.rows
+        }
+
+    def _load_locked_until(self, agent_id, db):
+        self.lock_queries += 1
+        return self.rows.get(agent_id, {}).get("locked_until")
+
+
+def _verified_row():
+    return {
+        "verification_status": "verified",
+        "credibility_score": 50,
+        "verification_badge_visible": True,
+        "locked_until": None,
+    }
+
+
+def test_ttl_cache_expiry_and_eviction():
+    """Entries expire after their TTL and the oldest entry is evicted first"""
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=10, max_entries=2, clock=clock)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # touches "a" so "b" is least recent
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1  # only "c" remains until it is read
+
+
+def test_badges_batch_uses_one_query_and_caches_misses():
+    """Many agents resolve in one loader call, including agents without a row"""
+    verified_id, unknown_id = uuid.uuid4(), uuid.uuid4()
+    service = StubbedStatusService({verified_id: _verified_row()})
+
+    badges = service.get_badges([verified_id, unknown_id, verified_id], db=None)
+
+    assert list(badges) == [verified_id, unknown_id]
+    assert badges[verified_id]["verification_badge_visible"] is True
+    assert badges[unknown_id]["verification_status"] == "pending"
+    assert service.badge_queries == [[verified_id, unknown_id]]
+
+    # Second lookup is served entirely from cache
+    service.get_badges([verified_id, unknown_id], db=None)
+    assert len(service.badge_queries) == 1
+
+    # Invalidation forces a reload for that agent only
+    service.invalidate(unknown_id)
+    service.get_badges([verified_id, unknown_id], db=None)
+    assert service.badge_queries[-1] == [unknown_id]
+
+
+def test_expired_lock_is_reported_as_failed():
+    """A cached lock stops applying once locked_until has passed"""
+    agent_id = uuid.uuid4()
+    row = _verified_row()
+    row.update(
+        verification_status="locked",
+        verification_badge_visible=False,
+        locked_until=datetime.now(timezone.utc) - timedelta(minutes=1),
+    )
+    service = StubbedStatusService({agent_id: row})
+
+    badge = service.get_badges([agent_id], db=None)[agent_id]
+
+    assert badge["is_locked"] is False
+    assert badge["verification_status"] == "failed"
+
+
+def test_lock_gate_reads_the_database_not_the_cache():
+    """A lock recorded on another worker applies despite a cached status"""
+    agent_id = uuid.uuid4()
+    row = {**_verified_row(), "verification_status": "failed"}
+    service = StubbedStatusService({agent_id: row})
+    service.status_cache.set(agent_id, {**row, "recent_attempts": []})
+
+    # Another worker records the third failure
+    row["locked_until"] = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    assert service.is_locked(agent_id, db=None) is True
+    assert service.lock_queries == 1
+    assert service.get_status(agent_id, db=None)["is_locked"] is False
+
+
+def test_first_attempts_share_one_verification_row(engine, add_user):
+    """A row created by a concurrent first attempt is reused, not duplicated"""
+    Session = sessionmaker(bind=engine)
+    service = VerificationStatusService(ttl_seconds=60)
+    agent_id = add_user("agent")
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    first, second = Session(), Session()
+    created = service._get_or_create(agent_id, first)
+    first.commit()
+    # The second request started before the row existed
+    reused = service._get_or_create(agent_id, second)
+    reused.verification_status = "failed"
+    second.commit()
+
+    assert reused.id == created.id
+    # Both requests insert; the loser's insert is a no-op, not an error
+    inserts = [sql for sql in statements if sql.startswith("INSERT")]
+    assert len(inserts) == 2
+    assert all("ON CONFLICT (agent_id) DO NOTHING" in sql for sql in inserts)
+    with Session() as db:
+        rows = db.query(AgentVerification).all()
+        assert [row.verification_status for row in rows] == ["failed"]
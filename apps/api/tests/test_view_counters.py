@@ -0,0 +1,135 @@
+"""
+Tests for daily view buckets, view_count_7d refresh and trending scores
+"""
+
+import sys
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+import pytest
+from sqlalchemy import select
+
+from app.models.property import Property, PropertyViewDaily
+from app.services.view_counters import (
+    ViewCounterService,
+    bucket_day,
+    count_buckets,
+    trending_weight,
+)
+from app.services.view_ingestion import ViewEvent
+
+TODAY = date(2024, 3, 10)
+EDITED_AT = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def seed(engine, add_listing):
+    """Add listings edited at EDITED_AT, then their daily view buckets"""
+
+    def add(rows, bucket_rows):
+        for row in rows:
+            add_listing(updated_at=EDITED_AT, **row)
+        if bucket_rows:
+            with engine.begin() as conn:
+                conn.execute(PropertyViewDaily.__table__.insert(), bucket_rows)
+
+    return add
+
+
+def _counters(db):
+    return {
+        row.id: (row.view_count_7d, row.trending_score, row.updated_at)
+        for row in db.execute(
+            select(
+                Property.id,
+                Property.view_count_7d,
+                Property.trending_score,
+                Property.updated_at,
+            )
+        )
+    }
+
+
+def test_bucket_day_uses_utc():
+    """Views are bucketed by UTC day regardless of the input timezone"""
+    lagos = timezone(timedelta(hours=1))
+    assert bucket_day(datetime(2024, 3, 10, 0, 30, tzinfo=lagos)) == date(2024, 3, 9)
+    assert bucket_day(datetime(2024, 3, 10, 0, 30)) == date(2024, 3, 10)
+
+
+def test_count_buckets_coalesces_per_property_day():
+    """A batch collapses to one bucket increment per property and day"""
+    property_id = uuid.uuid4()
+    noon = datetime(2024, 3, 10, 12, tzinfo=timezone.utc)
+    events = [ViewEvent(property_id, None, noon) for _ in range(3)]
+    events.append(ViewEvent(property_id, None, noon - timedelta(days=1)))
+    assert count_buckets(events) == {
+        (property_id, date(2024, 3, 10)): 3,
+        (property_id, date(2024, 3, 9)): 1,
+    }
+
+
+def test_refresh_sums_window_and_decays_trending(db, seed):
+    """view_count_7d covers the last 7 days; older buckets are ignored"""
+    property_id = uuid.uuid4()
+    seed(
+        [{"id": property_id, "view_count_7d": 999}],
+        [
+            {"property_id": property_id, "day": TODAY, "views": 10},
+            {"property_id": property_id, "day": TODAY - timedelta(days=2), "views": 4},
+            {"property_id": property_id, "day": TODAY - timedelta(days=7), "views": 50},
+        ],
+    )
+
+    assert ViewCounterService().refresh(db, TODAY) == 1
+
+    views, score, updated_at = _counters(db)[property_id]
+    assert views == 14
+    assert score == pytest.approx(10 + 4 * trending_weight(2))
+    assert updated_at == EDITED_AT
+
+
+def test_refresh_is_idempotent_and_zeroes_stale_listings(db, seed):
+    """A second run changes nothing; listings without recent views drop to 0"""
+    viewed, stale = uuid.uuid4(), uuid.uuid4()
+    seed(
+        [
+            {"id": viewed, "view_count_7d": 0},
+            {"id": stale, "view_count_7d": 30, "trending_score": 12.5},
+        ],
+        [
+            {"property_id": viewed, "day": TODAY, "views": 3},
+            {"property_id": stale, "day": TODAY - timedelta(days=9), "views": 30},
+        ],
+    )
+    service = ViewCounterService()
+
+    assert service.refresh(db, TODAY) == 2
+    assert service.refresh(db, TODAY) == 0
+    counters = _counters(db)
+    assert counters[viewed][:2] == (3, 3.0)
+    assert counters[stale][:2] == (0, 0.0)
+
+
+def test_roll_forward_purges_expired_buckets(db, seed):
+    """Buckets older than the retention window are deleted"""
+    property_id = uuid.uuid4()
+    seed(
+        [{"id": property_id, "view_count_7d": 0}],
+        [
+            {"property_id": property_id, "day": TODAY - timedelta(days=age), "views": 1}
+            for age in range(10)
+        ],
+    )
+
+    result = ViewCounterService().roll_forward(db, TODAY)
+
+    assert result["purged_buckets"] == 2
+    remaining = db.execute(select(PropertyViewDaily.day)).scalars().all()
+    assert min(remaining) == TODAY - timedelta(days=7)
+    assert _counters(db)[property_id][0] == 7
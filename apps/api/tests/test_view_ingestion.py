@@ -0,0 +1,161 @@
+"""
+Tests for buffered property view ingestion
+"""
+
+import sys
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(app_dir))
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.property import Property, PropertyView, PropertyViewDaily
+from app.services.view_ingestion import ViewIngestionService, write_view_batch
+
+
+class RecordingWriter:
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.fail_times = fail_times
+
+    def __call__(self, events):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(events))
+
+
+def test_flush_writes_in_batches():
+    """Buffered views are written batch_size at a time"""
+    writer = RecordingWriter()
+    service = ViewIngestionService(writer=writer, max_buffered=100, batch_size=4)
+    property_id = uuid.uuid4()
+    for _ in range(10):
+        assert service.record(property_id)
+
+    assert service.flush() == 10
+    assert [len(batch) for batch in writer.batches] == [4, 4, 2]
+    assert len(service) == 0
+
+
+def test_full_buffer_drops_new_views():
+    """Backpressure: beyond max_buffered, record() drops instead of blocking"""
+    service = ViewIngestionService(
+        writer=RecordingWriter(), max_buffered=3, batch_size=10
+    )
+    results = [service.record(uuid.uuid4()) for _ in range(5)]
+
+    assert results == [True, True, True, False, False]
+    stats = service.get_stats()
+    assert stats["dropped"] == 2
+    assert stats["buffered"] == 3
+
+
+def test_failed_batch_is_requeued_in_order():
+    """A failed write keeps the events, oldest first, for the next flush"""
+    writer = RecordingWriter(fail_times=1)
+    service = ViewIngestionService(writer=writer, max_buffered=10, batch_size=3)
+    ids = [uuid.uuid4() for _ in range(3)]
+    for property_id in ids:
+        service.record(property_id)
+
+    assert service.flush() == 0
+    assert service.get_stats()["failed_flushes"] == 1
+    assert service.flush() == 3
+    assert [event.property_id for event in writer.batches[0]] == ids
+
+
+def test_requeue_is_bounded_by_capacity():
+    """Loss bound: a failed batch that no longer fits is dropped and counted"""
+    writer = RecordingWriter(fail_times=1)
+    service = ViewIngestionService(writer=writer, max_buffered=4, batch_size=4)
+    for _ in range(4):
+        service.record(uuid.uuid4())
+
+    original_writer = service.writer
+
+    def fill_then_fail(events):
+        # New traffic arrives while the failing write is in flight
+        for _ in range(3):
+            service.record(uuid.uuid4())
+        original_writer(events)
+
+    service.writer = fill_then_fail
+    service.flush()
+
+    stats = service.get_stats()
+    assert stats["buffered"] == 4
+    assert stats["dropped"] == 3
+    assert stats["accepted"] - stats["dropped"] == stats["buffered"]
+
+
+def test_repeat_views_by_one_viewer_count_once():
+    """A user or client counts once per listing within the dedupe window"""
+    writer = RecordingWriter()
+    service = ViewIngestionService(writer=writer, max_buffered=100, batch_size=10)
+    listing, other, user = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    assert service.record(listing, user)
+    assert not service.record(listing, user)
+    assert service.record(other, user)
+    assert service.record(listing, client="203.0.113.7")
+    assert not service.record(listing, client="203.0.113.7")
+    assert service.record(listing, client="203.0.113.8")
+
+    assert service.flush() == 4
+    assert service.get_stats()["repeated"] == 2
+
+
+def test_stop_flushes_remaining_views():
+    """Graceful shutdown writes whatever is still buffered"""
+    writer = RecordingWriter()
+    service = ViewIngestionService(
+        writer=writer, max_buffered=100, batch_size=50, flush_interval=60
+    )
+    service.start()
+    service.record(uuid.uuid4())
+    service.stop()
+
+    assert sum(len(batch) for batch in writer.batches) == 1
+
+
+def test_write_view_batch_coalesces_counter_updates(engine, db, add_listing):
+    """One increment per property per batch, view rows and buckets written"""
+    edited_at = datetime(2024, 1, 1)
+    popular = add_listing(view_count_total=5, view_count_7d=2, updated_at=edited_at)
+    quiet = add_listing(view_count_total=None, view_count_7d=None, updated_at=edited_at)
+    hidden = add_listing(is_active=False, updated_at=edited_at)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    now = datetime.now(timezone.utc)
+    service = ViewIngestionService(
+        writer=partial(write_view_batch, session_factory=sessionmaker(bind=engine)),
+        batch_size=100,
+    )
+    for _ in range(7):
+        service.record(popular, viewed_at=now)
+    service.record(quiet, uuid.uuid4(), viewed_at=now)
+    service.record(hidden, viewed_at=now)
+    service.record(uuid.uuid4(), viewed_at=now)
+    assert service.flush() == 8
+    assert service.get_stats()["rejected"] == 2
+
+    totals = dict(db.execute(select(Property.id, Property.view_count_total)).all())
+    assert totals == {popular: 12, quiet: 1, hidden: 0}
+    weekly = dict(db.execute(select(Property.id, Property.view_count_7d)).all())
+    assert weekly == {popular: 9, quiet: 1, hidden: 0}
+    assert sorted(db.execute(select(PropertyViewDaily.views)).scalars()) == [1, 7]
+    assert len(db.execute(select(PropertyView.id)).all()) == 8
+    assert set(db.execute(select(Property.updated_at)).scalars()) == {edited_at}
+    assert sum(statement.startswith("UPDATE") for statement in statements) == 1